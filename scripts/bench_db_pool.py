@@ -0,0 +1,102 @@
+"""
+Benchmark: per-call connect/close vs the pooled, lifespan-owned SurrealClient.
+
+Fires N concurrent tool calls against a local stand-in /sql server and
+reports p50/p99 latency for both lifecycles.
+
+    python scripts/bench_db_pool.py --calls 500 --concurrency 50 --latency-ms 2
+"""
+import argparse
+import asyncio
+import logging
+import os
+import statistics
+import sys
+import time
+
+sys.path.append(os.path.join(os.path.dirname(__file__), "..", "src", "abyss-intelligence"))
+sys.path.append(os.path.dirname(__file__))
+
+from fake_surreal import FakeSurreal
+
+
+def percentile(samples, pct):
+    ordered = sorted(samples)
+    idx = min(len(ordered) - 1, int(round(pct / 100.0 * (len(ordered) - 1))))
+    return ordered[idx]
+
+
+async def run_calls(n, concurrency, call):
+    sem = asyncio.Semaphore(concurrency)
+    latencies = []
+    errors = 0
+
+    async def one(i):
+        nonlocal errors
+        async with sem:
+            t0 = time.perf_counter()
+            try:
+                await call(i)
+            except Exception:
+                errors += 1
+            latencies.append((time.perf_counter() - t0) * 1000)
+
+    t0 = time.perf_counter()
+    await asyncio.gather(*(one(i) for i in range(n)))
+    return latencies, errors, time.perf_counter() - t0
+
+
+def report(label, latencies, errors, elapsed):
+    print(f"{label:<22} p50={percentile(latencies, 50):7.2f}ms  p99={percentile(latencies, 99):7.2f}ms  "
+          f"mean={statistics.mean(latencies):7.2f}ms  rps={len(latencies) / elapsed:8.1f}  errors={errors}")
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--calls", type=int, default=500)
+    parser.add_argument("--concurrency", type=int, default=50)
+    parser.add_argument("--latency-ms", type=float, default=1.0, help="artificial server latency per request")
+    args = parser.parse_args()
+
+    fake = FakeSurreal(latency_ms=args.latency_ms).start()
+    os.environ["SURREAL_HOST"] = fake.host
+    os.environ["SURREAL_PORT"] = str(fake.port)
+    # Measure the connection lifecycle only, not query caching
+    os.environ["QUERY_CACHE_ENABLED"] = "false"
+
+    import server
+    from db_client import SurrealClient
+    logging.getLogger("httpx").setLevel(logging.WARNING)
+
+    print(f"[*] Stand-in SurrealDB at http://{fake.host}:{fake.port} "
+          f"({args.calls} calls, concurrency {args.concurrency}, latency {args.latency_ms}ms)")
+
+    # Before: every tool call opened its own client, probed with INFO FOR DB and closed it
+    async def per_call(i):
+        client = SurrealClient()
+        try:
+            await client.query("INFO FOR DB;")
+            await client.verify_financials("TSLA", "cash_equivalents")
+        finally:
+            await client.close()
+
+    conns_before = fake.connections
+    lat, err, elapsed = await run_calls(args.calls, args.concurrency, per_call)
+    report("connect/close per call", lat, err, elapsed)
+    print(f"{'':<22} tcp connections opened: {fake.connections - conns_before}")
+
+    # After: one pooled client owned by the server lifespan
+    async with server.lifespan(server.mcp):
+        async def pooled(i):
+            await server.verify_financial_claim("TSLA", "cash_equivalents")
+
+        conns_before = fake.connections
+        lat, err, elapsed = await run_calls(args.calls, args.concurrency, pooled)
+        report("pooled lifespan client", lat, err, elapsed)
+        print(f"{'':<22} tcp connections opened: {fake.connections - conns_before}")
+
+    fake.stop()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
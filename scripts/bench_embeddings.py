@@ -0,0 +1,80 @@
+"""
+Embedding stage benchmark: a syndicated corpus (the same stories re-posted
+across feeds, with whitespace differences) embedded through a provider with
+simulated per-call latency.
+
+Compares one provider call per text (naive) with the EmbeddingBatcher:
+micro-batching, in-flight coalescing of identical texts and the disk cache,
+then a second pass over the corpus as after a restart (all cache hits).
+
+    python scripts/bench_embeddings.py --stories 400 --copies 5 --latency 0.08
+"""
+import argparse
+import asyncio
+import os
+import random
+import sys
+import tempfile
+import time
+
+sys.path.append(os.path.join(os.path.dirname(__file__), "..", "src", "abyss-intelligence"))
+
+
+def corpus(stories: int, copies: int, seed: int = 7):
+    rng = random.Random(seed)
+    words = ["chip", "export", "rules", "guidance", "earnings", "rally", "tariff", "supply", "model", "cloud",
+             "demand", "margin", "datacenter", "battery", "lithium", "rate", "cut", "inflation", "yield", "order"]
+    base = [" ".join(rng.choice(words) for _ in range(rng.randint(20, 60))) for _ in range(stories)]
+    texts = [story.replace(" ", rng.choice([" ", "  ", "\n"]), rng.randint(0, 3))
+             for story in base for _ in range(rng.randint(1, copies))]
+    rng.shuffle(texts)
+    return texts
+
+
+async def run(args):
+    from embeddings import EmbeddingBatcher, HashEmbedder, VectorCache
+
+    texts = corpus(args.stories, args.copies)
+    print(f"📰 {len(texts):,} texts ({args.stories:,} distinct stories), "
+          f"provider latency {args.latency * 1000:.0f} ms per call")
+
+    provider = HashEmbedder(latency=args.latency)
+    slots = asyncio.Semaphore(args.concurrency)
+
+    async def one(text):
+        async with slots:
+            return await provider.embed([text])
+
+    t0 = time.perf_counter()
+    await asyncio.gather(*(one(t) for t in texts))
+    naive_s = time.perf_counter() - t0
+    print(f"🐢 Naive: {len(texts):,} provider calls in {naive_s:.2f}s")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "embeddings.sqlite")
+        for label in ("Batched + cached (cold)", "Restart (warm cache)"):
+            batcher = EmbeddingBatcher(HashEmbedder(latency=args.latency), VectorCache(path),
+                                       max_batch=args.max_batch, max_delay=0.02, concurrency=args.concurrency)
+            t0 = time.perf_counter()
+            # Callers arrive in small groups, as the ingest writer and the server would send them
+            await asyncio.gather(*(batcher.embed(texts[i:i + 4]) for i in range(0, len(texts), 4)))
+            took = time.perf_counter() - t0
+            m = batcher.metrics()
+            print(f"🚀 {label}: {m['calls']} provider calls in {took:.2f}s ({naive_s / took:.0f}x), "
+                  f"hit rate {m['hit_rate']:.1%}, batch p50 {m['batch_size'].get('p50')}, "
+                  f"provider latency p90 {m['provider_latency_ms'].get('p90')} ms")
+            await batcher.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--stories", type=int, default=400)
+    parser.add_argument("--copies", type=int, default=5, help="max syndicated copies per story")
+    parser.add_argument("--latency", type=float, default=0.08, help="seconds per provider call")
+    parser.add_argument("--max-batch", type=int, default=64)
+    parser.add_argument("--concurrency", type=int, default=4)
+    asyncio.run(run(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,105 @@
+"""
+Ingestion benchmark: FeedIngestor against a fake RSSHub and a fake /sql endpoint.
+
+Polls every feed for a number of rounds (new items appear between rounds),
+checks that each item is written exactly once and that unchanged feeds are
+answered with 304, and reports throughput, batch stats and peak memory.
+
+    python scripts/bench_ingest.py --feeds 200 --items 50 --rounds 5
+"""
+import argparse
+import asyncio
+import os
+import re
+import sys
+import time
+import tracemalloc
+
+sys.path.append(os.path.join(os.path.dirname(__file__), "..", "src", "abyss-intelligence"))
+sys.path.append(os.path.dirname(__file__))
+
+from fake_rss import FakeRSS
+from fake_surreal import FakeSurreal, default_responder
+
+_URL_RE = re.compile(r'"url": "([^"]+)"')
+
+
+class RowCounter:
+    def __init__(self):
+        self.urls = []
+        self.mentions = 0
+        self.requests = 0
+
+    def __call__(self, sql):
+        self.requests += 1
+        for line in sql.splitlines():
+            if line.startswith("LET $articles") or line.startswith("LET $pulses"):
+                self.urls.extend(_URL_RE.findall(line))
+            elif line.startswith("LET $mentions"):
+                self.mentions += line.count('"in": ')
+        return default_responder(sql)
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--feeds", type=int, default=200)
+    parser.add_argument("--items", type=int, default=50, help="items per feed window")
+    parser.add_argument("--new", type=int, default=10, help="new items per feed per round")
+    parser.add_argument("--rounds", type=int, default=5)
+    parser.add_argument("--batch", type=int, default=500)
+    args = parser.parse_args()
+
+    counter = RowCounter()
+    surreal = FakeSurreal(responder=counter).start()
+    rss = FakeRSS(feeds=args.feeds, items_per_feed=args.items, new_per_tick=args.new).start()
+    os.environ["SURREAL_HOST"] = surreal.host
+    os.environ["SURREAL_PORT"] = str(surreal.port)
+
+    from db_client import RecordId, SurrealClient
+    from ingest import BatchWriter, EntityMatcher, FeedIngestor, FeedSource
+
+    db = SurrealClient()
+    matcher = EntityMatcher({
+        "Tesla": RecordId("company", "tsla"),
+        "CATL": RecordId("company", "catl"),
+        "solid state battery": RecordId("concept", "solid_state_battery"),
+    })
+    feeds = [FeedSource(url=u, kind="pulse" if i % 2 else "article", platform="x")
+             for i, u in enumerate(rss.feed_urls())]
+    ingestor = FeedIngestor(db, feeds, matcher=matcher, writer=BatchWriter(db, max_rows=args.batch))
+
+    tracemalloc.start()
+    writer = asyncio.create_task(ingestor.write_loop())
+    t0 = time.perf_counter()
+    for r in range(args.rounds):
+        await ingestor.poll_once()
+        # An immediate re-poll must be all 304s
+        await ingestor.poll_once()
+        rss.advance()
+    await ingestor.drain()
+    elapsed = time.perf_counter() - t0
+    writer.cancel()
+    _, peak = tracemalloc.get_traced_memory()
+    await ingestor.stop()
+    await db.close()
+
+    expected = args.feeds * (args.items + (args.rounds - 1) * args.new)
+    written = len(counter.urls)
+    unique = len(set(counter.urls))
+    print(f"[*] {args.feeds} feeds x {args.rounds} rounds, batch={args.batch}")
+    print(f"    items written:   {written} (unique {unique}, expected {expected})")
+    print(f"    mentions edges:  {counter.mentions}")
+    print(f"    db requests:     {counter.requests} ({ingestor.writer.flushes} flushes)")
+    print(f"    feed requests:   {rss.requests} (304 not modified: {rss.not_modified})")
+    print(f"    elapsed:         {elapsed:.2f}s -> {written / elapsed * 60:,.0f} items/min")
+    print(f"    peak py memory:  {peak / 1024 / 1024:.1f} MiB")
+    ok = written == unique == expected and rss.not_modified == args.feeds * args.rounds
+    print("✅ Every item written exactly once." if ok else "❌ Duplicate or missing items.")
+
+    rss.stop()
+    surreal.stop()
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,90 @@
+"""
+Compact embedding benchmark: full float vectors vs int8 / float16 copies.
+
+On a synthetic clustered corpus, reports per row the JSON bytes that travel
+over /sql, the in-memory index size, recall@k of the quantized scan alone and
+after exact re-ranking of the top `rerank * k` candidates, and per-query
+latency of each path. The ground truth is an exact float32 scan.
+
+    python scripts/bench_quantized.py --n 20000 --queries 50 --rerank 4
+"""
+import argparse
+import json
+import os
+import sys
+import time
+
+sys.path.append(os.path.join(os.path.dirname(__file__), "..", "src", "abyss-intelligence"))
+sys.path.append(os.path.dirname(__file__))
+
+import numpy as np
+
+from bench_vector_search import brute_force, make_corpus, make_queries, percentile
+from quantize import QuantizedIndex, cosine, encode
+
+
+def recall(found, truth, k):
+    return sum(len(set(f[:k]) & set(t[:k].tolist())) for f, t in zip(found, truth)) / (k * len(truth))
+
+
+def timed(fn, queries):
+    latencies, results = [], []
+    for q in queries:
+        t0 = time.perf_counter()
+        results.append(fn(q))
+        latencies.append((time.perf_counter() - t0) * 1000)
+    return results, latencies
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--n", type=int, default=20000)
+    parser.add_argument("--dim", type=int, default=1536)
+    parser.add_argument("--clusters", type=int, default=64)
+    parser.add_argument("--queries", type=int, default=50)
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--rerank", type=int, default=4, help="candidates re-ranked = rerank * k")
+    args = parser.parse_args()
+    k = args.k
+
+    data = make_corpus(args.n, args.dim, args.clusters)
+    queries = make_queries(data, args.queries)
+    truth = brute_force(data, queries, k)
+    print(f"[*] Corpus {args.n} x {args.dim}, {args.queries} queries, k={k}, rerank={args.rerank}x")
+
+    sample = data[0].astype(np.float64).tolist()
+    full_json = len(json.dumps(sample))
+    print(f"\n    {'mode':<8} {'JSON B/row':>11} {'index MiB':>10} {'recall':>8} {'+rerank':>8} "
+          f"{'p50 ms':>8} {'p99 ms':>8}")
+
+    _, latencies = timed(lambda q: brute_force(data, q[None, :], k)[0], queries)
+    print(f"    {'full':<8} {full_json:>11,} {data.nbytes / 2**20:>10.1f} {1.0:>8.3f} {'-':>8} "
+          f"{percentile(latencies, 0.5):>8.2f} {percentile(latencies, 0.99):>8.2f}")
+
+    for mode in ("int8", "float16"):
+        fields = encode(sample, mode)
+        row_json = len(json.dumps(fields))
+        index = QuantizedIndex(mode, args.dim)
+        for i, vector in enumerate(data):
+            index.add_vector(str(i), vector)
+        index.search(queries[:1], 1)  # build the matrix before timing
+
+        approx, _ = timed(lambda q: [int(i) for i, _ in index.search([q], k)[0]], queries)
+
+        def with_rerank(q):
+            candidates = [int(i) for i, _ in index.search([q], k * args.rerank)[0]]
+            # In the server this is the `SELECT ... embedding FROM $candidates` round trip
+            exact = cosine(q, data[candidates])
+            return [candidates[j] for j in np.argsort(-exact)[:k]]
+
+        reranked, latencies = timed(with_rerank, queries)
+        print(f"    {mode:<8} {row_json:>11,} {index.nbytes / 2**20:>10.1f} "
+              f"{recall(approx, truth, k):>8.3f} {recall(reranked, truth, k):>8.3f} "
+              f"{percentile(latencies, 0.5):>8.2f} {percentile(latencies, 0.99):>8.2f}")
+
+    print("\n    JSON B/row is what a row's vector costs on the wire; latency includes re-ranking.")
+    print("✅ Done.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,84 @@
+"""
+Query-building micro-benchmark: raw `SurrealClient.query` text assembly vs
+prepared templates.
+
+Measures only the client-side work done per call before the request leaves
+the process, without any network: write detection, cache key, table set for
+the cache and the `/sql` body (USE + one LET per param + SQL). The template
+path also includes validating and typing the parameters.
+
+    python scripts/bench_query_build.py --n 20000
+"""
+import argparse
+import os
+import sys
+import time
+from datetime import datetime, timezone
+
+sys.path.append(os.path.join(os.path.dirname(__file__), "..", "src", "abyss-intelligence"))
+
+from cache import QueryCache, is_write, tables_in
+from db_client import RecordId, to_surql
+from templates import validate_all
+
+
+def generic(sql, params, use_stmt):
+    write = is_write(sql)
+    key = None if write else QueryCache.make_key(sql, params)
+    lets = [f"LET ${k} = {to_surql(v)};" for k, v in params.items()]
+    body = use_stmt + "\n".join(lets + [sql])
+    return write, key, tables_in(sql, params), body
+
+
+def prepared(template, values, use_stmt):
+    bound = template.bind(values)
+    key = None if template.write else template.cache_key(bound)
+    body, _ = template.http_body(bound)
+    return template.write, key, template.tables_for(bound), use_stmt + body
+
+
+def per_call_us(fn, n):
+    t0 = time.perf_counter()
+    for _ in range(n):
+        fn()
+    return (time.perf_counter() - t0) / n * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--n", type=int, default=20000)
+    args = parser.parse_args()
+
+    validate_all()
+    from financials import SERIES, WRITE_REPORT
+    from hunter import COMPLETE, CREATE_DIRECTIVE
+
+    now = datetime.now(timezone.utc)
+    cases = [
+        ("verify_financials.series", SERIES, {"ticker": "TSLA", "metric": "gross_margin"}),
+        ("create_directive", CREATE_DIRECTIVE,
+         {"target": "XBI", "type": "monitor_sentiment", "context": {"platform": "x", "depth": 2}}),
+        ("write_report", WRITE_REPORT,
+         {"ticker": "TSLA", "period": "2025Q2", "type": "10-Q", "metrics": {"revenue": 1.2e10, "gross_margin": 0.18},
+          "url": None, "published_at": now.isoformat(),
+          "series": [{"name": "revenue", "value": 1.2e10}, {"name": "gross_margin", "value": 0.18}]}),
+        ("hunter.complete (20 rows)", COMPLETE,
+         {"owner": "hunter-1", "done": [{"id": RecordId("directive", f"d{i}"), "ran_at": now, "next_run": now,
+                                         "status": "active", "result": {}} for i in range(20)]}),
+    ]
+
+    use_stmt = "USE NS abyss DB core;\n"
+    print(f"[*] {args.n} builds per case (µs per call, client side only)\n")
+    print(f"    {'query':<28} {'raw':>8} {'template':>9} {'speedup':>8}")
+    for name, template, values in cases:
+        params = template.bind(values)
+        assert generic(template.sql, params, use_stmt)[3] == prepared(template, values, use_stmt)[3]
+        raw = per_call_us(lambda: generic(template.sql, params, use_stmt), args.n)
+        tpl = per_call_us(lambda: prepared(template, values, use_stmt), args.n)
+        print(f"    {name:<28} {raw:>8.1f} {tpl:>9.1f} {raw / tpl:>7.1f}x")
+    print("\n    Raw builds skip validation; template builds include bind().")
+    print("✅ Done.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,162 @@
+"""
+Snapshot benchmark: export a synthetic Trinity graph (trinity_gen.py) from a
+fake `/sql` endpoint into a columnar snapshot, restore it with parallel
+batched transactions, then analyse the snapshot memory-mapped with no
+database at all.
+
+The fake runs in its own process (serving pre-serialized rows by keyset
+page, and counting the rows of every INSERT it receives), so its JSON work
+does not share the benchmark's interpreter.
+
+    python scripts/bench_snapshot.py --scale 40 --dim 64     # ~1.2M rows
+"""
+import argparse
+import asyncio
+import json
+import multiprocessing
+import os
+import re
+import shutil
+import sys
+import tempfile
+import threading
+import time
+from bisect import bisect_right
+from datetime import datetime, timezone
+
+import numpy as np
+
+sys.path.append(os.path.join(os.path.dirname(__file__), "..", "src", "abyss-intelligence"))
+sys.path.append(os.path.dirname(__file__))
+
+from fake_surreal import FakeSurreal, default_responder
+
+ANCHOR = datetime(2025, 6, 1, tzinfo=timezone.utc)
+
+
+def serve(scale: float, dim: int, ready, stop):
+    """Child process: generate the graph and answer snapshot pages and INSERT batches"""
+    from snapshot import EDGE_TABLES, NODE_TABLES
+    from trinity_gen import generate
+
+    g = generate(scale, dim=dim, anchor=ANCHOR)
+    tables = {}
+    for name in NODE_TABLES + EDGE_TABLES:
+        rows = g.tables.get(name) or g.edges.get(name) or []
+        ids, matrix = g.vectors.get(name, (None, None))
+        encoded = []
+        for i, row in enumerate(rows):
+            row = dict(row)
+            row.setdefault("id", f"{name}:e{i}")
+            if matrix is not None:
+                row["embedding"] = [round(float(x), 6) for x in matrix[i]]
+            encoded.append((row["id"], json.dumps(row, separators=(",", ":"))))
+        encoded.sort()
+        tables[name] = ([k for k, _ in encoded], [v for _, v in encoded])
+    received = {"rows": 0, "statements": 0}
+    lock = threading.Lock()
+
+    def respond(sql):
+        if "INSERT" in sql:
+            rows = sql.count("}, {") + 1
+            with lock:
+                received["statements"] += 1
+                received["rows"] += rows
+            return default_responder("USE;LET;BEGIN;INSERT;COMMIT")
+        m = re.search(r"LET \$table = \"(\w+)\";", sql)
+        if not m:
+            return default_responder(sql)
+        keys, rows = tables.get(m.group(1), ([], []))
+        limit = int(re.search(r"LET \$limit = (\d+);", sql).group(1))
+        after = re.search(r"LET \$after = ([^;]+);", sql)
+        start = bisect_right(keys, after.group(1)) if after else 0
+        # Rows are spliced in as pre-serialized JSON rather than re-encoded per request
+        head = json.dumps(default_responder(sql)[:-1])[1:-1]
+        return f'[{head},{{"result":[{",".join(rows[start:start + limit])}],"status":"OK","time":"1ms"}}]'.encode()
+
+    fake = FakeSurreal(responder=respond)
+    fake.start()
+    ready.send((fake.port, g.counts()))
+    stop.recv()
+    ready.send(received)
+    fake.stop()
+
+
+async def run(args, port, expected):
+    os.environ.update(SURREAL_HOST="127.0.0.1", SURREAL_PORT=str(port), SURREAL_PROTOCOL="http",
+                      QUERY_CACHE_ENABLED="false", TELEMETRY_ENABLED="false")
+    from db_client import SurrealClient
+    from snapshot import Snapshot, export_snapshot, import_snapshot
+
+    path = tempfile.mkdtemp(prefix="abyss-snapshot-")
+    db = SurrealClient()
+    try:
+        t0 = time.perf_counter()
+        counts = await export_snapshot(db, path, batch=args.batch, vector_dtype=args.vector_dtype)
+        export_s = time.perf_counter() - t0
+        rows = sum(counts.values())
+        for table, n in counts.items():
+            assert n == expected.get(table, 0), (table, n, expected.get(table))
+        disk = sum(os.path.getsize(os.path.join(path, f)) for f in os.listdir(path))
+        print(f"✅ Export: {rows:,} rows in {export_s:.1f}s = {rows / export_s:,.0f} rows/s, "
+              f"{disk / 1024 / 1024:.1f} MiB on disk")
+
+        t0 = time.perf_counter()
+        sent = await import_snapshot(db, path, batch=args.import_batch, concurrency=args.concurrency)
+        import_s = time.perf_counter() - t0
+        assert sent == counts, (sent, counts)
+        print(f"✅ Import: {rows:,} rows in {import_s:.1f}s = {rows / import_s:,.0f} rows/s "
+              f"({args.import_batch} rows/transaction, {args.concurrency} in flight)")
+
+        # Offline analysis straight from the mapped files
+        t0 = time.perf_counter()
+        with Snapshot(path) as snap:
+            scores = snap.column("pulse", "sentiment_score")
+            platforms, per_platform = np.unique(snap.column("pulse", "platform").astype(str), return_counts=True)
+            values = snap.column("trend_metric", "value")
+            matrix, valid = snap.vectors("pulse")
+            query = np.asarray(matrix[0], dtype=np.float32)
+            top = np.argsort(-(matrix @ query))[:10]
+            out_ids = snap.column("mentions", "out")
+        analyse_s = time.perf_counter() - t0
+        print(f"✅ Mapped analysis in {analyse_s:.2f}s: mean pulse sentiment {float(scores.mean()):+.3f}, "
+              f"{dict(zip(platforms.tolist(), per_platform.tolist()))}, {len(values):,} trend points, "
+              f"{matrix.shape} vectors (top hit row {int(top[0])}), {len(out_ids):,} mention targets")
+        return counts, export_s, import_s, disk
+    finally:
+        await db.close()
+        shutil.rmtree(path, ignore_errors=True)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--scale", type=float, default=40)
+    parser.add_argument("--dim", type=int, default=64)
+    parser.add_argument("--batch", type=int, default=5000, help="export keyset page size")
+    parser.add_argument("--import-batch", type=int, default=1000, help="rows per import transaction")
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--vector-dtype", default="float32")
+    args = parser.parse_args()
+
+    ready, child_ready = multiprocessing.Pipe()
+    stop, child_stop = multiprocessing.Pipe()
+    server = multiprocessing.Process(target=serve, args=(args.scale, args.dim, child_ready, child_stop), daemon=True)
+    t0 = time.perf_counter()
+    server.start()
+    port, expected = ready.recv()
+    print(f"🗄️  Graph at scale {args.scale} ({sum(expected.values()):,} rows, {args.dim}-dim vectors) "
+          f"generated and served in {time.perf_counter() - t0:.1f}s")
+    try:
+        counts, *_ = asyncio.run(run(args, port, expected))
+    finally:
+        stop.send(None)
+        received = ready.recv()
+        server.join(timeout=10)
+    assert received["rows"] == sum(counts.values()), received
+    print(f"✅ Fake received {received['rows']:,} rows in {received['statements']:,} transactions")
+    for table, n in counts.items():
+        print(f"    {table:<14} {n:>9,}")
+
+
+if __name__ == "__main__":
+    main()
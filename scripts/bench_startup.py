@@ -0,0 +1,104 @@
+"""
+Cold-start benchmark: how long an MCP client waits on a freshly spawned
+`server.py` before the handshake and the first tool call are answered.
+
+Each run spawns the server over stdio against an in-process fake `/sql`
+endpoint and times, from process spawn:
+
+- initialize   the `initialize` response
+- tools/list   the tool list right after the handshake
+- first_call   the first `tools/call` (this one waits for the real server)
+
+in three modes:
+
+- eager      MCP_FAST_START=false: every import happens before the handshake
+- cold       fast start on a first run: no manifest yet, `initialize` is
+             answered from the stock FastMCP handshake and the lists wait
+             for the server, which is imported in the background
+- manifest   fast start once a previous run has recorded the manifest
+
+The target is for the cold mode, so a fresh install starts fast too:
+
+    python scripts/bench_startup.py --runs 7
+"""
+import argparse
+import asyncio
+import os
+import statistics
+import sys
+import tempfile
+import time
+from typing import Dict, List
+
+sys.path.append(os.path.dirname(__file__))
+
+from fake_surreal import FakeSurreal
+from mcp_pool import StdioClient
+
+SERVER = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src", "abyss-intelligence", "server.py")
+PHASES = ("initialize", "tools/list", "first_call")
+TARGET_MS = 200
+
+
+async def cold_start(env: Dict[str, str]) -> Dict[str, float]:
+    client = StdioClient("abyss-intelligence", sys.executable, [SERVER], env, timeout=60)
+    t0 = time.perf_counter()
+    try:
+        await client.start()
+        t_init = time.perf_counter()
+        await client.list_tools()
+        t_list = time.perf_counter()
+        await client.call_tool("trace_narrative_chain", {"start_node": "company:catl", "depth": 1})
+        t_call = time.perf_counter()
+    finally:
+        await client.close()
+    return {"initialize": (t_init - t0) * 1000, "tools/list": (t_list - t0) * 1000,
+            "first_call": (t_call - t0) * 1000}
+
+
+async def bench(runs: int) -> Dict[str, Dict[str, List[float]]]:
+    fake = FakeSurreal().start()
+    tmp = tempfile.mkdtemp(prefix="abyss-startup-")
+    base = {"SURREAL_HOST": fake.host, "SURREAL_PORT": str(fake.port), "SURREAL_PROTOCOL": "http",
+            "LIVE_EVENTS_ENABLED": "false", "TREND_ENGINE_ENABLED": "false", "LOG_LEVEL": "WARNING"}
+    # The manifest mode reuses the one the first of its runs records
+    manifest = os.path.join(tmp, "manifest.json")
+    modes = {"eager": {**base, "MCP_FAST_START": "false"}, "cold": {**base, "MCP_FAST_START": "true"},
+             "manifest": {**base, "MCP_FAST_START": "true", "MCP_MANIFEST_PATH": manifest}}
+    samples = {mode: {phase: [] for phase in PHASES} for mode in modes}
+    try:
+        # Interleave the modes so machine noise hits all of them alike
+        for run in range(runs + 1):
+            for mode, env in modes.items():
+                if mode == "cold":
+                    # A path nothing was ever written to: every cold run is a first start
+                    env = {**env, "MCP_MANIFEST_PATH": os.path.join(tmp, f"cold-{run}.json")}
+                elif mode == "manifest" and run == 0:
+                    await cold_start(env)
+                    assert os.path.exists(manifest), "fast start did not record a manifest"
+                    continue
+                for phase, ms in (await cold_start(env)).items():
+                    samples[mode][phase].append(ms)
+    finally:
+        fake.stop()
+    return samples
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=5)
+    args = parser.parse_args()
+
+    samples = asyncio.run(bench(args.runs))
+    print(f"\n{'mode':<10}" + "".join(f"{phase + ' p50/min (ms)':>28}" for phase in PHASES))
+    for mode, phases in samples.items():
+        print(f"{mode:<10}" + "".join(f"{statistics.median(v):>20.0f} /{min(v):>6.0f}" for v in phases.values()))
+    cold = statistics.median(samples["cold"]["initialize"])
+    eager = statistics.median(samples["eager"]["initialize"])
+    verdict = "✅" if cold < TARGET_MS else "❌"
+    print(f"\n{verdict} first-start initialize: {cold:.0f} ms fast start without a manifest vs {eager:.0f} ms eager "
+          f"(target < {TARGET_MS} ms)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,135 @@
+"""
+Streaming benchmark: peak memory of reading a large `/sql` result whole
+(`SurrealClient.query`) vs. row by row (`SurrealClient.stream`), and the
+cost of one budgeted tool page served by `ResponseShaper.render_stream`.
+
+Each measurement runs in its own child process (so peak RSS is not shared),
+against an in-process fake `/sql` endpoint returning N pulse-like rows:
+
+- query   response.json() of the whole body, then walk the rows
+- stream  walk the rows as they are decoded, keeping none
+- page    render one RESPONSE_MAX_BYTES page and close the stream
+
+    python scripts/bench_stream.py --rows 10000 50000 100000
+"""
+import argparse
+import asyncio
+import json
+import os
+import re
+import subprocess
+import sys
+import time
+
+sys.path.append(os.path.join(os.path.dirname(__file__), "..", "src", "abyss-intelligence"))
+sys.path.append(os.path.dirname(__file__))
+
+from fake_surreal import FakeSurreal, default_responder
+
+MODES = ("query", "stream", "page")
+SQL = "SELECT * FROM bench_pulse LIMIT {n};"
+
+
+def status_kb(field: str) -> int:
+    # VmHWM rather than ru_maxrss: the latter survives fork/exec and would
+    # report the parent's peak (which holds the fake result rows)
+    with open("/proc/self/status") as f:
+        for line in f:
+            if line.startswith(field + ":"):
+                return int(line.split()[1])
+    return 0
+
+
+def make_responder():
+    cache = {}
+
+    def respond(sql):
+        m = re.search(r"FROM bench_pulse LIMIT (\d+)", sql)
+        if not m:
+            return default_responder(sql)
+        n = int(m.group(1))
+        if n not in cache:
+            rows = [{"id": f"pulse:{i}", "platform": "x", "author_handle": f"@user{i % 977}",
+                     "content": f"Post {i} about solid state battery supply and CATL pricing " * 3,
+                     "url": f"https://x.com/user{i % 977}/status/{10 ** 12 + i}",
+                     "engagement": {"likes": i % 500, "reposts": i % 50}, "sentiment_score": (i % 200) / 100 - 1,
+                     "created_at": "2025-01-01T00:00:00Z"} for i in range(n)]
+            cache.clear()
+            cache[n] = rows
+        out = default_responder(sql)
+        out[-1]["result"] = cache[n]
+        return out
+
+    return respond
+
+
+async def child(mode: str, n: int):
+    from db_client import SurrealClient
+    from shaping import ResponseShaper
+
+    db = SurrealClient()
+    # Warm the connection and imports so the baseline is comparable
+    await db.query("RETURN 1;", use_cache=False)
+    base = status_kb("VmRSS")
+    t0 = time.perf_counter()
+    rows, nbytes = 0, 0
+    if mode == "query":
+        res = await db.query(SQL.format(n=n), use_cache=False)
+        for row in res[0]["result"]:
+            rows += 1
+    elif mode == "stream":
+        async for _, row in db.stream(SQL.format(n=n)):
+            rows += 1
+    else:
+        async def only_rows():
+            async for _, row in db.stream(SQL.format(n=n)):
+                yield row
+
+        text = await ResponseShaper().render_stream({}, only_rows(), "rows", "bench", {})
+        rows = text.count('"id":')
+    elapsed = time.perf_counter() - t0
+    peak = status_kb("VmHWM")
+    snapshot = db.telemetry.snapshot()["queries"]
+    for label, stats in snapshot.items():
+        if "bench_pulse" in label:
+            nbytes = stats.get("bytes", {}).get("total") or 0
+    await db.close()
+    print(json.dumps({"mode": mode, "rows": n, "seen": rows, "elapsed_s": elapsed, "base_kb": base,
+                      "peak_kb": peak, "growth_kb": peak - base, "bytes": nbytes}))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, nargs="+", default=[10_000, 50_000, 100_000])
+    parser.add_argument("--child", nargs=2, metavar=("MODE", "ROWS"), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    if args.child:
+        asyncio.run(child(args.child[0], int(args.child[1])))
+        return
+
+    fake = FakeSurreal(responder=make_responder()).start()
+    env = {**os.environ, "SURREAL_HOST": fake.host, "SURREAL_PORT": str(fake.port), "SURREAL_PROTOCOL": "http",
+           "QUERY_CACHE_ENABLED": "false", "LOG_LEVEL": "WARNING"}
+    results = []
+    try:
+        for n in args.rows:
+            for mode in MODES:
+                out = subprocess.run([sys.executable, __file__, "--child", mode, str(n)], env=env,
+                                     capture_output=True, text=True, check=True)
+                results.append(json.loads(out.stdout.strip().splitlines()[-1]))
+    finally:
+        fake.stop()
+
+    print(f"{'rows':>8} {'mode':<7} {'seen':>8} {'RSS growth MiB':>15} {'peak MiB':>9} {'seconds':>8}")
+    for r in results:
+        print(f"{r['rows']:>8} {r['mode']:<7} {r['seen']:>8} {r['growth_kb'] / 1024:>15.1f} "
+              f"{r['peak_kb'] / 1024:>9.1f} {r['elapsed_s']:>8.2f}")
+    stream = [r["growth_kb"] for r in results if r["mode"] == "stream"]
+    query = [r["growth_kb"] for r in results if r["mode"] == "query"]
+    flat = max(stream) - min(stream) < 0.1 * (max(query) - min(query)) + 4096
+    print(f"\n{'✅' if flat else '❌'} stream RSS growth {min(stream) / 1024:.1f}-{max(stream) / 1024:.1f} MiB "
+          f"vs query {min(query) / 1024:.1f}-{max(query) / 1024:.1f} MiB across {args.rows} rows")
+
+
+if __name__ == "__main__":
+    main()
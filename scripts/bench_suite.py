@@ -0,0 +1,325 @@
+"""
+End-to-end benchmark: the MCP server driven over stdio, against a synthetic
+Trinity graph.
+
+Generates the graph (trinity_gen.py), serves it from an in-process fake
+`/sql` endpoint (fake_trinity.py) or loads it into a real SurrealDB, starts
+`server.py` as a stdio subprocess exactly like an MCP client would, and
+replays a seeded mix of tool calls with N requests in flight. Writes one
+JSON document with throughput, latency percentiles and response bytes per
+tool, peak RSS of the server and of this process, the server's own
+`metrics://latency` / `stats://cache` and the git commit, so runs can be
+compared across commits:
+
+    python scripts/bench_suite.py --out bench-base.json
+    python scripts/bench_suite.py --out bench-new.json --compare bench-base.json
+
+The same seed, scale and mix always replay the same calls. The fake only
+speaks HTTP; with --surreal-url the server talks to that database instead
+(--load applies init_db.surql and inserts the graph first).
+"""
+import argparse
+import asyncio
+import json
+import os
+import platform
+import random
+import resource
+import subprocess
+import sys
+import time
+from collections import defaultdict
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional, Tuple
+from urllib.parse import urlparse
+
+sys.path.append(os.path.join(os.path.dirname(__file__), "..", "src", "abyss-intelligence"))
+sys.path.append(os.path.dirname(__file__))
+
+from fake_surreal import FakeSurreal
+from fake_trinity import TrinityResponder
+from mcp_pool import McpError, StdioClient, text_of
+from trinity_gen import METRICS, generate, surql_batches
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+SERVER = os.path.join(ROOT, "src", "abyss-intelligence", "server.py")
+
+# Relative weight of each tool in the replayed mix
+DEFAULT_MIX = {
+    "trace_narrative_chain": 3,
+    "trace_narrative_chains": 1,
+    "verify_financial_claim": 3,
+    "verify_financial_claims": 1,
+    "semantic_search": 3,
+    "detect_trend_anomalies": 1,
+    "create_surveillance_directive": 1,
+}
+CALL_TIMEOUT = 60.0
+
+
+def peak_rss_kb(pid: int) -> Optional[int]:
+    """Peak resident set size of a process (Linux VmHWM)"""
+    try:
+        with open(f"/proc/{pid}/status") as f:
+            for line in f:
+                if line.startswith("VmHWM:"):
+                    return int(line.split()[1])
+    except OSError:
+        return None
+    return None
+
+
+def _vector(rng: random.Random, graph, table: str) -> List[float]:
+    ids, matrix = graph.vectors[table]
+    base = matrix[rng.randrange(len(ids))]
+    return [round(float(x) + rng.gauss(0, 0.01), 5) for x in base]
+
+
+def build_calls(graph, n: int, mix: Dict[str, float], seed: int) -> List[Tuple[str, Dict]]:
+    """A deterministic sequence of (tool, arguments) drawn from `mix`"""
+    rng = random.Random(seed)
+    tools = [t for t in mix if mix[t] > 0]
+    weights = [mix[t] for t in tools]
+    concepts = [c["id"] for c in graph.tables["concept"]]
+    companies = [c["id"] for c in graph.tables["company"]]
+    tickers = [c["ticker"] for c in graph.tables["company"]]
+    calls = []
+    for tool in rng.choices(tools, weights=weights, k=n):
+        if tool == "trace_narrative_chain":
+            args = {"start_node": rng.choice(concepts + companies), "depth": 2, "max_fanout": 20}
+        elif tool == "trace_narrative_chains":
+            args = {"start_nodes": rng.sample(concepts + companies, 3), "depth": 2, "max_fanout": 20}
+        elif tool == "verify_financial_claim":
+            args = {"ticker": rng.choice(tickers), "metric_name": rng.choice(METRICS)}
+        elif tool == "verify_financial_claims":
+            args = {"claims": [{"ticker": rng.choice(tickers), "metric_name": rng.choice(METRICS)} for _ in range(4)]}
+        elif tool == "semantic_search":
+            table = rng.choice(("article", "pulse", "concept"))
+            args = {"table": table, "query_vectors": [_vector(rng, graph, table)], "k": 10}
+            if table == "article" and rng.random() < 0.5:
+                args["min_reliability"] = 0.5
+        elif tool == "detect_trend_anomalies":
+            args = {"limit": 20}
+        elif tool == "create_surveillance_directive":
+            args = {"target": rng.choice(tickers), "task_type": "monitor_sentiment",
+                    "detailed_context": json.dumps({"platform": "x"})}
+        else:
+            raise ValueError(f"No argument generator for tool {tool!r}")
+        calls.append((tool, args))
+    return calls
+
+
+def percentiles(values: List[float]) -> Dict[str, float]:
+    if not values:
+        return {}
+    ordered = sorted(values)
+
+    def pick(q):
+        return round(ordered[min(len(ordered) - 1, int(q * len(ordered)))], 3)
+
+    return {"p50": pick(0.5), "p95": pick(0.95), "p99": pick(0.99), "max": round(ordered[-1], 3),
+            "mean": round(sum(ordered) / len(ordered), 3)}
+
+
+def _is_error(result: Dict) -> bool:
+    return bool(result.get("isError")) or text_of(result).startswith("Invalid request")
+
+
+def git_info() -> Dict[str, Any]:
+    def git(*args):
+        return subprocess.run(["git", *args], cwd=ROOT, capture_output=True, text=True).stdout.strip()
+
+    return {"commit": git("rev-parse", "HEAD") or None, "dirty": bool(git("status", "--porcelain", "-uno"))}
+
+
+def load_real_db(graph, url: str):
+    """Apply the schema and insert `graph` through /sql"""
+    import httpx
+
+    headers = {"Accept": "application/json", "Content-Type": "text/plain"}
+    auth = (os.getenv("SURREAL_USER", "root"), os.getenv("SURREAL_PASS", "root"))
+    use = f"USE NS {os.getenv('SURREAL_NS', 'abyss')} DB {os.getenv('SURREAL_DB', 'core')};\n"
+    with open(os.path.join(os.path.dirname(__file__), "init_db.surql"), encoding="utf-8") as f:
+        schema = f.read()
+    with httpx.Client(base_url=url, headers=headers, auth=auth, timeout=120) as client:
+        batches = [schema] + [use + stmt for stmt in surql_batches(graph)]
+        for i, sql in enumerate(batches):
+            resp = client.post("/sql", content=sql)
+            resp.raise_for_status()
+            failed = [r for r in resp.json() if r.get("status") == "ERR"]
+            if failed:
+                raise RuntimeError(f"Load batch {i} failed: {json.dumps(failed[0])[:300]}")
+    print(f"[*] Loaded {len(batches) - 1} batches into {url}")
+
+
+async def run(args) -> Dict[str, Any]:
+    mix = dict(DEFAULT_MIX)
+    for item in args.mix or []:
+        tool, _, weight = item.partition("=")
+        mix[tool] = float(weight or 1)
+
+    t0 = time.perf_counter()
+    graph = generate(args.scale, args.seed)
+    gen_s = time.perf_counter() - t0
+    print(f"[*] Generated Trinity graph in {gen_s:.2f}s: {graph.counts()}")
+
+    env = dict(os.environ)
+    env.update({"LIVE_EVENTS_ENABLED": "false", "TREND_ENGINE_ENABLED": "false", "LOG_LEVEL": "WARNING",
+                "PYTHONUNBUFFERED": "1"})
+    fake, responder = None, None
+    if args.surreal_url:
+        if args.load:
+            load_real_db(graph, args.surreal_url)
+        target = urlparse(args.surreal_url)
+        env.update({"SURREAL_HOST": target.hostname, "SURREAL_PORT": str(target.port or 8000)})
+        backend = "surrealdb"
+    else:
+        responder = TrinityResponder(graph)
+        fake = FakeSurreal(latency_ms=args.latency_ms, responder=responder).start()
+        env.update({"SURREAL_HOST": fake.host, "SURREAL_PORT": str(fake.port), "SURREAL_PROTOCOL": "http"})
+        backend = "fake"
+    for item in args.env or []:
+        key, _, value = item.partition("=")
+        env[key] = value
+
+    calls = build_calls(graph, args.warmup + args.requests, mix, args.seed)
+    session = StdioClient("abyss-intelligence", sys.executable, [SERVER], env, timeout=CALL_TIMEOUT)
+    t_start = time.perf_counter()
+    await session.start()
+    startup_s = time.perf_counter() - t_start
+
+    samples: Dict[str, List[Tuple[float, int, bool]]] = defaultdict(list)
+    queue: asyncio.Queue = asyncio.Queue()
+
+    async def worker():
+        while True:
+            item = await queue.get()
+            if item is None:
+                return
+            i, (tool, tool_args) = item
+            t = time.perf_counter()
+            try:
+                result, size = await session.request("tools/call", {"name": tool, "arguments": tool_args})
+                error = _is_error(result)
+            except (McpError, asyncio.TimeoutError, ConnectionError):
+                size, error = 0, True
+            if i >= args.warmup:
+                samples[tool].append(((time.perf_counter() - t) * 1000, size, error))
+
+    async def replay(items):
+        for item in items:
+            queue.put_nowait(item)
+        for _ in range(args.concurrency):
+            queue.put_nowait(None)
+        await asyncio.gather(*(worker() for _ in range(args.concurrency)))
+
+    indexed = list(enumerate(calls))
+    await replay(indexed[:args.warmup])
+    t_run = time.perf_counter()
+    await replay(indexed[args.warmup:])
+    wall_s = time.perf_counter() - t_run
+
+    server_metrics = json.loads(await session.read_resource("metrics://latency") or "{}")
+    cache = json.loads(await session.read_resource("stats://cache") or "{}")
+    server_rss = peak_rss_kb(session.pid)
+    await session.close()
+    if fake is not None:
+        fake.stop()
+
+    tools, every = {}, []
+    for tool, rows in sorted(samples.items()):
+        latencies = [r[0] for r in rows]
+        every += rows
+        tools[tool] = {"count": len(rows), "errors": sum(r[2] for r in rows), **percentiles(latencies),
+                       "bytes_out": sum(r[1] for r in rows), "bytes_mean": round(sum(r[1] for r in rows) / len(rows))}
+    return {
+        "suite": "abyss-intelligence/bench_suite",
+        "version": 1,
+        "started_at": datetime.now(timezone.utc).isoformat(),
+        "git": git_info(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "config": {"scale": args.scale, "seed": args.seed, "requests": args.requests, "warmup": args.warmup,
+                   "concurrency": args.concurrency, "mix": mix, "latency_ms": args.latency_ms,
+                   "env": args.env or []},
+        "backend": backend,
+        "dataset": {"counts": graph.counts(), "generate_s": round(gen_s, 3)},
+        "startup_s": round(startup_s, 3),
+        "wall_s": round(wall_s, 3),
+        "throughput_rps": round(len(every) / wall_s, 2) if wall_s else None,
+        "overall": {"count": len(every), "errors": sum(r[2] for r in every), **percentiles([r[0] for r in every]),
+                    "bytes_out": sum(r[1] for r in every)},
+        "tools": tools,
+        "rss_peak_kb": {"server": server_rss, "bench": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss},
+        "db": {"requests": fake.requests if fake else None,
+               "statements": dict(responder.statements) if responder else None,
+               "unhandled": dict(responder.unhandled) if responder else None},
+        "cache": cache,
+        "server_metrics": server_metrics,
+    }
+
+
+def _delta(new, old) -> str:
+    if not isinstance(new, (int, float)) or not isinstance(old, (int, float)) or not old:
+        return ""
+    return f"{(new - old) / old * 100:+.1f}%"
+
+
+def print_summary(results: Dict, baseline: Optional[Dict] = None):
+    base_tools = (baseline or {}).get("tools", {})
+    print(f"\n[*] {results['overall']['count']} calls in {results['wall_s']}s "
+          f"-> {results['throughput_rps']} req/s ({results['config']['concurrency']} in flight, "
+          f"backend {results['backend']})", end="")
+    if baseline:
+        print(f"  [{_delta(results['throughput_rps'], baseline.get('throughput_rps'))} vs "
+              f"{(baseline.get('git') or {}).get('commit', '?')[:8]}]", end="")
+    print()
+    print(f"    {'tool':<32} {'n':>5} {'err':>4} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'bytes/call':>11}")
+    for tool, s in results["tools"].items():
+        line = (f"    {tool:<32} {s['count']:>5} {s['errors']:>4} {s['p50']:>9.2f} {s['p95']:>9.2f} "
+                f"{s['p99']:>9.2f} {s['bytes_mean']:>11}")
+        old = base_tools.get(tool)
+        if old:
+            line += f"   p50 {_delta(s['p50'], old.get('p50'))}, p95 {_delta(s['p95'], old.get('p95'))}"
+        print(line)
+    rss = results["rss_peak_kb"]
+    print(f"    peak RSS: server {rss['server']} KB, bench {rss['bench']} KB; startup {results['startup_s']}s")
+    unhandled = (results.get("db") or {}).get("unhandled")
+    if unhandled:
+        print(f"⚠️  {sum(unhandled.values())} statements the fake did not recognise: {list(unhandled)[:3]}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--scale", type=float, default=1.0, help="graph size multiplier (1.0 = 200 companies)")
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--requests", type=int, default=400, help="measured tool calls")
+    parser.add_argument("--warmup", type=int, default=40, help="calls replayed first and not measured")
+    parser.add_argument("--concurrency", type=int, default=8, help="tool calls in flight")
+    parser.add_argument("--mix", action="append", metavar="TOOL=WEIGHT", help="override a tool's weight (0 drops it)")
+    parser.add_argument("--env", action="append", metavar="KEY=VALUE", help="extra environment for the server")
+    parser.add_argument("--latency-ms", type=float, default=0.0, help="artificial latency of the fake endpoint")
+    parser.add_argument("--surreal-url", help="benchmark a real SurrealDB (e.g. http://localhost:8000)")
+    parser.add_argument("--load", action="store_true", help="with --surreal-url: apply the schema and insert the graph")
+    parser.add_argument("--out", help="write the JSON results here")
+    parser.add_argument("--compare", help="previous results JSON to diff against")
+    args = parser.parse_args()
+
+    results = asyncio.run(run(args))
+    baseline = None
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            baseline = json.load(f)
+    print_summary(results, baseline)
+    if args.out:
+        with open(args.out, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+        print(f"[*] Results written to {args.out}")
+    if results["overall"]["errors"]:
+        print(f"❌ {results['overall']['errors']} calls failed.")
+        sys.exit(1)
+    print("✅ Done.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,164 @@
+"""
+Vector search benchmark: brute-force NumPy scan vs the SurrealDB HNSW index.
+
+Generates a clustered synthetic corpus of normalized embeddings, computes the
+exact top-k with NumPy (ground truth and the brute-force baseline), and, with
+--surreal, loads the same corpus into a scratch table on the configured
+SurrealDB and measures KNN latency and recall@k for every M / EF combination.
+Use it to pick the index `M`/`EFC` and the query `EF` (VECTOR_SEARCH_EF) for
+the corpus size you expect.
+
+    python scripts/bench_vector_search.py --n 20000 --queries 50
+    python scripts/bench_vector_search.py --n 20000 --surreal --m 12 16 32 --ef 16 40 64 128
+
+Requires numpy.
+"""
+import argparse
+import asyncio
+import os
+import sys
+import time
+
+sys.path.append(os.path.join(os.path.dirname(__file__), "..", "src", "abyss-intelligence"))
+
+try:
+    import numpy as np
+except ImportError:
+    print("❌ This benchmark needs numpy (pip install numpy).")
+    sys.exit(1)
+
+BENCH_TABLE = "bench_vector"
+
+
+def make_corpus(n, dim, clusters, seed=7):
+    """Gaussian clusters on the unit sphere, a rough stand-in for text embeddings"""
+    rng = np.random.default_rng(seed)
+    centers = rng.standard_normal((clusters, dim)).astype(np.float32)
+    labels = rng.integers(0, clusters, n)
+    data = centers[labels] + 0.6 * rng.standard_normal((n, dim)).astype(np.float32)
+    data /= np.linalg.norm(data, axis=1, keepdims=True)
+    return data
+
+
+def make_queries(data, count, seed=11):
+    rng = np.random.default_rng(seed)
+    picks = data[rng.integers(0, len(data), count)]
+    queries = picks + 0.3 * rng.standard_normal(picks.shape).astype(np.float32) / np.sqrt(data.shape[1])
+    queries /= np.linalg.norm(queries, axis=1, keepdims=True)
+    # Keep float32: a float64 query would upcast the whole corpus on every scan
+    return queries.astype(np.float32)
+
+
+def brute_force(data, queries, k):
+    """Exact cosine top-k (vectors are normalized, so a dot product)"""
+    scores = queries @ data.T
+    top = np.argpartition(-scores, k, axis=1)[:, :k]
+    order = np.take_along_axis(scores, top, axis=1).argsort(axis=1)[:, ::-1]
+    return np.take_along_axis(top, order, axis=1)
+
+
+def percentile(values, p):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * p))] if values else 0.0
+
+
+def bench_numpy(data, queries, k):
+    latencies = []
+    for q in queries:
+        t0 = time.perf_counter()
+        brute_force(data, q[None, :], k)
+        latencies.append((time.perf_counter() - t0) * 1000)
+    t0 = time.perf_counter()
+    truth = brute_force(data, queries, k)
+    batch_ms = (time.perf_counter() - t0) * 1000
+    return truth, latencies, batch_ms
+
+
+async def load_surreal(db, data, m, efc, batch=500):
+    dim = data.shape[1]
+    await db.query(f"REMOVE TABLE IF EXISTS {BENCH_TABLE};", use_cache=False)
+    await db.query(
+        f"DEFINE TABLE {BENCH_TABLE} SCHEMALESS;"
+        f"DEFINE INDEX {BENCH_TABLE}_idx ON {BENCH_TABLE} FIELDS embedding "
+        f"HNSW DIMENSION {dim} DIST COSINE M {m} EFC {efc};",
+        use_cache=False,
+    )
+    t0 = time.perf_counter()
+    for start in range(0, len(data), batch):
+        rows = [{"id": i, "embedding": data[i].tolist()} for i in range(start, min(start + batch, len(data)))]
+        res = await db.query(f"INSERT INTO {BENCH_TABLE} $rows RETURN NONE;", {"rows": rows}, use_cache=False)
+        if any(r.get("status") == "ERR" for r in res):
+            raise RuntimeError(res)
+    return time.perf_counter() - t0
+
+
+async def bench_surreal(db, queries, truth, k, ef):
+    latencies, recalls = [], []
+    for q, expected in zip(queries, truth):
+        t0 = time.perf_counter()
+        res = await db.query(
+            f"SELECT id, vector::distance::knn() AS distance FROM {BENCH_TABLE} "
+            f"WHERE embedding <|{k},{ef}|> $q ORDER BY distance ASC LIMIT {k};",
+            {"q": q.tolist()}, use_cache=False,
+        )
+        latencies.append((time.perf_counter() - t0) * 1000)
+        got = {int(str(row["id"]).split(":", 1)[1]) for row in res[-1].get("result") or []}
+        recalls.append(len(got & set(expected.tolist())) / k)
+    return latencies, sum(recalls) / len(recalls)
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--n", type=int, default=20000, help="corpus size")
+    parser.add_argument("--dim", type=int, default=1536)
+    parser.add_argument("--clusters", type=int, default=64)
+    parser.add_argument("--queries", type=int, default=50)
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--surreal", action="store_true", help="also benchmark the HNSW index on SURREAL_HOST")
+    parser.add_argument("--m", type=int, nargs="+", default=[12, 16, 32])
+    parser.add_argument("--efc", type=int, default=150)
+    parser.add_argument("--ef", type=int, nargs="+", default=[16, 40, 64, 128, 200])
+    args = parser.parse_args()
+
+    data = make_corpus(args.n, args.dim, args.clusters)
+    queries = make_queries(data, args.queries)
+    print(f"[*] Corpus {args.n} x {args.dim} ({data.nbytes / 1024 / 1024:.0f} MiB float32), "
+          f"{args.queries} queries, k={args.k}")
+
+    truth, latencies, batch_ms = bench_numpy(data, queries, args.k)
+    print(f"    numpy brute force: p50 {percentile(latencies, 0.5):.2f} ms, "
+          f"p99 {percentile(latencies, 0.99):.2f} ms per query, "
+          f"{batch_ms / args.queries:.2f} ms/query batched (recall 1.000)")
+
+    if not args.surreal:
+        print("    (pass --surreal to benchmark the HNSW index against a running SurrealDB)")
+        return
+
+    from db_client import SurrealClient
+
+    db = SurrealClient()
+    await db.start()
+    if not db.healthy:
+        print(f"❌ SurrealDB not reachable at {db.base_url}")
+        await db.close()
+        sys.exit(1)
+    try:
+        print(f"\n    {'M':>4} {'EF':>5} {'p50 ms':>8} {'p99 ms':>8} {'recall@k':>9}")
+        for m in args.m:
+            load_s = await load_surreal(db, data, m, args.efc)
+            print(f"    M={m}, EFC={args.efc}: loaded + indexed in {load_s:.1f}s "
+                  f"({args.n / load_s:,.0f} vectors/s)")
+            for ef in args.ef:
+                if ef < args.k:
+                    continue
+                latencies, recall = await bench_surreal(db, queries, truth, args.k, ef)
+                print(f"    {m:>4} {ef:>5} {percentile(latencies, 0.5):>8.2f} "
+                      f"{percentile(latencies, 0.99):>8.2f} {recall:>9.3f}")
+    finally:
+        await db.query(f"REMOVE TABLE IF EXISTS {BENCH_TABLE};", use_cache=False)
+        await db.close()
+    print("✅ Pick the smallest EF whose recall is acceptable; raise M if no EF gets there.")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
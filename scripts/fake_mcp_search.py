@@ -0,0 +1,43 @@
+"""
+Stand-in stdio MCP search server for swarm tests.
+
+Exposes one search tool that sleeps `--delay` seconds and returns `--hits`
+results over a shared URL space (so several instances overlap and the
+swarm has something to deduplicate), either as JSON or as Brave-style
+`Title:/Description:/URL:` text.
+
+    python scripts/fake_mcp_search.py --name brave --tool brave_web_search --delay 0.5 --format text
+"""
+import argparse
+import asyncio
+import json
+
+from mcp.server.fastmcp import FastMCP
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--name", default="fake-search")
+    parser.add_argument("--tool", default="search")
+    parser.add_argument("--delay", type=float, default=0.0)
+    parser.add_argument("--hits", type=int, default=5)
+    parser.add_argument("--offset", type=int, default=0, help="first result number, to control overlap")
+    parser.add_argument("--format", choices=("json", "text"), default="json")
+    args = parser.parse_args()
+
+    mcp = FastMCP(args.name, log_level="WARNING")
+
+    async def search(query: str) -> str:
+        await asyncio.sleep(args.delay)
+        hits = [{"title": f"{query} #{i}", "url": f"https://www.example.com/{i}/?utm_source={args.name}",
+                 "snippet": f"{args.name} result {i}"} for i in range(args.offset, args.offset + args.hits)]
+        if args.format == "json":
+            return json.dumps(hits)
+        return "\n\n".join(f"Title: {h['title']}\nDescription: {h['snippet']}\nURL: {h['url']}" for h in hits)
+
+    mcp.tool(name=args.tool)(search)
+    mcp.run()
+
+
+if __name__ == "__main__":
+    main()
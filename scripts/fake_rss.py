@@ -0,0 +1,102 @@
+"""
+Local stand-in for RSSHub.
+
+Serves `/feed/<n>` as RSS 2.0 with `items_per_feed` items per feed. Each call
+to `advance()` publishes `new_per_tick` fresh items on every feed (older ones
+roll off, like a real feed window). Supports ETag / Last-Modified so
+conditional GETs get a 304 when nothing changed.
+"""
+import threading
+from email.utils import formatdate
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import List, Optional
+from xml.sax.saxutils import escape
+
+DEFAULT_TERMS = ["Tesla", "CATL", "NVIDIA", "solid state battery", "AI Agent", "Fed Rate Cut"]
+
+
+class FakeRSS:
+    def __init__(self, host: str = "127.0.0.1", port: int = 0, feeds: int = 10, items_per_feed: int = 20,
+                 new_per_tick: int = 5, terms: Optional[List[str]] = None, body_bytes: int = 400):
+        self.feeds = feeds
+        self.items_per_feed = items_per_feed
+        self.new_per_tick = new_per_tick
+        self.terms = terms or DEFAULT_TERMS
+        self.body_bytes = body_bytes
+        self.tick = 0
+        self.requests = 0
+        self.not_modified = 0
+        self._cache = {}
+        fake = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def log_message(self, format, *args):
+                pass
+
+            def do_GET(self):
+                fake.requests += 1
+                parts = self.path.strip("/").split("/")
+                if len(parts) != 2 or parts[0] != "feed" or not parts[1].isdigit():
+                    self.send_response(404)
+                    self.send_header("Content-Length", "0")
+                    self.end_headers()
+                    return
+                feed = int(parts[1])
+                etag = f'"{feed}-{fake.tick}"'
+                if self.headers.get("If-None-Match") == etag:
+                    fake.not_modified += 1
+                    self.send_response(304)
+                    self.send_header("ETag", etag)
+                    self.send_header("Content-Length", "0")
+                    self.end_headers()
+                    return
+                body = fake.render(feed)
+                self.send_response(200)
+                self.send_header("Content-Type", "application/rss+xml")
+                self.send_header("ETag", etag)
+                self.send_header("Last-Modified", formatdate(usegmt=True))
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+        self.server = ThreadingHTTPServer((host, port), Handler)
+        self.server.daemon_threads = True
+        self.host, self.port = self.server.server_address[:2]
+
+    def feed_urls(self) -> List[str]:
+        return [f"http://{self.host}:{self.port}/feed/{i}" for i in range(self.feeds)]
+
+    def advance(self):
+        """Publish `new_per_tick` new items on every feed"""
+        self.tick += 1
+        self._cache.clear()
+
+    def render(self, feed: int) -> bytes:
+        key = (feed, self.tick)
+        if key in self._cache:
+            return self._cache[key]
+        newest = self.items_per_feed + self.tick * self.new_per_tick
+        items = []
+        for n in range(newest - 1, newest - 1 - self.items_per_feed, -1):
+            term = self.terms[(feed + n) % len(self.terms)]
+            body = escape(f"Item {n} of feed {feed} discusses {term}. " * (self.body_bytes // 40 + 1))
+            items.append(
+                f"<item><title>{escape(term)} update #{n}</title>"
+                f"<link>http://news.example/{feed}/{n}</link>"
+                f"<description>{body}</description>"
+                f"<pubDate>{formatdate(1700000000 + n * 60, usegmt=True)}</pubDate></item>"
+            )
+        doc = (f'<?xml version="1.0" encoding="UTF-8"?><rss version="2.0"><channel>'
+               f"<title>Feed {feed}</title>{''.join(items)}</channel></rss>").encode("utf-8")
+        self._cache[key] = doc
+        return doc
+
+    def start(self) -> "FakeRSS":
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        return self
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
@@ -0,0 +1,226 @@
+"""
+Local stand-ins for the SurrealDB HTTP and WebSocket RPC endpoints.
+
+Only implements what the abyss-intelligence client talks to (`/sql`,
+`/health` and the `/rpc` methods signin/use/query/ping/kill plus `LIVE SELECT`
+notifications pushed with `notify()`), with an optional
+artificial latency, so benchmarks and smoke tests can run offline. Not a
+database: every statement returns an empty result unless a custom
+`responder` is supplied (returning the result list, or the encoded body).
+"""
+import asyncio
+import json
+import random
+import re
+import socket
+import threading
+import time
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Callable, Dict, List, Optional
+
+
+def split_statements(sql: str) -> List[str]:
+    """Naive statement splitter (good enough for the client's own queries)"""
+    return [s.strip() for s in sql.split(";") if s.strip()]
+
+
+def default_responder(sql: str) -> List[Dict]:
+    return [{"result": [], "status": "OK", "time": "1µs"} for _ in split_statements(sql)]
+
+
+class FakeSurreal:
+    def __init__(self, host: str = "127.0.0.1", port: int = 0, latency_ms: float = 0.0,
+                 responder: Optional[Callable[[str], List[Dict]]] = None):
+        self.latency = latency_ms / 1000.0
+        self.responder = responder or default_responder
+        self.requests = 0
+        self.connections = 0
+        fake = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def setup(self):
+                super().setup()
+                # Headers and body are separate writes; without this, Nagle plus
+                # delayed ACKs add ~40 ms to every keep-alive response
+                self.connection.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+                fake.connections += 1
+
+            def log_message(self, format, *args):
+                pass
+
+            def _send(self, code: int, body: bytes):
+                self.send_response(code)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                try:
+                    self.wfile.write(body)
+                except (BrokenPipeError, ConnectionResetError):
+                    # The client stopped reading a streamed response early
+                    pass
+
+            def do_GET(self):
+                if self.path == "/health":
+                    self._send(200, b"")
+                else:
+                    self._send(404, b"")
+
+            def do_POST(self):
+                length = int(self.headers.get("Content-Length", 0))
+                sql = self.rfile.read(length).decode("utf-8")
+                fake.requests += 1
+                if fake.latency:
+                    time.sleep(fake.latency)
+                if self.path != "/sql":
+                    self._send(404, b"")
+                    return
+                out = fake.responder(sql)
+                # A responder may hand back the encoded body itself (pre-serialized rows)
+                self._send(200, out if isinstance(out, bytes) else json.dumps(out).encode("utf-8"))
+
+        self.server = ThreadingHTTPServer((host, port), Handler)
+        self.server.daemon_threads = True
+        self.host, self.port = self.server.server_address[:2]
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self) -> "FakeSurreal":
+        self._thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+class FakeSurrealRpc:
+    """
+    WebSocket RPC stand-in. Runs on the caller's event loop.
+
+    Requests are answered concurrently with a random delay of up to
+    `jitter_ms`, so responses come back out of order and exercise the client's
+    id-based demultiplexing. Every call is recorded in `calls`.
+    """
+
+    def __init__(self, host: str = "127.0.0.1", port: int = 0, latency_ms: float = 0.0,
+                 jitter_ms: float = 0.0,
+                 responder: Optional[Callable[[str, Dict], List[Dict]]] = None):
+        self.host = host
+        self.port = port
+        self.latency = latency_ms / 1000.0
+        self.jitter = jitter_ms / 1000.0
+        self.responder = responder or (lambda sql, vars: default_responder(sql))
+        self.calls: List[Dict] = []
+        self.connections = 0
+        self._server = None
+        self._sockets = set()
+        # live id -> (socket, table)
+        self.live_queries: Dict[str, tuple] = {}
+
+    @property
+    def url(self) -> str:
+        return f"ws://{self.host}:{self.port}/rpc"
+
+    async def start(self) -> "FakeSurrealRpc":
+        from websockets.asyncio.server import serve
+
+        self._server = await serve(self._handle, self.host, self.port, subprotocols=["json"],
+                                   max_size=None)
+        self.port = self._server.sockets[0].getsockname()[1]
+        return self
+
+    async def stop(self):
+        self._server.close()
+        await self._server.wait_closed()
+
+    async def notify(self, table: str, action: str, record: Dict) -> int:
+        """Push a live notification to every live query on `table`; returns how many were sent"""
+        sent = 0
+        for live_id, (ws, live_table) in list(self.live_queries.items()):
+            if live_table != table:
+                continue
+            try:
+                await ws.send(json.dumps({"result": {"id": live_id, "action": action, "result": record}}))
+                sent += 1
+            except Exception:
+                self.live_queries.pop(live_id, None)
+        return sent
+
+    async def drop_connections(self):
+        """Close every client socket, as if the server restarted"""
+        for ws in list(self._sockets):
+            await ws.close()
+
+    async def _handle(self, ws):
+        self.connections += 1
+        self._sockets.add(ws)
+        session = {"auth": None, "ns": None, "db": None}
+        tasks = set()
+        try:
+            async for raw in ws:
+                task = asyncio.create_task(self._answer(ws, session, json.loads(raw)))
+                tasks.add(task)
+                task.add_done_callback(tasks.discard)
+        except Exception:
+            pass
+        finally:
+            self._sockets.discard(ws)
+            for live_id, (live_ws, _) in list(self.live_queries.items()):
+                if live_ws is ws:
+                    del self.live_queries[live_id]
+
+    async def _answer(self, ws, session, msg):
+        method, params = msg.get("method"), msg.get("params") or []
+        self.calls.append({"method": method, "params": params})
+        delay = self.latency + random.uniform(0, self.jitter)
+        if delay:
+            await asyncio.sleep(delay)
+
+        if method == "signin":
+            session["auth"] = params[0].get("user")
+            result = "fake-token"
+        elif method == "use":
+            session["ns"], session["db"] = params[0], params[1]
+            result = None
+        elif method == "ping":
+            result = None
+        elif method == "query":
+            if session["auth"] is None or session["db"] is None:
+                await ws.send(json.dumps({"id": msg.get("id"), "error": {
+                    "code": -32000, "message": "There was a problem with authentication"}}))
+                return
+            sql = params[0]
+            live = re.match(r"\s*LIVE SELECT .*? FROM (\w+)", sql, re.IGNORECASE)
+            if live:
+                live_id = str(uuid.uuid4())
+                self.live_queries[live_id] = (ws, live.group(1))
+                result = [{"result": live_id, "status": "OK", "time": "1µs"}]
+            else:
+                result = self.responder(sql, params[1] if len(params) > 1 else {})
+        elif method == "kill":
+            self.live_queries.pop(params[0], None)
+            result = None
+        else:
+            await ws.send(json.dumps({"id": msg.get("id"), "error": {
+                "code": -32601, "message": "Method not found"}}))
+            return
+        await ws.send(json.dumps({"id": msg.get("id"), "result": result}))
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Run a fake SurrealDB /sql endpoint")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--latency-ms", type=float, default=0.0)
+    args = parser.parse_args()
+
+    fake = FakeSurreal(port=args.port, latency_ms=args.latency_ms)
+    print(f"[*] Fake SurrealDB listening on http://{fake.host}:{fake.port}")
+    try:
+        fake.server.serve_forever()
+    except KeyboardInterrupt:
+        fake.stop()
@@ -0,0 +1,285 @@
+"""
+A `/sql` responder that answers the client's own queries from a generated
+Trinity graph (see trinity_gen.py), for use with `FakeSurreal`.
+
+It evaluates the statements the MCP tools actually send (graph walks, series
+lookups and report scans, KNN searches, trend loads/write-backs, directive
+creation) against in-memory indexes, with `LET` params parsed back from
+their SurrealQL literals. KNN is brute-force cosine over the embedding
+matrix, so results are exact. Anything it does not recognise gets an empty
+OK result and is counted in `unhandled`, so a benchmark notices when the
+client starts sending something new.
+"""
+import json
+import re
+import threading
+from bisect import bisect_left
+from collections import Counter, defaultdict
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+
+_RECORD_RE = re.compile(r"[A-Za-z_][A-Za-z0-9_]*:(?:⟨(?:[^⟩\\]|\\.)*⟩|[A-Za-z0-9_]+)")
+_WS_RE = re.compile(r"\s+")
+
+
+def split_surql(sql: str) -> List[str]:
+    """Top-level statements of `sql` (semicolons inside strings, braces or brackets do not split)"""
+    out, depth, start, i, quote = [], 0, 0, 0, None
+    while i < len(sql):
+        ch = sql[i]
+        if quote:
+            if ch == "\\":
+                i += 1
+            elif ch == quote:
+                quote = None
+        elif ch in "'\"":
+            quote = ch
+        elif ch in "({[":
+            depth += 1
+        elif ch in ")}]":
+            depth -= 1
+        elif ch == ";" and depth == 0:
+            stmt = sql[start:i].strip()
+            if stmt:
+                out.append(stmt)
+            start = i + 1
+        i += 1
+    tail = sql[start:].strip()
+    if tail:
+        out.append(tail)
+    return out
+
+
+def parse_literal(text: str) -> Any:
+    """SurrealQL literal as rendered by `to_surql` -> Python (record ids and datetimes become strings)"""
+    out, i, n = [], 0, len(text)
+    while i < n:
+        ch = text[i]
+        if ch == '"':
+            j = i + 1
+            while text[j] != '"':
+                j += 2 if text[j] == "\\" else 1
+            out.append(text[i:j + 1])
+            i = j + 1
+        elif ch == "d" and i + 1 < n and text[i + 1] == '"' and (i == 0 or not text[i - 1].isalnum()):
+            i += 1
+        else:
+            m = _RECORD_RE.match(text, i) if (ch.isalpha() or ch == "_") else None
+            if m and (i == 0 or not (text[i - 1].isalnum() or text[i - 1] == "_")):
+                out.append(json.dumps(m.group(0)))
+                i = m.end()
+            else:
+                out.append(ch)
+                i += 1
+    return json.loads("".join(out))
+
+
+def _epoch(value: str) -> float:
+    return datetime.fromisoformat(value.replace("Z", "+00:00")).timestamp()
+
+
+def ok(result: Any) -> Dict:
+    return {"result": result, "status": "OK", "time": "1µs"}
+
+
+class TrinityResponder:
+    def __init__(self, graph):
+        self.graph = graph
+        self.records: Dict[str, Dict] = {}
+        for rows in graph.tables.values():
+            for row in rows:
+                self.records[row["id"]] = row
+        self.by_ticker = {c["ticker"]: c["id"] for c in graph.tables["company"]}
+        self.series = {(s["ticker"], s["metric"]): s for s in graph.tables["metric_series"]}
+        self.reports = defaultdict(list)
+        for r in graph.tables["report"]:
+            self.reports[r["company"]].append(r)
+        for rows in self.reports.values():
+            rows.sort(key=lambda r: r["published_at"], reverse=True)
+        # (edge table, side) -> node id -> edges
+        self.edges: Dict[Tuple[str, str], Dict[str, List[Dict]]] = defaultdict(lambda: defaultdict(list))
+        for table, rows in graph.edges.items():
+            for e in rows:
+                self.edges[(table, "in")][e["in"]].append(e)
+                self.edges[(table, "out")][e["out"]].append(e)
+        self.trends = sorted(graph.tables["trend_metric"], key=lambda r: r["timestamp"])
+        self.trend_times = [_epoch(r["timestamp"]) for r in self.trends]
+        self.vectors = {t: (ids, matrix, {rid: i for i, rid in enumerate(ids)})
+                        for t, (ids, matrix) in graph.vectors.items()}
+        self.time_cache: Dict[str, float] = {}
+
+        self.lock = threading.Lock()
+        self.directives = 0
+        self.trend_writes = 0
+        self.statements = Counter()
+        self.unhandled = Counter()
+        self.handlers: List[Tuple[re.Pattern, Callable]] = [
+            (re.compile(r"^LET \$(\w+) = (.*)$", re.S), self._let),
+            (re.compile(r"^SELECT in, out, (\w+) AS weight, .*? FROM (\w+) WHERE (in|out) INSIDE \$(\w+)"
+                        r"(?: AND math::abs\(\w+ \?\? 0\) >= \$(\w+))? ORDER BY strength DESC LIMIT \$(\w+)$"),
+             self._edges),
+            (re.compile(r"^SELECT ([\w, ]+) FROM \$(\w+)$"), self._nodes),
+            (re.compile(r"^SELECT ticker, metric, points FROM type::thing\('metric_series', \[\$(\w+), \$(\w+)\]\)$"),
+             self._series),
+            (re.compile(r"^SELECT VALUE id FROM company WHERE ticker = \$(\w+) LIMIT 1$"), self._company),
+            (re.compile(r"^SELECT id AS report, period, published_at, metrics\[\$(\w+)\] AS value FROM report "
+                        r"WHERE company = \$(\w+) ORDER BY published_at DESC LIMIT \$(\w+)$"), self._report_scan),
+            (re.compile(r"^SELECT (.*?), string::slice\((\w+) \?\? '', 0, (\d+)\) AS snippet, "
+                        r"vector::distance::knn\(\) AS distance FROM (\w+) WHERE embedding <\|(\d+),(\d+)\|> "
+                        r"\$(\w+)(.*?) ORDER BY distance ASC LIMIT (\d+)$"), self._knn),
+            (re.compile(r"^SELECT (VALUE embedding|embedding, embedding_q, embedding_scale) FROM ONLY \$(\w+)$"),
+             self._embedding),
+            (re.compile(r"^SELECT id, concept, source, value, timestamp FROM trend_metric WHERE timestamp >= "
+                        r"<datetime>\$(\w+) AND id NOTINSIDE \$(\w+) ORDER BY timestamp ASC LIMIT \$(\w+)$"),
+             self._trend_load),
+            (re.compile(r"^FOR \$u IN \$(\w+) \{ UPDATE \$u\.id SET velocity"), self._trend_write),
+            (re.compile(r"^CREATE directive CONTENT \{(.*)\}$"), self._create_directive),
+            (re.compile(r"^(BEGIN|COMMIT|CANCEL)( TRANSACTION)?$"), lambda scope, m: None),
+        ]
+
+    def __call__(self, sql: str) -> List[Dict]:
+        scope: Dict[str, Any] = {}
+        out = []
+        for stmt in split_surql(sql):
+            out.append(ok(self.evaluate(_WS_RE.sub(" ", stmt), scope)))
+        return out
+
+    def evaluate(self, stmt: str, scope: Dict[str, Any]) -> Any:
+        for pattern, handler in self.handlers:
+            m = pattern.match(stmt)
+            if m:
+                self.statements[handler.__name__.strip("_") if hasattr(handler, "__name__") else "tx"] += 1
+                return handler(scope, m)
+        if not stmt.startswith("USE "):
+            self.unhandled[stmt[:80]] += 1
+        return []
+
+    # --- Handlers ---
+
+    def _let(self, scope, m):
+        name, raw = m.groups()
+        sub = re.match(r"^\((SELECT .*)\)(\[0\])?$", raw.strip(), re.S)
+        if sub:
+            rows = self.evaluate(sub.group(1), scope)
+            if sub.group(2):
+                rows = rows[0] if rows else None
+            scope[name] = rows
+        else:
+            scope[name] = parse_literal(raw)
+        return None
+
+    def _project(self, rid: str, fields: List[str]) -> Optional[Dict]:
+        row = self.records.get(rid)
+        if row is None:
+            return None
+        return {f: row.get(f) for f in fields if f in row or f == "id"}
+
+    def _nodes(self, scope, m):
+        fields = [f.strip() for f in m.group(1).split(",")]
+        ids = scope.get(m.group(2)) or []
+        return [p for p in (self._project(rid, fields) for rid in ids) if p is not None]
+
+    def _edges(self, scope, m):
+        weight, table, side, frontier, min_var, limit_var = m.groups()
+        index = self.edges[(table, side)]
+        threshold = float(scope[min_var]) if min_var else None
+        rows = []
+        for node in scope.get(frontier) or []:
+            for e in index.get(node, ()):
+                w = e.get(weight)
+                strength = abs(w or 0)
+                if threshold is None or strength >= threshold:
+                    rows.append({"in": e["in"], "out": e["out"], "weight": w, "strength": strength})
+        rows.sort(key=lambda r: r["strength"], reverse=True)
+        return rows[:int(scope[limit_var])]
+
+    def _series(self, scope, m):
+        s = self.series.get((scope.get(m.group(1)), scope.get(m.group(2))))
+        return [{"ticker": s["ticker"], "metric": s["metric"], "points": s["points"]}] if s else []
+
+    def _company(self, scope, m):
+        rid = self.by_ticker.get(scope.get(m.group(1)))
+        return [rid] if rid else []
+
+    def _report_scan(self, scope, m):
+        metric, comp, limit = (scope.get(v) for v in m.groups())
+        return [{"report": r["id"], "period": r["period"], "published_at": r["published_at"],
+                 "value": r["metrics"].get(metric)} for r in self.reports.get(comp, [])[:int(limit)]]
+
+    def _time(self, value: str) -> float:
+        t = self.time_cache.get(value)
+        if t is None:
+            t = self.time_cache[value] = _epoch(value)
+        return t
+
+    def _matches(self, row: Dict, conds: List[str], scope) -> bool:
+        for cond in conds:
+            field, op, cast, var = re.match(r"^(\w+) (>=|<=|=|!=) (<datetime>)?\$(\w+)$", cond).groups()
+            value, bound = row.get(field), scope.get(var)
+            if cast:
+                value, bound = (self._time(value) if value else None), self._time(bound)
+            if value is None:
+                return False
+            if op == ">=" and not value >= bound or op == "<=" and not value <= bound:
+                return False
+            if op == "=" and value != bound or op == "!=" and value == bound:
+                return False
+        return True
+
+    def _knn(self, scope, m):
+        fields, snippet_field, chars, table, candidates, _ef, var, rest, k = m.groups()
+        ids, matrix, _ = self.vectors[table]
+        query = np.asarray(scope[var], dtype=np.float32)
+        norm = np.linalg.norm(query)
+        distance = 1.0 - matrix @ (query / norm if norm else query)
+        top = np.argsort(distance)[:int(candidates)]
+        conds = [c.strip() for c in rest.split(" AND ") if c.strip()]
+        fields = [f.strip() for f in fields.split(",")]
+        hits = []
+        for i in top:
+            row = self.records[ids[i]]
+            if conds and not self._matches(row, conds, scope):
+                continue
+            hit = {f: row.get(f) for f in fields}
+            hit["snippet"] = (row.get(snippet_field) or "")[:int(chars)]
+            hit["distance"] = float(distance[i])
+            hits.append(hit)
+            if len(hits) == int(k):
+                break
+        return hits
+
+    def _embedding(self, scope, m):
+        rid = scope.get(m.group(2))
+        table = rid.split(":", 1)[0]
+        ids, matrix, positions = self.vectors.get(table, ([], None, {}))
+        if rid not in positions:
+            return None
+        vector = matrix[positions[rid]].tolist()
+        return vector if m.group(1).startswith("VALUE") else {"embedding": vector}
+
+    def _trend_load(self, scope, m):
+        since, seen, limit = self._time(scope[m.group(1)]), set(scope[m.group(2)] or ()), int(scope[m.group(3)])
+        start = bisect_left(self.trend_times, since)
+        rows = (r for r in self.trends[start:] if r["id"] not in seen)
+        return [{k: r[k] for k in ("id", "concept", "source", "value", "timestamp")}
+                for r, _ in zip(rows, range(limit))]
+
+    def _trend_write(self, scope, m):
+        updates = scope.get(m.group(1)) or []
+        with self.lock:
+            for u in updates:
+                row = self.records.get(u["id"])
+                if row is not None:
+                    row["zscore"], row["flags"] = u.get("zscore"), u.get("flags")
+            self.trend_writes += len(updates)
+        return []
+
+    def _create_directive(self, scope, m):
+        row = {field: scope.get(var) for field, var in re.findall(r"(\w+): \$(\w+)", m.group(1))}
+        with self.lock:
+            self.directives += 1
+            row["id"] = f"directive:d{self.directives}"
+        row["status"] = "active"
+        return [row]
@@ -0,0 +1,375 @@
+"""
+Asyncio stdio MCP client with a pool of warm server processes.
+
+`StdioClient` speaks newline-delimited JSON-RPC to one server subprocess:
+requests are pipelined (many in flight on the same pipe) and a single reader
+task routes each response to its caller by id, so a per-call timeout is just
+`asyncio.wait_for` on a future, never a polling loop. Server-initiated pings
+are answered, notifications and non-JSON log lines are skipped.
+
+`StdioPool` keeps one or more clients per configured server alive between
+calls (restarting any that exit) and `fan_out()` sends one search query to
+every search server at once, merging the hits by normalized URL: the swarm
+takes as long as its slowest server instead of the sum of all of them.
+
+Servers are configured as in `.mcp.json` (`mcpServers: {name: {type,
+command, args, env}}`); only `stdio` servers are supported.
+"""
+import asyncio
+import json
+import os
+import re
+import sys
+import time
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+
+PROTOCOL_VERSION = "2024-11-05"
+DEFAULT_TIMEOUT = 15.0
+STREAM_LIMIT = 64 * 1024 * 1024
+
+# Query-string keys that only track the click, never change the page
+_TRACKING_PARAMS = re.compile(r"^(utm_\w+|fbclid|gclid|ref|ref_src)$")
+_TEXT_HIT_RE = re.compile(r"^Title:\s*(?P<title>.*?)\n(?:Description:\s*(?P<snippet>.*?)\n)?URL:\s*(?P<url>\S+)",
+                          re.MULTILINE | re.DOTALL)
+
+
+class McpError(Exception):
+    """A JSON-RPC error returned by the server"""
+
+    def __init__(self, error: Dict):
+        super().__init__(error.get("message", "MCP error"))
+        self.code = error.get("code")
+        self.data = error.get("data")
+
+
+def load_servers(path: str = ".mcp.json", names: Optional[Sequence[str]] = None) -> Dict[str, Dict]:
+    """`mcpServers` entries from an MCP config file, optionally only `names` (in that order)"""
+    with open(path, encoding="utf-8") as f:
+        servers = json.load(f).get("mcpServers", {})
+    if names is None:
+        return servers
+    return {name: servers[name] for name in names if name in servers}
+
+
+class StdioClient:
+    def __init__(self, name: str, command: str, args: Sequence[str] = (), env: Optional[Dict[str, str]] = None,
+                 timeout: float = DEFAULT_TIMEOUT, cwd: Optional[str] = None):
+        self.name = name
+        self.command = command
+        self.args = list(args)
+        self.env = {**os.environ, **(env or {})}
+        self.cwd = cwd
+        self.timeout = timeout
+        self.proc: Optional[asyncio.subprocess.Process] = None
+        self.server_info: Dict = {}
+        self._next_id = 0
+        self._pending: Dict[int, asyncio.Future] = {}
+        self._reader: Optional[asyncio.Task] = None
+        self._write_lock = asyncio.Lock()
+        self._tools: Optional[List[Dict]] = None
+
+    @classmethod
+    def from_config(cls, name: str, config: Dict, timeout: float = DEFAULT_TIMEOUT) -> "StdioClient":
+        if config.get("type", "stdio") != "stdio":
+            raise ValueError(f"Server {name!r} is not a stdio server (type {config.get('type')!r})")
+        return cls(name, config["command"], config.get("args", []), config.get("env"), timeout, config.get("cwd"))
+
+    @property
+    def pid(self) -> Optional[int]:
+        return self.proc.pid if self.proc is not None else None
+
+    @property
+    def alive(self) -> bool:
+        return self.proc is not None and self.proc.returncode is None and self._reader is not None \
+            and not self._reader.done()
+
+    @property
+    def in_flight(self) -> int:
+        return len(self._pending)
+
+    async def start(self) -> "StdioClient":
+        """Spawn the server and run the initialize handshake"""
+        self.proc = await asyncio.create_subprocess_exec(
+            self.command, *self.args, env=self.env, cwd=self.cwd, stdin=asyncio.subprocess.PIPE,
+            stdout=asyncio.subprocess.PIPE, stderr=sys.stderr, limit=STREAM_LIMIT)
+        self._reader = asyncio.create_task(self._read_loop())
+        result, _ = await self.request("initialize", {
+            "protocolVersion": PROTOCOL_VERSION,
+            "capabilities": {},
+            "clientInfo": {"name": "abyss-mcp-pool", "version": "1.0"},
+        })
+        self.server_info = result.get("serverInfo", {})
+        await self.notify("notifications/initialized")
+        return self
+
+    async def _write(self, msg: Dict):
+        if not self.alive:
+            raise ConnectionError(f"MCP server {self.name!r} is not running")
+        async with self._write_lock:
+            self.proc.stdin.write((json.dumps(msg) + "\n").encode("utf-8"))
+            await self.proc.stdin.drain()
+
+    async def _read_loop(self):
+        try:
+            while True:
+                line = await self.proc.stdout.readline()
+                if not line:
+                    break
+                try:
+                    msg = json.loads(line)
+                except ValueError:
+                    # Some servers log to stdout
+                    continue
+                if not isinstance(msg, dict):
+                    continue
+                if "method" in msg:
+                    if "id" in msg:
+                        await self._answer(msg)
+                    continue
+                future = self._pending.pop(msg.get("id"), None)
+                if future is not None and not future.done():
+                    future.set_result((msg, len(line)))
+        finally:
+            error = ConnectionError(f"MCP server {self.name!r} exited")
+            for future in self._pending.values():
+                if not future.done():
+                    future.set_exception(error)
+            self._pending.clear()
+
+    async def _answer(self, msg: Dict):
+        if msg["method"] == "ping":
+            reply = {"jsonrpc": "2.0", "id": msg["id"], "result": {}}
+        else:
+            reply = {"jsonrpc": "2.0", "id": msg["id"],
+                     "error": {"code": -32601, "message": f"Method not supported: {msg['method']}"}}
+        try:
+            await self._write(reply)
+        except (ConnectionError, OSError):
+            pass
+
+    async def notify(self, method: str, params: Optional[Dict] = None):
+        msg = {"jsonrpc": "2.0", "method": method}
+        if params is not None:
+            msg["params"] = params
+        await self._write(msg)
+
+    async def request(self, method: str, params: Optional[Dict] = None,
+                      timeout: Optional[float] = None) -> Tuple[Dict, int]:
+        """`(result, response bytes)`; raises McpError, ConnectionError or asyncio.TimeoutError"""
+        self._next_id += 1
+        request_id = self._next_id
+        future = asyncio.get_running_loop().create_future()
+        self._pending[request_id] = future
+        msg = {"jsonrpc": "2.0", "id": request_id, "method": method}
+        if params is not None:
+            msg["params"] = params
+        try:
+            await self._write(msg)
+            response, size = await asyncio.wait_for(future, timeout or self.timeout)
+        finally:
+            self._pending.pop(request_id, None)
+        if "error" in response:
+            raise McpError(response["error"])
+        return response.get("result") or {}, size
+
+    async def list_tools(self, refresh: bool = False) -> List[Dict]:
+        if self._tools is None or refresh:
+            result, _ = await self.request("tools/list")
+            self._tools = result.get("tools", [])
+        return self._tools
+
+    async def call_tool(self, tool: str, arguments: Optional[Dict] = None, timeout: Optional[float] = None) -> Dict:
+        result, _ = await self.request("tools/call", {"name": tool, "arguments": arguments or {}}, timeout)
+        return result
+
+    async def read_resource(self, uri: str, timeout: Optional[float] = None) -> str:
+        result, _ = await self.request("resources/read", {"uri": uri}, timeout)
+        contents = result.get("contents") or [{}]
+        return contents[0].get("text") or ""
+
+    async def close(self):
+        if self.proc is None:
+            return
+        if self.proc.returncode is None:
+            self.proc.stdin.close()
+            try:
+                await asyncio.wait_for(self.proc.wait(), 5)
+            except asyncio.TimeoutError:
+                self.proc.terminate()
+                await self.proc.wait()
+        if self._reader is not None:
+            await asyncio.gather(self._reader, return_exceptions=True)
+
+
+def text_of(result: Dict) -> str:
+    """Concatenated text content of a tools/call result"""
+    return "\n".join(c.get("text", "") for c in result.get("content") or [] if c.get("type") == "text")
+
+
+def normalize_url(url: str) -> str:
+    """Key for deduplication: lower-case host without www, no fragment, tracking params or trailing slash"""
+    parts = urlsplit(url.strip())
+    host = parts.netloc.lower()
+    if host.startswith("www."):
+        host = host[4:]
+    query = urlencode(sorted((k, v) for k, v in parse_qsl(parts.query) if not _TRACKING_PARAMS.match(k)))
+    return urlunsplit(("https" if parts.scheme in ("http", "https") else parts.scheme, host,
+                       parts.path.rstrip("/"), query, ""))
+
+
+def parse_hits(result: Dict) -> List[Dict]:
+    """
+    Search hits (title, url, snippet) from a tools/call result: structured
+    content, JSON text (a list or {results: [...]}) or Brave-style
+    `Title:/Description:/URL:` text blocks.
+    """
+    hits: List[Dict] = []
+    payloads: List[Any] = []
+    if result.get("structuredContent"):
+        payloads.append(result["structuredContent"])
+    for block in result.get("content") or []:
+        text = block.get("text") if block.get("type") == "text" else None
+        if not text:
+            continue
+        try:
+            payloads.append(json.loads(text))
+        except ValueError:
+            for m in _TEXT_HIT_RE.finditer(text):
+                hits.append({"title": m["title"].strip(), "url": m["url"], "snippet": (m["snippet"] or "").strip()})
+    for payload in payloads:
+        if isinstance(payload, dict):
+            payload = payload.get("results") or payload.get("result") or payload.get("items") or []
+        for item in payload if isinstance(payload, list) else []:
+            if isinstance(item, dict) and (item.get("url") or item.get("link") or item.get("href")):
+                hits.append({"title": item.get("title") or "",
+                             "url": item.get("url") or item.get("link") or item.get("href"),
+                             "snippet": item.get("snippet") or item.get("description") or item.get("content") or ""})
+    return hits
+
+
+def pick_search_tool(tools: List[Dict]) -> Optional[str]:
+    """The main web search tool of a server (exact `search` first, then *web*/*search* names)"""
+    names = [t["name"] for t in tools]
+    if "search" in names:
+        return "search"
+    for name in names:
+        if "search" in name and ("web" in name or "tavily" in name):
+            return name
+    for name in names:
+        if "search" in name:
+            return name
+    return names[0] if names else None
+
+
+class StdioPool:
+    """
+    Warm stdio MCP servers, `size` processes per configured server.
+
+    Each client pipelines its own requests, so one process per server is
+    usually enough; with `size > 1` calls go to the client with the fewest
+    requests in flight. A client whose process died is restarted on the next
+    call.
+    """
+
+    def __init__(self, servers: Dict[str, Dict], size: int = 1, timeout: float = DEFAULT_TIMEOUT):
+        self.servers = servers
+        self.size = max(1, size)
+        self.timeout = timeout
+        self.clients: Dict[str, List[StdioClient]] = {}
+        self._locks: Dict[str, asyncio.Lock] = {}
+
+    async def start(self, names: Optional[Sequence[str]] = None) -> Dict[str, Optional[str]]:
+        """Warm the given (default: all) servers concurrently; returns {name: error or None}"""
+        names = list(names or self.servers)
+        results = await asyncio.gather(*(self._ensure(name) for name in names), return_exceptions=True)
+        return {name: (None if not isinstance(r, BaseException) else f"{type(r).__name__}: {r}")
+                for name, r in zip(names, results)}
+
+    async def _ensure(self, name: str) -> List[StdioClient]:
+        lock = self._locks.setdefault(name, asyncio.Lock())
+        async with lock:
+            clients = [c for c in self.clients.get(name, []) if c.alive]
+            missing = self.size - len(clients)
+            if missing > 0:
+                config = self.servers[name]
+                fresh = [StdioClient.from_config(name, config, self.timeout) for _ in range(missing)]
+                started = await asyncio.gather(*(c.start() for c in fresh), return_exceptions=True)
+                for client, outcome in zip(fresh, started):
+                    if isinstance(outcome, BaseException):
+                        await client.close()
+                        if not clients:
+                            raise outcome
+                    else:
+                        clients.append(client)
+            self.clients[name] = clients
+            return clients
+
+    async def client(self, name: str) -> StdioClient:
+        if name not in self.servers:
+            raise KeyError(f"Unknown MCP server {name!r}")
+        clients = await self._ensure(name)
+        return min(clients, key=lambda c: c.in_flight)
+
+    async def call_tool(self, name: str, tool: str, arguments: Optional[Dict] = None,
+                        timeout: Optional[float] = None) -> Dict:
+        return await (await self.client(name)).call_tool(tool, arguments, timeout)
+
+    async def search(self, name: str, query: str, timeout: Optional[float] = None) -> Dict:
+        """One server's search for `query` with timing; errors are returned, not raised"""
+        t0 = time.perf_counter()
+        out: Dict[str, Any] = {"server": name}
+        try:
+            client = await self.client(name)
+            tool = pick_search_tool(await client.list_tools())
+            if tool is None:
+                raise ValueError("no tools")
+            result = await client.call_tool(tool, {"query": query}, timeout)
+            out["tool"] = tool
+            if result.get("isError"):
+                out["error"] = text_of(result)[:300] or "tool error"
+                out["hits"] = []
+            else:
+                out["hits"] = parse_hits(result)
+        except asyncio.TimeoutError:
+            out["error"], out["hits"] = f"timed out after {timeout or self.timeout:g}s", []
+        except Exception as e:
+            out["error"], out["hits"] = f"{type(e).__name__}: {e}", []
+        out["ms"] = round((time.perf_counter() - t0) * 1000, 1)
+        return out
+
+    async def fan_out(self, query: str, names: Optional[Sequence[str]] = None,
+                      timeout: Optional[float] = None) -> Dict:
+        """
+        `query` on every search server in parallel. Hits are merged by
+        normalized URL, keeping the first title/snippet and listing every
+        server that returned it; servers are ranked by how many others agree.
+        """
+        names = list(names or self.servers)
+        t0 = time.perf_counter()
+        per_server = await asyncio.gather(*(self.search(name, query, timeout) for name in names))
+        merged: Dict[str, Dict] = {}
+        for res in per_server:
+            for rank, hit in enumerate(res["hits"]):
+                key = normalize_url(hit["url"])
+                entry = merged.get(key)
+                if entry is None:
+                    entry = merged[key] = {**hit, "sources": [], "best_rank": rank}
+                if res["server"] not in entry["sources"]:
+                    entry["sources"].append(res["server"])
+                entry["best_rank"] = min(entry["best_rank"], rank)
+                if not entry.get("snippet") and hit.get("snippet"):
+                    entry["snippet"] = hit["snippet"]
+        results = sorted(merged.values(), key=lambda e: (-len(e["sources"]), e["best_rank"]))
+        return {
+            "query": query,
+            "elapsed_ms": round((time.perf_counter() - t0) * 1000, 1),
+            "servers": {r["server"]: {k: r[k] for k in ("tool", "ms", "error") if k in r} | {"hits": len(r["hits"])}
+                        for r in per_server},
+            "results": results,
+        }
+
+    async def close(self):
+        clients = [c for group in self.clients.values() for c in group]
+        self.clients = {}
+        await asyncio.gather(*(c.close() for c in clients), return_exceptions=True)
@@ -80,5 +80,77 @@ def setup_db():
         print("Ensure SurrealDB is running via `docker-compose up -d`")
         sys.exit(1)
 
+def run_query(sql):
+    """POST SurrealQL against NS/DB and return the per-statement results"""
+    auth_b64 = base64.b64encode(f"{USER}:{PASS}".encode()).decode()
+    headers = {
+        'Accept': 'application/json',
+        'NS': NS,
+        'DB': DB,
+        'Authorization': f'Basic {auth_b64}',
+        'Content-Type': 'text/plain',
+    }
+    req = urllib.request.Request(SURREAL_URL, data=sql.encode('utf-8'), headers=headers, method='POST')
+    with urllib.request.urlopen(req) as response:
+        results = json.loads(response.read().decode('utf-8'))
+    for i, result in enumerate(results):
+        if result.get('status') == 'ERR':
+            raise RuntimeError(f"SQL Error (stmt {i}): {json.dumps(result)}")
+    return results
+
+def quantize_embeddings(mode, tables, batch=200, drop_full=False):
+    """
+    Backfill compact embeddings (embedding_q / embedding_scale / embedded_at)
+    for rows that have a full vector but no compact copy yet. Resumable: each
+    pass only selects rows still missing `embedding_q`. With `drop_full` the
+    full vector is removed as well (only for VECTOR_SEARCH_MODE=int8|float16;
+    those rows leave the HNSW index).
+    """
+    sys.path.append(os.path.join(os.path.dirname(__file__), "..", "src", "abyss-intelligence"))
+    from db_client import RecordId, to_surql
+    from quantize import encode
+
+    drop = ", embedding = NONE" if drop_full else ""
+    for table in tables:
+        done = 0
+        saved = 0
+        while True:
+            res = run_query(f"SELECT id, embedding FROM {table} WHERE embedding != NONE "
+                            f"AND embedding_q = NONE LIMIT {int(batch)};")
+            rows = res[-1]['result'] or []
+            if not rows:
+                break
+            updates = []
+            for row in rows:
+                fields = encode(row['embedding'], mode)
+                updates.append({"id": RecordId.parse(row['id']), "q": fields['embedding_q'],
+                                "s": fields['embedding_scale']})
+                saved += len(json.dumps(row['embedding'])) - len(fields['embedding_q'])
+            run_query(f"LET $rows = {to_surql(updates)};\n"
+                      f"FOR $row IN $rows {{ UPDATE $row.id SET embedding_q = $row.q, "
+                      f"embedding_scale = $row.s, embedded_at = time::now(){drop}; }};")
+            done += len(rows)
+            print(f"[*] {table}: {done} rows quantized ({mode})", end="\r")
+        print(f"[+] {table}: {done} rows quantized ({mode}), "
+              f"~{saved / 1024 / 1024:.1f} MiB of JSON per full read saved" if done else f"[=] {table}: nothing to do")
+
 if __name__ == "__main__":
-    setup_db()
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Initialize the schema, or run a migration")
+    parser.add_argument("--quantize", choices=["int8", "float16"],
+                        help="backfill compact embeddings instead of applying init_db.surql")
+    parser.add_argument("--tables", nargs="+", default=["pulse", "article", "concept"])
+    parser.add_argument("--batch", type=int, default=200)
+    parser.add_argument("--drop-full", action="store_true",
+                        help="also remove the full-precision vectors (compact-only storage)")
+    args = parser.parse_args()
+
+    if args.quantize:
+        try:
+            quantize_embeddings(args.quantize, args.tables, args.batch, args.drop_full)
+        except (urllib.error.URLError, RuntimeError) as e:
+            print(f"[-] Migration failed: {e}")
+            sys.exit(1)
+    else:
+        setup_db()
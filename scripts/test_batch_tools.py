@@ -0,0 +1,135 @@
+import asyncio
+import json
+import os
+import re
+import sys
+
+# Add src to path so we can import abyss-intelligence components
+sys.path.append(os.path.join(os.path.dirname(__file__), "..", "src", "abyss-intelligence"))
+sys.path.append(os.path.dirname(__file__))
+
+from fake_surreal import FakeSurreal, split_statements
+
+# A tiny Trinity graph: (edge table, in, out, weight)
+EDGES = [
+    ("involves", "company:moderna", "concept:biotech", 0.9),
+    ("involves", "company:prologis", "concept:real_estate", 0.8),
+    ("impacts", "article:cut", "company:moderna", 0.7),
+    ("impacts", "article:cut", "company:prologis", 0.6),
+]
+SERIES = {("TSLA", "gross_margin"): [{"period": "2025Q1", "published_at": "2025-04-20T00:00:00Z", "value": 0.17},
+                                     {"period": "2025Q2", "published_at": "2025-07-20T00:00:00Z", "value": 0.18}]}
+REPORTS = {"NIO": [{"report": "report:n1", "period": "2025Q2", "published_at": "2025-08-01T00:00:00Z", "value": 5.1}]}
+
+_LET_RE = re.compile(r"^LET \$(\w+) = (.*)$", re.S)
+_ID_RE = re.compile(r"\b([a-z_]+:[a-z_0-9]+)\b")
+
+
+def ok(result):
+    return {"result": result, "status": "OK", "time": "1µs"}
+
+
+def responder(sql):
+    scope, out = {}, []
+    for stmt in split_statements(sql):
+        let = _LET_RE.match(stmt)
+        if let:
+            name, raw = let.groups()
+            try:
+                scope[name] = json.loads(raw)
+            except ValueError:
+                scope[name] = _ID_RE.findall(raw) or raw
+            out.append(ok(None))
+        elif "metric_series" in stmt:
+            i = re.search(r"\$ticker_(\d+)", stmt).group(1)
+            points = SERIES.get((scope[f"ticker_{i}"], scope[f"metric_{i}"]))
+            out.append(ok([{"points": points}] if points else []))
+        elif "FROM report" in stmt:
+            i = re.search(r"\$comp_(\d+)", stmt).group(1)
+            out.append(ok(REPORTS.get(scope.get(f"ticker_{i}"), [])))
+        elif stmt.startswith("CREATE directive"):
+            i = re.search(r"\$target_(\d+)", stmt).group(1)
+            if scope[f"target_{i}"] == "BAD":
+                out.append({"result": "Found NONE for field `target`", "status": "ERR", "time": "1µs"})
+            else:
+                out.append(ok([{"id": f"directive:d{i}", "target": scope[f"target_{i}"]}]))
+        elif " INSIDE $" in stmt:
+            table = re.search(r"FROM (\w+)", stmt).group(1)
+            side, var = re.search(r"WHERE (in|out) INSIDE \$(\w+)", stmt).groups()
+            frontier = set(scope[var])
+            out.append(ok([{"in": i, "out": o, "weight": w, "strength": w} for t, i, o, w in EDGES
+                           if t == table and (i if side == "in" else o) in frontier]))
+        elif "FROM $nodes" in stmt:
+            ids = scope[re.search(r"FROM \$(\w+)", stmt).group(1)]
+            if "concept:boom" in ids:
+                out.append({"result": "Simulated failure", "status": "ERR", "time": "1µs"})
+            else:
+                out.append(ok([{"id": rid, "name": rid.split(":")[1]} for rid in ids]))
+        else:
+            out.append(ok([]))
+    return out
+
+
+async def test_batch_tools():
+    print("📦 Testing batched multi-entity tools...")
+
+    fake = FakeSurreal(responder=responder).start()
+    os.environ["SURREAL_HOST"] = fake.host
+    os.environ["SURREAL_PORT"] = str(fake.port)
+    os.environ["QUERY_CACHE_ENABLED"] = "false"
+    os.environ["BATCH_MAX_ITEMS"] = "5"
+
+    from db_client import SurrealClient
+
+    client = SurrealClient()
+    try:
+        # 1. Traces advance together: one request per level, not per start node
+        before = fake.requests
+        result = await client.trace_narrative_chains(
+            ["concept:biotech", "concept:real_estate", "not an id", "concept:boom"], depth=2)
+        items = result["items"]
+        assert fake.requests - before == 3, fake.requests - before
+        assert {n["id"] for n in items[0]["nodes"]} == {"concept:biotech", "company:moderna", "article:cut"}
+        assert {n["id"] for n in items[1]["nodes"]} == {"concept:real_estate", "company:prologis", "article:cut"}
+        assert "error" in items[2] and items[2]["start"] == "not an id"
+        assert items[3]["error"] == "Simulated failure"
+        assert result["failed"] == 2
+        print("✅ 4 traces x depth 2 in 3 requests, errors reported per item.")
+
+        # 2. Financial claims: series lookups in one request, report scans for misses in one more
+        before = fake.requests
+        result = await client.verify_financials_batch(
+            [("TSLA", "gross_margin"), ("NIO", "revenue"), ("ZZZ", "revenue")], periods=4)
+        items = result["items"]
+        assert fake.requests - before == 2, fake.requests - before
+        assert items[0]["source"] == "metric_series" and items[0]["points"][-1]["qoq"] == 0.0588
+        assert items[1]["source"] == "report_scan" and items[1]["points"][0]["value"] == 5.1
+        assert items[2]["error"] == "No reports found for ticker ZZZ"
+        print("✅ 3 claims verified in 2 requests (series + fallback scan).")
+
+        # 3. Directives: one request, one statement each, failures stay local
+        before = fake.requests
+        result = await client.create_directives([
+            {"target": "XBI", "type": "monitor_sentiment", "context": {"platform": "x"}},
+            {"target": "BAD", "type": "monitor_sentiment", "context": {}},
+            {"target": "IBB", "type": "track_keyword", "context": {}},
+        ])
+        assert fake.requests - before == 1
+        assert [i.get("id") for i in result["items"]] == ["directive:d0", None, "directive:d2"]
+        assert result["failed"] == 1 and "error" in result["items"][1]
+        print("✅ 3 directives in 1 request, the rejected one reported on its own.")
+
+        # 4. Batch size is bounded
+        try:
+            await client.trace_narrative_chains([f"concept:c{i}" for i in range(6)])
+            raise AssertionError("oversized batch accepted")
+        except ValueError as e:
+            assert "At most 5" in str(e)
+        print("✅ Oversized batches are rejected.")
+    finally:
+        await client.close()
+        fake.stop()
+
+
+if __name__ == "__main__":
+    asyncio.run(test_batch_tools())
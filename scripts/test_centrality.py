@@ -0,0 +1,138 @@
+import asyncio
+import math
+import os
+import re
+import sys
+
+sys.path.append(os.path.join(os.path.dirname(__file__), "..", "src", "abyss-intelligence"))
+sys.path.append(os.path.dirname(__file__))
+
+from fake_surreal import FakeSurreal, default_responder
+
+EDGES = {
+    "involves": [{"in": "company:a", "out": "concept:x", "weight": 0.8},
+                 {"in": "company:b", "out": "concept:x", "weight": 0.4},
+                 {"in": "article:n1", "out": "concept:x", "weight": 0.5}],
+    "impacts": [{"in": "article:n1", "out": "company:a", "weight": -0.6},
+                {"in": "article:n1", "out": "company:b", "weight": 0.2}],
+    "mentions": [{"in": "pulse:p1", "out": "concept:x", "weight": 1}, {"in": "pulse:p1", "out": "company:a", "weight": 1},
+                 {"in": "pulse:p2", "out": "concept:x", "weight": 1}, {"in": "pulse:p2", "out": "company:a", "weight": 1},
+                 {"in": "pulse:p3", "out": "concept:x", "weight": 1}, {"in": "pulse:p3", "out": "company:b", "weight": 1}],
+}
+SENT = []
+
+
+def responder(sql):
+    SENT.append(sql)
+    out = default_responder(sql)
+    m = re.search(r"AS weight FROM (\w+);", sql)
+    if m:
+        out[-1]["result"] = [dict(r) for r in EDGES[m.group(1)]]
+    elif "FROM influence WHERE" in sql:
+        out[-1]["result"] = [{"node": "company:a", "name": "A", "score": 1.9165}]
+    return out
+
+
+async def test_centrality():
+    print("🕸️ Testing graph centrality, influence and co-mention scores...")
+    surreal = FakeSurreal(responder=responder).start()
+    os.environ["SURREAL_HOST"] = surreal.host
+    os.environ["SURREAL_PORT"] = str(surreal.port)
+    os.environ["SURREAL_PROTOCOL"] = "http"
+    os.environ["QUERY_CACHE_ENABLED"] = "false"
+    from db_client import SurrealClient
+    from centrality import CentralityEngine, rank_related
+
+    db = SurrealClient()
+    engine = CentralityEngine(db, write_batch=2, min_co_mentions=2)
+    try:
+        # 1. Edges are streamed into CSR arrays and scored in one pass
+        changed = await engine.flush()
+        graph = engine.graph
+        assert graph.edges == 11 and len(graph) == 7, (graph.edges, len(graph))
+        assert math.isclose(engine.rank.sum(), len(graph))
+        top = engine.top(limit=2)
+        assert top[0][0] == "concept:x" and top[1][0] == "company:a", top
+        print(f"✅ PageRank over {graph.edges} edges: {top} (mean node = 1.0)")
+
+        # 2. Influence and co-mention against hand-computed values
+        co = dict(zip(engine.scores["co_mention"]["keys"].tolist(), engine.scores["co_mention"]["values"].tolist()))
+        x, a, b = graph.node("concept:x"), graph.node("company:a"), graph.node("company:b")
+        strength, count = co[(x << 31) | a]
+        assert count == 2 and math.isclose(strength, 2 / math.sqrt(3 * 2)) and ((x << 31) | b) not in co
+        assert co[(a << 31) | x] == co[(x << 31) | a]
+        influence = dict(zip(engine.scores["influence"]["keys"].tolist(),
+                             engine.scores["influence"]["values"].tolist()))
+        score, direct, via, co_part, sentiment = influence[(x << 31) | a]
+        assert (direct, via, sentiment) == (0.8, 0.5 * 0.6, -1.0) and math.isclose(score, 0.8 + 0.3 + strength)
+        assert influence[(x << 31) | b] == [0.4 + 0.1, 0.4, 0.5 * 0.2, 0.0, 1.0]
+        print(f"✅ influence(x→a) = {score:.4f} (direct + via articles + co-mentions), x↔a co-mention {strength:.4f}")
+
+        # 3. Write-back in batches: 3 ranked nodes, 2 influence rows, 2 co-mention rows
+        writes = [s for s in SENT if "FOR $u IN $updates" in s]
+        assert changed == 7 and len(writes) == 2 + 1 + 1, (changed, len(writes))
+        assert "influence:[$u.concept, $u.company]" in SENT[-2].replace("type::thing('influence', ", "influence:")
+        assert "company: company:a" in SENT[-2].replace('"company": ', "company: ")
+        print(f"✅ {changed} score rows written in {len(writes)} requests of <= 2")
+
+        # 4. New edge: warm-started PageRank, only moved scores are rewritten
+        iterations = engine.stats["iterations"]
+        SENT.clear()
+        edge = {"in": "company:c", "out": "concept:x", "weight": 0.1}
+        EDGES["involves"].append(edge)
+        engine._pending.append(("involves", dict(edge)))
+        changed = await engine.flush()
+        assert engine.stats["iterations"] - iterations < iterations, engine.stats
+        assert 0 < changed < 8, changed
+        assert await engine.flush() == 0
+        print(f"✅ Incremental update rewrote {changed} rows "
+              f"({engine.stats['iterations'] - iterations} vs {iterations} PageRank iterations)")
+
+        # 5. An edge removed upstream: the next reload deletes the pair it supported
+        EDGES["mentions"] = [m for m in EDGES["mentions"] if m["in"] != "pulse:p2"]
+        engine._stale = True
+        SENT.clear()
+        await engine.flush()
+        deletes = [s for s in SENT if "DELETE type::thing('co_mention'" in s]
+        assert len(deletes) == 1 and engine.stats["deletes"] == 2, engine.stats
+        print("✅ Reload after an edge change deleted the vanished co-mention pair (both directions)")
+
+        # 6. Top-k read is one indexed query
+        SENT.clear()
+        result = await rank_related(db, "concept:x", "influence", k=5)
+        assert result["results"][0]["node"] == "company:a" and len(SENT) == 1
+        assert "FROM influence WHERE concept = $node ORDER BY score DESC LIMIT $k" in " ".join(SENT[0].split())
+        for bad in (("concept:x", "pagerank", 5), ("person:p", "influence", 5), ("concept:x", "influence", 0)):
+            try:
+                await rank_related(db, *bad)
+                raise AssertionError(f"accepted {bad}")
+            except ValueError:
+                pass
+        print("✅ rank_related reads the top k in one query and rejects bad arguments")
+
+        # 7. HTTP-only server: the WebSocket is refused, the engine keeps scoring by reloading
+        background = CentralityEngine(db, interval=0.05, min_co_mentions=2)
+        background.start()
+        try:
+            deadline = asyncio.get_running_loop().time() + 5
+            while background.stats["reconnects"] < len(background.kinds) or background.stats["polls"] < 1:
+                assert asyncio.get_running_loop().time() < deadline, background.stats
+                await asyncio.sleep(0.02)
+            loads = background.stats["loads"]
+            EDGES["involves"].append({"in": "company:d", "out": "concept:x", "weight": 0.9})
+            while "company:d" not in background.graph.ids:
+                assert asyncio.get_running_loop().time() < deadline, background.stats
+                await asyncio.sleep(0.02)
+            assert not background._task.done() and not any(background.live.values())
+            assert background.stats["loads"] > loads
+        finally:
+            await background.stop()
+        assert background._task is None
+        print(f"✅ No live socket: engine stayed up and reloaded {background.stats['loads']} times")
+    finally:
+        await db.close()
+        surreal.stop()
+
+
+if __name__ == "__main__":
+    asyncio.run(test_centrality())
@@ -0,0 +1,126 @@
+import asyncio
+import os
+import random
+import re
+import sys
+from datetime import datetime, timezone
+
+sys.path.append(os.path.join(os.path.dirname(__file__), "..", "src", "abyss-intelligence"))
+sys.path.append(os.path.dirname(__file__))
+
+from fake_surreal import FakeSurreal, default_responder
+
+SENT = []
+
+STORY = ("CATL said on Tuesday it will begin pilot production of solid state battery cells next year, "
+         "with energy density above 500 Wh/kg. The company expects costs to fall as volumes rise and "
+         "plans to supply several European carmakers from its Hungarian plant starting in 2027, according "
+         "to a statement released after the close of trading in Shenzhen.")
+OTHER = ("Tesla reported quarterly deliveries below analyst estimates as demand for its ageing lineup "
+         "softened in China and Europe, while the company continued to cut prices to defend market share "
+         "against BYD and a wave of cheaper domestic rivals.")
+
+
+def recorder(sql):
+    SENT.append(sql)
+    return default_responder(sql)
+
+
+async def test_dedup():
+    print("🧬 Testing ingestion dedup (canonical URLs, MinHash LSH, merges)...")
+    surreal = FakeSurreal(responder=recorder).start()
+    os.environ["SURREAL_HOST"] = surreal.host
+    os.environ["SURREAL_PORT"] = str(surreal.port)
+    os.environ["SURREAL_PROTOCOL"] = "http"
+    os.environ["QUERY_CACHE_ENABLED"] = "false"
+
+    from db_client import RecordId, SurrealClient
+    from dedup import Deduplicator, MinHashIndex, canonical_url, encode_signature
+    from ingest import BatchWriter, FeedIngestor, FeedItem, FeedSource
+
+    # 1. Syndicated copies of one URL share a canonical key; different pages don't
+    same = ["http://www.reuters.com/markets/catl-battery/?utm_source=x&utm_medium=rss",
+            "https://reuters.com/markets/catl-battery#comments",
+            "https://m.reuters.com:443/markets/catl-battery?fbclid=abc",
+            "https://REUTERS.com/markets//catl-battery/index.html"]
+    assert len({canonical_url(u) for u in same}) == 1, [canonical_url(u) for u in same]
+    assert canonical_url("https://x.com/a?id=1&b=2") == canonical_url("https://x.com/a?b=2&id=1")
+    assert canonical_url("https://x.com/a?id=1") != canonical_url("https://x.com/a?id=2")
+    assert canonical_url("https://x.com/a") != canonical_url("https://x.com/b")
+    print(f"✅ {len(same)} URL variants collapse to {canonical_url(same[0])}")
+
+    # 2. Light edits stay above the similarity threshold, unrelated text doesn't
+    dedup = Deduplicator(threshold=0.7, min_shingles=8)
+    base = dedup.fingerprint(STORY)
+    edited = dedup.fingerprint(STORY.replace("Tuesday", "Wednesday") + " (Reporting by Staff)")
+    other = dedup.fingerprint(OTHER)
+    close, far = float((base == edited).mean()), float((base == other).mean())
+    assert close >= 0.7 > far, (close, far)
+    assert dedup.fingerprint("CATL shares up 3%") is None
+    print(f"✅ MinHash similarity: edited copy {close:.2f}, unrelated story {far:.2f}")
+
+    # 3. The LSH index finds close signatures among many, and stays bounded
+    rng = random.Random(7)
+    words = (STORY + " " + OTHER).split()
+    index = MinHashIndex(threshold=0.7, capacity=2000)
+    docs = [[rng.choice(words) for _ in range(80)] for _ in range(2000)]
+    signatures = [dedup.fingerprint(" ".join(d)) for d in docs]
+    for i, signature in enumerate(signatures):
+        index.add(RecordId("article", str(i)), signature)
+    found = 0
+    for i in rng.sample(range(2000), 200):
+        copy = list(docs[i])
+        copy[rng.randrange(80)] = "syndicated"
+        match = index.nearest(dedup.fingerprint(" ".join(copy)))
+        found += match is not None and match[0] == RecordId("article", str(i))
+    assert found >= 195, found
+    assert index.nearest(other) is None
+    index.add(RecordId("article", "new"), other)
+    assert len(index) == 2000 and index.nearest(signatures[0]) is None
+    print(f"✅ LSH found {found}/200 one-word edits among 2000 docs; oldest entries are evicted at capacity")
+
+    # 4. The ingestor merges copies into the first row instead of inserting them
+    db = SurrealClient()
+    ingestor = FeedIngestor(db, [], writer=BatchWriter(db), dedup=Deduplicator(threshold=0.7, min_shingles=8))
+    source = FeedSource(url="http://feeds/reuters", kind="article")
+    now = datetime.now(timezone.utc)
+
+    def item(url, content):
+        return FeedItem("article", url, "CATL pilot line", content, "", now, source)
+
+    ingestor.stage(item(same[0], STORY), 0)
+    ingestor.stage(item(same[1], STORY), 0)  # same canonical URL
+    ingestor.stage(item("https://finance.yahoo.com/news/catl-solid-state", STORY + " (Reporting by Staff)"), 0)
+    ingestor.stage(item("https://other.example/tesla", OTHER), 0)
+    await ingestor.writer.flush()
+    sql = SENT[-1]
+    articles = re.search(r"LET \$articles = (.*);", sql).group(1)
+    merges = re.search(r"LET \$merges = (.*);", sql).group(1)
+    assert articles.count('"url_key"') == 2 and articles.count('"minhash"') == 2, articles
+    assert merges.count('"urls"') == 1 and "finance.yahoo.com" in merges and "#comments" in merges, merges
+    assert "FOR $m IN $merges" in sql
+    assert ingestor.stats["merged"] == 2 and ingestor.dedup.stats["exact"] == 1 and ingestor.dedup.stats["near"] == 1
+    print(f"✅ 4 items -> 2 inserted rows, 2 copies merged as extra sources ({ingestor.dedup.stats})")
+
+    # 5. The LSH index is rebuilt from stored fingerprints
+    def rows(sql):
+        SENT.append(sql)
+        if "minhash != NONE" in sql:
+            out = default_responder(sql)
+            out[-1]["result"] = [{"id": "article:abc", "minhash": encode_signature(base)}]
+            return out
+        return default_responder(sql)
+
+    surreal.responder = rows
+    fresh = Deduplicator(threshold=0.7, min_shingles=8)
+    await fresh.load(db, tables=("article",))
+    assert fresh.check("article", RecordId("article", "copy"), edited) == RecordId("article", "abc")
+    print("✅ Restarted ingestor matches new copies against fingerprints loaded from the DB")
+
+    await ingestor.http.aclose()
+    await db.close()
+    surreal.stop()
+
+
+if __name__ == "__main__":
+    asyncio.run(test_dedup())
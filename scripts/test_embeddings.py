@@ -0,0 +1,158 @@
+import asyncio
+import os
+import sys
+import tempfile
+import time
+
+sys.path.append(os.path.join(os.path.dirname(__file__), "..", "src", "abyss-intelligence"))
+sys.path.append(os.path.dirname(__file__))
+
+import numpy as np
+
+from fake_surreal import FakeSurreal, default_responder
+
+PENDING = {"article": [{"id": "article:a1", "title": "Chip export rules", "content": "New limits on GPUs."},
+                       {"id": "article:a2", "title": "Chip export rules", "content": "New limits on GPUs."}],
+           "pulse": [{"id": "pulse:p1", "content": "GPUs sold out again"}]}
+SENT = []
+
+
+def responder(sql):
+    SENT.append(sql)
+    out = default_responder(sql)
+    for table, rows in PENDING.items():
+        if f"FROM {table}" in sql and "embedded_at = NONE" in sql:
+            out[-1]["result"] = rows if "LET $after = null" in sql else []
+    return out
+
+
+class CountingEmbedder:
+    """HashEmbedder that records every batch it is asked for"""
+
+    def __init__(self, dim=64, fail=False):
+        from embeddings import HashEmbedder
+
+        self.inner = HashEmbedder(dim, latency=0.01)
+        self.name, self.model, self.dim, self.max_batch = "counting", self.inner.model, dim, 2048
+        self.batches = []
+        self.fail = fail
+
+    async def embed(self, texts):
+        self.batches.append(list(texts))
+        if self.fail:
+            raise RuntimeError("provider down")
+        return await self.inner.embed(texts)
+
+    async def close(self):
+        pass
+
+
+async def test_embeddings():
+    print("🧬 Testing the embedding stage...")
+    from embeddings import EmbeddingBatcher, EmbeddingStage, HashEmbedder, VectorCache, engagement_heat
+
+    # 1. The local provider is deterministic, unit length and similarity-preserving
+    hasher = HashEmbedder(256)
+    a, b, c = await hasher.embed(["Nvidia raises guidance", "Nvidia raises its guidance", "Rain in Paris"])
+    again = (await hasher.embed(["Nvidia raises guidance"]))[0]
+    assert np.array_equal(a, again) and np.isclose(np.linalg.norm(a), 1.0)
+    assert a @ b > 0.7 > 0.2 > a @ c, (a @ b, a @ c)
+    print(f"✅ Hash embedder: deterministic, cos(near) {a @ b:.2f} vs cos(far) {a @ c:.2f}")
+
+    # 2. Concurrent requests are micro-batched; identical texts are embedded once
+    provider = CountingEmbedder()
+    batcher = EmbeddingBatcher(provider, max_batch=8, max_delay=0.02, concurrency=2)
+    texts = [f"headline {i}" for i in range(20)]
+    results = await asyncio.gather(*(batcher.embed([t, "  syndicated\tstory "]) for t in texts))
+    sizes = sorted(len(batch) for batch in provider.batches)
+    assert sum(sizes) == 21 and max(sizes) == 8 and len(sizes) == 3, sizes
+    assert all(np.array_equal(r[1], results[0][1]) for r in results)
+    assert np.array_equal(results[0][1], (await provider.inner.embed(["syndicated story"]))[0])
+    m = batcher.metrics()
+    assert m["shared"] == 19 and m["calls"] == 3 and m["batch_size"]["max"] == 8, m
+    print(f"✅ 40 texts from 20 callers -> batches {sizes}, hit rate {m['hit_rate']:.0%}")
+
+    # 3. Disk cache: survives a restart, evicts least recently used
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "vectors", "cache.sqlite")
+        provider = CountingEmbedder()
+        batcher = EmbeddingBatcher(provider, VectorCache(path, max_entries=3), max_batch=16, max_delay=0.0)
+        first = [(await batcher.embed([t]))[0] for t in ("one", "two", "three")]
+        await batcher.embed(["one"])  # now most recently used; "two" is the oldest
+        await batcher.close()
+
+        provider = CountingEmbedder()
+        batcher = EmbeddingBatcher(provider, VectorCache(path, max_entries=3), max_batch=16, max_delay=0.0)
+        await batcher.embed(["four"])
+        cache = batcher.cache
+        assert cache.entries == 3 and cache.evictions == 1
+        again = await batcher.embed(["one", "two", "three", "four"])
+        assert provider.batches == [["four"], ["two"]], provider.batches
+        assert np.array_equal(first[0], again[0]) and np.array_equal(first[2], again[2])
+        m = batcher.metrics()
+        print(f"✅ Cache persisted across instances and evicted the LRU entry "
+              f"(hit rate {m['hit_rate']:.0%}, {m['cache']['entries']} entries)")
+        await batcher.close()
+
+        # A caller arriving while the cache write is in progress shares the call;
+        # when embed() returns the vector is already stored
+        class SlowCache(VectorCache):
+            def _put(self, items):
+                time.sleep(0.1)
+                super()._put(items)
+
+        provider = CountingEmbedder()
+        batcher = EmbeddingBatcher(provider, SlowCache(os.path.join(tmp, "slow.sqlite")), max_delay=0.0)
+        first = asyncio.create_task(batcher.embed(["five"]))
+        await asyncio.sleep(0.05)
+        assert not first.done()
+        second = await batcher.embed(["five"])
+        assert first.done() and provider.batches == [["five"]], provider.batches
+        assert batcher.key("five") in await batcher.cache.get_many([batcher.key("five")])
+        assert np.array_equal(first.result()[0], second[0]) and batcher.stats["shared"] == 1
+        print("✅ Vectors are cached before callers are answered; a repeat during the write is shared")
+        await batcher.close()
+
+    # 4. Failures reach every waiting caller and are counted
+    batcher = EmbeddingBatcher(CountingEmbedder(fail=True), max_batch=4, max_delay=0.0)
+    outcome = await asyncio.gather(batcher.embed(["x"]), batcher.embed(["x"]), return_exceptions=True)
+    assert all(isinstance(o, RuntimeError) for o in outcome) and batcher.stats["errors"] == 1
+    print("✅ A provider failure is raised to all callers sharing the batch")
+
+    # 5. Rows: fields set in place, cold pulses skipped
+    assert engagement_heat({"likes": 40, "reposts": 20, "views": 1000}) == 110
+    stage = EmbeddingStage(None, EmbeddingBatcher(CountingEmbedder(), max_delay=0.0), min_pulse_heat=100,
+                           quantize="int8")
+    pulses = [{"content": "hot take", "engagement": {"likes": 150}}, {"content": "quiet", "engagement": {}}]
+    assert await stage.embed_rows("pulse", pulses) == 1
+    assert len(pulses[0]["embedding"]) == 64 and pulses[0]["embedding_q"] and "embedding" not in pulses[1]
+    assert await stage.embed_rows("pulse", pulses) == 0 and stage.stats["skipped_cold"] == 2
+    print("✅ embed_rows: hot pulse embedded (with int8 copy), cold pulse left for later")
+
+    # 6. Backfill: one page read per table, vectors written back in one batched request
+    surreal = FakeSurreal(responder=responder).start()
+    os.environ.update(SURREAL_HOST=surreal.host, SURREAL_PORT=str(surreal.port), SURREAL_PROTOCOL="http",
+                      QUERY_CACHE_ENABLED="false")
+    from db_client import SurrealClient
+
+    db = SurrealClient()
+    provider = CountingEmbedder()
+    stage = EmbeddingStage(db, EmbeddingBatcher(provider, max_delay=0.0), min_pulse_heat=100)
+    try:
+        assert await stage.backfill("article") == 2 and await stage.backfill("pulse") == 1
+        writes = [s for s in SENT if "FOR $u IN $updates" in s]
+        assert len(writes) == 2 and "article:a2" in writes[0], writes
+        assert "null" not in writes[0].split("FOR $u")[0], "option<T> fields must be NONE, not NULL"
+        assert sum(len(b) for b in provider.batches) == 2, provider.batches
+        pulse_reads = [s for s in SENT if "FROM pulse" in s]
+        assert "(engagement.likes ?? 0) * 1.0" in pulse_reads[0] and "LET $min_heat = 100" in pulse_reads[0]
+        print(f"✅ Backfill wrote 3 rows in {len(writes)} requests with 2 provider texts "
+              f"(syndicated copy served from the batch)")
+    finally:
+        await stage.close()
+        await db.close()
+        surreal.stop()
+
+
+if __name__ == "__main__":
+    asyncio.run(test_embeddings())
@@ -0,0 +1,115 @@
+import asyncio
+import os
+import sys
+import tempfile
+from datetime import datetime, timezone
+
+sys.path.append(os.path.join(os.path.dirname(__file__), "..", "src", "abyss-intelligence"))
+sys.path.append(os.path.dirname(__file__))
+
+STORY = ("Battery maker says solid state cells enter pilot production next quarter with energy density "
+         "forty percent above current packs and charging to eighty percent in twelve minutes according "
+         "to the company which also expects margins to widen as yields improve through next year")
+
+
+class RecordingDB:
+    def __init__(self, rows=None):
+        self.params = []
+        # Rows per table returned to Deduplicator.load
+        self.rows = rows or {}
+
+    async def query(self, sql, params=None, **_):
+        self.params.append(params)
+        if "minhash" in sql:
+            return [{"status": "OK", "result": self.rows.get(params["table"], [])}]
+        return []
+
+
+def rollup(params, hour):
+    rows = [r for r in params.get("rollups", []) if r["bucket"].startswith(hour)]
+    assert len(rows) == 1, rows
+    return {"count": rows[0]["count"], "sum": round(rows[0]["sum"], 6), "negative": rows[0]["negative"],
+            "positive": rows[0]["positive"]}
+
+
+async def test_engagement():
+    print("📣 Testing engagement coalescing and sentiment roll-ups...")
+    from dedup import Deduplicator, canonical_url, encode_signature
+    from engagement import EngagementAggregator
+    from ingest import BatchWriter, FeedIngestor, FeedItem, FeedSource, record_id_for
+
+    db = RecordingDB()
+    with tempfile.TemporaryDirectory() as tmp:
+        agg = EngagementAggregator(db, wal_path=os.path.join(tmp, "engagement.wal"))
+
+        # 1. A repeated score for the same pulse counts once
+        for _ in range(3):
+            agg.add_sentiment("pulse:p1", -0.8, "x", "2026-03-01T09:15:00Z")
+        agg.add_sentiment("pulse:p2", 0.2, "x", "2026-03-01T09:40:00Z")
+        await agg.flush()
+        assert rollup(db.params[-1], "2026-03-01T09") == {"count": 2, "sum": -0.6, "negative": 1, "positive": 0}
+        print("✅ Same score sent three times: counted once in the roll-up")
+
+        # 2. A re-score after the flush sends only the difference
+        agg.add_sentiment("pulse:p1", 0.9, "x", "2026-03-01T09:15:00Z")
+        await agg.flush()
+        params = db.params[-1]
+        assert rollup(params, "2026-03-01T09") == {"count": 0, "sum": 1.7, "negative": -1, "positive": 1}
+        assert params["scores"] == [{"id": params["scores"][0]["id"], "score": 0.9}]
+        assert agg.stats["rescored"] == 1
+        print("✅ Re-scoring a pulse moves its contribution instead of adding a second one")
+
+        # 3. Ingest: copies of a pulse count as reposts of the original
+        writer = BatchWriter(db)
+        ingestor = FeedIngestor(db, [], writer=writer, engagement=agg)
+        now = datetime.now(timezone.utc)
+        source = FeedSource("https://rss/p", kind="pulse", platform="x")
+        copies = [FeedItem("pulse", f"https://x.com/u{i}/status/{i}", "", STORY + " " * i, f"@u{i}", now, source)
+                  for i in range(4)]
+        ingestor.stage(copies[0], 100)
+        ingestor.stage(copies[1], 100)
+        # Original still buffered: counted on the row that is about to be inserted
+        assert writer.pulses[0]["engagement"] == {"reposts": 1} and not len(agg)
+        await writer.flush()
+        ingestor.stage(copies[2], 100)
+        ingestor.stage(copies[3], 100)
+        original = str(record_id_for("pulse", canonical_url(copies[0].url)))
+        assert agg.deltas == {original: {"reposts": 2}}, (agg.deltas, original)
+        await agg.flush()
+        assert db.params[-1]["deltas"][0]["d"] == {"reposts": 2}
+        assert ingestor.stats["merged"] == 3
+        print("✅ 3 copies of one pulse -> 1 repost on the buffered row, 2 coalesced into one increment")
+
+        # 4. Re-deliveries of the original URL are not reposts, before or after a restart
+        for _ in range(3):
+            ingestor.stage(copies[0], 100)
+        assert not len(agg) and ingestor.stats["merged"] == 6
+        stored = {"id": original, "minhash": encode_signature(ingestor.dedup.fingerprint(STORY)),
+                  "url": copies[0].url, "sources": [c.url for c in copies[1:]]}
+        restarted = FeedIngestor(RecordingDB({"pulse": [stored]}), [], writer=BatchWriter(db),
+                                 dedup=Deduplicator(), engagement=agg)
+        await restarted.load()
+        assert not any(restarted.seen.add(c.url) for c in copies), "merged URLs should count as seen"
+        restarted.stage(copies[0], 100)
+        assert not len(agg) and not restarted.writer.pulses
+        print("✅ Original URL re-delivered 3 times and after a restart: no reposts, merged URLs already seen")
+        await agg.stop()
+        await ingestor.http.aclose()
+        await restarted.http.aclose()
+
+        # 5. Processes sharing a WAL path each own a slot; a crashed one's events are replayed once
+        wal = os.path.join(tmp, "shared.wal")
+        first = EngagementAggregator(RecordingDB(), wal_path=wal)
+        first.add("pulse:p1", {"likes": 5})
+        second = EngagementAggregator(RecordingDB(), wal_path=wal)
+        assert second.wal.path != wal and second.recover() == 0 and os.path.exists(wal)
+        first.wal.close()  # first process dies before flushing
+        third = EngagementAggregator(RecordingDB(), wal_path=wal)
+        assert third.wal.path == wal and third.recover() == 1 and third.deltas == {"pulse:p1": {"likes": 5}}
+        print("✅ A second process got its own WAL; the crashed process's slot was replayed by the next one")
+        second.wal.close()
+        third.wal.close()
+
+
+if __name__ == "__main__":
+    asyncio.run(test_engagement())
@@ -0,0 +1,75 @@
+import asyncio
+import os
+import sys
+import tempfile
+
+sys.path.append(os.path.join(os.path.dirname(__file__), "..", "src", "abyss-intelligence"))
+sys.path.append(os.path.dirname(__file__))
+
+from fake_surreal import FakeSurreal
+from mcp_pool import StdioClient, text_of
+
+SERVER = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src", "abyss-intelligence", "server.py")
+
+
+async def handshake(env):
+    client = StdioClient("abyss-intelligence", sys.executable, [SERVER], env, timeout=60)
+    await client.start()
+    try:
+        init, _ = await client.request("initialize", {
+            "protocolVersion": "2025-03-26", "capabilities": {},
+            "clientInfo": {"name": "test", "version": "0"}})
+        tools = await client.list_tools()
+        resources, _ = await client.request("resources/list")
+        result = await client.call_tool("trace_narrative_chain", {"start_node": "company:catl", "depth": 1})
+        config = await client.read_resource("config://surreal")
+        return init, tools, resources, text_of(result), config
+    finally:
+        await client.close()
+
+
+async def test_fast_start():
+    print("⚡ Testing fast start (handshake served from the manifest)...")
+    fake = FakeSurreal().start()
+    manifest = os.path.join(tempfile.mkdtemp(prefix="abyss-fast-start-"), "manifest.json")
+    env = {"SURREAL_HOST": fake.host, "SURREAL_PORT": str(fake.port), "SURREAL_PROTOCOL": "http",
+           "LIVE_EVENTS_ENABLED": "false", "TREND_ENGINE_ENABLED": "false", "LOG_LEVEL": "WARNING",
+           "MCP_MANIFEST_PATH": manifest}
+    try:
+        # 1. Eager start is the reference
+        eager = await handshake({**env, "MCP_FAST_START": "false"})
+        assert not os.path.exists(manifest)
+        print(f"✅ Eager start: {len(eager[1])} tools.")
+
+        # 2. First fast start has no manifest: initialize is answered from the stock FastMCP
+        #    handshake, the lists wait for the server, which records a manifest
+        from fast_start import default_handshake
+        default = default_handshake("abyss-intelligence")
+        assert default is not None and default["initialize"] == {
+            k: v for k, v in eager[0].items() if k != "protocolVersion"}, (default, eager[0])
+        first = await handshake({**env, "MCP_FAST_START": "true"})
+        assert os.path.exists(manifest), "manifest not written"
+        assert first == eager, "first fast start differs from eager start"
+        print("✅ First fast start answered initialize without a manifest and recorded one.")
+
+        # 3. Later fast starts answer from the manifest, identically to the real server
+        second = await handshake({**env, "MCP_FAST_START": "true"})
+        assert second[0] == eager[0], (second[0], eager[0])
+        assert second[1] == eager[1] and second[2] == eager[2]
+        assert second[3] == eager[3] and second[4] == eager[4]
+        print("✅ Manifest handshake matches the real server; tool calls and resources work after handover.")
+
+        # 4. A manifest that doesn't match the sources is ignored
+        with open(manifest, "w") as f:
+            f.write('{"key": "stale", "versions": ["x"], "initialize": {}, "lists": {}}')
+        third = await handshake({**env, "MCP_FAST_START": "true"})
+        assert third == eager
+        with open(manifest) as f:
+            assert '"stale"' not in f.read()
+        print("✅ Stale manifest ignored and rewritten.")
+    finally:
+        fake.stop()
+
+
+if __name__ == "__main__":
+    asyncio.run(test_fast_start())
@@ -0,0 +1,146 @@
+import asyncio
+import json
+import os
+import re
+import sys
+
+# Add src to path so we can import abyss-intelligence components
+sys.path.append(os.path.join(os.path.dirname(__file__), "..", "src", "abyss-intelligence"))
+sys.path.append(os.path.dirname(__file__))
+
+from fake_surreal import FakeSurreal, split_statements
+
+# (edge table, in, out, weight). concept:a -> b/c -> e -> b/c is a cycle.
+EDGES = [
+    ("involves", "company:b", "concept:a", 0.9),
+    ("involves", "company:g", "concept:a", -0.6),
+    ("involves", "company:c", "concept:a", 0.5),
+    ("involves", "company:d", "concept:a", 0.2),
+    ("involves", "company:b", "concept:e", 0.8),
+    ("involves", "company:c", "concept:e", 0.7),
+    ("involves", "company:d", "concept:f", 0.3),
+    # A busy node next to a quiet one, for the level-wide edge budget
+    ("involves", "person:x", "company:hub", 0.95),
+    ("involves", "person:x", "company:quiet", 0.9),
+    ("impacts", "company:hub", "concept:h1", 0.75),
+    ("impacts", "company:hub", "concept:h2", 0.7),
+    ("impacts", "company:hub", "concept:h3", 0.65),
+    ("impacts", "company:hub", "concept:h4", 0.6),
+    ("impacts", "company:quiet", "concept:q", 0.3),
+]
+
+_LET_RE = re.compile(r"^LET \$(\w+) = (.*)$", re.S)
+_ID_RE = re.compile(r"\b([a-z_]+:[a-z_0-9]+)\b")
+# Every edge statement the fake answered: (table, side, frontier, rows returned)
+EDGE_CALLS = []
+
+
+def ok(result):
+    return {"result": result, "status": "OK", "time": "1µs"}
+
+
+def responder(sql):
+    scope, out = {}, []
+    for stmt in split_statements(sql):
+        let = _LET_RE.match(stmt)
+        if let:
+            name, raw = let.groups()
+            try:
+                scope[name] = json.loads(raw)
+            except ValueError:
+                scope[name] = _ID_RE.findall(raw) or raw
+            out.append(ok(None))
+        elif " INSIDE $" in stmt:
+            table = re.search(r"FROM (\w+)", stmt).group(1)
+            side, var = re.search(r"WHERE (in|out) INSIDE \$(\w+)", stmt).groups()
+            frontier = set(scope[var])
+            threshold = scope.get("min_weight") if "$min_weight" in stmt else None
+            rows = [{"in": i, "out": o, "weight": w, "strength": abs(w or 0)} for t, i, o, w in EDGES
+                    if t == table and (i if side == "in" else o) in frontier]
+            rows = [r for r in rows if threshold is None or r["strength"] >= threshold]
+            rows.sort(key=lambda r: r["strength"], reverse=True)
+            rows = rows[:scope["edge_limit"]]
+            EDGE_CALLS.append((table, side, frontier, rows))
+            out.append(ok(rows))
+        elif "FROM $nodes" in stmt:
+            ids = scope[re.search(r"FROM \$(\w+)", stmt).group(1)]
+            out.append(ok([{"id": rid, "name": rid.split(":")[1]} for rid in ids]))
+        else:
+            out.append(ok([]))
+    return out
+
+
+def levels(result):
+    return {n["id"]: n["level"] for n in result["nodes"]}
+
+
+async def test_graph():
+    print("🕸️ Testing the bounded narrative trace...")
+
+    fake = FakeSurreal(responder=responder).start()
+    os.environ["SURREAL_HOST"] = fake.host
+    os.environ["SURREAL_PORT"] = str(fake.port)
+    os.environ["QUERY_CACHE_ENABLED"] = "false"
+
+    from db_client import SurrealClient
+    from graph import NarrativeTracer
+
+    client = SurrealClient()
+    tracer = NarrativeTracer(client)
+    try:
+        # 1. Depth limit: nothing beyond `depth`, one request per level
+        before = fake.requests
+        result = await tracer.trace("concept:a", depth=0)
+        assert levels(result) == {"concept:a": 0} and result["edges"] == [] and fake.requests - before == 1
+        before = fake.requests
+        result = await tracer.trace("concept:a", depth=1)
+        assert levels(result) == {"concept:a": 0, "company:b": 1, "company:g": 1, "company:c": 1, "company:d": 1}
+        assert fake.requests - before == 2 and not result["truncated"]
+        print("✅ Depth 0 returns the start only, depth 1 stops at the neighbours")
+
+        # 2. Cycles: a node reached twice keeps its first level and is expanded once
+        EDGE_CALLS.clear()
+        result = await tracer.trace("concept:a", depth=5)
+        assert levels(result) == {"concept:a": 0, "company:b": 1, "company:g": 1, "company:c": 1,
+                                  "company:d": 1, "concept:e": 2, "concept:f": 2}, levels(result)
+        # Eight edge statements per level (four tables, both directions) share one frontier
+        expanded = [node for table, side, frontier, _ in EDGE_CALLS if (table, side) == ("mentions", "in")
+                    for node in frontier]
+        assert len(expanded) == len(set(expanded)) == 7, expanded
+        assert {(e["in"], e["out"]) for e in result["edges"]} >= {("company:b", "concept:e"), ("company:c", "concept:e")}
+        print(f"✅ Cycle a-b-e-c-a walked without revisiting ({len(EDGE_CALLS) // 8} expanding levels)")
+
+        # 3. Fan-out: each level keeps its strongest new nodes and says it was cut
+        result = await tracer.trace("concept:a", depth=2, max_fanout=[2, 1])
+        assert levels(result) == {"concept:a": 0, "company:b": 1, "company:g": 1, "concept:e": 2}, levels(result)
+        assert result["truncated"]
+        # Level 2 reads 2 x 1 edges: d -> f is beyond the budget, which is reported too
+        result = await tracer.trace("concept:a", depth=2, max_fanout=[4, 1])
+        assert "concept:e" in levels(result) and "concept:f" not in levels(result) and result["truncated"]
+        print("✅ Per-level fan-out keeps the strongest neighbours (|-0.6| beats 0.5) and flags truncation")
+
+        # 4. min_weight prunes on the absolute weight, in the query
+        result = await tracer.trace("concept:a", depth=2, min_weight=0.55)
+        assert levels(result) == {"concept:a": 0, "company:b": 1, "company:g": 1, "concept:e": 2}, levels(result)
+        assert all(abs(e["weight"]) >= 0.55 for e in result["edges"])
+        print("✅ min_weight drops weak edges (and keeps strong negative ones)")
+
+        # 5. The edge LIMIT (2 x fan-out) is shared by the whole level, not given per node:
+        #    the busy node's strong edges take the budget and the quiet node's weak one is never read
+        EDGE_CALLS.clear()
+        result = await tracer.trace("person:x", depth=2, max_fanout=2)
+        level_1 = [rows for table, side, frontier, rows in EDGE_CALLS
+                   if table == "impacts" and side == "in" and frontier == {"company:hub", "company:quiet"}]
+        assert len(level_1) == 1 and len(level_1[0]) == 4, level_1
+        assert {r["in"] for r in level_1[0]} == {"company:hub"}
+        assert levels(result) == {"person:x": 0, "company:hub": 1, "company:quiet": 1,
+                                  "concept:h1": 2, "concept:h2": 2}, levels(result)
+        assert result["truncated"]
+        print("✅ A level reads at most 2 x fan-out edges per table and direction, strongest first across the frontier")
+    finally:
+        await client.close()
+        fake.stop()
+
+
+if __name__ == "__main__":
+    asyncio.run(test_graph())
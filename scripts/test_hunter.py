@@ -0,0 +1,135 @@
+import asyncio
+import os
+import re
+import sys
+import time
+
+sys.path.append(os.path.join(os.path.dirname(__file__), "..", "src", "abyss-intelligence"))
+sys.path.append(os.path.dirname(__file__))
+
+from fake_surreal import FakeSurreal, default_responder
+
+SCHEMA = os.path.join(os.path.dirname(__file__), "init_db.surql")
+
+# A tiny directive table: id -> row, next_run as epoch seconds (None = field missing)
+NOW = time.time()
+DIRECTIVES = {
+    f"directive:d{i}": {"id": f"directive:d{i}", "type": "monitor_user", "target": f"user{i}",
+                        "status": "active", "next_run": NOW - 60 + i, "lease_owner": None}
+    for i in range(5)
+}
+# Leased by a worker that died; its lease ran out a minute ago
+DIRECTIVES["directive:dead"] = {"id": "directive:dead", "type": "track_keyword", "target": "chips",
+                                "status": "active", "next_run": NOW - 120, "lease_owner": "hunter-dead"}
+# Created before next_run existed
+DIRECTIVES["directive:legacy"] = {"id": "directive:legacy", "type": "monitor_user", "target": "old",
+                                  "status": "active", "next_run": None, "lease_owner": None}
+DIRECTIVES["directive:paused"] = {"id": "directive:paused", "type": "monitor_user", "target": "p",
+                                  "status": "paused", "next_run": NOW - 300, "lease_owner": None}
+COMPLETES = []
+
+
+def param(sql, name):
+    match = re.search(rf"LET \${name} = (.+?);\n", sql)
+    return match.group(1) if match else None
+
+
+def responder(sql):
+    out = default_responder(sql)
+    now = time.time()
+    if "UPDATE directive SET next_run = time::now() WHERE next_run = NONE" in sql:
+        for row in DIRECTIVES.values():
+            if row["next_run"] is None:
+                row["next_run"] = now
+    elif "LET $due" in sql:
+        limit, owner = int(param(sql, "limit")), param(sql, "owner").strip('"')
+        ttl = float(param(sql, "lease_ttl").strip('"').rstrip("s"))
+        due = sorted((r for r in DIRECTIVES.values()
+                      if r["status"] == "active" and r["next_run"] is not None and r["next_run"] <= now),
+                     key=lambda r: r["next_run"])[:limit]
+        before = [dict(r) for r in due]
+        for row in due:
+            row.update(lease_owner=owner, next_run=now + ttl)
+        out[-1]["result"] = before
+    elif "FOR $c IN $done" in sql:
+        owner = param(sql, "owner").strip('"')
+        ids = re.findall(r"\"id\": (directive:\w+)", param(sql, "done"))
+        COMPLETES.append(ids)
+        for rid in ids:
+            row = DIRECTIVES[rid]
+            if row["lease_owner"] == owner:
+                row.update(lease_owner=None, next_run=now + 900)
+    return out
+
+
+async def drain(hunter):
+    """Lease once, let the workers finish, then flush"""
+    await hunter.run_once()
+    await hunter.queue.join()
+    await hunter.flush()
+
+
+async def test_hunter():
+    print("🎯 Testing the Hunter scheduler...")
+    surreal = FakeSurreal(responder=responder).start()
+    os.environ.update(SURREAL_HOST=surreal.host, SURREAL_PORT=str(surreal.port), SURREAL_PROTOCOL="http",
+                      QUERY_CACHE_ENABLED="false")
+    from db_client import SurrealClient
+    from hunter import Hunter, default_handler, load_handlers
+
+    db = SurrealClient()
+    seen = []
+
+    async def handler(directive):
+        seen.append(directive["id"])
+        if directive["target"] == "user3":
+            raise RuntimeError("rate limited upstream")
+        return {"posts": 1}
+
+    hunter = Hunter(db, handlers={"monitor_user": handler, "track_keyword": handler}, workers=4,
+                    lease_ttl=600, jitter=0, target_rate=0)
+    hunter._tasks = [asyncio.create_task(hunter._worker()) for _ in range(hunter.workers)]
+    try:
+        # 1. Due directives are leased oldest first, an expired lease is taken over,
+        #    and all completions go back in one request
+        await drain(hunter)
+        assert sorted(seen) == sorted(["directive:dead"] + [f"directive:d{i}" for i in range(5)]), seen
+        assert hunter.stats["leased"] == 6 and hunter.stats["recovered"] == 1, hunter.stats
+        assert hunter.stats["completed"] == 5 and hunter.stats["failed"] == 1, hunter.stats
+        assert len(COMPLETES) == 1 and len(COMPLETES[0]) == 6, COMPLETES
+        assert all(r["lease_owner"] is None for r in DIRECTIVES.values())
+        print(f"✅ Leased 6 (1 recovered from a dead worker), recorded completions in {len(COMPLETES)} request")
+
+        # 2. Nothing is due until the interval passes; paused and legacy rows are not leased
+        seen.clear()
+        await drain(hunter)
+        assert seen == [] and len(COMPLETES) == 1
+        print("✅ Completed directives wait for their next run")
+
+        # 3. The schema backfill makes directives created before next_run existed due again
+        with open(SCHEMA, encoding="utf-8") as f:
+            backfill = [line for line in f if line.startswith("UPDATE directive SET next_run")]
+        assert len(backfill) == 1, "init_db.surql must backfill next_run"
+        await db.query(backfill[0])
+        await drain(hunter)
+        assert seen == ["directive:legacy"] and len(COMPLETES) == 2, seen
+        print("✅ Backfilled legacy directive was leased")
+
+        # 4. The daemon's handlers come from HUNTER_HANDLERS
+        assert load_handlers("") == {}
+        assert load_handlers(" fetch_10k = hunter:default_handler ,") == {"fetch_10k": default_handler}
+        for bad in ("fetch_10k", "fetch_10k=hunter", "=hunter:default_handler", "x=hunter:load_handlers"):
+            try:
+                load_handlers(bad)
+                raise AssertionError(bad)
+            except ValueError:
+                pass
+        print("✅ HUNTER_HANDLERS maps types to async functions; malformed entries are rejected")
+    finally:
+        await hunter.stop()
+        await db.close()
+        surreal.stop()
+
+
+if __name__ == "__main__":
+    asyncio.run(test_hunter())
@@ -0,0 +1,86 @@
+import asyncio
+import os
+import re
+import sys
+from datetime import datetime, timezone
+
+sys.path.append(os.path.join(os.path.dirname(__file__), "..", "src", "abyss-intelligence"))
+sys.path.append(os.path.dirname(__file__))
+
+SCHEMA = os.path.join(os.path.dirname(__file__), "init_db.surql")
+_FIELD_RE = re.compile(r"^DEFINE FIELD (?:IF NOT EXISTS |OVERWRITE )?([\w.*]+) ON (?:TABLE )?(\w+)"
+                       r"(?: FLEXIBLE)? TYPE (.+?)(?: DEFAULT .+?| ASSERT .+?)?;", re.MULTILINE)
+
+
+def schema_fields(path=SCHEMA):
+    """{table: {field: (optional, has_default)}} for top-level fields of init_db.surql"""
+    tables = {}
+    for m in _FIELD_RE.finditer(open(path, encoding="utf-8").read()):
+        name, table, spec = m.groups()
+        if "." in name:
+            continue
+        has_default = " DEFAULT " in m.group(0)
+        tables.setdefault(table, {})[name] = (spec.strip().startswith("option<"), has_default)
+    return tables
+
+
+def check_rows(table, rows, fields):
+    """SCHEMAFULL rules SurrealDB v2 enforces on insert: required fields present, no NULL anywhere"""
+    for row in rows:
+        for name, (optional, has_default) in fields.items():
+            if not optional and not has_default:
+                assert row.get(name) is not None, f"{table}.{name} is required but missing in {row}"
+        for name, value in row.items():
+            if name != "id":
+                assert name in fields, f"{table}.{name} is not defined in the schema"
+                # NULL is not NONE: option<T> rejects it
+                assert value is not None, f"{table}.{name} is null in {row}"
+
+
+class RecordingDB:
+    def __init__(self):
+        self.params = []
+
+    async def query(self, sql, params=None, **_):
+        self.params.append(params)
+        return []
+
+
+async def test_ingest_schema():
+    print("📐 Testing flushed ingest rows against init_db.surql...")
+    from db_client import RecordId
+    from embeddings import EmbeddingBatcher, EmbeddingStage, HashEmbedder
+    from ingest import BatchWriter, EntityMatcher, FeedIngestor, FeedItem, FeedSource
+
+    fields = schema_fields()
+    assert fields["mentions"]["sentiment"][0], "mentions.sentiment must be optional: ingest doesn't know it"
+
+    db = RecordingDB()
+    for quantize in (None, "", "int8"):
+        embedder = None if quantize is None else EmbeddingStage(
+            db, EmbeddingBatcher(HashEmbedder(64), max_delay=0.0), min_pulse_heat=0, quantize=quantize)
+        writer = BatchWriter(db, embedder=embedder)
+        ingestor = FeedIngestor(db, [], matcher=EntityMatcher({"Tesla": RecordId("company", "tsla")}),
+                                writer=writer)
+        now = datetime.now(timezone.utc)
+        items = [FeedItem("article", "https://example.com/a", "Tesla recalls cars", "Tesla said...", "", now,
+                          FeedSource("https://rss/a")),
+                 FeedItem("pulse", "https://x.com/p/1", "", "Tesla to the moon", "@fan", now,
+                          FeedSource("https://rss/p", kind="pulse", platform="x"))]
+        for item in items:
+            ingestor.stage(item, 100)
+        await writer.flush()
+        params = db.params[-1]
+        if embedder is not None:
+            assert params["articles"][0]["embedding"] and params["pulses"][0]["embedding"]
+            assert ("embedding_q" in params["pulses"][0]) == bool(quantize)
+            await embedder.close()
+        for table, key in (("article", "articles"), ("pulse", "pulses"), ("mentions", "mentions")):
+            assert params[key], key
+            check_rows(table, params[key], fields[table])
+        mode = "no embedder" if quantize is None else f"embedded, quantize={quantize or 'off'}"
+        print(f"✅ article, pulse and mentions rows satisfy the schema ({mode})")
+
+
+if __name__ == "__main__":
+    asyncio.run(test_ingest_schema())
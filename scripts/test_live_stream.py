@@ -0,0 +1,112 @@
+import asyncio
+import sys
+import os
+
+# Add src to path so we can import abyss-intelligence components
+sys.path.append(os.path.join(os.path.dirname(__file__), "..", "src", "abyss-intelligence"))
+sys.path.append(os.path.dirname(__file__))
+
+from fake_surreal import FakeSurrealRpc
+
+# Rows the fake "database" holds for catch-up queries
+STORED = []
+
+
+def catch_up_responder(sql, vars):
+    if "type::table($table)" in sql:
+        rows = [r for r in STORED if r["created_at"] > vars["since"]][: vars["limit"]]
+        return [{"result": rows, "status": "OK", "time": "1µs"}]
+    return [{"result": [], "status": "OK", "time": "1µs"}]
+
+
+def pulse(n):
+    return {"id": f"pulse:p{n}", "content": f"pulse {n}", "created_at": f"2030-01-01T00:00:{n:02d}Z"}
+
+
+async def next_events(sub, n):
+    return [await asyncio.wait_for(sub.__anext__(), 2) for _ in range(n)]
+
+
+async def test_live_stream():
+    print("📡 Testing live query subscriptions...")
+
+    fake = await FakeSurrealRpc(responder=catch_up_responder).start()
+    os.environ["SURREAL_PROTOCOL"] = "ws"
+    os.environ["SURREAL_HOST"] = fake.host
+    os.environ["SURREAL_PORT"] = str(fake.port)
+
+    from db_client import SurrealClient
+    from live import LiveFeed
+
+    client = SurrealClient()
+    sub = client.subscribe("pulse", max_queue=4)
+    try:
+        await sub.start()
+        assert sub.live_id in fake.live_queries
+        print("✅ LIVE SELECT registered.")
+
+        # 1. Notifications are pushed, no polling
+        for n in (1, 2):
+            STORED.append(pulse(n))
+            await fake.notify("pulse", "CREATE", pulse(n))
+        events = await next_events(sub, 2)
+        assert [e["id"] for e in events] == ["pulse:p1", "pulse:p2"], events
+        assert all(e["source"] == "live" for e in events)
+        print("✅ Events delivered in order from notifications.")
+
+        # 2. Backpressure: overflow drops notifications, then catch-up fills the gap
+        for n in range(3, 13):
+            STORED.append(pulse(n))
+            await fake.notify("pulse", "CREATE", pulse(n))
+        await asyncio.sleep(0.1)
+        events = await next_events(sub, 10)
+        assert [e["id"] for e in events] == [f"pulse:p{n}" for n in range(3, 13)], [e["id"] for e in events]
+        assert sub._queue.qsize() <= 4 and sub.caught_up > 0
+        print(f"✅ Bounded queue overflowed and caught up ({sub.caught_up} rows replayed, none duplicated).")
+
+        # 3. Reconnect: the live query is re-issued and the gap is filled
+        old_id = sub.live_id
+        await fake.drop_connections()
+        STORED.append(pulse(13))
+        for _ in range(50):
+            if sub.live_id and sub.live_id != old_id:
+                break
+            await asyncio.sleep(0.05)
+        assert sub.live_id and sub.live_id != old_id and sub.resubscribes == 1
+        event = (await next_events(sub, 1))[0]
+        assert event["id"] == "pulse:p13" and event["source"] == "catch_up", event
+        STORED.append(pulse(14))
+        await fake.notify("pulse", "CREATE", pulse(14))
+        assert (await next_events(sub, 1))[0]["id"] == "pulse:p14"
+        print("✅ Resubscribed after connection loss, missed rows resumed from timestamp.")
+
+        # 4. Updates pass through untouched
+        await fake.notify("pulse", "UPDATE", {**pulse(14), "content": "edited"})
+        event = (await next_events(sub, 1))[0]
+        assert event["action"] == "UPDATE" and event["record"]["content"] == "edited"
+        print("✅ UPDATE notifications delivered.")
+
+        # 5. LiveFeed keeps the latest N events per table
+        await sub.close()
+        assert not fake.live_queries
+        feed = LiveFeed(client, tables=["pulse"], size=3)
+        feed.start()
+        for _ in range(50):
+            if fake.live_queries:
+                break
+            await asyncio.sleep(0.05)
+        for n in range(15, 20):
+            await fake.notify("pulse", "CREATE", pulse(n))
+        await asyncio.sleep(0.1)
+        assert [e["id"] for e in feed.latest("pulse", 10)] == ["pulse:p19", "pulse:p18", "pulse:p17"]
+        await feed.stop()
+        print("✅ LiveFeed buffers the latest events per table.")
+    finally:
+        await sub.close()
+        await client.close()
+        await fake.stop()
+        print("👋 Test Complete.")
+
+
+if __name__ == "__main__":
+    asyncio.run(test_live_stream())
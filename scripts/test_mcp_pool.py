@@ -0,0 +1,83 @@
+import asyncio
+import os
+import sys
+import time
+
+sys.path.append(os.path.dirname(__file__))
+
+from mcp_pool import StdioPool, normalize_url
+
+FAKE = os.path.join(os.path.dirname(__file__), "fake_mcp_search.py")
+
+
+def server(name, delay, offset, fmt="json", tool="search"):
+    return {"type": "stdio", "command": sys.executable,
+            "args": [FAKE, "--name", name, "--delay", str(delay), "--offset", str(offset), "--format", fmt,
+                     "--tool", tool]}
+
+
+SERVERS = {
+    "brave": server("brave", 0.6, 0, "text", "brave_web_search"),
+    "tavily": server("tavily", 0.9, 2, tool="tavily_search"),
+    "duckduckgo": server("duckduckgo", 1.2, 4),
+    "stuck": server("stuck", 30, 0),
+}
+
+
+async def test_mcp_pool():
+    print("🐝 Testing the pooled stdio MCP client and swarm fan-out...")
+
+    pool = StdioPool(SERVERS, timeout=5)
+    try:
+        # 1. All servers are warmed concurrently
+        t0 = time.perf_counter()
+        errors = await pool.start()
+        assert not any(errors.values()), errors
+        print(f"✅ {len(SERVERS)} servers warmed in {time.perf_counter() - t0:.1f}s.")
+
+        # 2. One query to every search server takes the slowest one, not the sum
+        swarm = ["brave", "tavily", "duckduckgo"]
+        result = await pool.fan_out("surrealdb v2", swarm)
+        total = sum(result["servers"][s]["ms"] for s in swarm)
+        assert result["elapsed_ms"] < 0.8 * total, (result["elapsed_ms"], total)
+        assert all(result["servers"][s]["hits"] == 5 for s in swarm), result["servers"]
+        print(f"✅ Fan-out took {result['elapsed_ms']:.0f} ms vs {total:.0f} ms if run one after another.")
+
+        # 3. Hits are merged by normalized URL, agreeing servers first
+        urls = [r["url"] for r in result["results"]]
+        assert len(urls) == 9, urls
+        assert len({normalize_url(u) for u in urls}) == len(urls)
+        top = result["results"][0]
+        assert set(top["sources"]) == {"brave", "tavily", "duckduckgo"}, top
+        assert result["servers"]["brave"]["tool"] == "brave_web_search"
+        print(f"✅ 15 hits merged into {len(urls)} unique URLs; {top['url']} confirmed by 3 servers.")
+
+        # 4. Requests are pipelined on one warm process
+        t0 = time.perf_counter()
+        outs = await asyncio.gather(*(pool.call_tool("brave", "brave_web_search", {"query": f"q{i}"})
+                                      for i in range(20)))
+        elapsed = time.perf_counter() - t0
+        assert len(outs) == 20 and elapsed < 3, elapsed
+        assert len(pool.clients["brave"]) == 1
+        print(f"✅ 20 concurrent calls on one process in {elapsed:.2f}s (0.6s each).")
+
+        # 5. A stuck server times out on its own; the others still answer
+        t0 = time.perf_counter()
+        result = await pool.fan_out("timeouts", ["brave", "stuck"], timeout=1.5)
+        assert "timed out" in result["servers"]["stuck"]["error"], result["servers"]
+        assert result["servers"]["brave"]["hits"] == 5 and time.perf_counter() - t0 < 3
+        print(f"✅ Stuck server reported '{result['servers']['stuck']['error']}', others unaffected.")
+
+        # 6. A server that exits is restarted on the next call
+        dead = pool.clients["tavily"][0]
+        dead.proc.kill()
+        await dead.proc.wait()
+        result = await pool.search("tavily", "after restart")
+        assert "error" not in result and pool.clients["tavily"][0] is not dead, result
+        print("✅ Dead server process restarted transparently.")
+    finally:
+        await pool.close()
+
+
+if __name__ == "__main__":
+    asyncio.run(test_mcp_pool())
@@ -0,0 +1,85 @@
+import asyncio
+import os
+import sys
+
+sys.path.append(os.path.join(os.path.dirname(__file__), "..", "src", "abyss-intelligence"))
+sys.path.append(os.path.dirname(__file__))
+
+import numpy as np
+
+from fake_surreal import default_responder, split_statements, FakeSurreal
+
+DIM = 1536
+rng = np.random.default_rng(3)
+BASE = rng.normal(size=DIM)
+VECTORS = {f"pulse:p{i}": (BASE + rng.normal(scale=0.2 * (i + 1), size=DIM)).tolist() for i in range(4)}
+# Rows in the database: p1 deleted, p2 compacted by retention
+STORED = {"pulse:p0": True, "pulse:p2": False, "pulse:p3": True}
+SENT = []
+
+
+def responder(sql):
+    from quantize import encode
+
+    SENT.append(sql)
+    out = default_responder(sql)
+    for i, statement in enumerate(split_statements(sql)):
+        if "embedded_at > <datetime>$since" in statement:
+            # Loaded before p1 was deleted and p2 compacted
+            out[i]["result"] = [] if "1970" not in sql else [
+                {"id": rid, **encode(v, "int8"), "embedded_at": f"2026-01-0{n + 1}T00:00:00Z"}
+                for n, (rid, v) in enumerate(VECTORS.items())]
+        elif statement.startswith("SELECT VALUE id FROM $cand_all"):
+            out[i]["result"] = [rid for rid, indexed in STORED.items() if indexed]
+        elif "FROM $cand_0" in statement:
+            out[i]["result"] = [{"id": rid, "platform": "x", "snippet": "", "embedding": VECTORS[rid]}
+                                for rid, indexed in STORED.items() if indexed]
+    return out
+
+
+async def test_quantized_search():
+    print("🗜️ Testing the compact vector index against deletes and compaction...")
+    from quantize import QuantizedIndex
+
+    # 1. Removed records are masked, then reclaimed once they are half the index
+    index = QuantizedIndex("int8", DIM)
+    for rid, vector in VECTORS.items():
+        index.add_vector(rid, vector)
+    # Replacing a record rewrites its own row
+    index.search([BASE.tolist()], 1)
+    index.add_vector("pulse:p3", VECTORS["pulse:p0"])
+    scores = dict(index.search([BASE.tolist()], 4)[0])
+    assert scores["pulse:p3"] == scores["pulse:p0"] and len(index) == 4, scores
+    index.add_vector("pulse:p3", VECTORS["pulse:p3"])
+    assert index.remove(["pulse:p0", "pulse:missing"]) == 1 and len(index) == 3
+    found = [rid for rid, _ in index.search([BASE.tolist()], 10)[0]]
+    assert found[0] == "pulse:p1" and "pulse:p0" not in found and len(found) == 3, found
+    assert index.remove(["pulse:p1", "pulse:p2"]) == 2 and index._codes.shape[0] == 1
+    index.add_vector("pulse:p0", VECTORS["pulse:p0"])
+    assert [rid for rid, _ in index.search([BASE.tolist()], 10)[0]] == ["pulse:p0", "pulse:p3"]
+    print("✅ QuantizedIndex.remove masks rows and compacts the matrix")
+
+    # 2. Search: candidates gone from the database are neither returned nor kept
+    surreal = FakeSurreal(responder=responder).start()
+    os.environ.update(SURREAL_HOST=surreal.host, SURREAL_PORT=str(surreal.port), SURREAL_PROTOCOL="http",
+                      QUERY_CACHE_ENABLED="false")
+    from db_client import SurrealClient
+    from search import VectorSearch
+
+    db = SurrealClient()
+    search = VectorSearch(db, mode="int8", refresh_interval=3600)
+    try:
+        result = await search.search("pulse", [BASE.tolist()], k=3)
+        assert [h["id"] for h in result["hits"]] == ["pulse:p0", "pulse:p3"], result["hits"]
+        assert "embedding_q != NONE" in SENT[-1].split("FROM $cand_0")[1]
+        assert search.evicted == 2 and len(search._index("pulse")) == 2
+        result = await search.search("pulse", [BASE.tolist()], k=3)
+        assert "pulse:p1" not in SENT[-1] and "pulse:p2" not in SENT[-1] and search.evicted == 2
+        print(f"✅ Deleted and compacted rows dropped from results and evicted ({search.evicted} ids)")
+    finally:
+        await db.close()
+        surreal.stop()
+
+
+if __name__ == "__main__":
+    asyncio.run(test_quantized_search())
@@ -0,0 +1,114 @@
+import asyncio
+import os
+import sys
+import time
+
+sys.path.append(os.path.join(os.path.dirname(__file__), "..", "src", "abyss-intelligence"))
+sys.path.append(os.path.dirname(__file__))
+
+from fake_surreal import FakeSurreal, default_responder
+
+READS = []
+
+
+def responder(sql):
+    if "SELECT" in sql:
+        READS.append(sql)
+    out = default_responder(sql)
+    out[-1]["result"] = [{"reads": len(READS)}]
+    return out
+
+
+async def test_query_cache():
+    print("🗃️ Testing the query cache...")
+    from cache import QueryCache, is_write, tables_in
+    from db_client import RecordId
+
+    # 1. Tables read or written, including graph hops without a closing arrow
+    cases = {
+        "SELECT * FROM pulse WHERE created_at > $t;": {"pulse"},
+        "SELECT <-mentions.in AS pulses FROM company:tsla;": {"mentions", "company"},
+        "SELECT count(<-mentions) AS n FROM ONLY $id;": {"mentions"},
+        "SELECT ->involves->concept.name AS concepts FROM company;": {"involves", "concept", "company"},
+        "SELECT ->(impacts WHERE weight > 0)->company AS hit FROM article;": {"impacts", "company", "article"},
+        "SELECT <->co_mention AS pairs FROM $node;": {"co_mention"},
+        "UPDATE concept:ai SET heat += 1;": {"concept"},
+        "INSERT RELATION IGNORE INTO mentions $mentions;": {"mentions"},
+        "RELATE $pulse->mentions->$company SET sentiment = 0.4;": {"mentions"},
+        "RELATE pulse:p1->mentions->company:tsla;": {"pulse", "mentions", "company"},
+        "DELETE FROM pulse WHERE compacted_at != NONE;": {"pulse"},
+    }
+    for sql, expected in cases.items():
+        assert tables_in(sql) == expected, (sql, tables_in(sql))
+    assert tables_in("UPDATE $c.id SET last_run = time::now();", {"done": [{"id": RecordId("directive", "d1")}]}) \
+        == {"directive"}
+    assert is_write("RELATE $a->mentions->$b;") and is_write("INSERT RELATION INTO mentions $m;")
+    assert not is_write("SELECT <-mentions<-pulse FROM company;")
+    print(f"✅ tables_in: {len(cases)} statements, traversals in both directions")
+
+    # 2. TTL: an entry lives for the shortest TTL among its tables
+    cache = QueryCache(max_bytes=10_000, ttls={"pulse": 0.05, "company": 60}, enabled=True)
+    cache.put("q1", {"pulse", "company"}, [{"result": [1]}])
+    cache.put("q2", {"company"}, [{"result": [2]}])
+    assert cache.get("q1") == [{"result": [1]}]
+    time.sleep(0.08)
+    assert cache.get("q1") is None and cache.get("q2") == [{"result": [2]}]
+    assert cache.expirations == 1 and "q1" not in cache._by_table.get("pulse", ())
+    print("✅ Entries expire after the shortest TTL of the tables they read")
+
+    # 3. Byte bound: least recently used goes first
+    cache = QueryCache(max_bytes=300, ttls={"company": 60}, enabled=True)
+    row = [{"result": ["x" * 60]}]
+    for key in ("a", "b", "c"):
+        cache.put(key, {"company"}, row)
+    cache.get("a")  # "b" is now the oldest
+    cache.put("d", {"company"}, row)
+    assert cache.get("b") is None and all(cache.get(k) is not None for k in ("a", "c", "d"))
+    assert cache.evictions == 1 and cache.bytes <= cache.max_bytes
+    cache.put("huge", {"company"}, [{"result": ["x" * 1000]}])
+    assert cache.get("huge") is None and len(cache._entries) == 3
+    print(f"✅ LRU eviction under {cache.max_bytes} bytes ({cache.bytes} used), oversized results not stored")
+
+    # 4. Writes through the client drop the reads they affect
+    surreal = FakeSurreal(responder=responder).start()
+    os.environ.update(SURREAL_HOST=surreal.host, SURREAL_PORT=str(surreal.port), SURREAL_PROTOCOL="http",
+                      QUERY_CACHE_ENABLED="true")
+    from db_client import SurrealClient
+
+    db = SurrealClient()
+    reads = {
+        "pulses": "SELECT <-mentions<-pulse AS pulses FROM company:tsla;",
+        "mention_count": "SELECT count(->mentions) AS n FROM pulse:p9;",
+        "concept": "SELECT name FROM concept:ai;",
+        "directives": "SELECT * FROM directive WHERE status = 'active';",
+    }
+    writes = [
+        ("RELATE pulse:p1->mentions->company:tsla;", {"pulses", "mention_count"}),
+        ("INSERT RELATION IGNORE INTO mentions [{in: pulse:p2, out: company:tsla}];", {"pulses", "mention_count"}),
+        ("UPDATE concept:ai SET heat += 1;", {"concept"}),
+        ("UPDATE $id SET status = 'paused';", {"directives"}),
+    ]
+    try:
+        for sql, dropped in writes:
+            first = {name: await db.query(sql_read) for name, sql_read in reads.items()}
+            again = {name: await db.query(sql_read) for name, sql_read in reads.items()}
+            assert again == first, "not cached"
+            params = {"id": RecordId("directive", "d1")} if "$id" in sql else None
+            await db.query(sql, params)
+            stale = {name for name, sql_read in reads.items() if await db.query(sql_read) != first[name]}
+            assert stale == dropped, (sql, stale, dropped)
+        print(f"✅ RELATE / INSERT RELATION / UPDATE invalidated exactly the affected reads "
+              f"({db.cache.invalidations} invalidations)")
+
+        # A write whose tables cannot be told drops everything
+        await db.query("SELECT name FROM concept:ai;")
+        await db.query("UPDATE $target SET seen = true;", {"target": "unknown"})
+        assert db.cache.stats()["entries"] == 0
+        print("✅ A write to unknown tables clears the cache")
+    finally:
+        await db.close()
+        surreal.stop()
+
+
+if __name__ == "__main__":
+    asyncio.run(test_query_cache())
@@ -0,0 +1,119 @@
+import asyncio
+import os
+import sys
+from datetime import datetime, timezone
+
+sys.path.append(os.path.join(os.path.dirname(__file__), "..", "src", "abyss-intelligence"))
+sys.path.append(os.path.dirname(__file__))
+
+from fake_surreal import FakeSurreal, default_responder
+
+NOW = datetime(2026, 6, 1, tzinfo=timezone.utc)
+POINTS = [{"id": f"trend_metric:t{i}", "concept": "concept:ai", "source": "google", "value": float(v),
+           "timestamp": f"2026-01-01T{h:02d}:{m:02d}:00Z"}
+          for i, (h, m, v) in enumerate([(9, 0, 4), (9, 30, 8), (9, 45, 2), (10, 15, 5)])]
+# Rows served once per kind of query, then the tier is empty
+PAGES = {"FROM trend_metric": POINTS, "FROM pulse WHERE created_at < <datetime>$before AND compacted_at": ["pulse:p1"],
+         "FROM pulse WHERE created_at < <datetime>$before LIMIT": ["pulse:old1", "pulse:old2"]}
+REPORT = {"FROM pulse WHERE created_at < <datetime>$before GROUP ALL": {"rows": 2, "bytes": 3000},
+          "compacted_at = NONE\n    GROUP ALL": {"rows": 1, "content_bytes": 280, "floats": 1536, "q_bytes": 0},
+          "FROM trend_metric\n    WHERE": {"rows": 4, "bytes": 1200}, ") GROUP ALL": {"added": 2}}
+SENT = []
+FAIL_ROLLUP = []
+
+
+def responder(sql):
+    SENT.append(sql)
+    out = default_responder(sql)
+    if "TRANSACTION" in sql and FAIL_ROLLUP:
+        out[-1] = {"result": "The query was not executed due to a failed transaction", "status": "ERR", "time": "1µs"}
+        return out
+    if "GROUP ALL" in sql:
+        statements = [s for s in sql.split(";") if s.strip().startswith("SELECT")]
+        for i, statement in enumerate(statements):
+            for marker, row in REPORT.items():
+                if marker in statement:
+                    out[len(out) - len(statements) + i]["result"] = [row]
+        return out
+    for marker, rows in PAGES.items():
+        if marker in sql and ("ORDER BY timestamp" in sql or "SELECT VALUE id" in sql):
+            out[-1]["result"] = list(rows)
+            PAGES[marker] = []
+    return out
+
+
+async def test_retention():
+    print("🗄️ Testing time-tiered retention...")
+    from retention import RetentionEngine, rollup
+
+    # 1. Rollups: per hour bucket, last value by time; hourly rows fold into the same daily row
+    hourly = rollup(POINTS, "1h")
+    by_bucket = {r["bucket"][11:13]: r for r in hourly}
+    assert set(by_bucket) == {"09", "10"}
+    nine = by_bucket["09"]
+    assert (nine["count"], nine["sum"], nine["min"], nine["max"], nine["last"]) == (3, 14.0, 2.0, 8.0, 2.0), nine
+    assert nine["last_at"].startswith("2026-01-01T09:45")
+    daily = rollup([dict(r, timestamp=r["bucket"]) for r in hourly], "1d")
+    direct = rollup(POINTS, "1d")
+    assert len(daily) == 1 and {k: daily[0][k] for k in ("count", "sum", "min", "max", "last")} == \
+        {k: direct[0][k] for k in ("count", "sum", "min", "max", "last")} == \
+        {"count": 4, "sum": 19.0, "min": 2.0, "max": 8.0, "last": 5.0}
+    print(f"✅ 4 points -> {len(hourly)} hourly rollups -> 1 daily rollup (count/sum/min/max/last match)")
+
+    for bad in ({"pulse_full_days": 30, "pulse_max_days": 7}, {"trend_raw_days": 90, "trend_hourly_days": 30}):
+        try:
+            RetentionEngine(None, **bad)
+            raise AssertionError(f"accepted {bad}")
+        except ValueError:
+            pass
+
+    # An explicit 0 disables a tier even when the environment sets it
+    os.environ["RETENTION_PULSE_FULL_DAYS"] = "30"
+    cutoffs = RetentionEngine(None, pulse_full_days=0, pulse_max_days=0, trend_daily_days=0).cutoffs(NOW)
+    del os.environ["RETENTION_PULSE_FULL_DAYS"]
+    assert cutoffs["pulse.compact"] is None and cutoffs["pulse.delete"] is None and cutoffs["trend.hourly"]
+    print("✅ Tier ages are validated; 0 disables a tier")
+
+    surreal = FakeSurreal(responder=responder).start()
+    os.environ.update(SURREAL_HOST=surreal.host, SURREAL_PORT=str(surreal.port), SURREAL_PROTOCOL="http",
+                      QUERY_CACHE_ENABLED="false")
+    from db_client import SurrealClient
+
+    db = SurrealClient()
+    engine = RetentionEngine(db, pulse_full_days=30, pulse_max_days=365, trend_raw_days=90, trend_hourly_days=365,
+                             trend_daily_days=0, batch=500, pause=0)
+    try:
+        # 2. Dry run: rows and bytes per tier, nothing written
+        report = await engine.report(NOW)
+        tiers = report["tiers"]
+        assert set(tiers) == {"pulse.delete", "pulse.compact", "trend.hourly", "trend.daily"}, tiers
+        assert tiers["pulse.compact"]["reclaim_bytes"] == 280 + 8 * 1536
+        assert tiers["trend.hourly"] == dict(tiers["trend.hourly"], rows=4, rows_added=2, reclaim_bytes=1200 - 2 * 256)
+        assert tiers["pulse.compact"]["before"].startswith("2026-05-02")
+        assert not any(("DELETE" in s or "UPDATE" in s or "UPSERT" in s) for s in SENT)
+        print(f"✅ Dry run: ~{report['reclaim_bytes']} bytes reclaimable, no writes")
+
+        # 3. A run: expired pulses deleted, older ones compacted, raw points rolled up in one transaction
+        SENT.clear()
+        done = await engine.run_once(NOW)
+        assert done == {"pulse.delete": 2, "pulse.compact": 1, "trend.hourly": 4, "trend.daily": 0}, done
+        rollups = [s for s in SENT if "TRANSACTION" in s]
+        assert len(rollups) == 1 and "trend_metric:t3" in rollups[0] and "UPSERT type::thing('trend_rollup'" in rollups[0]
+        assert any("compacted_at = time::now()" in s and "pulse:p1" in s for s in SENT)
+        assert any("DELETE $id" in s and "pulse:old2" in s for s in SENT)
+        assert engine.stats["rollups"] == 2 and engine.stats["deleted"] == 2 and engine.stats["batches"] == 3
+        print(f"✅ Run: {done} in {engine.stats['batches']} batches")
+
+        # 4. A failed rollup transaction stops the tier for this run and is counted
+        PAGES["FROM trend_metric"] = POINTS
+        FAIL_ROLLUP.append(True)
+        done = await engine.run_once(NOW)
+        assert done["trend.hourly"] == 0 and engine.stats["failures"] == 1 and engine.stats["rolled_up"] == 4
+        print("✅ A failed batch is left for the next run without double counting")
+    finally:
+        await db.close()
+        surreal.stop()
+
+
+if __name__ == "__main__":
+    asyncio.run(test_retention())
@@ -0,0 +1,114 @@
+import asyncio
+import os
+import re
+import shutil
+import sys
+import tempfile
+
+import numpy as np
+
+sys.path.append(os.path.join(os.path.dirname(__file__), "..", "src", "abyss-intelligence"))
+sys.path.append(os.path.dirname(__file__))
+
+from fake_surreal import FakeSurreal, default_responder
+
+PULSES = [{"id": f"pulse:p{i:03d}", "content": f"帖子 {i} \"quoted\" \\ {'x' * (i % 5)}",
+           "platform": ("x", "weibo")[i % 2], "sentiment_score": None if i % 4 == 0 else (i - 50) / 50,
+           "engagement": {"likes": i, "tags": ["a", i]}, "dup_count": i,
+           "created_at": f"2025-03-01T12:00:{i % 60:02d}" + (".25Z" if i % 3 else "Z"),
+           # Vectors start late and skip rows; the last chunk has a float in an int-looking column
+           **({"embedding": [float(i), 1.0, -0.5, 0.125]} if i >= 5 and i % 7 else {}),
+           **({"url_key": "https://x.com/a"} if i > 90 else {})} for i in range(100)]
+PULSES[-1]["dup_count"] = 2.5
+MENTIONS = [{"id": f"mentions:m{i}", "in": f"pulse:p{i:03d}", "out": "company:⟨tsla-us⟩", "sentiment": 0.5}
+            for i in range(10)]
+SENT = []
+
+
+def responder(sql):
+    SENT.append(sql)
+    m = re.search(r'LET \$table = "(\w+)";', sql)
+    if not m:
+        return default_responder(sql)
+    rows = {"pulse": PULSES, "mentions": MENTIONS}.get(m.group(1), [])
+    after = re.search(r"LET \$after = (\S+);", sql)
+    limit = int(re.search(r"LET \$limit = (\d+);", sql).group(1))
+    rows = [r for r in rows if not after or r["id"] > after.group(1)][:limit]
+    out = default_responder(sql)
+    out[-1]["result"] = [dict(r) for r in rows]
+    return out
+
+
+async def test_snapshot():
+    print("🗃️ Testing columnar snapshots (export, mapped reads, restore)...")
+    surreal = FakeSurreal(responder=responder).start()
+    os.environ["SURREAL_HOST"] = surreal.host
+    os.environ["SURREAL_PORT"] = str(surreal.port)
+    os.environ["SURREAL_PROTOCOL"] = "http"
+    os.environ["QUERY_CACHE_ENABLED"] = "false"
+    from db_client import SurrealClient
+    from snapshot import Snapshot, export_snapshot, import_snapshot
+
+    db = SurrealClient()
+    path = tempfile.mkdtemp(prefix="abyss-snapshot-test-")
+    try:
+        # 1. Keyset pages of 16 rows, chunks of 40 rows (so kinds differ between chunks)
+        counts = await export_snapshot(db, path, tables=("pulse", "mentions", "directive"), batch=16,
+                                       chunk_rows=40, vector_dtype="float16")
+        assert counts == {"pulse": 100, "mentions": 10, "directive": 0}, counts
+        pages = [s for s in SENT if "$after" in s]
+        assert len(pages) == 100 // 16, len(pages)
+        print(f"✅ Exported {sum(counts.values())} rows in keyset pages ({len(pages)} follow-up pages)")
+
+        # 2. Records come back exactly as SurrealDB returned them
+        with Snapshot(path) as snap:
+            for original, restored in zip(PULSES, snap.records("pulse")):
+                expected = {k: v for k, v in original.items() if v is not None and k != "embedding"}
+                vector = restored.pop("embedding", None)
+                assert restored == expected, (restored, expected)
+                if "embedding" in original:
+                    assert np.allclose(vector, original["embedding"])
+            assert list(snap.records("directive")) == []
+            kinds = snap.columns("pulse")
+            assert kinds["created_at"] == "time" and kinds["engagement"] == "json" and kinds["platform"] == "str"
+            assert snap.columns("mentions")["out"] == "link"
+            scores = snap.column("pulse", "sentiment_score")
+            assert isinstance(scores, np.ma.MaskedArray) and scores.count() == 75
+            assert snap.column("pulse", "dup_count").dtype == np.float64
+            assert snap.column("pulse", "created_at").dtype == np.dtype("datetime64[ns]")
+            matrix, valid = snap.vectors("pulse")
+            assert matrix.shape == (100, 4) and matrix.dtype == np.float16 and valid.sum() == 81
+            assert not matrix[:5].any() and matrix[8, 0] == 8
+        print(f"✅ Mapped reads: {len(kinds)} pulse columns, {int(valid.sum())} float16 vectors, nulls masked")
+
+        # 3. Restore: node tables first, pre-rendered literals bound as $rows
+        SENT.clear()
+        sent = await import_snapshot(db, path, batch=30, concurrency=3)
+        assert sent == counts, sent
+        inserts = [s for s in SENT if "INSERT" in s]
+        # Batches don't span chunks: pulse 30+10, 30+10, 20; mentions 10
+        assert len(inserts) == 6, len(inserts)
+        assert "INSERT RELATION IGNORE INTO mentions $rows" in inserts[-1]
+        assert "out: company:⟨tsla-us⟩" in inserts[-1].replace('"out": ', "out: ")
+        body = inserts[0]
+        assert 'd"2025-03-01T12:00:00Z"' in body and 'd"2025-03-01T12:00:01.25Z"' in body
+        assert '"id": pulse:p000' in body and '"sentiment_score"' not in body.split("}, {")[0]
+        assert '"embedding": [5,1,-0.5,0.125]' in body
+        print(f"✅ Restored in {len(inserts)} transactions with record links, datetimes and vectors typed")
+
+        # 4. An interrupted export leaves no manifest and is refused
+        os.remove(os.path.join(path, "manifest.json"))
+        try:
+            Snapshot(path)
+            raise AssertionError("incomplete snapshot accepted")
+        except ValueError:
+            pass
+        print("✅ Snapshot without a manifest is rejected as incomplete")
+    finally:
+        shutil.rmtree(path, ignore_errors=True)
+        await db.close()
+        surreal.stop()
+
+
+if __name__ == "__main__":
+    asyncio.run(test_snapshot())
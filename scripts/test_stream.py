@@ -0,0 +1,131 @@
+import asyncio
+import json
+import os
+import random
+import re
+import sys
+from contextlib import aclosing
+
+sys.path.append(os.path.join(os.path.dirname(__file__), "..", "src", "abyss-intelligence"))
+sys.path.append(os.path.dirname(__file__))
+
+from fake_surreal import FakeSurreal, default_responder
+
+ROWS = [{"id": f"pulse:{i}", "content": f"row {i} " + "é中" * (i % 7), "score": i / 3} for i in range(3000)]
+
+
+def responder(sql):
+    out = default_responder(sql)
+    if "FROM pulse" in sql:
+        # scan_records binds $start / $limit as LET statements
+        start = re.search(r"LET \$start = (\d+);", sql)
+        limit = re.search(r"LET \$limit = (\d+);", sql)
+        start = int(start.group(1)) if start else 0
+        out[-1]["result"] = ROWS[start:start + int(limit.group(1))] if limit else ROWS
+    elif "THROW" in sql:
+        out[-1] = {"result": "An error occurred: boom", "status": "ERR", "time": "1ms"}
+    return out
+
+
+async def test_stream():
+    print("🌊 Testing streamed result decoding and progressive responses...")
+    from jsonstream import ResultStream
+
+    # 1. Any chunking of a response decodes to the same rows and statement metadata
+    doc = [{"result": ROWS[:200], "status": "OK", "time": "2ms"}, {"result": 42, "status": "OK", "time": "1ms"},
+           {"result": "An error occurred", "status": "ERR", "time": "1ms"}, {"result": [], "status": "OK", "time": "0ms"}]
+    body = json.dumps(doc, ensure_ascii=False).encode("utf-8")
+    rng = random.Random(1)
+    for _ in range(50):
+        decoder, events, i = ResultStream(), [], 0
+        while i < len(body):
+            n = rng.randint(1, 600)
+            events += decoder.feed(body[i:i + n])
+            i += n
+        events += decoder.close()
+        assert [e[2] for e in events if e[0] == "row"] == ROWS[:200]
+        assert [e[2].get("result") for e in events if e[0] == "end"] == [None, 42, "An error occurred", None]
+    try:
+        decoder = ResultStream()
+        decoder.feed(body[:-10])
+        decoder.close()
+        raise AssertionError("truncated body accepted")
+    except ValueError:
+        pass
+    print("✅ 50 random chunkings (1-600 bytes, split UTF-8) decode identically; truncation is detected")
+
+    surreal = FakeSurreal(responder=responder).start()
+    os.environ["SURREAL_HOST"] = surreal.host
+    os.environ["SURREAL_PORT"] = str(surreal.port)
+    os.environ["SURREAL_PROTOCOL"] = "http"
+    os.environ["QUERY_CACHE_ENABLED"] = "false"
+    from db_client import SurrealClient
+    from shaping import ResponseShaper
+
+    db = SurrealClient()
+
+    # 2. SurrealClient.stream yields the caller's rows, skipping the USE/LET prefix
+    rows = [row async for _, row in db.stream("SELECT * FROM pulse WHERE score > $min;", {"min": 0})]
+    assert rows == ROWS
+    try:
+        async for _ in db.stream("THROW 'boom';"):
+            pass
+        raise AssertionError("ERR statement did not raise")
+    except Exception as e:
+        assert "SurrealDBQL Error" in str(e)
+    print(f"✅ stream() yielded {len(rows)} rows; an ERR statement raises")
+
+    # 3. Stopping early closes the response
+    seen = 0
+    async with aclosing(db.stream("SELECT * FROM pulse;")) as stream:
+        async for _ in stream:
+            seen += 1
+            if seen == 10:
+                break
+    assert seen == 10
+    print("✅ Consumer stopped after 10 rows and closed the stream")
+
+    # 4. render_stream fills one page, then hands out a cursor for the rest
+    shaper = ResponseShaper(max_bytes=8192)
+    args = {"table": "pulse", "since": None, "until": None, "limit": 3000}
+    reports = []
+
+    async def progress(n, nbytes):
+        reports.append(n)
+
+    offset, collected, pages = 0, [], 0
+    while True:
+        rows = db.scan_records("pulse", None, None, offset, 3000)
+        page = json.loads(await shaper.render_stream({"table": "pulse"}, rows, "rows", "scan_records", args,
+                                                     offset, progress, progress_every=20))
+        pages += 1
+        assert len(json.dumps(page, ensure_ascii=False, separators=(",", ":")).encode("utf-8")) <= 8192
+        collected += page["rows"]
+        if "next_cursor" not in page:
+            assert page["total"] == len(collected)
+            break
+        assert "total" not in page
+        offset = shaper.offset("scan_records", args, page["next_cursor"])
+        if pages >= 3:
+            break
+    assert collected == ROWS[:len(collected)] and reports and reports[0] == 20
+    try:
+        shaper.offset("scan_records", {**args, "table": "article"}, page["next_cursor"])
+        raise AssertionError("cursor accepted for other arguments")
+    except ValueError:
+        pass
+    print(f"✅ {pages} pages of <= 8 KB carried {len(collected)} rows in order, {len(reports)} progress reports")
+
+    # 5. Vector copies and MinHash signatures never reach the client
+    blobs = {"embedding": [0.1] * 8, "embedding_q": "AAEC", "embedding_scale": 0.02, "minhash": "c2ln"}
+    for table in ("pulse", "article", "company"):
+        shaped = shaper.shape({"id": f"{table}:x", "name": "x", **blobs})
+        assert shaped == {"id": f"{table}:x", "name": "x"}, shaped
+    print("✅ embedding, embedding_q, embedding_scale and minhash are dropped from every table")
+
+    await db.close()
+    surreal.stop()
+
+
+if __name__ == "__main__":
+    asyncio.run(test_stream())
@@ -0,0 +1,91 @@
+import asyncio
+import json
+import os
+import sys
+import time
+
+# Add src to path so we can import abyss-intelligence components
+sys.path.append(os.path.join(os.path.dirname(__file__), "..", "src", "abyss-intelligence"))
+sys.path.append(os.path.dirname(__file__))
+
+from fake_surreal import FakeSurreal, split_statements
+
+POINTS = [{"period": f"2025Q{q}", "published_at": f"2025-0{q * 2}-20T00:00:00Z", "value": 0.1 + q / 100}
+          for q in range(1, 5)]
+
+
+def responder(sql):
+    out = []
+    for stmt in split_statements(sql):
+        if "metric_series" in stmt:
+            # The series lookup is artificially slow
+            time.sleep(0.08)
+            out.append({"result": [{"points": POINTS}], "status": "OK", "time": "1µs"})
+        else:
+            out.append({"result": [], "status": "OK", "time": "1µs"})
+    return out
+
+
+async def test_telemetry():
+    print("⏱️  Testing latency spans, histograms and the slow-query log...")
+
+    fake = FakeSurreal(responder=responder).start()
+    os.environ["SURREAL_HOST"] = fake.host
+    os.environ["SURREAL_PORT"] = str(fake.port)
+    os.environ["QUERY_CACHE_ENABLED"] = "false"
+    os.environ["LIVE_EVENTS_ENABLED"] = "false"
+    os.environ["SLOW_QUERY_MS"] = "50"
+    os.environ["LOG_LEVEL"] = "ERROR"
+
+    import server
+    from telemetry import NULL_SPAN, Histogram, Telemetry
+
+    db = server.get_db()
+    try:
+        # 1. A tool call is timed end to end and split into stages
+        for _ in range(3):
+            await server.mcp.call_tool("verify_financial_claim", {"ticker": "TSLA", "metric_name": "gross_margin"})
+        snap = json.loads(server.get_latency_metrics())
+        tool = snap["tools"]["verify_financial_claim"]
+        assert tool["total"]["count"] == 3, tool
+        assert {"decode", "handler", "shape", "serialize", "encode", "bytes"} <= set(tool), set(tool)
+        assert tool["total"]["p50"] >= 80 and tool["bytes"]["max"] > 100, tool
+        print(f"✅ Tool span: total p50 {tool['total']['p50']} ms, stages {sorted(tool)}.")
+
+        # 2. Queries carry template names and network/parse stages
+        query = snap["queries"]["verify_financials.series"]
+        assert {"build", "network", "parse", "bytes"} <= set(query) and query["network"]["p50"] >= 80, query
+        print(f"✅ Query span: network p50 {query['network']['p50']} ms, {query['bytes']['max']} bytes.")
+
+        # 3. Slow queries are logged with normalized SQL, rows and the calling tool
+        slow = snap["slow_queries"][-1]
+        assert slow["name"] == "verify_financials.series" and slow["tool"] == "verify_financial_claim", slow
+        assert slow["rows"] == 1 and "\n" not in slow["sql"] and "metric_series" in slow["sql"], slow
+        print(f"✅ Slow-query log: {len(snap['slow_queries'])} entries, {slow['ms']} ms, rows={slow['rows']}.")
+
+        # 4. Ad-hoc queries are grouped by verb and tables
+        await db.query("SELECT * FROM company WHERE ticker = $t;", {"t": "TSLA"})
+        assert "select:company" in db.telemetry.snapshot()["queries"]
+        print("✅ Raw queries grouped as 'select:company'.")
+
+        # 5. Rolling window: samples older than the window age out
+        hist = Histogram([1, 2, 4, 8], window=60, slots=6)
+        for v in (0.5, 3, 3, 7):
+            hist.record(v, now=1000)
+        snap = hist.snapshot(1000)
+        assert snap["count"] == 4 and snap["p50"] == 4 and snap["max"] == 7
+        assert hist.snapshot(1061)["count"] == 0 and hist.snapshot(1061)["total"] == 4
+        print("✅ Histograms bucket, report percentiles and age out.")
+
+        # 6. Disabled telemetry hands out the shared no-op span
+        os.environ["TELEMETRY_ENABLED"] = "false"
+        off = Telemetry()
+        assert off.span("query", "x") is NULL_SPAN and off.snapshot()["queries"] == {}
+        print("✅ TELEMETRY_ENABLED=false records nothing.")
+    finally:
+        await db.close()
+        fake.stop()
+
+
+if __name__ == "__main__":
+    asyncio.run(test_telemetry())
@@ -0,0 +1,114 @@
+import asyncio
+import os
+import sys
+
+# Add src to path so we can import abyss-intelligence components
+sys.path.append(os.path.join(os.path.dirname(__file__), "..", "src", "abyss-intelligence"))
+sys.path.append(os.path.dirname(__file__))
+
+from fake_surreal import FakeSurreal, default_responder
+
+SENT = []
+
+# start_node values an agent (or a prompt injection) might pass to trace_narrative_chain
+INJECTIONS = [
+    "company:catl; DELETE company",
+    "company:catl WHERE true",
+    "company:catl, person:elon",
+    "company:`catl`; REMOVE TABLE company",
+    "company:⟨catl⟩; DELETE company",
+    "company:catl -- comment",
+    "(DELETE company)",
+    "$auth",
+    "company",
+    "company:",
+    ":catl",
+    "company:catl\n;DELETE company",
+]
+
+
+def recorder(sql):
+    SENT.append(sql)
+    return default_responder(sql)
+
+
+def expect_error(fn, *args, **kwargs):
+    try:
+        fn(*args, **kwargs)
+    except ValueError as e:
+        return str(e)
+    raise AssertionError(f"{fn.__name__}{args} did not raise")
+
+
+async def test_templates():
+    print("🧾 Testing query templates and parameter binding...")
+
+    fake = FakeSurreal(responder=recorder).start()
+    os.environ["SURREAL_HOST"] = fake.host
+    os.environ["SURREAL_PORT"] = str(fake.port)
+    os.environ["QUERY_CACHE_ENABLED"] = "false"
+
+    from db_client import SurrealClient
+    from templates import QueryTemplate, validate_all
+
+    client = SurrealClient()
+    try:
+        # 1. Every declared template is valid
+        count = validate_all()
+        assert count >= 10, count
+        print(f"✅ {count} registered templates validated.")
+
+        # 2. Injection-style start nodes never reach the database
+        for payload in INJECTIONS:
+            try:
+                await client.trace_narrative_chain(payload, depth=1)
+                raise AssertionError(f"accepted {payload!r}")
+            except ValueError:
+                pass
+        assert fake.requests == 0, fake.requests
+        print(f"✅ {len(INJECTIONS)} injection-style start_node values rejected before any request.")
+
+        # 3. A quoted key with SurrealQL inside stays one escaped record literal
+        await client.trace_narrative_chain("company:⟨x⟩; DELETE company; ⟩", depth=0)
+        assert "LET $frontier = [company:⟨x\\⟩; DELETE company; ⟩];" in SENT[-1], SENT[-1]
+        print("✅ Quoted record keys are bound as escaped literals, never interpolated.")
+
+        # 4. Declarations are checked when they are made
+        errors = {
+            "undeclared": lambda: QueryTemplate("t", "SELECT * FROM x WHERE a = $a AND b = $b;", a="string"),
+            "unused": lambda: QueryTemplate("t", "SELECT * FROM x WHERE a = $a;", a="string", b="int"),
+            "unbalanced": lambda: QueryTemplate("t", "SELECT * FROM x WHERE (a = $a;", a="string"),
+            "type": lambda: QueryTemplate("t", "SELECT * FROM x WHERE a = $a;", a="str"),
+            "terminator": lambda: QueryTemplate("t", "SELECT * FROM x WHERE a = $a", a="string"),
+        }
+        for name, declare in errors.items():
+            expect_error(declare)
+        local = QueryTemplate("t", "LET $c = 1; FOR $m IN $ms { UPDATE $m.id SET n = $c + $this.n; };", ms="array<object>")
+        assert local.write and set(local.params) == {"ms"}
+        print("✅ Undeclared/unused params, unbalanced brackets and unknown types fail at declaration.")
+
+        # 5. Values are typed before anything is sent
+        t = QueryTemplate("t", "SELECT * FROM $company WHERE n > $n AND at < <duration>$ttl AND u = $url;",
+                          company="record<company>", n="int", ttl="duration", url="option<string>")
+        assert "expected a company record" in expect_error(t.bind, {"company": "person:elon", "n": 1, "ttl": "5s"})
+        expect_error(t.bind, {"company": "company:catl", "n": "1", "ttl": "5s"})
+        expect_error(t.bind, {"company": "company:catl", "n": 1, "ttl": "5s; DELETE company"})
+        expect_error(t.bind, {"company": "company:catl", "n": 1, "ttl": "5s", "extra": 1})
+        expect_error(t.bind, {"company": "company:catl", "ttl": "5s"})
+        bound = t.bind({"company": "company:catl", "n": 1, "ttl": "5s"})
+        assert str(bound["company"]) == "company:catl" and bound["url"] is None
+        print("✅ Record tables, ints, durations, unknown and missing params are checked on bind.")
+
+        # 6. The prebuilt path sends exactly what the generic path would
+        from financials import SERIES
+        await client.run(SERIES, ticker="TSLA", metric="gross_margin")
+        await client.query(SERIES.sql, {"ticker": "TSLA", "metric": "gross_margin"})
+        assert SENT[-1] == SENT[-2], (SENT[-2], SENT[-1])
+        print("✅ Template requests match the generic query text.")
+    finally:
+        await client.close()
+        fake.stop()
+
+
+if __name__ == "__main__":
+    asyncio.run(test_templates())
@@ -0,0 +1,99 @@
+import asyncio
+import os
+import re
+import sys
+from datetime import datetime, timedelta, timezone
+
+sys.path.append(os.path.join(os.path.dirname(__file__), "..", "src", "abyss-intelligence"))
+sys.path.append(os.path.dirname(__file__))
+
+from fake_surreal import FakeSurreal, default_responder
+
+START = datetime.now(timezone.utc) - timedelta(days=1)
+# The trend_metric table
+TABLE = []
+
+
+def points(first, n):
+    return [{"id": f"trend_metric:m{i}", "concept": "concept:ai", "source": "google", "value": float(i % 5),
+             "timestamp": (START + timedelta(minutes=i)).isoformat()} for i in range(first, first + n)]
+
+
+def tick(t, series, only=None):
+    """One sampling tick: every series at the same timestamp"""
+    stamp = (START + timedelta(hours=1, minutes=t)).isoformat()
+    return [{"id": f"trend_metric:t{t}s{s}", "concept": f"concept:c{s}", "source": "github", "value": float(t),
+             "timestamp": stamp} for s in (only if only is not None else range(series))]
+
+
+def responder(sql):
+    out = default_responder(sql)
+    if "FROM trend_metric" in sql and "ORDER BY timestamp" in sql:
+        since = datetime.fromisoformat(re.search(r'LET \$since = "(.+?)";', sql).group(1))
+        seen = set(re.search(r"LET \$seen = \[(.*?)\];", sql).group(1).replace(" ", "").split(",")) - {""}
+        limit = int(re.search(r"LET \$limit = (\d+);", sql).group(1))
+        rows = [r for r in TABLE if datetime.fromisoformat(r["timestamp"]) >= since and r["id"] not in seen]
+        # Order within a timestamp is up to the database: reversed here
+        rows.sort(key=lambda r: r["id"], reverse=True)
+        rows.sort(key=lambda r: datetime.fromisoformat(r["timestamp"]))
+        out[-1]["result"] = rows[:limit]
+    return out
+
+
+async def wait_for(check, timeout=5.0):
+    deadline = asyncio.get_running_loop().time() + timeout
+    while not check():
+        assert asyncio.get_running_loop().time() < deadline, "timed out"
+        await asyncio.sleep(0.02)
+
+
+async def test_trends():
+    print("📈 Testing the trend engine without a live socket...")
+    # HTTP only: the WebSocket upgrade on /rpc is answered with a 404
+    surreal = FakeSurreal(responder=responder).start()
+    os.environ.update(SURREAL_HOST=surreal.host, SURREAL_PORT=str(surreal.port), SURREAL_PROTOCOL="http",
+                      QUERY_CACHE_ENABLED="false")
+    from db_client import SurrealClient
+    from trends import TrendEngine
+
+    db = SurrealClient()
+    engine = TrendEngine(db, flush_interval=0.05)
+    TABLE.extend(points(0, 10))
+    engine.start()
+    try:
+        # 1. The subscription fails, the engine keeps running and polls instead
+        await wait_for(lambda: engine.stats["reconnects"] >= 1 and engine.stats["polls"] >= 1)
+        assert not engine._task.done() and not engine.live
+        assert engine.stats["points"] == 10, engine.stats
+        print(f"✅ Live socket refused; engine alive, polled {engine.stats['polls']} times")
+
+        # 2. Points written while the socket is down still reach the windows
+        TABLE.extend(points(10, 5))
+        await wait_for(lambda: engine.stats["points"] == 15)
+        result = await engine.detect()
+        assert result["series"] == 1 and engine.stats["computed"] >= 2, (result, engine.stats)
+        print(f"✅ New points picked up by polling ({engine.stats['points']} points, 1 series)")
+        await engine.stop()
+
+        # 3. A page (5) that ends inside a tick (7 series) does not skip the rest of it
+        for t in range(3):
+            TABLE.extend(tick(t, 7))
+        paged = TrendEngine(db)
+        paged._since = (START + timedelta(minutes=30)).isoformat()
+        assert await paged.load(page=5) == 21 and len(paged.windows) == 7, paged.stats
+        # A tick written in two batches, polled in between
+        TABLE.extend(tick(3, 7, only=range(4)))
+        assert await paged.load(page=5) == 4
+        TABLE.extend(tick(3, 7, only=range(4, 7)))
+        assert await paged.load(page=5) == 3 and await paged.load(page=5) == 0
+        assert paged.stats["points"] == 28 and paged.windows.late == 0, paged.stats
+        print("✅ 7 series x 4 ticks read in pages of 5 and split writes: all 28 points, none twice")
+    finally:
+        await engine.stop()
+        await db.close()
+        surreal.stop()
+    assert engine._task is None
+
+
+if __name__ == "__main__":
+    asyncio.run(test_trends())
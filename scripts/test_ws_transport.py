@@ -0,0 +1,69 @@
+
+import asyncio
+import sys
+import os
+
+# Add src to path so we can import abyss-intelligence components
+sys.path.append(os.path.join(os.path.dirname(__file__), "..", "src", "abyss-intelligence"))
+sys.path.append(os.path.dirname(__file__))
+
+from fake_surreal import FakeSurrealRpc
+
+
+def echo_responder(sql, vars):
+    # Echo the bound variables back so the caller can match answers to requests
+    return [{"result": [vars], "status": "OK", "time": "1µs"}]
+
+
+async def test_ws_transport():
+    print("🔌 Testing SurrealClient WebSocket RPC transport...")
+
+    fake = await FakeSurrealRpc(jitter_ms=20, responder=echo_responder).start()
+    os.environ["SURREAL_PROTOCOL"] = "ws"
+    os.environ["SURREAL_HOST"] = fake.host
+    os.environ["SURREAL_PORT"] = str(fake.port)
+
+    from db_client import SurrealClient
+
+    client = SurrealClient()
+    try:
+        await client.connect()
+        assert client.rpc is not None and client.rpc.connected
+        print("✅ Connected and authenticated.")
+
+        # 1. Concurrent queries share one socket and come back matched by id
+        n = 100
+        results = await asyncio.gather(*(
+            client.query("SELECT * FROM directive WHERE target = $target;", {"target": f"t{i}"})
+            for i in range(n)
+        ))
+        for i, res in enumerate(results):
+            assert res[0]["result"][0] == {"target": f"t{i}"}, res
+        assert fake.connections == 1, fake.connections
+        print(f"✅ {n} multiplexed queries on {fake.connections} socket, all demultiplexed correctly.")
+
+        # 2. signin/use happen once per connection, params travel as bindings
+        methods = [c["method"] for c in fake.calls]
+        assert methods.count("signin") == 1 and methods.count("use") == 1, methods
+        query_call = next(c for c in fake.calls if c["method"] == "query")
+        assert "LET $" not in query_call["params"][0] and "USE NS" not in query_call["params"][0]
+        print("✅ Session-level signin/use, no LET/USE prefix in query text.")
+
+        # 3. Same public API as the HTTP transport
+        res = await client.create_directive("@elonmusk", "monitor_user", {"platform": "x"})
+        assert res[0]["result"][0]["context"] == {"platform": "x"}
+        print("✅ create_directive works over RPC.")
+
+        # 4. Reconnects transparently after the socket drops
+        await client.rpc.close()
+        await client.query("SELECT * FROM directive LIMIT 1;")
+        assert fake.connections == 2
+        print("✅ Reconnected after connection loss.")
+    finally:
+        await client.close()
+        await fake.stop()
+        print("👋 Test Complete.")
+
+
+if __name__ == "__main__":
+    asyncio.run(test_ws_transport())
@@ -0,0 +1,246 @@
+"""
+Synthetic Trinity graph for benchmarks.
+
+Generates L1 companies/persons/reports (with their materialized
+metric_series), L2 concepts/articles, L3 pulses/trend metrics and the four
+edge tables, at a configurable scale and fully determined by the seed.
+Embeddings are clustered around their concept's vector so nearest-neighbour
+queries return meaningful neighbourhoods, and a few trend series carry
+injected spikes and level shifts for the anomaly engine to find.
+
+Records are plain dicts with string ids (`company:c12`), which is what the
+fake endpoint serves; `surql_batches()` renders them as INSERT statements
+for loading a real SurrealDB.
+
+    python scripts/trinity_gen.py --scale 0.5
+"""
+import argparse
+import os
+import random
+import sys
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Dict, Iterator, List, Optional
+
+import numpy as np
+
+sys.path.append(os.path.join(os.path.dirname(__file__), "..", "src", "abyss-intelligence"))
+
+# Row counts at scale 1.0
+BASE_COUNTS = {
+    "company": 200,
+    "person": 60,
+    "concept": 100,
+    "article": 1000,
+    "pulse": 3000,
+}
+QUARTERS = 8
+TREND_SOURCES = ("google_trends", "github")
+TREND_DAYS = 60
+METRICS = ("revenue", "gross_margin", "net_income", "deliveries")
+SECTORS = ("auto", "energy", "biotech", "semis", "real_estate", "software", "retail", "finance")
+PLATFORMS = ("x", "weibo", "reddit")
+SOURCE_TYPES = ("news", "report", "blog")
+WORDS = ("battery", "margin", "guidance", "supply", "demand", "rate", "cut", "launch", "recall", "merger",
+         "lawsuit", "chip", "export", "subsidy", "strike", "upgrade", "downgrade", "buyback", "outlook", "capex")
+
+# Fields holding record links, rendered as record literals for a real database
+LINK_FIELDS = ("id", "company", "concept", "in", "out", "report")
+TIME_FIELDS = ("published_at", "created_at", "timestamp", "embedded_at", "next_run")
+
+
+class TrinityGraph:
+    """Generated records per table, edge rows per edge table and embedding matrices"""
+
+    def __init__(self, anchor: datetime):
+        self.anchor = anchor
+        self.tables: Dict[str, List[Dict]] = {}
+        self.edges: Dict[str, List[Dict]] = {}
+        # table -> (ids, float32 matrix of unit vectors)
+        self.vectors: Dict[str, tuple] = {}
+
+    def counts(self) -> Dict[str, int]:
+        out = {t: len(rows) for t, rows in self.tables.items()}
+        out.update({t: len(rows) for t, rows in self.edges.items()})
+        return out
+
+
+def _iso(dt: datetime) -> str:
+    return dt.strftime("%Y-%m-%dT%H:%M:%SZ")
+
+
+def _unit(rows: np.ndarray) -> np.ndarray:
+    return (rows / np.linalg.norm(rows, axis=-1, keepdims=True)).astype(np.float32)
+
+
+def _text(rng: random.Random, n: int) -> str:
+    return " ".join(rng.choice(WORDS) for _ in range(n))
+
+
+def generate(scale: float = 1.0, seed: int = 7, dim: int = 1536,
+             anchor: Optional[datetime] = None) -> TrinityGraph:
+    """
+    Build a graph with BASE_COUNTS * scale rows per node table. Timestamps
+    are relative to `anchor` (default: today 00:00 UTC), so a given seed and
+    scale produce the same data all day.
+    """
+    rng = random.Random(seed)
+    nrng = np.random.default_rng(seed)
+    anchor = anchor or datetime.now(timezone.utc).replace(hour=0, minute=0, second=0, microsecond=0)
+    n = {t: max(2, int(c * scale)) for t, c in BASE_COUNTS.items()}
+    g = TrinityGraph(anchor)
+
+    concepts = [{"id": f"concept:k{i}", "name": f"concept {i} {rng.choice(WORDS)}",
+                 "description": _text(rng, 12)} for i in range(n["concept"])]
+    concept_vecs = _unit(nrng.standard_normal((n["concept"], dim)))
+
+    companies = [{"id": f"company:c{i}", "name": f"Company {i}", "ticker": f"T{i:04d}",
+                  "sector": SECTORS[i % len(SECTORS)]} for i in range(n["company"])]
+    persons = [{"id": f"person:p{i}", "name": f"Person {i}", "role": rng.choice(("ceo", "cfo", "analyst"))}
+               for i in range(n["person"])]
+
+    def around(k: int) -> np.ndarray:
+        return concept_vecs[k] + 0.6 * nrng.standard_normal(dim) / np.sqrt(dim)
+
+    involves, impacts, mentions, reflects_on = [], [], [], []
+    for c in companies:
+        for k in rng.sample(range(n["concept"]), 3):
+            involves.append({"in": c["id"], "out": f"concept:k{k}", "weight": round(rng.uniform(0.1, 1.0), 3)})
+
+    articles, article_vecs = [], []
+    for i in range(n["article"]):
+        k = rng.randrange(n["concept"])
+        published = anchor - timedelta(hours=rng.uniform(0, 24 * 90))
+        articles.append({"id": f"article:a{i}", "url": f"https://news.example/{i}", "title": _text(rng, 6),
+                         "content": _text(rng, 120), "source_type": rng.choice(SOURCE_TYPES),
+                         "reliability": round(rng.uniform(0.2, 1.0), 2), "published_at": _iso(published)})
+        article_vecs.append(around(k))
+        involves.append({"in": f"article:a{i}", "out": f"concept:k{k}", "weight": round(rng.uniform(0.3, 1.0), 3)})
+        for c in rng.sample(companies, 2):
+            impacts.append({"in": f"article:a{i}", "out": c["id"], "score": round(rng.uniform(-1, 1), 3),
+                            "reason": _text(rng, 4)})
+        mentions.append({"in": f"article:a{i}", "out": rng.choice(persons)["id"],
+                         "sentiment": round(rng.uniform(-1, 1), 3)})
+
+    pulses, pulse_vecs = [], []
+    for i in range(n["pulse"]):
+        k = rng.randrange(n["concept"])
+        created = anchor - timedelta(hours=rng.uniform(0, 24 * 30))
+        pulses.append({"id": f"pulse:u{i}", "content": _text(rng, 25), "platform": rng.choice(PLATFORMS),
+                       "author_handle": f"@user{rng.randrange(500)}", "url": f"https://social.example/{i}",
+                       "sentiment_score": round(rng.uniform(-1, 1), 3),
+                       "engagement": {"likes": rng.randrange(1000), "views": rng.randrange(50000)},
+                       "created_at": _iso(created)})
+        pulse_vecs.append(around(k))
+        mentions.append({"in": f"pulse:u{i}", "out": f"concept:k{k}", "sentiment": pulses[-1]["sentiment_score"]})
+        mentions.append({"in": f"pulse:u{i}", "out": rng.choice(companies)["id"],
+                         "sentiment": round(rng.uniform(-1, 1), 3)})
+
+    reports, series = [], []
+    for c in companies:
+        points = {m: [] for m in METRICS}
+        base = {m: rng.uniform(0.1, 1.0) * (1e10 if m in ("revenue", "net_income") else 1) for m in METRICS}
+        for q in range(QUARTERS):
+            published = anchor - timedelta(days=91 * (QUARTERS - q))
+            period = f"{published.year}Q{(published.month - 1) // 3 + 1}"
+            rid = f"report:{c['id'].split(':')[1]}_{q}"
+            metrics = {m: round(base[m] * (1 + 0.05 * q + rng.uniform(-0.03, 0.03)), 4) for m in METRICS}
+            reports.append({"id": rid, "company": c["id"], "period": period, "type": "10-Q",
+                            "metrics": metrics, "url": f"https://filings.example/{rid}",
+                            "published_at": _iso(published)})
+            for m, v in metrics.items():
+                points[m].append({"period": period, "published_at": _iso(published), "value": v, "report": rid})
+        # The last metric is left without a series so the report-scan fallback is exercised
+        for m in METRICS[:-1]:
+            series.append({"id": f"metric_series:['{c['ticker']}', '{m}']", "company": c["id"],
+                           "ticker": c["ticker"], "metric": m, "points": points[m]})
+
+    trend_metrics = []
+    for k in range(n["concept"]):
+        for source in TREND_SOURCES:
+            level = rng.uniform(20, 80)
+            # ~10% of series spike on the last day, ~5% shift level over the last days
+            spike = rng.random() < 0.1
+            shift = not spike and rng.random() < 0.05
+            for d in range(TREND_DAYS):
+                value = level + rng.gauss(0, 2)
+                if spike and d == TREND_DAYS - 1:
+                    value += 25
+                if shift and d >= TREND_DAYS - 4:
+                    value += 15
+                tid = f"trend_metric:k{k}_{source}_{d}"
+                trend_metrics.append({"id": tid, "concept": f"concept:k{k}", "source": source,
+                                      "value": round(value, 3), "velocity": 0.0,
+                                      "timestamp": _iso(anchor - timedelta(days=TREND_DAYS - 1 - d))})
+                if d == TREND_DAYS - 1:
+                    reflects_on.append({"in": tid, "out": f"concept:k{k}", "weight": round(rng.uniform(0.5, 1), 3)})
+
+    g.tables = {"company": companies, "person": persons, "concept": concepts, "article": articles,
+                "pulse": pulses, "report": reports, "metric_series": series, "trend_metric": trend_metrics}
+    g.edges = {"involves": involves, "impacts": impacts, "mentions": mentions, "reflects_on": reflects_on}
+    g.vectors = {
+        "concept": ([c["id"] for c in concepts], concept_vecs),
+        "article": ([a["id"] for a in articles], _unit(np.array(article_vecs))),
+        "pulse": ([p["id"] for p in pulses], _unit(np.array(pulse_vecs))),
+    }
+    return g
+
+
+def _record(row: Dict, vector: Optional[np.ndarray]):
+    from db_client import RecordId
+
+    out = {}
+    for key, value in row.items():
+        if key == "id" and value.startswith("metric_series:"):
+            continue
+        if key in LINK_FIELDS and isinstance(value, str):
+            value = RecordId.parse(value)
+        elif key in TIME_FIELDS and isinstance(value, str):
+            value = datetime.fromisoformat(value.replace("Z", "+00:00"))
+        elif key == "points":
+            value = [{**p, "published_at": datetime.fromisoformat(p["published_at"].replace("Z", "+00:00")),
+                      "report": RecordId.parse(p["report"])} for p in value]
+        out[key] = value
+    if vector is not None:
+        out["embedding"] = [round(float(x), 6) for x in vector]
+    return out
+
+
+def surql_batches(g: TrinityGraph, batch: int = 200) -> Iterator[str]:
+    """INSERT statements (nodes first, then edges) for loading `g` into a real SurrealDB"""
+    from db_client import to_surql
+
+    for table, rows in g.tables.items():
+        ids, matrix = g.vectors.get(table, (None, None))
+        for start in range(0, len(rows), batch):
+            chunk = rows[start:start + batch]
+            if table == "metric_series":
+                # Array ids are rendered by SurrealDB itself
+                yield "\n".join(
+                    f"UPSERT type::thing('metric_series', [{to_surql(r['ticker'])}, {to_surql(r['metric'])}]) "
+                    f"CONTENT {to_surql(_record(r, None))};" for r in chunk)
+                continue
+            records = [_record(r, matrix[start + i] if matrix is not None else None) for i, r in enumerate(chunk)]
+            yield f"INSERT INTO {table} {to_surql(records)};"
+    for table, rows in g.edges.items():
+        for start in range(0, len(rows), batch):
+            yield f"INSERT RELATION INTO {table} {to_surql([_record(r, None) for r in rows[start:start + batch]])};"
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--scale", type=float, default=1.0)
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+
+    t0 = time.perf_counter()
+    g = generate(args.scale, args.seed)
+    print(f"[*] Generated in {time.perf_counter() - t0:.2f}s")
+    for table, count in g.counts().items():
+        print(f"    {table:<14} {count:>7}")
+    statements = sum(1 for _ in surql_batches(g))
+    print(f"[*] {statements} INSERT batches for a real database")
+
+
+if __name__ == "__main__":
+    main()
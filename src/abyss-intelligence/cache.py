@@ -0,0 +1,188 @@
+import os
+import re
+import json
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Iterable, Optional, Set, Tuple
+
+# Default TTL (seconds) per table. L1 truth changes rarely, L3 signals constantly.
+DEFAULT_TTLS: Dict[str, float] = {
+    "company": 3600,
+    "report": 3600,
+    "person": 3600,
+    "market_metric": 300,
+    "concept": 600,
+    "article": 300,
+    "mentions": 120,
+    "involves": 600,
+    "impacts": 300,
+    "reflects_on": 120,
+    "directive": 30,
+    "pulse": 15,
+    "trend_metric": 15,
+    "trend_rollup": 300,
+    "influence": 600,
+    "co_mention": 600,
+}
+FALLBACK_TTL = 30.0
+
+_WRITE_RE = re.compile(r"\b(CREATE|UPDATE|UPSERT|DELETE|INSERT|RELATE|DEFINE|REMOVE|LIVE|KILL)\b", re.IGNORECASE)
+_TABLE_RES = [
+    re.compile(r"\bFROM\s+(?:ONLY\s+)?([A-Za-z_][A-Za-z0-9_]*)", re.IGNORECASE),
+    re.compile(r"\b(?:CREATE|UPDATE|UPSERT|DELETE|RELATE|INSERT\s+(?:RELATION\s+)?(?:IGNORE\s+)?INTO)\s+(?:ONLY\s+)?([A-Za-z_][A-Za-z0-9_]*)", re.IGNORECASE),
+    re.compile(r"type::thing\(\s*['\"]([A-Za-z_][A-Za-z0-9_]*)['\"]"),
+    # Graph hops in either direction, with or without a closing arrow: `->mentions->concept`,
+    # `<-mentions.in`, `<->co_mention`, `->(impacts WHERE ...)`
+    re.compile(r"(?:<->|->|<-)\s*\(?\s*([A-Za-z_][A-Za-z0-9_]*)"),
+]
+_KEYWORDS = {"only", "select", "value", "where", "type", "from"}
+_WS_RE = re.compile(r"\s+")
+
+
+def normalize_sql(sql: str) -> str:
+    return _WS_RE.sub(" ", sql).strip()
+
+
+def tables_in(sql: str, params: Optional[Dict] = None) -> Set[str]:
+    """Best-effort set of tables a statement reads or writes"""
+    tables = set()
+    for pattern in _TABLE_RES:
+        for name in pattern.findall(sql):
+            if name.lower() not in _KEYWORDS:
+                tables.add(name)
+    # Record-id params (e.g. `FROM $nodes`) name their tables directly
+    for value in (params or {}).values():
+        tables.update(_param_tables(value))
+    return tables
+
+
+def _param_tables(value: Any) -> Iterable[str]:
+    table = getattr(value, "table", None)
+    if isinstance(table, str):
+        yield table
+    elif isinstance(value, (list, tuple)):
+        for v in value:
+            yield from _param_tables(v)
+    elif isinstance(value, dict):
+        for v in value.values():
+            yield from _param_tables(v)
+
+
+def is_write(sql: str) -> bool:
+    return _WRITE_RE.search(sql) is not None
+
+
+class QueryCache:
+    """
+    In-process LRU of query results keyed on normalized (SQL, params).
+
+    Entries expire after the shortest TTL among the tables they read, the
+    cache is bounded by an approximate byte size of the stored results, and
+    any write that goes through the client drops every entry touching the
+    written tables. Cached results are shared: callers must not mutate them.
+    """
+
+    def __init__(self, max_bytes: Optional[int] = None, ttls: Optional[Dict[str, float]] = None,
+                 enabled: Optional[bool] = None):
+        self.enabled = enabled if enabled is not None else \
+            os.getenv("QUERY_CACHE_ENABLED", "true").lower() in ("1", "true", "yes")
+        self.max_bytes = max_bytes or int(os.getenv("QUERY_CACHE_MAX_BYTES", str(64 * 1024 * 1024)))
+        self.ttls = dict(DEFAULT_TTLS)
+        self.ttls.update(ttls or {})
+        # e.g. QUERY_CACHE_TTL_PULSE=5
+        for table in list(self.ttls):
+            env = os.getenv(f"QUERY_CACHE_TTL_{table.upper()}")
+            if env:
+                self.ttls[table] = float(env)
+
+        self._entries: "OrderedDict[str, Tuple[float, int, Set[str], Any]]" = OrderedDict()
+        self._by_table: Dict[str, Set[str]] = {}
+        self.bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.invalidations = 0
+
+    @staticmethod
+    def make_key(sql: str, params: Optional[Dict]) -> str:
+        return normalize_sql(sql) + "\x00" + json.dumps(params or {}, sort_keys=True, default=str)
+
+    def ttl_for(self, tables: Set[str]) -> float:
+        if not tables:
+            return FALLBACK_TTL
+        return min(self.ttls.get(t, FALLBACK_TTL) for t in tables)
+
+    def get(self, key: str) -> Optional[Any]:
+        entry = self._entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+        expires, _, _, value = entry
+        if expires < time.monotonic():
+            self._remove(key)
+            self.expirations += 1
+            self.misses += 1
+            return None
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return value
+
+    def put(self, key: str, tables: Set[str], value: Any):
+        size = len(key) + len(json.dumps(value, default=str))
+        if size > self.max_bytes:
+            return
+        if key in self._entries:
+            self._remove(key)
+        self._entries[key] = (time.monotonic() + self.ttl_for(tables), size, tables, value)
+        self.bytes += size
+        for table in tables:
+            self._by_table.setdefault(table, set()).add(key)
+        while self.bytes > self.max_bytes and self._entries:
+            self._remove(next(iter(self._entries)))
+            self.evictions += 1
+
+    def invalidate(self, tables: Iterable[str]):
+        tables = set(tables)
+        if not tables:
+            # A write whose tables could not be worked out may touch anything
+            self.invalidations += len(self._entries)
+            self.clear()
+            return
+        for table in tables:
+            for key in list(self._by_table.get(table, ())):
+                self._remove(key)
+                self.invalidations += 1
+
+    def clear(self):
+        self._entries.clear()
+        self._by_table.clear()
+        self.bytes = 0
+
+    def _remove(self, key: str):
+        entry = self._entries.pop(key, None)
+        if entry is None:
+            return
+        _, size, tables, _ = entry
+        self.bytes -= size
+        for table in tables:
+            keys = self._by_table.get(table)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self._by_table[table]
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            "enabled": self.enabled,
+            "entries": len(self._entries),
+            "bytes": self.bytes,
+            "max_bytes": self.max_bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+            "invalidations": self.invalidations,
+        }
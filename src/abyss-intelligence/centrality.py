@@ -0,0 +1,657 @@
+import os
+import sys
+import time
+import asyncio
+from contextlib import aclosing
+from typing import Any, Dict, List, Optional, Sequence, Tuple, Union
+
+import numpy as np
+
+from db_client import RecordId, SurrealClient
+from templates import register
+
+# Edge tables the scores are computed from, with the field giving each edge's
+# strength (absolute value). A mention counts the same whatever its sentiment.
+CENTRALITY_EDGES: Dict[str, Optional[str]] = {
+    "involves": "weight",
+    "impacts": "score",
+    "mentions": None,
+}
+
+# Node tables that store their PageRank (field + index in init_db.surql)
+RANKED_TABLES = ("company", "person", "concept")
+
+# Node indices are packed in pairs into one int64 key (a << 31 | b)
+_SHIFT = np.int64(31)
+_LOW = (np.int64(1) << _SHIFT) - 1
+
+EDGES_SQL = "SELECT in, out, {weight} AS weight FROM {table};"
+
+RANK_WRITE_SQL = """
+FOR $u IN $updates { UPDATE $u.id SET pagerank = $u.pagerank RETURN NONE; };
+"""
+
+INFLUENCE_WRITE_SQL = """
+FOR $u IN $updates {
+    UPSERT type::thing('influence', [$u.concept, $u.company]) SET
+        concept = $u.concept,
+        company = $u.company,
+        score = $u.score,
+        direct = $u.direct,
+        via_articles = $u.via_articles,
+        co_mentions = $u.co_mentions,
+        sentiment = $u.sentiment,
+        updated_at = time::now()
+    RETURN NONE;
+};
+"""
+
+CO_MENTION_WRITE_SQL = """
+FOR $u IN $updates {
+    UPSERT type::thing('co_mention', [$u.a, $u.b]) SET
+        a = $u.a, b = $u.b, count = $u.count, strength = $u.strength, updated_at = time::now()
+    RETURN NONE;
+};
+"""
+
+INFLUENCE_DELETE_SQL = """
+FOR $k IN $keys { DELETE type::thing('influence', [$k.concept, $k.company]) RETURN NONE; };
+"""
+
+CO_MENTION_DELETE_SQL = """
+FOR $k IN $keys { DELETE type::thing('co_mention', [$k.a, $k.b]) RETURN NONE; };
+"""
+
+# Top-k neighbours in one query over the (node, score) indexes
+RANK_SQL = {
+    ("influence", "concept"): """
+SELECT company AS node, company.name AS name, company.ticker AS ticker, company.pagerank AS pagerank,
+    score, direct, via_articles, co_mentions, sentiment
+    FROM influence WHERE concept = $node ORDER BY score DESC LIMIT $k;
+""",
+    ("influence", "company"): """
+SELECT concept AS node, concept.name AS name, concept.pagerank AS pagerank,
+    score, direct, via_articles, co_mentions, sentiment
+    FROM influence WHERE company = $node ORDER BY score DESC LIMIT $k;
+""",
+    ("co_mention", None): """
+SELECT b AS node, b.name AS name, b.pagerank AS pagerank, count, strength
+    FROM co_mention WHERE a = $node ORDER BY strength DESC LIMIT $k;
+""",
+}
+
+LOAD = {table: register(f"centrality.edges.{table}", EDGES_SQL.format(table=table, weight=field or "1"))
+        for table, field in CENTRALITY_EDGES.items()}
+WRITE_RANK = register("centrality.write_rank", RANK_WRITE_SQL, updates="array<object>")
+WRITE = {
+    "influence": register("centrality.write_influence", INFLUENCE_WRITE_SQL, updates="array<object>"),
+    "co_mention": register("centrality.write_co_mention", CO_MENTION_WRITE_SQL, updates="array<object>"),
+}
+DELETE = {
+    "influence": register("centrality.delete_influence", INFLUENCE_DELETE_SQL, keys="array<object>"),
+    "co_mention": register("centrality.delete_co_mention", CO_MENTION_DELETE_SQL, keys="array<object>"),
+}
+RANK = {key: register(f"centrality.rank.{key[0]}" + (f".{key[1]}" if key[1] else ""), sql,
+                      node=f"record<{key[1]}>" if key[1] else "record", k="int")
+        for key, sql in RANK_SQL.items()}
+
+# Value columns per pair table, in write order; the first one is what ranks
+PAIR_FIELDS = {
+    "influence": ("score", "direct", "via_articles", "co_mentions", "sentiment"),
+    "co_mention": ("strength", "count"),
+}
+PAIR_KEYS = {"influence": ("concept", "company"), "co_mention": ("a", "b")}
+RANK_BY = tuple(PAIR_FIELDS)
+
+
+def pair_keys(a: np.ndarray, b: np.ndarray) -> np.ndarray:
+    return (a.astype(np.int64) << _SHIFT) | b.astype(np.int64)
+
+
+def _aggregate(a: np.ndarray, b: np.ndarray, *values: np.ndarray) -> Tuple[np.ndarray, List[np.ndarray]]:
+    """Sorted distinct (a, b) keys and the sum of each value array per key"""
+    keys, inverse = np.unique(pair_keys(a, b), return_inverse=True)
+    return keys, [np.bincount(inverse, weights=v, minlength=len(keys)) for v in values]
+
+
+def _join(left: np.ndarray, right: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """All index pairs (i, j) with left[i] == right[j], without a Python loop"""
+    lo, ro = np.argsort(left, kind="stable"), np.argsort(right, kind="stable")
+    ls, rs = left[lo], right[ro]
+    keys, l_start, l_count = np.unique(ls, return_index=True, return_counts=True)
+    r_start = np.searchsorted(rs, keys, "left")
+    r_count = np.searchsorted(rs, keys, "right") - r_start
+    keep = r_count > 0
+    l_start, l_count, r_start, r_count = l_start[keep], l_count[keep], r_start[keep], r_count[keep]
+    sizes = l_count * r_count
+    group = np.repeat(np.arange(len(sizes)), sizes)
+    within = np.arange(int(sizes.sum())) - np.repeat(np.cumsum(sizes) - sizes, sizes)
+    return lo[l_start[group] + within // r_count[group]], ro[r_start[group] + within % r_count[group]]
+
+
+class EdgeGraph:
+    """
+    The centrality edges held as NumPy arrays: node ids are interned to
+    int32 indices (append-only, so indices stay stable across reloads of the
+    same process), edges are parallel src/dst/weight/kind arrays, and
+    `csr()` gives the out-adjacency in CSR form (indptr, indices, weights).
+
+    Appends are buffered in lists and folded into the arrays by `settle()`,
+    which also drops repeated (kind, in, out) edges keeping the last one.
+    """
+
+    def __init__(self):
+        self._index: Dict[str, int] = {}
+        self.ids: List[str] = []
+        self.table_names: List[str] = []
+        self._table_index: Dict[str, int] = {}
+        self._node_tables: List[int] = []
+        self.node_table = np.zeros(0, dtype=np.int16)  # table code per node, as of settle()
+        self.src = np.zeros(0, dtype=np.int32)
+        self.dst = np.zeros(0, dtype=np.int32)
+        self.weight = np.zeros(0, dtype=np.float64)
+        self.kind = np.zeros(0, dtype=np.int8)
+        self._pending: Tuple[List[int], List[int], List[float], List[int]] = ([], [], [], [])
+        self.dirty = False
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    @property
+    def edges(self) -> int:
+        return len(self.src) + len(self._pending[0])
+
+    @property
+    def nbytes(self) -> int:
+        return int(self.src.nbytes + self.dst.nbytes + self.weight.nbytes + self.kind.nbytes)
+
+    def table_code(self, table: str) -> int:
+        return self._table_index.get(table, -1)
+
+    def node(self, record: Any) -> int:
+        key = str(record)
+        index = self._index.get(key)
+        if index is None:
+            table = key.split(":", 1)[0]
+            code = self._table_index.get(table)
+            if code is None:
+                code = self._table_index[table] = len(self.table_names)
+                self.table_names.append(table)
+            index = self._index[key] = len(self.ids)
+            self.ids.append(key)
+            self._node_tables.append(code)
+        return index
+
+    def add(self, kind: int, rows: Sequence[Dict]) -> int:
+        """Buffer edge rows ({in, out, weight}) of the edge table numbered `kind`"""
+        src, dst, weight, kinds = self._pending
+        added = 0
+        for row in rows:
+            if row.get("in") is None or row.get("out") is None:
+                continue
+            value = row.get("weight")
+            src.append(self.node(row["in"]))
+            dst.append(self.node(row["out"]))
+            weight.append(float(value) if value is not None else 0.0)
+            kinds.append(kind)
+            added += 1
+        if added:
+            self.dirty = True
+        return added
+
+    def settle(self):
+        src, dst, weight, kinds = self._pending
+        if len(self.node_table) < len(self.ids):
+            self.node_table = np.asarray(self._node_tables, dtype=np.int16)
+        if not src:
+            return
+        self.src = np.concatenate([self.src, np.asarray(src, dtype=np.int32)])
+        self.dst = np.concatenate([self.dst, np.asarray(dst, dtype=np.int32)])
+        self.weight = np.concatenate([self.weight, np.asarray(weight, dtype=np.float64)])
+        self.kind = np.concatenate([self.kind, np.asarray(kinds, dtype=np.int8)])
+        self._pending = ([], [], [], [])
+        # A replayed or re-read edge replaces the earlier copy
+        keep = []
+        for kind in np.unique(self.kind):
+            rows = np.flatnonzero(self.kind == kind)[::-1]
+            _, first = np.unique(pair_keys(self.src[rows], self.dst[rows]), return_index=True)
+            keep.append(rows[first])
+        keep = np.sort(np.concatenate(keep))
+        if len(keep) < len(self.src):
+            self.src, self.dst, self.weight, self.kind = (
+                self.src[keep], self.dst[keep], self.weight[keep], self.kind[keep])
+
+    def clear(self):
+        """Drop the edges (node indices are kept)"""
+        self.src, self.dst = np.zeros(0, dtype=np.int32), np.zeros(0, dtype=np.int32)
+        self.weight, self.kind = np.zeros(0, dtype=np.float64), np.zeros(0, dtype=np.int8)
+        self._pending = ([], [], [], [])
+        self.dirty = True
+
+    def csr(self) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """Out-adjacency by absolute edge weight (parallel edges summed, zero weights dropped)"""
+        live = self.weight != 0
+        keys, (weights,) = _aggregate(self.src[live], self.dst[live], np.abs(self.weight[live]))
+        rows = (keys >> _SHIFT).astype(np.int32)
+        indptr = np.zeros(len(self) + 1, dtype=np.int64)
+        np.cumsum(np.bincount(rows, minlength=len(self)), out=indptr[1:])
+        return indptr, (keys & _LOW).astype(np.int32), weights
+
+
+def pagerank(indptr: np.ndarray, indices: np.ndarray, weights: np.ndarray, damping: float = 0.85,
+             tol: float = 1e-4, max_iter: int = 100, start: Optional[np.ndarray] = None) -> Tuple[np.ndarray, int]:
+    """
+    Weighted PageRank by power iteration over a CSR out-adjacency, scaled so
+    the mean node scores 1.0. Dangling nodes spread their rank uniformly.
+    Iterates until no node moves by more than `tol`; `start` (a previous
+    result, padded for new nodes) usually converges in a few iterations.
+    Returns (scores, iterations).
+    """
+    n = len(indptr) - 1
+    if n == 0:
+        return np.zeros(0), 0
+    rows = np.repeat(np.arange(n), np.diff(indptr))
+    out = np.bincount(rows, weights=weights, minlength=n)
+    share = weights / out[rows]
+    dangling = out == 0
+    rank = np.ones(n) if start is None else np.asarray(start, dtype=np.float64) * (n / max(start.sum(), 1e-12))
+    for iteration in range(1, max_iter + 1):
+        new = np.bincount(indices, weights=share * rank[rows], minlength=n)
+        new = damping * (new + rank[dangling].sum() / n) + (1.0 - damping)
+        moved = np.abs(new - rank).max()
+        rank = new
+        if moved < tol:
+            break
+    return rank, iteration
+
+
+class CentralityEngine:
+    """
+    Graph scores used to rank traversal results, computed off the request
+    path from the involves/impacts/mentions edges and written back to the
+    database, so a tool reads the top k with one indexed query:
+
+    - pagerank (company/person/concept): weighted PageRank over the edge
+      directions (documents -> entities -> concepts), mean node = 1.0
+    - influence:[concept, company]: `direct` (company involves concept),
+      `via_articles` (sum over articles of involves weight x |impact score|,
+      with `sentiment` the signed share of it), `co_mentions` (strength
+      below) and their sum `score`
+    - co_mention:[a, b], stored in both directions: documents mentioning
+      both entities (`count`) and `strength` = count / sqrt(docs(a) x docs(b)).
+      Documents mentioning more than `max_doc_mentions` entities are left
+      out of the pairs, and pairs seen fewer than `min_co_mentions` times
+      are not stored.
+
+    The edges are loaded once (streamed, see SurrealClient.stream) into an
+    EdgeGraph; afterwards `LIVE SELECT` creations are appended and every
+    `interval` seconds the scores are recomputed if anything arrived:
+    PageRank starts from the previous vector, and only scores that moved by
+    more than `tolerance` (relative) are written, `write_batch` per request.
+    Updates and deletions of edges trigger a full reload at the next flush,
+    as does `reload_interval`. Without a live subscription (HTTP-only
+    server, or while reconnecting) every flush reloads.
+    """
+
+    def __init__(self, db, damping: Optional[float] = None, tolerance: Optional[float] = None,
+                 max_doc_mentions: Optional[int] = None, min_co_mentions: Optional[int] = None,
+                 write_batch: Optional[int] = None, interval: Optional[float] = None,
+                 reload_interval: Optional[float] = None):
+        self.db = db
+        self.damping = damping or float(os.getenv("CENTRALITY_DAMPING", "0.85"))
+        self.tolerance = tolerance or float(os.getenv("CENTRALITY_TOLERANCE", "0.01"))
+        self.max_doc_mentions = max_doc_mentions or int(os.getenv("CENTRALITY_MAX_DOC_MENTIONS", "50"))
+        self.min_co_mentions = min_co_mentions or int(os.getenv("CENTRALITY_MIN_CO_MENTIONS", "2"))
+        self.write_batch = write_batch or int(os.getenv("CENTRALITY_WRITE_BATCH", "1000"))
+        self.interval = interval or float(os.getenv("CENTRALITY_INTERVAL", "300"))
+        self.reload_interval = reload_interval or float(os.getenv("CENTRALITY_RELOAD_INTERVAL", "86400"))
+
+        self.graph = EdgeGraph()
+        self.kinds = list(CENTRALITY_EDGES)
+        self.rank = np.zeros(0)
+        self.scores: Dict[str, Dict[str, np.ndarray]] = {}
+        self._unsent = False
+        # What the database holds (NaN = unknown, rewrite)
+        self._written_rank = np.zeros(0)
+        self._written: Dict[str, Tuple[np.ndarray, np.ndarray]] = {
+            name: (np.zeros(0, dtype=np.int64), np.zeros((0, len(fields)))) for name, fields in PAIR_FIELDS.items()}
+        self._loaded_at: Optional[float] = None
+        self._stale = False
+        self._pending: List[Tuple[int, Dict]] = []
+        self._lock = asyncio.Lock()
+        self._task: Optional[asyncio.Task] = None
+        self._stopping = asyncio.Event()
+        self.stats: Dict[str, Any] = {"loads": 0, "computes": 0, "iterations": 0, "writes": 0, "deletes": 0,
+                                      "requests": 0, "failures": 0, "compute_s": 0.0, "polls": 0, "reconnects": 0}
+        # Per edge table: True while its live subscription is delivering changes
+        self.live: Dict[str, bool] = {table: False for table in self.kinds}
+
+    # --- Intake ---
+
+    async def load(self) -> int:
+        """(Re)read every centrality edge, streamed table by table"""
+        self.graph.clear()
+        loaded = 0
+        for kind, table in enumerate(self.kinds):
+            batch: List[Dict] = []
+            async with aclosing(self.db.stream("", template=LOAD[table])) as rows:
+                async for _, row in rows:
+                    batch.append(row)
+                    if len(batch) >= 10000:
+                        loaded += self.graph.add(kind, batch)
+                        batch = []
+            loaded += self.graph.add(kind, batch)
+        self.graph.settle()
+        self._loaded_at = time.monotonic()
+        self._stale = False
+        self.stats["loads"] += 1
+        return loaded
+
+    def ingest(self, table: str, rows: Sequence[Dict]) -> int:
+        return self.graph.add(self.kinds.index(table), rows)
+
+    # --- Scores ---
+
+    def _mask(self, nodes: np.ndarray, *tables: str) -> np.ndarray:
+        codes = [self.graph.table_code(t) for t in tables]
+        return np.isin(self.graph.node_table[nodes], [c for c in codes if c >= 0])
+
+    def _of_kind(self, table: str) -> np.ndarray:
+        return np.flatnonzero(self.graph.kind == self.kinds.index(table))
+
+    def co_mentions(self) -> Dict[str, np.ndarray]:
+        g = self.graph
+        m = self._of_kind("mentions")
+        docs_ents = np.unique(pair_keys(g.src[m], g.dst[m]))
+        doc, ent = docs_ents >> _SHIFT, docs_ents & _LOW
+        per_doc = np.bincount(doc, minlength=len(g))
+        small = per_doc[doc] <= self.max_doc_mentions
+        doc, ent = doc[small], ent[small]
+        left, right = _join(doc, doc)
+        other = ent[left] != ent[right]
+        keys, (count,) = _aggregate(ent[left][other], ent[right][other], np.ones(int(other.sum())))
+        keep = count >= self.min_co_mentions
+        keys, count = keys[keep], count[keep]
+        docs_of = np.bincount(ent, minlength=len(g)).astype(np.float64)
+        a, b = keys >> _SHIFT, keys & _LOW
+        strength = count / np.sqrt(docs_of[a] * docs_of[b])
+        return {"keys": keys, "values": np.column_stack([strength, count])}
+
+    def influence(self, co: Dict[str, np.ndarray]) -> Dict[str, np.ndarray]:
+        g = self.graph
+        inv, imp = self._of_kind("involves"), self._of_kind("impacts")
+        # Company involves concept
+        direct = inv[self._mask(g.src[inv], "company") & self._mask(g.dst[inv], "concept")]
+        # Article involves concept x article impacts company (signed impact score)
+        art_inv = inv[self._mask(g.src[inv], "article") & self._mask(g.dst[inv], "concept")]
+        art_imp = imp[self._mask(g.dst[imp], "company")]
+        left, right = _join(g.src[art_inv], g.src[art_imp])
+        art_inv, art_imp = art_inv[left], art_imp[right]
+        via = np.abs(g.weight[art_inv]) * np.abs(g.weight[art_imp])
+        signed = np.abs(g.weight[art_inv]) * g.weight[art_imp]
+        # Concept/company pairs among the co-mentions
+        co_a, co_b = co["keys"] >> _SHIFT, co["keys"] & _LOW
+        co_pairs = self._mask(co_a, "concept") & self._mask(co_b, "company")
+
+        concepts = np.concatenate([g.dst[direct], g.dst[art_inv], co_a[co_pairs]])
+        companies = np.concatenate([g.src[direct], g.dst[art_imp], co_b[co_pairs]])
+        zeros = [np.zeros(len(direct)), np.zeros(len(art_inv)), np.zeros(int(co_pairs.sum()))]
+        keys, (d, v, s, c) = _aggregate(
+            concepts, companies,
+            np.concatenate([np.abs(g.weight[direct]), zeros[1], zeros[2]]),
+            np.concatenate([zeros[0], via, zeros[2]]),
+            np.concatenate([zeros[0], signed, zeros[2]]),
+            np.concatenate([zeros[0], zeros[1], co["values"][co_pairs, 0]]),
+        )
+        with np.errstate(divide="ignore", invalid="ignore"):
+            sentiment = np.where(v > 0, s / v, np.nan)
+        return {"keys": keys, "values": np.column_stack([d + v + c, d, v, c, sentiment])}
+
+    def compute(self) -> Dict[str, Dict[str, np.ndarray]]:
+        """PageRank, influence and co-mention over the current edges"""
+        t0 = time.perf_counter()
+        self.graph.settle()
+        indptr, indices, weights = self.graph.csr()
+        start = None
+        if len(self.rank):
+            start = np.concatenate([self.rank, np.ones(len(self.graph) - len(self.rank))])
+        self.rank, iterations = pagerank(indptr, indices, weights, self.damping, start=start)
+        co = self.co_mentions()
+        scores = {"co_mention": co, "influence": self.influence(co)}
+        self.graph.dirty = False
+        self.stats["computes"] += 1
+        self.stats["iterations"] += iterations
+        self.stats["compute_s"] = round(time.perf_counter() - t0, 3)
+        return scores
+
+    # --- Write back ---
+
+    def _record(self, index: int) -> RecordId:
+        return RecordId.parse(self.graph.ids[int(index)])
+
+    def _pair(self, name: str, key: int) -> Dict[str, RecordId]:
+        a, b = PAIR_KEYS[name]
+        return {a: self._record(key >> 31), b: self._record(key & int(_LOW))}
+
+    async def _batches(self, template, param: str, items: List[Dict], counter: str) -> np.ndarray:
+        """Send `items` `write_batch` at a time; returns a mask of the items whose request failed"""
+        failed = np.zeros(len(items), dtype=bool)
+        for start in range(0, len(items), self.write_batch):
+            chunk = items[start:start + self.write_batch]
+            try:
+                await self.db.run(template, use_cache=False, **{param: chunk})
+            except Exception as e:
+                # Marked unknown below, so the next flush sends them again
+                failed[start:start + len(chunk)] = True
+                self.stats["failures"] += 1
+                print(f"[Centrality] {template.name} of {len(chunk)} rows failed: {e}", file=sys.stderr)
+                continue
+            self.stats["requests"] += 1
+            self.stats[counter] += len(chunk)
+        return failed
+
+    async def _write_rank(self) -> int:
+        n = len(self.rank)
+        written = np.concatenate([self._written_rank, np.full(n - len(self._written_rank), np.nan)])
+        moved = ~np.isclose(self.rank, written, rtol=self.tolerance, atol=0.0)
+        rows = np.flatnonzero(moved & self._mask(np.arange(n), *RANKED_TABLES))
+        updates = [{"id": self._record(i), "pagerank": round(float(self.rank[i]), 6)} for i in rows]
+        failed = await self._batches(WRITE_RANK, "updates", updates, "writes")
+        written[rows] = self.rank[rows]
+        written[rows[failed]] = np.nan
+        self._written_rank = written
+        return len(rows)
+
+    async def _write_pairs(self, name: str, scores: Dict[str, np.ndarray]) -> int:
+        keys, values = scores["keys"], scores["values"]
+        old_keys, old_values = self._written[name]
+        same = np.zeros(len(keys), dtype=bool)
+        if len(old_keys):
+            pos = np.minimum(np.searchsorted(old_keys, keys), len(old_keys) - 1)
+            same = (old_keys[pos] == keys) & np.isclose(values, old_values[pos], rtol=self.tolerance,
+                                                        atol=1e-9, equal_nan=True).all(axis=1)
+        rows = np.flatnonzero(~same)
+        gone = old_keys[~np.isin(old_keys, keys)]
+
+        fields = PAIR_FIELDS[name]
+        updates = []
+        for i in rows:
+            update = self._pair(name, int(keys[i]))
+            for field, value in zip(fields, values[i].tolist()):
+                if field == "count":
+                    update[field] = int(value)
+                else:
+                    update[field] = round(value, 6) if np.isfinite(value) else None
+            updates.append(update)
+        failed = await self._batches(WRITE[name], "updates", updates, "writes")
+        dropped = await self._batches(DELETE[name], "keys", [self._pair(name, int(k)) for k in gone], "deletes")
+
+        written = values.copy()
+        written[rows[failed]] = np.nan
+        # Rows whose delete failed stay listed (as unknown) and are deleted again next time
+        keys = np.concatenate([keys, gone[dropped]])
+        written = np.vstack([written, np.full((int(dropped.sum()), len(fields)), np.nan)])
+        order = np.argsort(keys, kind="stable")
+        self._written[name] = (keys[order], written[order])
+        return len(rows) + len(gone)
+
+    async def flush(self, write: bool = True) -> int:
+        """
+        Recompute if edges arrived since the last flush (loading them all on
+        the first call, after an edge update/delete and every
+        `reload_interval`); returns the rows written or deleted.
+        """
+        async with self._lock:
+            overdue = self._loaded_at is not None and time.monotonic() - self._loaded_at > self.reload_interval
+            if self._loaded_at is None or self._stale or overdue:
+                await self.load()
+            if self._pending:
+                pending, self._pending = self._pending, []
+                for table, row in pending:
+                    self.ingest(table, [row])
+            if self.graph.dirty:
+                self.scores = self.compute()
+                self._unsent = True
+            if not write or not self._unsent:
+                return 0
+            self._unsent = False
+            changed = await self._write_rank()
+            for name in RANK_BY:
+                changed += await self._write_pairs(name, self.scores[name])
+            return changed
+
+    # --- Queries ---
+
+    def top(self, table: Optional[str] = None, limit: int = 10) -> List[Tuple[str, float]]:
+        """Highest PageRank nodes held in memory (optionally of one table)"""
+        rows = np.arange(len(self.rank))
+        if table is not None:
+            rows = rows[self._mask(rows, table)]
+        rows = rows[np.argsort(-self.rank[rows], kind="stable")][:limit]
+        return [(self.graph.ids[i], round(float(self.rank[i]), 4)) for i in rows]
+
+    # --- Background loop ---
+
+    async def _watch(self, table: str, max_backoff: float = 30.0):
+        """Feed edge changes from a live subscription; reconnects with backoff"""
+        field = CENTRALITY_EDGES[table]
+        backoff = 1.0
+        while True:
+            sub = self.db.subscribe(table)
+            try:
+                await sub.start()
+                self.live[table] = True
+                # Edges created while there was no subscription are only seen by a reload
+                self._stale = True
+                backoff = 1.0
+                async for event in sub:
+                    if event["action"] == "CREATE":
+                        record = event["record"] or {}
+                        self._pending.append((table, {"in": record.get("in"), "out": record.get("out"),
+                                                      "weight": record.get(field) if field else 1}))
+                    else:
+                        # Changed or removed edges are picked up by reloading everything
+                        self._stale = True
+            except asyncio.CancelledError:
+                self.live[table] = False
+                await sub.close()
+                raise
+            except Exception as e:
+                print(f"[Centrality] Live subscription to {table} failed, reloading every "
+                      f"{self.interval:g}s until it is back: {e}", file=sys.stderr)
+            self.live[table] = False
+            self.stats["reconnects"] += 1
+            await sub.close()
+            await asyncio.sleep(backoff)
+            backoff = min(backoff * 2, max_backoff)
+
+    async def run(self):
+        # Edges created while the initial load runs are replayed, then deduplicated
+        watchers = [asyncio.create_task(self._watch(table)) for table in self.kinds]
+        try:
+            try:
+                await self.flush()
+                print(f"[Centrality] Scored {len(self.graph)} nodes over {self.graph.edges} edges "
+                      f"in {self.stats['compute_s']}s", file=sys.stderr)
+            except Exception as e:
+                print(f"[Centrality] Initial load failed, will retry: {e}", file=sys.stderr)
+            while not self._stopping.is_set():
+                try:
+                    await asyncio.wait_for(self._stopping.wait(), self.interval)
+                except asyncio.TimeoutError:
+                    pass
+                try:
+                    if not all(self.live.values()):
+                        # No live socket (HTTP-only server or reconnecting): reload instead
+                        self._stale = True
+                        self.stats["polls"] += 1
+                    await self.flush()
+                except Exception as e:
+                    print(f"[Centrality] Flush failed, will retry: {e}", file=sys.stderr)
+        finally:
+            for watcher in watchers:
+                watcher.cancel()
+            await asyncio.gather(*watchers, return_exceptions=True)
+
+    def start(self):
+        if self._task is None:
+            self._stopping.clear()
+            self._task = asyncio.create_task(self.run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._stopping.set()
+            try:
+                await self._task
+            except Exception as e:
+                print(f"[Centrality] Engine stopped with error: {e}", file=sys.stderr)
+            self._task = None
+
+
+MAX_RANK_K = 200
+
+
+async def rank_related(db, node: Union[str, RecordId], by: str = "influence", k: int = 20) -> Dict:
+    """
+    Top `k` neighbours of `node` by a precomputed score, strongest first:
+    `influence` gives the companies of a concept (or the concepts of a
+    company), `co_mention` the entities mentioned alongside any entity.
+    """
+    if by not in RANK_BY:
+        raise ValueError(f"by must be one of {', '.join(RANK_BY)}")
+    if not 1 <= k <= MAX_RANK_K:
+        raise ValueError(f"k must be between 1 and {MAX_RANK_K}")
+    rid = RecordId.parse(node)
+    key = (by, rid.table) if by == "influence" else (by, None)
+    if key not in RANK:
+        raise ValueError("influence ranks the companies of a concept or the concepts of a company")
+    res = await db.run(RANK[key], node=rid, k=k)
+    rows = (res[-1].get("result") or []) if res else []
+    return {"node": str(rid), "by": by, "count": len(rows), "results": rows}
+
+
+async def main():
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Compute graph centrality scores and write them back")
+    parser.add_argument("--dry-run", action="store_true", help="compute and print, write nothing")
+    parser.add_argument("--top", type=int, default=10, help="highest PageRank nodes to print per table")
+    args = parser.parse_args()
+
+    db = SurrealClient()
+    await db.start()
+    engine = CentralityEngine(db)
+    t0 = time.perf_counter()
+    try:
+        changed = await engine.flush(write=not args.dry_run)
+    finally:
+        await db.close()
+    print(f"[Centrality] {len(engine.graph)} nodes, {engine.graph.edges} edges; {changed} rows written "
+          f"in {time.perf_counter() - t0:.1f}s ({engine.stats})", file=sys.stderr)
+    for table in RANKED_TABLES:
+        for record, score in engine.top(table, args.top):
+            print(f"{record}\t{score}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -1,12 +1,123 @@
 import os
+import re
+import sys
 import json
 import base64
+import asyncio
+import importlib.util
 import httpx
-from typing import Any, Dict, List, Optional
+from datetime import datetime, timezone
+from typing import Any, AsyncIterator, Dict, List, Optional, Tuple
 from dotenv import load_dotenv
 
+from cache import QueryCache, is_write, tables_in
+from telemetry import NULL_SPAN, Telemetry, count_rows
+
 load_dotenv()
 
+MODULE_DIR = os.path.dirname(os.path.abspath(__file__))
+
+
+def resolve_path(path: str) -> str:
+    """
+    A file path from the settings (WAL, caches) made absolute: relative paths
+    are taken from this directory, not from whatever working directory the
+    process was started in (MCP clients often spawn servers from `/`).
+    Empty and ":memory:" are returned as they are.
+    """
+    if not path or path == ":memory:":
+        return path
+    path = os.path.expanduser(path)
+    return path if os.path.isabs(path) else os.path.join(MODULE_DIR, path)
+
+
+class RecordId:
+    """
+    A validated SurrealDB record id (`table:key`).
+
+    Values of this type are rendered as record literals when bound as query
+    params, so callers never have to interpolate ids into SurrealQL text.
+    """
+    __slots__ = ("table", "key")
+
+    _TABLE_RE = re.compile(r"^[A-Za-z_][A-Za-z0-9_]*$")
+    _PLAIN_KEY_RE = re.compile(r"^[A-Za-z0-9_]+$")
+
+    def __init__(self, table: str, key: str):
+        if not self._TABLE_RE.match(table or ""):
+            raise ValueError(f"Invalid table name: {table!r}")
+        if not key or "\x00" in key:
+            raise ValueError(f"Invalid record key: {key!r}")
+        self.table = table
+        self.key = key
+
+    @classmethod
+    def parse(cls, value: "str | RecordId") -> "RecordId":
+        """Parse `table:key`, `table:⟨key⟩` or `table:`key``; raises ValueError otherwise"""
+        if isinstance(value, RecordId):
+            return value
+        if not isinstance(value, str) or ":" not in value:
+            raise ValueError(f"Invalid record id: {value!r}")
+        table, key = value.split(":", 1)
+        if len(key) >= 2 and ((key[0], key[-1]) in (("⟨", "⟩"), ("`", "`"))):
+            key = re.sub(r"\\(.)", r"\1", key[1:-1])
+        elif not cls._PLAIN_KEY_RE.match(key):
+            raise ValueError(f"Invalid record id: {value!r}")
+        return cls(table, key)
+
+    def __str__(self) -> str:
+        if self._PLAIN_KEY_RE.match(self.key):
+            return f"{self.table}:{self.key}"
+        escaped = self.key.replace("\\", "\\\\").replace("⟩", "\\⟩")
+        return f"{self.table}:⟨{escaped}⟩"
+
+    def __repr__(self) -> str:
+        return f"RecordId({str(self)!r})"
+
+    def __eq__(self, other) -> bool:
+        return isinstance(other, RecordId) and (self.table, self.key) == (other.table, other.key)
+
+    def __hash__(self) -> int:
+        return hash((self.table, self.key))
+
+
+class Literal(str):
+    """
+    SurrealQL text bound as a param verbatim, for values already rendered
+    elsewhere (e.g. a restore batch rendered column by column). The caller
+    is responsible for it being a well-formed literal.
+    """
+    __slots__ = ()
+
+
+def _needs_literal(value: Any) -> bool:
+    """True if `value` holds types plain JSON cannot carry (record ids, datetimes)"""
+    if isinstance(value, (RecordId, datetime, Literal)):
+        return True
+    if isinstance(value, (list, tuple)):
+        return any(_needs_literal(v) for v in value)
+    if isinstance(value, dict):
+        return any(_needs_literal(v) for v in value.values())
+    return False
+
+
+def to_surql(value: Any) -> str:
+    """Render a Python value as a SurrealQL literal (JSON plus record ids and datetimes)"""
+    if isinstance(value, Literal):
+        return str(value)
+    if isinstance(value, RecordId):
+        return str(value)
+    if isinstance(value, datetime):
+        if value.tzinfo is None:
+            value = value.replace(tzinfo=timezone.utc)
+        return f'd"{value.isoformat()}"'
+    if isinstance(value, (list, tuple)):
+        return "[" + ", ".join(to_surql(v) for v in value) + "]"
+    if isinstance(value, dict):
+        return "{" + ", ".join(f"{json.dumps(str(k))}: {to_surql(v)}" for k, v in value.items()) + "}"
+    return json.dumps(value, default=str)
+
+
 class SurrealClient:
     def __init__(self):
         self.host = os.getenv("SURREAL_HOST", "localhost")
@@ -15,8 +126,12 @@ class SurrealClient:
         self.password = os.getenv("SURREAL_PASS", "root")
         self.namespace = os.getenv("SURREAL_NS", "abyss")
         self.database = os.getenv("SURREAL_DB", "core")
+        # Transport: "http" posts SurrealQL text to /sql, "ws" uses the RPC socket
+        self.protocol = os.getenv("SURREAL_PROTOCOL", "http").lower()
         self.base_url = f"http://{self.host}:{self.port}"
         self.sql_url = f"{self.base_url}/sql"
+        # Static head of every /sql request
+        self._use_stmt = f"USE NS {self.namespace} DB {self.database};\n"
         
         # Prepare headers
         auth_str = f"{self.user}:{self.password}"
@@ -28,106 +143,514 @@ class SurrealClient:
             "Authorization": f"Basic {auth_b64}",
             "Content-Type": "text/plain",
         }
-        self.client = httpx.AsyncClient(timeout=30.0)
 
-    async def connect(self):
-        # HTTP is stateless, but we'll check connection
+        # Connection pool settings. One client is shared by every tool call for
+        # the lifetime of the server, so these bound the concurrency towards DB.
+        self.timeout = float(os.getenv("SURREAL_TIMEOUT", "30"))
+        self.max_connections = int(os.getenv("SURREAL_MAX_CONNECTIONS", "20"))
+        self.max_keepalive = int(os.getenv("SURREAL_MAX_KEEPALIVE", "20"))
+        self.keepalive_expiry = float(os.getenv("SURREAL_KEEPALIVE_EXPIRY", "30"))
+        # HTTP/2 needs the optional `h2` package (httpx[http2])
+        self.http2 = (
+            os.getenv("SURREAL_HTTP2", "true").lower() in ("1", "true", "yes")
+            and importlib.util.find_spec("h2") is not None
+        )
+        # Seconds between background health probes, 0 disables the timer
+        self.health_interval = float(os.getenv("SURREAL_HEALTH_INTERVAL", "30"))
+        self.healthy: Optional[bool] = None
+        self._health_task: Optional[asyncio.Task] = None
+
+        self.client = self._build_http_client()
+        self.cache = QueryCache()
+        self.telemetry = Telemetry()
+
+        self.rpc = self._build_rpc() if self.protocol == "ws" else None
+        # Live queries need a socket even when queries go over HTTP
+        self._live_rpc = None
+        self._vector_search = None
+        # Max entities per batched tool call (one request each)
+        self.max_batch = int(os.getenv("BATCH_MAX_ITEMS", "25"))
+
+    def _build_rpc(self):
+        from ws_rpc import SurrealRpc
+        return SurrealRpc(
+            f"ws://{self.host}:{self.port}/rpc",
+            self.user, self.password, self.namespace, self.database,
+            timeout=self.timeout,
+        )
+
+    def live_transport(self):
+        """The RPC socket that carries live query notifications"""
+        if self.rpc is not None:
+            return self.rpc
+        if self._live_rpc is None:
+            self._live_rpc = self._build_rpc()
+        return self._live_rpc
+
+    def subscribe(self, table: str, where: Optional[str] = None, params: Optional[Dict] = None,
+                  since: Optional[datetime] = None, max_queue: int = 1000):
+        """
+        `LIVE SELECT` on `table` as an async iterator of change events.
+        Call `await sub.start()` before iterating and `await sub.close()` when done.
+        """
+        from live import LiveSubscription
+        return LiveSubscription(self, table, where=where, params=params, since=since, max_queue=max_queue)
+
+    def _build_http_client(self) -> httpx.AsyncClient:
+        limits = httpx.Limits(
+            max_connections=self.max_connections,
+            max_keepalive_connections=self.max_keepalive,
+            keepalive_expiry=self.keepalive_expiry,
+        )
+        return httpx.AsyncClient(
+            timeout=self.timeout,
+            limits=limits,
+            http2=self.http2,
+            headers=self.headers,
+        )
+
+    async def health_check(self) -> bool:
+        """Cheap liveness probe against /health (no query is executed)"""
         try:
-            resp = await self.client.post(self.sql_url, content="INFO FOR DB;", headers=self.headers)
-            resp.raise_for_status()
-            print(f"[SurrealDB] HTTP Connected to ns:{self.namespace} db:{self.database}")
+            if self.rpc is not None:
+                self.healthy = await self.rpc.ping()
+            else:
+                resp = await self.client.get(f"{self.base_url}/health")
+                self.healthy = resp.status_code == 200
         except Exception as e:
-            print(f"[SurrealDB] Connection Check Failed: {e}")
+            if self.healthy is not False:
+                print(f"[SurrealDB] Health check failed: {e}", file=sys.stderr)
+            self.healthy = False
+        return self.healthy
+
+    async def _health_loop(self):
+        while True:
+            await asyncio.sleep(self.health_interval)
+            await self.health_check()
+
+    async def connect(self):
+        # HTTP is stateless, but we'll check connection
+        if self.client.is_closed:
+            self.client = self._build_http_client()
+        if await self.health_check():
+            print(f"[SurrealDB] {self.protocol.upper()} Connected to ns:{self.namespace} db:{self.database}", file=sys.stderr)
+        else:
             # Don't raise here, allow retries or lazy failure
-            
+            print(f"[SurrealDB] Connection Check Failed: {self.base_url}", file=sys.stderr)
+
+    async def start(self):
+        """Open the pooled client and start the background health timer"""
+        await self.connect()
+        if self.health_interval > 0 and self._health_task is None:
+            self._health_task = asyncio.create_task(self._health_loop())
+
     async def close(self):
+        if self._health_task is not None:
+            self._health_task.cancel()
+            try:
+                await self._health_task
+            except asyncio.CancelledError:
+                pass
+            self._health_task = None
+        if self.rpc is not None:
+            await self.rpc.close()
+        if self._live_rpc is not None:
+            await self._live_rpc.close()
         await self.client.aclose()
 
-    async def query(self, sql: str, params: Optional[Dict] = None) -> List[Dict]:
-        """Execute a raw SurrealQL query"""
-        # SurrealDB HTTP endpoint handles params differently (usually simpler to inline or use LET)
-        # But for robustness, we will perform simple variable substitution if params are simple
-        # Or just rely on string formatting from the caller for now.
-        # The recommended way for HTTP is just sending the SQL string.
-        # If params are needed, we can prepend `LET $key = value;` to the SQL.
-        
-        final_sql = sql
-        if params:
-            # Prepend LET statements for params
-            # Note: This is a basic implementation. Complex types (objects) need JSON serialization.
-            let_stmts = []
-            for k, v in params.items():
-                val_json = json.dumps(v, default=str)
-                # SurrealQL var format
-                let_stmts.append(f"LET ${k} = {val_json};")
-            final_sql = "\n".join(let_stmts) + "\n" + sql
+    async def query(self, sql: str, params: Optional[Dict] = None, use_cache: bool = True,
+                    strict: bool = True) -> List[Dict]:
+        """
+        Execute a raw SurrealQL query.
+        Returns one result object per statement of `sql`, whichever transport is used.
+        Reads are served from the query cache unless `use_cache` is False; writes
+        invalidate every cached result touching the written tables.
+        With `strict=False` a failed statement comes back as its `ERR` result
+        instead of raising, so batches can report errors per item.
+        """
+        return await self._execute(sql, params, use_cache, strict, None)
 
-        # Explicitly set namespace/db for every request to be safe
-        final_sql = f"USE NS {self.namespace} DB {self.database};\n{final_sql}"
+    async def run(self, template, use_cache: bool = True, strict: bool = True, **values) -> List[Dict]:
+        """
+        Execute a registered query template (see templates.py) by name or object.
+        `values` are validated and typed by the template before anything is sent.
+        """
+        from templates import get_template
+
+        template = get_template(template)
+        return await self._execute(template.sql, template.bind(values), use_cache, strict, template)
 
+    async def stream(self, sql: str, params: Optional[Dict] = None, template=None) -> AsyncIterator[Tuple[int, Any]]:
+        """
+        Execute SurrealQL (or a registered template, with `sql` ignored) and
+        yield `(statement, row)` pairs while the response is still arriving.
+
+        Rows are decoded one at a time from the HTTP body (jsonstream.py), so
+        memory stays flat whatever the result size; a result that is not an
+        array is yielded as a single row. Statement numbers count the caller's
+        statements only, and a failed statement raises when it is reached.
+        Streams bypass the query cache. Iterate inside `contextlib.aclosing()`
+        to stop early: the response is closed and the rest is never read.
+        Over the WebSocket transport the result arrives as one frame and is
+        replayed row by row.
+        """
+        from jsonstream import ResultStream
+
+        if template is not None:
+            from templates import get_template
+            template = get_template(template)
+            sql, params = template.sql, template.bind(params or {})
+        telemetry = self.telemetry
+        span = NULL_SPAN
+        if telemetry.enabled:
+            span = telemetry.span("query", template.name if template is not None else telemetry.label(sql))
+        decoder = ResultStream()
+        error = None
         try:
-            response = await self.client.post(self.sql_url, content=final_sql, headers=self.headers)
-            response.raise_for_status()
-            
-            # SurrealDB returns a list of result objects, one for each statement
-            json_resp = response.json()
-            
+            if self.rpc is not None:
+                json_resp, _ = await self._rpc_query(sql, params, span)
+                events = [("end", i, res) for i, res in enumerate(json_resp)]
+                for statement, row in self._stream_rows(events, 0):
+                    yield statement, row
+            else:
+                final_sql, n_prefix = self._http_body(sql, params, template)
+                span.lap("build")
+                async with self.client.stream("POST", self.sql_url, content=final_sql) as response:
+                    response.raise_for_status()
+                    span.lap("network")
+                    async for chunk in response.aiter_bytes():
+                        for statement, row in self._stream_rows(decoder.feed(chunk), n_prefix):
+                            yield statement, row
+                    for statement, row in self._stream_rows(decoder.close(), n_prefix):
+                        yield statement, row
+                span.lap("parse")
+            if template.write if template is not None else is_write(sql):
+                self.cache.invalidate(template.tables_for(params) if template is not None else tables_in(sql, params))
+        except Exception as e:
+            error = str(e)[:200]
+            telemetry.log("ERROR", "[SurrealDB]", f"Stream failed: {e}")
+            raise
+        finally:
+            # Also reached when the consumer stops early
+            span.finish(decoder.bytes or None, decoder.rows, sql, error)
+
+    @staticmethod
+    def _stream_rows(events, n_prefix: int) -> List[Tuple[int, Any]]:
+        rows = []
+        for kind, statement, value in events:
+            if kind == "row":
+                if statement >= n_prefix:
+                    rows.append((statement - n_prefix, value))
+            elif value.get("status") == "ERR":
+                raise Exception(f"SurrealDBQL Error: {json.dumps(value)}")
+            elif statement >= n_prefix and "result" in value:
+                result = value["result"]
+                rows.extend((statement - n_prefix, row) for row in (result if isinstance(result, list) else [result]))
+        return rows
+
+    async def _execute(self, sql: str, params: Optional[Dict], use_cache: bool, strict: bool,
+                       template) -> List[Dict]:
+        telemetry = self.telemetry
+        span = NULL_SPAN
+        if telemetry.enabled:
+            span = telemetry.span("query", template.name if template is not None else telemetry.label(sql))
+        write = template.write if template is not None else is_write(sql)
+        cache_key = None
+        if use_cache and not write and self.cache.enabled:
+            cache_key = template.cache_key(params) if template is not None else self.cache.make_key(sql, params)
+            cached = self.cache.get(cache_key)
+            span.lap("cache")
+            if cached is not None:
+                span.finish(rows=count_rows(cached) if telemetry.enabled else None, sql=sql)
+                return cached
+
+        try:
+            if self.rpc is not None:
+                json_resp, nbytes = await self._rpc_query(sql, params, span)
+            else:
+                json_resp, nbytes = await self._http_query(sql, params, template, span)
+
             # Check for application-level errors
+            failed = False
             if isinstance(json_resp, list):
                 for res in json_resp:
                     if res.get('status') == 'ERR':
-                        raise Exception(f"SurrealDBQL Error: {json.dumps(res)}")
-            
+                        if strict:
+                            raise Exception(f"SurrealDBQL Error: {json.dumps(res)}")
+                        failed = True
+
+            if write or (cache_key is not None and not failed):
+                tables = template.tables_for(params) if template is not None else tables_in(sql, params)
+                if write:
+                    self.cache.invalidate(tables)
+                else:
+                    self.cache.put(cache_key, tables, json_resp)
+            span.finish(nbytes, count_rows(json_resp) if telemetry.enabled else None, sql,
+                        "ERR" if failed else None)
             return json_resp
         except Exception as e:
-            print(f"[SurrealDB] Query failed: {e}")
+            span.finish(sql=sql, error=str(e)[:200])
+            telemetry.log("ERROR", "[SurrealDB]", f"Query failed: {e}")
             raise
 
+    @staticmethod
+    def _strip_prefix(json_resp: Any, prefix_len: int) -> Any:
+        # Drop the results belonging to statements we prepended so the
+        # remaining ones line up with the caller's `sql`.
+        if not prefix_len or not isinstance(json_resp, list) or len(json_resp) <= prefix_len:
+            return json_resp
+        for res in json_resp[:prefix_len]:
+            if res.get('status') == 'ERR':
+                raise Exception(f"SurrealDBQL Error: {json.dumps(res)}")
+        return json_resp[prefix_len:]
+
+    async def _rpc_query(self, sql: str, params: Optional[Dict], span) -> Tuple[List[Dict], Optional[int]]:
+        # RPC sessions are already scoped by `use` and params travel as real
+        # bindings. JSON cannot carry record ids or datetimes though, so those are declared with LET.
+        params = params or {}
+        let_stmts = [f"LET ${k} = {to_surql(v)};" for k, v in params.items() if _needs_literal(v)]
+        bindings = {k: v for k, v in params.items() if not _needs_literal(v)}
+        if let_stmts:
+            sql = "\n".join(let_stmts) + "\n" + sql
+        span.lap("build")
+        # Frames are decoded by the socket reader, so parse time is part of "network"
+        json_resp = await self.rpc.query(sql, bindings)
+        span.lap("network")
+        return self._strip_prefix(json_resp, len(let_stmts)), None
+
+    def _http_body(self, sql: str, params: Optional[Dict], template) -> Tuple[str, int]:
+        """Request text for /sql and how many leading results belong to prepended statements"""
+        # The /sql endpoint takes plain text, so params are prepended as
+        # `LET $key = value;` statements.
+        if template is not None:
+            body, n_lets = template.http_body(params)
+        else:
+            let_stmts = [f"LET ${k} = {to_surql(v)};" for k, v in (params or {}).items()]
+            body, n_lets = "\n".join(let_stmts + [sql]), len(let_stmts)
+
+        if self.client.is_closed:
+            self.client = self._build_http_client()
+        # Explicitly set namespace/db for every request to be safe
+        return self._use_stmt + body, 1 + n_lets
+
+    async def _http_query(self, sql: str, params: Optional[Dict], template, span) -> Tuple[List[Dict], int]:
+        final_sql, n_prefix = self._http_body(sql, params, template)
+        span.lap("build")
+
+        response = await self.client.post(self.sql_url, content=final_sql)
+        response.raise_for_status()
+        span.lap("network")
+
+        # SurrealDB returns a list of result objects, one for each statement
+        json_resp = response.json()
+        span.lap("parse")
+        return self._strip_prefix(json_resp, n_prefix), len(response.content)
+
     # --- Tool Implementations ---
 
-    async def trace_narrative_chain(self, start_node: str, depth: int = 2) -> Dict:
+    async def trace_narrative_chain(self, start_node: str, depth: int = 2,
+                                    max_fanout: int = 50, min_weight: Optional[float] = None) -> Dict:
         """
         Implementation of the trace_narrative_chain tool.
-        Explore the graph starting from a node.
+        Bounded BFS from `start_node` over mentions/involves/impacts/reflects_on,
+        in both directions, returning projected nodes (no embeddings) and edges.
         """
-        # Note: This is a simplifed graph walk. In real scenario, we might want
-        # specific edge traversals.
-        # SURQL Logic: SELECT * FROM (SELECT ->involves->out FROM $start)
-        
-        # We'll fetch the node itself, and its direct outgoing relations
-        query = f"""
-        SELECT *, 
-            ->involves->concept AS related_concepts,
-            ->mentions->article AS related_articles,
-            ->mentions->pulse AS related_pulses
-        FROM {start_node};
+        from graph import NarrativeTracer
+
+        return await NarrativeTracer(self).trace(start_node, depth, max_fanout=max_fanout,
+                                                 min_weight=min_weight)
+
+    def _check_batch(self, items: List[Any], what: str):
+        if not items:
+            raise ValueError(f"No {what} given")
+        if len(items) > self.max_batch:
+            raise ValueError(f"At most {self.max_batch} {what} per call (got {len(items)})")
+
+    async def trace_narrative_chains(self, start_nodes: List[str], depth: int = 2,
+                                     max_fanout: int = 50, min_weight: Optional[float] = None) -> Dict:
+        """
+        Batched trace_narrative_chain: every BFS level of all start nodes is
+        one request. Each item carries its own nodes/edges or an `error`.
+        """
+        from graph import NarrativeTracer
+
+        self._check_batch(start_nodes, "start nodes")
+        items = await NarrativeTracer(self).trace_many(start_nodes, depth, max_fanout=max_fanout,
+                                                       min_weight=min_weight)
+        return {"count": len(items), "failed": sum("error" in i for i in items), "items": items}
+
+    async def rank_related(self, node: str, by: str = "influence", k: int = 20) -> Dict:
+        """
+        Implementation of the rank_related tool: top-k neighbours of `node` by
+        the influence / co-mention scores centrality.py precomputes, read with
+        one indexed query.
+        """
+        from centrality import rank_related
+
+        return await rank_related(self, node, by, k)
+
+    async def semantic_search(self, table: str, vectors: Optional[List[List[float]]] = None,
+                              like: Optional[str] = None, k: int = 10, **filters) -> Dict:
         """
-        return await self.query(query)
+        KNN over the HNSW embedding index of pulse/article/concept (or the
+        compact int8/float16 copies, see VECTOR_SEARCH_MODE).
+        `filters`: since, until, within_hours, platform, source_type, min_reliability, ef.
+        """
+        if self._vector_search is None:
+            # Kept across calls: compact mode holds an in-process index
+            from search import VectorSearch
+            self._vector_search = VectorSearch(self)
+        return await self._vector_search.search(table, vectors, like=like, k=k, **filters)
+
+    def scan_records(self, table: str, since: Optional[str] = None, until: Optional[str] = None,
+                     start: int = 0, limit: int = 1000) -> AsyncIterator[Dict]:
+        """
+        Implementation of the scan_records tool: rows of a time-ordered table,
+        newest first, streamed from the response (close the iterator to stop early).
+        """
+        from scan import scan
+
+        return scan(self, table, since, until, start, limit)
 
     async def create_directive(self, target: str, type: str, context: Dict) -> Dict:
         """
         Create a new directive in the database.
         """
-        query = """
-        CREATE directive CONTENT {
-            target: $target,
-            type: $type,
-            status: 'active',
-            context: $context,
-            created_at: time::now()
-        };
+        from hunter import CREATE_DIRECTIVE
+
+        return await self.run(CREATE_DIRECTIVE, target=target, type=type, context=context)
+
+    async def create_directives(self, directives: List[Dict]) -> Dict:
+        """
+        Create several directives in one request. Each CREATE is its own
+        statement, so one rejected directive does not roll back the others.
+        `directives`: [{target, type, context}].
         """
-        params = {"target": target, "type": type, "context": context}
-        return await self.query(query, params)
+        self._check_batch(directives, "directives")
+        params: Dict[str, Any] = {}
+        stmts = []
+        for i, d in enumerate(directives):
+            params[f"target_{i}"], params[f"type_{i}"] = d["target"], d["type"]
+            params[f"context_{i}"] = d.get("context") or {}
+            stmts.append(
+                f"CREATE directive CONTENT {{ target: $target_{i}, type: $type_{i}, status: 'active', "
+                f"context: $context_{i}, created_at: time::now() }};"
+            )
+        res = await self.query("\n".join(stmts), params, strict=False)
+        items = []
+        for i, d in enumerate(directives):
+            stmt = res[i] if i < len(res) else {}
+            if stmt.get("status") == "ERR":
+                items.append({"target": d["target"], "type": d["type"], "error": str(stmt.get("result"))})
+            else:
+                created = stmt.get("result") or []
+                items.append(created[0] if isinstance(created, list) and created else created)
+        return {"count": len(items), "failed": sum("error" in i for i in items), "items": items}
 
-    async def verify_financials(self, ticker: str, metric: str) -> Dict:
+    async def verify_financials(self, ticker: str, metric: str, periods: int = 4) -> Dict:
         """
-        Query L1 Report data.
+        Query L1 Report data for a single metric.
+        Served from the materialized `metric_series` record; falls back to an
+        indexed scan of `report` for metrics written before the series existed.
         """
-        # Find company by ticker
-        query = """
-        LET $comp = (SELECT id FROM company WHERE ticker = $ticker LIMIT 1)[0];
-        SELECT * FROM report WHERE company = $comp.id ORDER BY published_at DESC LIMIT 5;
+        from financials import SERIES, REPORT_SCAN, summarize
+
+        res = await self.run(SERIES, ticker=ticker, metric=metric)
+        rows = res[-1].get("result") or [] if res else []
+        if rows and rows[0].get("points"):
+            return summarize(ticker, metric, rows[0]["points"], periods, "metric_series")
+
+        res = await self.run(REPORT_SCAN, ticker=ticker, metric=metric, limit=periods + 4)
+        rows = res[-1].get("result") or [] if res else []
+        return summarize(ticker, metric, rows, periods, "report_scan")
+
+    async def verify_financials_batch(self, claims: List[Tuple[str, str]], periods: int = 4) -> Dict:
         """
-        params = {"ticker": ticker}
-        return await self.query(query, params)
+        Batched verify_financials over (ticker, metric) pairs: the series
+        lookups travel in one request, and only pairs without a materialized
+        series cost a second one (report scans). Errors are reported per item.
+        """
+        from financials import BATCH_SERIES_STMT, BATCH_SCAN_STMTS, summarize
+
+        self._check_batch(claims, "claims")
+        params: Dict[str, Any] = {"limit": periods + 4}
+        for i, (ticker, metric) in enumerate(claims):
+            params[f"ticker_{i}"], params[f"metric_{i}"] = ticker, metric
+        sql = "\n".join(BATCH_SERIES_STMT.format(i=i) for i in range(len(claims)))
+        res = await self.query(sql, params, strict=False)
+
+        items: List[Optional[Dict]] = [None] * len(claims)
+        missing = []
+        for i, (ticker, metric) in enumerate(claims):
+            stmt = res[i] if i < len(res) else {}
+            if stmt.get("status") == "ERR":
+                items[i] = {"ticker": ticker, "metric": metric, "error": str(stmt.get("result"))}
+                continue
+            rows = stmt.get("result") or []
+            if rows and rows[0].get("points"):
+                items[i] = summarize(ticker, metric, rows[0]["points"], periods, "metric_series")
+            else:
+                missing.append(i)
+
+        if missing:
+            sql = "".join(BATCH_SCAN_STMTS.format(i=i) for i in missing)
+            res = await self.query(sql, params, strict=False)
+            for n, i in enumerate(missing):
+                ticker, metric = claims[i]
+                # Two results per pair: the LET, then the scan
+                stmt = res[2 * n + 1] if 2 * n + 1 < len(res) else {}
+                if stmt.get("status") == "ERR":
+                    items[i] = {"ticker": ticker, "metric": metric, "error": str(stmt.get("result"))}
+                    continue
+                summary = summarize(ticker, metric, stmt.get("result") or [], periods, "report_scan")
+                if not summary["points"]:
+                    summary = {"ticker": ticker, "metric": metric, "error": f"No reports found for ticker {ticker}"}
+                items[i] = summary
+        return {"count": len(items), "failed": sum("error" in i for i in items), "items": items}
+
+    async def write_report(self, ticker: str, period: str, type: str, metrics: Dict,
+                           url: Optional[str] = None, published_at: Optional[str] = None) -> Dict:
+        """
+        Create a report and fold its numeric metrics into the per-(company, metric)
+        series, in one transaction.
+        """
+        from financials import WRITE_REPORT, numeric_metrics
+
+        res = await self.run(
+            WRITE_REPORT,
+            ticker=ticker,
+            period=period,
+            type=type,
+            metrics=metrics,
+            url=url,
+            published_at=published_at or datetime.now(timezone.utc).isoformat(),
+            series=numeric_metrics(metrics),
+        )
+        return res[-1].get("result") if res else None
+
+    async def rebuild_metric_series(self, batch_size: int = 500) -> int:
+        """Backfill `metric_series` from existing reports. Returns reports processed."""
+        from financials import BACKFILL
+
+        done = 0
+        while True:
+            res = await self.run(BACKFILL, start=done, limit=batch_size, use_cache=False)
+            rows = res[-1].get("result") or [] if res else []
+            if not rows:
+                return done
+            for row in rows:
+                if row.get("ticker"):
+                    await self._fold_report_metrics(row)
+            done += len(rows)
+
+    async def _fold_report_metrics(self, row: Dict):
+        from financials import FOLD_REPORT, numeric_metrics
+
+        await self.run(
+            FOLD_REPORT,
+            ticker=row["ticker"],
+            report=row["id"],
+            period=row.get("period"),
+            published_at=row.get("published_at"),
+            series=numeric_metrics(row.get("metrics")),
+        )
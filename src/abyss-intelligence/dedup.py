@@ -0,0 +1,258 @@
+import os
+import re
+import sys
+import base64
+import hashlib
+from collections import OrderedDict
+from typing import Dict, List, Optional, Tuple
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+
+import numpy as np
+
+from db_client import RecordId, SurrealClient
+
+# Query parameters that only track the click, never select the content
+TRACKING_PARAMS = {"fbclid", "gclid", "dclid", "msclkid", "yclid", "igshid", "mc_cid", "mc_eid",
+                   "ref", "ref_src", "ref_url", "spm", "share_source", "cmpid", "ncid", "ocid", "smid", "_ga"}
+_STRIP_HOST = ("www.", "m.", "mobile.", "amp.")
+
+# CJK has no word breaks: every character is a token, other scripts split on non-word chars
+_CJK = "\u3040-\u30ff\u3400-\u4dbf\u4e00-\u9fff\uac00-\ud7af"
+_TOKEN_RE = re.compile(rf"[{_CJK}]|[^\W_{_CJK}]+")
+
+# MinHash: NUM_PERM hashes per document, LSH over BANDS bands of ROWS each.
+# A pair with shingle Jaccard J becomes a candidate with probability
+# 1 - (1 - J^ROWS)^BANDS: ~99% at J=0.7, ~5% at J=0.3.
+NUM_PERM = 64
+BANDS = 16
+ROWS = NUM_PERM // BANDS
+_rng = np.random.default_rng(0x5EED)
+_PERM_A = _rng.integers(1, 2 ** 63, NUM_PERM, dtype=np.uint64) | np.uint64(1)
+_PERM_B = _rng.integers(0, 2 ** 63, NUM_PERM, dtype=np.uint64)
+_BAND_MIX = _rng.integers(1, 2 ** 63, ROWS, dtype=np.uint64) | np.uint64(1)
+
+LOAD_SQL = """
+SELECT id, minhash, url, sources FROM type::table($table)
+WHERE minhash != NONE AND created_at > time::now() - type::duration($window)
+ORDER BY created_at DESC LIMIT $limit;
+"""
+
+
+def canonical_url(url: str) -> str:
+    """
+    Key under which syndicated copies of one URL collapse: scheme and `www.`/`m.`
+    host prefixes, default ports, fragments, tracking parameters (utm_*, fbclid,
+    ...), parameter order and trailing slashes don't count.
+    """
+    try:
+        parts = urlsplit(url.strip())
+    except ValueError:
+        return url.strip()
+    if not parts.netloc:
+        return url.strip()
+    host = (parts.hostname or "").lower().rstrip(".")
+    for prefix in _STRIP_HOST:
+        if host.startswith(prefix) and host.count(".") > 1:
+            host = host[len(prefix):]
+            break
+    try:
+        port = parts.port
+    except ValueError:
+        port = None
+    if port and port not in (80, 443):
+        host = f"{host}:{port}"
+    query = sorted((k, v) for k, v in parse_qsl(parts.query, keep_blank_values=True)
+                   if not k.lower().startswith("utm_") and k.lower() not in TRACKING_PARAMS)
+    path = re.sub(r"/{2,}", "/", parts.path).rstrip("/") or "/"
+    for index in ("/index.html", "/index.htm", "/index.php"):
+        if path.endswith(index):
+            path = path[: -len(index)] or "/"
+    return urlunsplit(("https", host, path, urlencode(query), ""))
+
+
+_MIX1 = np.uint64(0xBF58476D1CE4E5B9)
+_MIX2 = np.uint64(0x94D049BB133111EB)
+_token_hashes: Dict[str, int] = {}
+TOKEN_CACHE_SIZE = 500_000
+
+
+def _token_hash(token: str) -> int:
+    h = _token_hashes.get(token)
+    if h is None:
+        if len(_token_hashes) >= TOKEN_CACHE_SIZE:
+            _token_hashes.clear()
+        h = _token_hashes[token] = int.from_bytes(
+            hashlib.blake2b(token.encode("utf-8"), digest_size=8).digest(), "little")
+    return h
+
+
+def _rotl(x: np.ndarray, r: int) -> np.ndarray:
+    return (x << np.uint64(r)) | (x >> np.uint64(64 - r))
+
+
+def shingles(text: str, size: int = 3) -> np.ndarray:
+    """
+    Distinct 64-bit hashes of the word (CJK: character) n-grams of `text`.
+    Tokens are hashed once (and cached); n-gram hashes are combined from
+    them in numpy rather than hashing every n-gram string.
+    """
+    tokens = _TOKEN_RE.findall(text.lower())
+    if not tokens:
+        return np.empty(0, dtype=np.uint64)
+    h = np.fromiter((_token_hash(t) for t in tokens), dtype=np.uint64, count=len(tokens))
+    if len(h) >= size:
+        n = len(h) - size + 1
+        mixed = h[:n].copy()
+        for i in range(1, size):
+            mixed ^= _rotl(h[i:i + n], 21 * i % 64)
+        h = mixed
+    # splitmix64 finalizer, so the rotated XOR doesn't leave correlated bits
+    h ^= h >> np.uint64(30)
+    h *= _MIX1
+    h ^= h >> np.uint64(27)
+    h *= _MIX2
+    h ^= h >> np.uint64(31)
+    return np.unique(h)
+
+
+def minhash(features: np.ndarray) -> np.ndarray:
+    """NUM_PERM-value MinHash signature (uint32) of a set of 64-bit feature hashes"""
+    products = _PERM_A[:, None] * features[None, :] + _PERM_B[:, None]
+    return (products >> np.uint64(32)).min(axis=1).astype(np.uint32)
+
+
+def encode_signature(signature: np.ndarray) -> str:
+    return base64.b64encode(signature.astype("<u4").tobytes()).decode("ascii")
+
+
+def decode_signature(value: str) -> np.ndarray:
+    return np.frombuffer(base64.b64decode(value), dtype="<u4").astype(np.uint32)
+
+
+class MinHashIndex:
+    """
+    Bounded LSH index over MinHash signatures. Signatures are bucketed per
+    band; records sharing any band are candidates, and a candidate matches
+    when the fraction of equal signature values (the Jaccard estimate) reaches
+    `threshold`.
+    """
+
+    def __init__(self, threshold: float = 0.7, capacity: int = 100_000):
+        self.threshold = threshold
+        self.capacity = capacity
+        self._signatures: "OrderedDict[str, Tuple[bytes, RecordId]]" = OrderedDict()
+        self._buckets: List[Dict[int, List[str]]] = [{} for _ in range(BANDS)]
+
+    def __len__(self) -> int:
+        return len(self._signatures)
+
+    @staticmethod
+    def _bands(signature: np.ndarray) -> List[int]:
+        rows = signature.astype(np.uint64).reshape(BANDS, ROWS)
+        return (rows * _BAND_MIX).sum(axis=1).tolist()
+
+    def add(self, rid: RecordId, signature: np.ndarray):
+        key = str(rid)
+        if key in self._signatures:
+            return
+        self._signatures[key] = (signature.tobytes(), rid)
+        for band, bucket in enumerate(self._bands(signature)):
+            self._buckets[band].setdefault(bucket, []).append(key)
+        if len(self._signatures) > self.capacity:
+            old_key, (old, _) = self._signatures.popitem(last=False)
+            for band, bucket in enumerate(self._bands(np.frombuffer(old, dtype=np.uint32))):
+                keys = self._buckets[band][bucket]
+                keys.remove(old_key)
+                if not keys:
+                    del self._buckets[band][bucket]
+
+    def nearest(self, signature: np.ndarray) -> Optional[Tuple[RecordId, float]]:
+        """Most similar indexed record at or above `threshold`, as (id, estimated Jaccard)"""
+        best = None
+        seen = set()
+        for band, bucket in enumerate(self._bands(signature)):
+            for key in self._buckets[band].get(bucket, ()):
+                if key in seen:
+                    continue
+                seen.add(key)
+                other, rid = self._signatures[key]
+                similarity = float((np.frombuffer(other, dtype=np.uint32) == signature).mean())
+                if similarity >= self.threshold and (best is None or similarity > best[1]):
+                    best = (rid, similarity)
+        return best
+
+
+class Deduplicator:
+    """
+    Ingestion-side dedup for `article` / `pulse`.
+
+    Exact duplicates share a canonical URL (and therefore a record id);
+    near-duplicates (syndicated or lightly edited copies) are found by
+    MinHash over content shingles. Either way `check()` names the record the
+    item should be merged into instead of being inserted again. Per-table
+    LSH indexes live in memory and are rebuilt from recent rows by `load()`.
+    """
+
+    def __init__(self, threshold: Optional[float] = None, min_shingles: Optional[int] = None,
+                 capacity: Optional[int] = None, window: Optional[str] = None):
+        self.threshold = threshold if threshold is not None else float(os.getenv("DEDUP_THRESHOLD", "0.7"))
+        self.min_shingles = min_shingles if min_shingles is not None else int(os.getenv("DEDUP_MIN_SHINGLES", "16"))
+        self.capacity = capacity or int(os.getenv("DEDUP_INDEX_SIZE", "100000"))
+        self.window = window or os.getenv("DEDUP_WINDOW", "14d")
+        self.indexes: Dict[str, MinHashIndex] = {}
+        # Record ids written recently, for exact matches on the canonical URL
+        self._ids: "OrderedDict[str, None]" = OrderedDict()
+        self.stats = {"checked": 0, "exact": 0, "near": 0, "loaded": 0}
+
+    def index(self, table: str) -> MinHashIndex:
+        if table not in self.indexes:
+            self.indexes[table] = MinHashIndex(self.threshold, self.capacity)
+        return self.indexes[table]
+
+    def fingerprint(self, content: str) -> Optional[np.ndarray]:
+        """MinHash signature of `content`, or None when it is too short to compare reliably"""
+        features = shingles(content)
+        if len(features) < self.min_shingles:
+            return None
+        return minhash(features)
+
+    def check(self, table: str, rid: RecordId, fingerprint: Optional[np.ndarray]) -> Optional[RecordId]:
+        """The record `rid` duplicates, or None after registering it as new"""
+        self.stats["checked"] += 1
+        key = str(rid)
+        if key in self._ids:
+            self._ids.move_to_end(key)
+            self.stats["exact"] += 1
+            return rid
+        if fingerprint is not None:
+            index = self.index(table)
+            match = index.nearest(fingerprint)
+            if match is not None:
+                self.stats["near"] += 1
+                return match[0]
+            index.add(rid, fingerprint)
+        self._ids[key] = None
+        if len(self._ids) > self.capacity:
+            self._ids.popitem(last=False)
+        return None
+
+    async def load(self, db: SurrealClient, tables=("article", "pulse")) -> List[str]:
+        """
+        Rebuild the LSH indexes from rows created within the dedup window.
+        Returns the URLs those rows were ingested or merged from.
+        """
+        urls: List[str] = []
+        for table in tables:
+            res = await db.query(LOAD_SQL, {"table": table, "window": self.window, "limit": self.capacity},
+                                 use_cache=False)
+            rows = (res[0].get("result") or []) if res else []
+            index = self.index(table)
+            # Oldest first, so the newest rows survive the capacity bound
+            for row in reversed(rows):
+                rid = RecordId.parse(row["id"])
+                index.add(rid, decode_signature(row["minhash"]))
+                self._ids[str(rid)] = None
+                urls.extend(u for u in [row.get("url")] + list(row.get("sources") or []) if u)
+            self.stats["loaded"] += len(rows)
+        print(f"[Dedup] Loaded {self.stats['loaded']} signatures ({self.window} window)", file=sys.stderr)
+        return urls
@@ -0,0 +1,545 @@
+import os
+import re
+import sys
+import time
+import asyncio
+import hashlib
+import sqlite3
+import threading
+import unicodedata
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import httpx
+import numpy as np
+
+from db_client import RecordId, SurrealClient, resolve_path
+from quantize import encode
+from search import EMBEDDING_DIMENSION
+from telemetry import LATENCY_BOUNDS_MS, Histogram
+from templates import register
+
+# Tables with an `embedding` field (init_db.surql) and the text embedded for each row
+EMBED_TABLES: Dict[str, Tuple[str, ...]] = {
+    "article": ("title", "content"),
+    "concept": ("name", "description"),
+    "pulse": ("content",),
+}
+
+# Weight of each engagement counter in a pulse's heat; only pulses at or above
+# EMBEDDING_PULSE_MIN_ENGAGEMENT are embedded
+ENGAGEMENT_WEIGHTS: Dict[str, float] = {"likes": 1.0, "replies": 2.0, "reposts": 3.0, "quotes": 3.0, "views": 0.01}
+
+BATCH_BOUNDS = [2 ** i for i in range(12)]
+_WS_RE = re.compile(r"\s+")
+
+
+def _heat_sql() -> str:
+    return " + ".join(f"(engagement.{k} ?? 0) * {w}" for k, w in ENGAGEMENT_WEIGHTS.items())
+
+
+PENDING_SQL = """
+SELECT id, {fields} FROM {table}
+    WHERE embedded_at = NONE AND (!$after OR id > $after){heat} ORDER BY id LIMIT $limit;
+"""
+
+WRITE_SQL = """
+FOR $u IN $updates {
+    UPDATE $u.id SET embedding = $u.embedding, embedding_q = $u.embedding_q ?? NONE,
+        embedding_scale = $u.embedding_scale ?? NONE, embedded_at = time::now() RETURN NONE;
+};
+"""
+
+PENDING = {
+    table: register(f"embeddings.pending.{table}",
+                    PENDING_SQL.format(table=table, fields=", ".join(fields),
+                                       heat=f" AND compacted_at = NONE AND {_heat_sql()} >= $min_heat" if table == "pulse" else ""),
+                    after="option<record>", limit="int", **({"min_heat": "float"} if table == "pulse" else {}))
+    for table, fields in EMBED_TABLES.items()
+}
+WRITE = register("embeddings.write", WRITE_SQL, updates="array<object>")
+
+
+def engagement_heat(engagement: Optional[Dict]) -> float:
+    return sum(float((engagement or {}).get(k) or 0) * w for k, w in ENGAGEMENT_WEIGHTS.items())
+
+
+def normalize_text(text: str, max_chars: int = 8000) -> str:
+    """What actually gets embedded: NFC, whitespace collapsed, capped at `max_chars`"""
+    return _WS_RE.sub(" ", unicodedata.normalize("NFC", text or "")).strip()[:max_chars]
+
+
+def row_text(table: str, row: Dict) -> str:
+    return "\n".join(str(row[f]) for f in EMBED_TABLES[table] if row.get(f))
+
+
+# --- Providers ---
+
+class EmbeddingProvider:
+    """
+    Turns a batch of texts into unit vectors. `model` and `dim` are part of
+    every cache key, so switching models never serves stale vectors.
+    """
+
+    name = "base"
+    model = ""
+    dim = 0
+    max_batch = 2048
+
+    async def embed(self, texts: List[str]) -> np.ndarray:
+        """float32 array of shape (len(texts), dim)"""
+        raise NotImplementedError
+
+    async def close(self):
+        pass
+
+
+class HashEmbedder(EmbeddingProvider):
+    """
+    Deterministic local stand-in: signed feature hashing of character
+    trigrams into `dim` buckets, L2-normalized. Texts sharing wording get
+    nearby vectors, so nearest-neighbour behaviour is testable offline; the
+    vectors carry no semantics. `latency` (seconds per call) simulates a
+    remote provider in benchmarks.
+    """
+
+    name = "hash"
+
+    def __init__(self, dim: int = EMBEDDING_DIMENSION, latency: float = 0.0):
+        self.dim = dim
+        self.model = f"hash-trigram-{dim}"
+        self.latency = latency
+
+    def _one(self, text: str) -> np.ndarray:
+        codes = np.frombuffer(text.lower().encode("utf-32-le"), dtype=np.uint32).astype(np.uint64)
+        v = np.zeros(self.dim, dtype=np.float32)
+        if len(codes) < 3:
+            codes = np.concatenate([codes, np.zeros(3 - len(codes), dtype=np.uint64)])
+        with np.errstate(over="ignore"):
+            h = (codes[:-2] * np.uint64(0x9E3779B97F4A7C15)) ^ (codes[1:-1] * np.uint64(0xBF58476D1CE4E5B9)) ^ codes[2:]
+            h ^= h >> np.uint64(31)
+            h *= np.uint64(0x94D049BB133111EB)
+            h ^= h >> np.uint64(29)
+        signs = np.where((h >> np.uint64(63)) == 1, -1.0, 1.0)
+        v += np.bincount((h % np.uint64(self.dim)).astype(np.int64), weights=signs, minlength=self.dim)
+        norm = float(np.linalg.norm(v))
+        return v / norm if norm else v
+
+    async def embed(self, texts: List[str]) -> np.ndarray:
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        return np.stack([self._one(t) for t in texts]) if texts else np.zeros((0, self.dim), dtype=np.float32)
+
+
+class OpenAIEmbedder(EmbeddingProvider):
+    """
+    OpenAI-compatible `POST /embeddings` (text-embedding-3-small gives the
+    1536 dimensions the HNSW indexes expect). 429 and 5xx responses are
+    retried with exponential backoff.
+    """
+
+    name = "openai"
+    max_batch = 2048
+
+    def __init__(self, model: Optional[str] = None, dim: Optional[int] = None, api_key: Optional[str] = None,
+                 base_url: Optional[str] = None, timeout: float = 30.0, retries: int = 3):
+        self.model = model or os.getenv("EMBEDDING_MODEL", "text-embedding-3-small")
+        self.dim = dim or EMBEDDING_DIMENSION
+        self.api_key = api_key or os.getenv("EMBEDDING_API_KEY") or os.getenv("OPENAI_API_KEY")
+        self.base_url = (base_url or os.getenv("EMBEDDING_API_BASE", "https://api.openai.com/v1")).rstrip("/")
+        self.retries = retries
+        self.http = httpx.AsyncClient(timeout=timeout)
+
+    async def embed(self, texts: List[str]) -> np.ndarray:
+        if not self.api_key:
+            raise RuntimeError("EMBEDDING_API_KEY is not set")
+        body = {"model": self.model, "input": texts, "dimensions": self.dim}
+        headers = {"Authorization": f"Bearer {self.api_key}"}
+        delay = 1.0
+        for attempt in range(self.retries + 1):
+            resp = await self.http.post(f"{self.base_url}/embeddings", json=body, headers=headers)
+            if resp.status_code != 429 and resp.status_code < 500 or attempt == self.retries:
+                break
+            await asyncio.sleep(delay)
+            delay *= 2
+        resp.raise_for_status()
+        data = sorted(resp.json()["data"], key=lambda d: d["index"])
+        return np.asarray([d["embedding"] for d in data], dtype=np.float32)
+
+    async def close(self):
+        await self.http.aclose()
+
+
+PROVIDERS = {"hash": HashEmbedder, "openai": OpenAIEmbedder}
+
+
+def make_provider(name: Optional[str] = None) -> Optional[EmbeddingProvider]:
+    """The EMBEDDING_PROVIDER provider, or None when embeddings are disabled"""
+    name = (name if name is not None else os.getenv("EMBEDDING_PROVIDER", "")).strip().lower()
+    if not name:
+        return None
+    if name not in PROVIDERS:
+        raise ValueError(f"Unknown EMBEDDING_PROVIDER {name!r} (expected one of {', '.join(PROVIDERS)})")
+    return PROVIDERS[name]()
+
+
+# --- Cache ---
+
+class VectorCache:
+    """
+    Vectors by content hash in a local SQLite file, evicted least recently
+    used once `max_entries` is exceeded. Recency is a counter stored with
+    each row (bumped on every hit), so the order survives restarts.
+    Lookups and writes are a handful of statements per batch, run in a
+    worker thread so the event loop is not blocked.
+    """
+
+    def __init__(self, path: str, max_entries: int = 200_000):
+        self.path = path
+        self.max_entries = max_entries
+        if path != ":memory:" and os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute("CREATE TABLE IF NOT EXISTS vectors (key BLOB PRIMARY KEY, used INTEGER NOT NULL, "
+                           "dim INTEGER NOT NULL, vector BLOB NOT NULL) WITHOUT ROWID")
+        self._conn.execute("CREATE INDEX IF NOT EXISTS vectors_used_idx ON vectors (used)")
+        self._lock = threading.Lock()
+        self.entries, self._clock = self._conn.execute("SELECT COUNT(*), COALESCE(MAX(used), 0) FROM vectors").fetchone()
+        self.evictions = 0
+
+    def _get(self, keys: List[bytes]) -> Dict[bytes, np.ndarray]:
+        found: Dict[bytes, np.ndarray] = {}
+        with self._lock:
+            for start in range(0, len(keys), 500):
+                chunk = keys[start:start + 500]
+                rows = self._conn.execute(f"SELECT key, dim, vector FROM vectors WHERE key IN "
+                                          f"({','.join('?' * len(chunk))})", chunk).fetchall()
+                for key, dim, blob in rows:
+                    found[key] = np.frombuffer(blob, dtype=np.float32, count=dim)
+            if found:
+                self._clock += 1
+                self._conn.executemany("UPDATE vectors SET used = ? WHERE key = ?",
+                                       [(self._clock, k) for k in found])
+        return found
+
+    def _put(self, items: List[Tuple[bytes, np.ndarray]]):
+        with self._lock:
+            self._clock += 1
+            self._conn.execute("BEGIN")
+            before = self._conn.total_changes
+            self._conn.executemany(
+                "INSERT OR IGNORE INTO vectors (key, used, dim, vector) VALUES (?, ?, ?, ?)",
+                [(k, self._clock, len(v), np.asarray(v, dtype=np.float32).tobytes()) for k, v in items])
+            self.entries += self._conn.total_changes - before
+            excess = self.entries - self.max_entries
+            if excess > 0:
+                self._conn.execute("DELETE FROM vectors WHERE key IN "
+                                   "(SELECT key FROM vectors ORDER BY used LIMIT ?)", (excess,))
+                self.entries -= excess
+                self.evictions += excess
+            self._conn.execute("COMMIT")
+
+    async def get_many(self, keys: List[bytes]) -> Dict[bytes, np.ndarray]:
+        return await asyncio.to_thread(self._get, keys) if keys else {}
+
+    async def put_many(self, items: List[Tuple[bytes, np.ndarray]]):
+        if items:
+            await asyncio.to_thread(self._put, items)
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+# --- Batching ---
+
+class EmbeddingBatcher:
+    """
+    Embeds texts through a provider, by content.
+
+    Each text is keyed by a hash of (model, dim, normalized text). Keys found
+    in the VectorCache are answered without a provider call, and identical
+    texts requested while one is already queued or in flight share its
+    result. The rest is queued and sent in micro-batches: a batch leaves as
+    soon as `max_batch` texts are queued, or `max_delay` seconds after the
+    first one arrived, with at most `concurrency` provider calls in flight.
+
+    `metrics()` reports the hit rate, batch sizes and provider latency
+    (rolling histograms, as in telemetry.py).
+    """
+
+    def __init__(self, provider: EmbeddingProvider, cache: Optional[VectorCache] = None,
+                 max_batch: Optional[int] = None, max_delay: Optional[float] = None,
+                 concurrency: Optional[int] = None, max_chars: Optional[int] = None):
+        self.provider = provider
+        self.cache = cache
+        self.max_batch = min(max_batch or int(os.getenv("EMBEDDING_MAX_BATCH", "64")), provider.max_batch)
+        self.max_delay = max_delay if max_delay is not None else float(os.getenv("EMBEDDING_MAX_DELAY", "0.05"))
+        self.max_chars = max_chars or int(os.getenv("EMBEDDING_MAX_CHARS", "8000"))
+        self._slots = asyncio.Semaphore(concurrency or int(os.getenv("EMBEDDING_CONCURRENCY", "4")))
+        self._queue: List[Tuple[bytes, str]] = []
+        self._waiting: Dict[bytes, asyncio.Future] = {}
+        self._timer: Optional[asyncio.TimerHandle] = None
+        self._calls: set = set()
+        window = float(os.getenv("TELEMETRY_WINDOW", "300"))
+        self.batch_sizes = Histogram(BATCH_BOUNDS, window)
+        self.latency_ms = Histogram(LATENCY_BOUNDS_MS, window)
+        self.stats: Dict[str, int] = {"texts": 0, "cache_hits": 0, "shared": 0, "misses": 0, "calls": 0,
+                                      "errors": 0}
+
+    def key(self, text: str) -> bytes:
+        h = hashlib.sha256(f"{self.provider.model}\x00{self.provider.dim}\x00".encode("utf-8"))
+        h.update(text.encode("utf-8"))
+        return h.digest()
+
+    async def embed(self, texts: Sequence[str]) -> List[np.ndarray]:
+        """One unit vector per text, in order"""
+        texts = [normalize_text(t, self.max_chars) for t in texts]
+        keys = [self.key(t) for t in texts]
+        self.stats["texts"] += len(texts)
+        loop = asyncio.get_running_loop()
+        futures: Dict[bytes, asyncio.Future] = {}
+        lookup: Dict[bytes, str] = {}
+        for key, text in zip(keys, texts):
+            if key in futures:
+                self.stats["shared"] += 1
+            elif key in self._waiting:
+                futures[key] = self._waiting[key]
+                self.stats["shared"] += 1
+            else:
+                futures[key] = None
+                lookup[key] = text
+        cached = await self.cache.get_many(list(lookup)) if self.cache is not None else {}
+        for key, text in lookup.items():
+            if key in cached:
+                self.stats["cache_hits"] += 1
+                futures[key] = loop.create_future()
+                futures[key].set_result(cached[key])
+            elif key in self._waiting:
+                # Queued by another caller while the cache was being read
+                futures[key] = self._waiting[key]
+                self.stats["shared"] += 1
+            else:
+                self.stats["misses"] += 1
+                futures[key] = self._waiting[key] = loop.create_future()
+                self._queue.append((key, text))
+        self._schedule()
+        vectors = await asyncio.gather(*futures.values())
+        found = dict(zip(futures, vectors))
+        return [found[k] for k in keys]
+
+    def _schedule(self):
+        while len(self._queue) >= self.max_batch:
+            self._send(self.max_batch)
+        if self._queue and self._timer is None:
+            self._timer = asyncio.get_running_loop().call_later(self.max_delay, self._send_due)
+
+    def _send_due(self):
+        self._timer = None
+        while self._queue:
+            self._send(self.max_batch)
+
+    def _send(self, n: int):
+        batch, self._queue = self._queue[:n], self._queue[n:]
+        if not self._queue and self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        task = asyncio.create_task(self._call(batch))
+        self._calls.add(task)
+        task.add_done_callback(self._calls.discard)
+
+    async def _call(self, batch: List[Tuple[bytes, str]]):
+        async with self._slots:
+            t0 = time.perf_counter()
+            try:
+                vectors = await self.provider.embed([text for _, text in batch])
+                if len(vectors) != len(batch):
+                    raise RuntimeError(f"Provider returned {len(vectors)} vectors for {len(batch)} texts")
+            except Exception as e:
+                self.stats["errors"] += 1
+                for key, _ in batch:
+                    future = self._waiting.pop(key, None)
+                    if future is not None and not future.done():
+                        future.set_exception(e)
+                return
+            now = time.monotonic()
+            self.latency_ms.record((time.perf_counter() - t0) * 1000, now)
+            self.batch_sizes.record(len(batch), now)
+            self.stats["calls"] += 1
+        vectors = np.asarray(vectors, dtype=np.float32)
+        # Stored before anyone is answered: until then the keys stay in `_waiting`,
+        # so a text asked for again meanwhile shares this call instead of a new one
+        if self.cache is not None:
+            try:
+                await self.cache.put_many([(key, vector) for (key, _), vector in zip(batch, vectors)])
+            except Exception as e:
+                print(f"[Embeddings] Cache write failed: {e}", file=sys.stderr)
+        for (key, _), vector in zip(batch, vectors):
+            future = self._waiting.pop(key, None)
+            if future is not None and not future.done():
+                future.set_result(vector)
+
+    def metrics(self) -> Dict[str, Any]:
+        now = time.monotonic()
+        served = self.stats["cache_hits"] + self.stats["shared"]
+        out: Dict[str, Any] = {
+            "provider": self.provider.name,
+            "model": self.provider.model,
+            **self.stats,
+            "hit_rate": round(served / self.stats["texts"], 4) if self.stats["texts"] else 0.0,
+            "queued": len(self._queue),
+            "batch_size": self.batch_sizes.snapshot(now),
+            "provider_latency_ms": self.latency_ms.snapshot(now),
+        }
+        if self.cache is not None:
+            out["cache"] = {"path": self.cache.path, "entries": self.cache.entries,
+                            "max_entries": self.cache.max_entries, "evictions": self.cache.evictions}
+        return out
+
+    async def close(self):
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        while self._queue:
+            self._send(self.max_batch)
+        await asyncio.gather(*self._calls, return_exceptions=True)
+        await self.provider.close()
+        if self.cache is not None:
+            self.cache.close()
+
+
+# --- Stage ---
+
+class EmbeddingStage:
+    """
+    The embedding step of ingestion and its backfill: fills `embedding`
+    (plus the compact `embedding_q`/`embedding_scale` copy when
+    EMBEDDING_QUANTIZE is int8/float16) and `embedded_at` on article,
+    concept and pulse rows. Pulses are only embedded once their engagement
+    heat (ENGAGEMENT_WEIGHTS) reaches `min_pulse_heat`; colder ones are
+    left for a later backfill.
+    """
+
+    def __init__(self, db: Optional[SurrealClient], batcher: EmbeddingBatcher,
+                 min_pulse_heat: Optional[float] = None, quantize: Optional[str] = None,
+                 write_batch: Optional[int] = None):
+        self.db = db
+        self.batcher = batcher
+        self.min_pulse_heat = (min_pulse_heat if min_pulse_heat is not None
+                               else float(os.getenv("EMBEDDING_PULSE_MIN_ENGAGEMENT", "100")))
+        self.quantize = (quantize if quantize is not None else os.getenv("EMBEDDING_QUANTIZE", "")).lower() or None
+        self.write_batch = write_batch or int(os.getenv("EMBEDDING_WRITE_BATCH", "100"))
+        self.stats: Dict[str, int] = {"embedded": 0, "skipped_cold": 0, "written": 0, "failures": 0}
+
+    @classmethod
+    def from_env(cls, db: Optional[SurrealClient]) -> Optional["EmbeddingStage"]:
+        """Built from EMBEDDING_* settings; None when EMBEDDING_PROVIDER is empty"""
+        provider = make_provider()
+        if provider is None:
+            return None
+        path = resolve_path(os.getenv("EMBEDDING_CACHE_PATH", "data/embeddings.sqlite"))
+        cache = VectorCache(path, int(os.getenv("EMBEDDING_CACHE_MAX_ENTRIES", "200000"))) if path else None
+        return cls(db, EmbeddingBatcher(provider, cache))
+
+    def eligible(self, table: str, row: Dict) -> bool:
+        if row.get("embedded_at") is not None:
+            return False
+        if table == "pulse" and engagement_heat(row.get("engagement")) < self.min_pulse_heat:
+            return False
+        return bool(row_text(table, row).strip())
+
+    def fields(self, vector: np.ndarray) -> Dict[str, Any]:
+        # No compact copy: the keys are left out (NULL is rejected by option<T>, a missing key is NONE)
+        out: Dict[str, Any] = {"embedding": [round(float(x), 7) for x in vector]}
+        if self.quantize:
+            out.update(encode(vector, self.quantize))
+        return out
+
+    async def embed_rows(self, table: str, rows: List[Dict]) -> int:
+        """Add embedding fields to eligible rows not embedded yet, in place; returns rows embedded"""
+        if table not in EMBED_TABLES:
+            raise ValueError(f"table must be one of {', '.join(EMBED_TABLES)}")
+        chosen = []
+        for row in rows:
+            if self.eligible(table, row):
+                chosen.append(row)
+            elif table == "pulse" and row.get("embedded_at") is None:
+                self.stats["skipped_cold"] += 1
+        if not chosen:
+            return 0
+        vectors = await self.batcher.embed([row_text(table, row) for row in chosen])
+        now = datetime.now(timezone.utc)
+        for row, vector in zip(chosen, vectors):
+            row.update(self.fields(vector))
+            row["embedded_at"] = now
+        self.stats["embedded"] += len(chosen)
+        return len(chosen)
+
+    async def backfill(self, table: str, page: int = 500) -> int:
+        """Embed existing rows without `embedded_at` (hot pulses only); returns rows written"""
+        if table not in EMBED_TABLES:
+            raise ValueError(f"table must be one of {', '.join(EMBED_TABLES)}")
+        extra = {"min_heat": self.min_pulse_heat} if table == "pulse" else {}
+        after, written = None, 0
+        while True:
+            res = await self.db.run(PENDING[table], after=after, limit=page, use_cache=False, **extra)
+            rows = (res[-1].get("result") or []) if res else []
+            if not rows:
+                return written
+            after = RecordId.parse(rows[-1]["id"])
+            rows = [row for row in rows if row_text(table, row).strip()]
+            vectors = await self.batcher.embed([row_text(table, row) for row in rows])
+            updates = [{"id": RecordId.parse(row["id"]), **self.fields(v)} for row, v in zip(rows, vectors)]
+            for start in range(0, len(updates), self.write_batch):
+                chunk = updates[start:start + self.write_batch]
+                try:
+                    await self.db.run(WRITE, updates=chunk, use_cache=False)
+                except Exception as e:
+                    # Still without embedded_at: the next backfill picks them up again
+                    self.stats["failures"] += 1
+                    print(f"[Embeddings] Write-back of {len(chunk)} {table} rows failed: {e}", file=sys.stderr)
+                    continue
+                written += len(chunk)
+                self.stats["written"] += len(chunk)
+            self.stats["embedded"] += len(rows)
+
+    def metrics(self) -> Dict[str, Any]:
+        return {**self.stats, "min_pulse_heat": self.min_pulse_heat, "quantize": self.quantize,
+                **self.batcher.metrics()}
+
+    async def close(self):
+        await self.batcher.close()
+
+
+async def main():
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Embed rows that have no embedding yet")
+    parser.add_argument("--tables", nargs="+", default=list(EMBED_TABLES), choices=list(EMBED_TABLES))
+    parser.add_argument("--page", type=int, default=500, help="rows read per request")
+    args = parser.parse_args()
+
+    db = SurrealClient()
+    stage = EmbeddingStage.from_env(db)
+    if stage is None:
+        sys.exit("EMBEDDING_PROVIDER is not set")
+    await db.start()
+    t0 = time.perf_counter()
+    try:
+        for table in args.tables:
+            written = await stage.backfill(table, args.page)
+            print(f"[Embeddings] {table}: {written} rows embedded", file=sys.stderr)
+    finally:
+        await stage.close()
+        await db.close()
+    metrics = stage.metrics()
+    print(f"[Embeddings] Done in {time.perf_counter() - t0:.1f}s: {metrics['texts']} texts, "
+          f"hit rate {metrics['hit_rate']:.1%}, {metrics['calls']} provider calls "
+          f"(batch p50 {metrics['batch_size'].get('p50')}, latency p90 "
+          f"{metrics['provider_latency_ms'].get('p90')} ms)", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,427 @@
+import os
+import re
+import sys
+import json
+import time
+import asyncio
+from collections import OrderedDict
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, List, Optional, Tuple, Union
+
+from db_client import RecordId, SurrealClient, resolve_path
+from templates import register
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+# Sentiment at or beyond these bounds counts as strongly negative / positive
+NEGATIVE_BELOW = -0.5
+POSITIVE_ABOVE = 0.5
+
+_METRIC_RE = re.compile(r"^[a-z][a-z0-9_]{0,31}$")
+
+ROLLUP_SQL = """
+FOR $r IN $rollups {
+    UPSERT type::thing('sentiment_rollup', [$r.bucket, $r.platform]) SET
+        bucket = <datetime>$r.bucket,
+        platform = $r.platform,
+        count = (count ?? 0) + $r.count,
+        sum = (sum ?? 0) + $r.sum,
+        sum_sq = (sum_sq ?? 0) + $r.sum_sq,
+        negative = (negative ?? 0) + $r.negative,
+        positive = (positive ?? 0) + $r.positive,
+        updated_at = time::now()
+    RETURN NONE;
+};
+"""
+
+SCORES_SQL = """
+FOR $s IN $scores { UPDATE $s.id SET sentiment_score = $s.score RETURN NONE; };
+"""
+
+PANIC_SQL = """
+SELECT bucket, platform, count, sum, sum_sq, negative, positive FROM sentiment_rollup
+    WHERE bucket >= <datetime>$since {platform} ORDER BY bucket ASC;
+"""
+
+PANIC = register("panic_index", PANIC_SQL.format(platform=""), since="datetime")
+PANIC_PLATFORM = register("panic_index.platform", PANIC_SQL.format(platform="AND platform = $platform"),
+                          since="datetime", platform="string")
+
+
+def _increments_sql(metrics: List[str]) -> str:
+    sets = ", ".join(f"engagement.{m} = (engagement.{m} ?? 0) + ($d.d.{m} ?? 0)" for m in metrics)
+    return f"FOR $d IN $deltas {{ UPDATE $d.id SET {sets} RETURN NONE; }};\n"
+
+
+def hour_bucket(value: Union[str, datetime, None]) -> str:
+    if isinstance(value, str):
+        value = datetime.fromisoformat(value.replace("Z", "+00:00"))
+    value = value or datetime.now(timezone.utc)
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    return value.astimezone(timezone.utc).replace(minute=0, second=0, microsecond=0).isoformat()
+
+
+def _try_lock(f) -> bool:
+    """Non-blocking exclusive lock on an open file, held until it is closed"""
+    try:
+        if fcntl is not None:
+            fcntl.flock(f.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+        else:
+            msvcrt.locking(f.fileno(), msvcrt.LK_NBLCK, 1)
+        return True
+    except OSError:
+        return False
+
+
+class WriteAheadLog:
+    """
+    Append-only JSON-lines log in segments. Every accepted event is appended
+    before it is acknowledged; `rotate()` seals the current segment so it can
+    be deleted once its contents are in the database. Replaying after a crash
+    is at-least-once: a segment whose flush succeeded but was not yet deleted
+    is applied again.
+
+    Several processes (ingest, one MCP server per client session) may be
+    configured with the same path. Each one owns a slot: `path` itself, else
+    `<name>-1.wal`, `<name>-2.wal`... whichever `.lock` file it can lock
+    first, and it only ever seals, replays or deletes its own slot's files.
+    The lock goes away with the process, so the next one to claim a crashed
+    process's slot replays what it left behind.
+    """
+
+    def __init__(self, path: str, fsync: bool = False, max_slots: int = 64):
+        self.fsync = fsync
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+        self.path, self._lock = self._claim(path, max_slots)
+        self._seq = max([self._segment_seq(p) for p in self.sealed()] + [0])
+        self._file = None
+
+    @staticmethod
+    def _claim(path: str, max_slots: int):
+        root, ext = os.path.splitext(path)
+        for slot in range(max_slots):
+            candidate = path if slot == 0 else f"{root}-{slot}{ext}"
+            lock = open(f"{candidate}.lock", "a+")
+            if _try_lock(lock):
+                return candidate, lock
+            lock.close()
+        raise RuntimeError(f"All {max_slots} write-ahead log slots for {path} are held by other processes")
+
+    @staticmethod
+    def _segment_seq(path: str) -> int:
+        try:
+            return int(path.rsplit(".", 2)[-2])
+        except (ValueError, IndexError):
+            return 0
+
+    def sealed(self) -> List[str]:
+        directory = os.path.dirname(os.path.abspath(self.path))
+        prefix = os.path.basename(self.path) + "."
+        names = [n for n in os.listdir(directory) if n.startswith(prefix) and n.endswith(".sealed")]
+        return sorted((os.path.join(directory, n) for n in names), key=self._segment_seq)
+
+    def append(self, record: Dict):
+        if self._file is None:
+            self._file = open(self.path, "a", encoding="utf-8")
+        self._file.write(json.dumps(record, separators=(",", ":")) + "\n")
+        self._file.flush()
+        if self.fsync:
+            os.fsync(self._file.fileno())
+
+    def rotate(self) -> Optional[str]:
+        """Seal the current segment; returns its new path (None if empty)"""
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+        if not os.path.exists(self.path) or os.path.getsize(self.path) == 0:
+            return None
+        self._seq += 1
+        sealed = f"{self.path}.{self._seq}.sealed"
+        os.replace(self.path, sealed)
+        return sealed
+
+    @staticmethod
+    def read(path: str) -> List[Dict]:
+        records = []
+        with open(path, encoding="utf-8") as f:
+            for line in f:
+                try:
+                    records.append(json.loads(line))
+                except json.JSONDecodeError:
+                    # Torn last line after a crash
+                    break
+        return records
+
+    @staticmethod
+    def discard(paths: List[str]):
+        for path in paths:
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+
+    def close(self):
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+        if self._lock is not None:
+            self._lock.close()
+            self._lock = None
+
+
+class EngagementAggregator:
+    """
+    Coalesces engagement deltas and sentiment scores for `pulse` in memory
+    and writes them in batches.
+
+    Deltas for the same pulse are summed, so a viral post that receives
+    thousands of like/repost events between flushes costs one UPDATE per
+    flush, each an atomic `engagement.x = engagement.x + n` on the record
+    (no read-modify-write round trip). Sentiment scores are folded into
+    hourly `sentiment_rollup` buckets per platform (count, sum, sum of
+    squares, strongly negative/positive counts) as they arrive, so the panic
+    index is read from a handful of rollup rows instead of rescanning pulses.
+    A pulse counts once: scoring it again replaces its earlier contribution
+    (for the last `remember` pulses scored).
+
+    A flush happens when `max_keys` distinct pulses are buffered or the
+    oldest buffered event is `max_delay` seconds old. Every event goes to a
+    local write-ahead log first and is replayed on start after a crash.
+    """
+
+    def __init__(self, db: SurrealClient, max_keys: Optional[int] = None, max_delay: Optional[float] = None,
+                 wal_path: Optional[str] = None, fsync: Optional[bool] = None, remember: Optional[int] = None):
+        self.db = db
+        self.max_keys = max_keys or int(os.getenv("ENGAGEMENT_MAX_KEYS", "2000"))
+        self.max_delay = max_delay or float(os.getenv("ENGAGEMENT_MAX_DELAY", "2"))
+        self.remember = remember or int(os.getenv("ENGAGEMENT_SENTIMENT_MEMORY", "100000"))
+        wal_path = wal_path if wal_path is not None else os.getenv("ENGAGEMENT_WAL_PATH", "data/engagement.wal")
+        if fsync is None:
+            fsync = os.getenv("ENGAGEMENT_WAL_FSYNC", "false").lower() in ("1", "true", "yes")
+        self.wal = WriteAheadLog(resolve_path(wal_path), fsync=fsync) if wal_path else None
+
+        self.deltas: Dict[str, Dict[str, int]] = {}
+        self.scores: Dict[str, float] = {}
+        self.rollups: Dict[Tuple[str, str], Dict[str, float]] = {}
+        # pulse -> (score, platform, bucket) as last folded into the roll-ups
+        self.scored: "OrderedDict[str, Tuple[float, str, str]]" = OrderedDict()
+        self.oldest: Optional[float] = None
+        # Sealed WAL segments whose events are (also) held in memory
+        self._segments: List[str] = []
+        self._lock = asyncio.Lock()
+        self._task: Optional[asyncio.Task] = None
+        self._stopping = asyncio.Event()
+        self.stats: Dict[str, int] = {"events": 0, "flushes": 0, "updates": 0, "replayed": 0, "failures": 0,
+                                      "rescored": 0}
+
+    def __len__(self) -> int:
+        return len(self.deltas) + len(self.scores)
+
+    # --- Intake ---
+
+    def _merge_delta(self, pulse_id: str, deltas: Dict[str, int]):
+        current = self.deltas.setdefault(pulse_id, {})
+        for metric, value in deltas.items():
+            current[metric] = current.get(metric, 0) + value
+
+    def _fold(self, score: float, platform: str, bucket: str, sign: int):
+        r = self.rollups.setdefault((bucket, platform), {"count": 0, "sum": 0.0, "sum_sq": 0.0,
+                                                         "negative": 0, "positive": 0})
+        r["count"] += sign
+        r["sum"] += sign * score
+        r["sum_sq"] += sign * score * score
+        r["negative"] += sign * (score <= NEGATIVE_BELOW)
+        r["positive"] += sign * (score >= POSITIVE_ABOVE)
+
+    def _merge_sentiment(self, pulse_id: str, score: float, platform: str, bucket: str):
+        self.scores[pulse_id] = score
+        previous = self.scored.pop(pulse_id, None)
+        if previous is not None:
+            # Scored before: take the old score back out of its bucket
+            self._fold(*previous, sign=-1)
+            self.stats["rescored"] += 1
+        self._fold(score, platform, bucket, sign=1)
+        self.scored[pulse_id] = (score, platform, bucket)
+        if len(self.scored) > self.remember:
+            self.scored.popitem(last=False)
+
+    def _touch(self):
+        self.stats["events"] += 1
+        if self.oldest is None:
+            self.oldest = time.monotonic()
+
+    def add(self, pulse_id: Union[str, RecordId], deltas: Dict[str, int]):
+        """Buffer engagement deltas, e.g. add('pulse:abc', {'likes': 3, 'reposts': 1})"""
+        pulse = RecordId.parse(pulse_id)
+        if pulse.table != "pulse":
+            raise ValueError(f"Engagement is tracked on pulse records, got {pulse}")
+        clean = {}
+        for metric, value in deltas.items():
+            if not _METRIC_RE.match(metric):
+                raise ValueError(f"Invalid engagement metric name: {metric!r}")
+            if isinstance(value, bool) or not isinstance(value, int):
+                raise ValueError(f"Engagement delta for {metric} must be an integer")
+            if value:
+                clean[metric] = value
+        if not clean:
+            return
+        if self.wal is not None:
+            self.wal.append({"e": str(pulse), "d": clean})
+        self._merge_delta(str(pulse), clean)
+        self._touch()
+
+    def add_sentiment(self, pulse_id: Union[str, RecordId], score: float, platform: str = "unknown",
+                      created_at: Union[str, datetime, None] = None):
+        """
+        Record the sentiment score of a pulse and fold it into the hourly
+        roll-up of the bucket the pulse was created in. Repeating the call
+        for a pulse replaces its earlier score instead of counting it twice.
+        """
+        pulse = RecordId.parse(pulse_id)
+        if pulse.table != "pulse":
+            raise ValueError(f"Sentiment is tracked on pulse records, got {pulse}")
+        score = max(-1.0, min(1.0, float(score)))
+        bucket = hour_bucket(created_at)
+        if self.scored.get(str(pulse)) == (score, platform, bucket):
+            return
+        if self.wal is not None:
+            self.wal.append({"s": str(pulse), "v": score, "p": platform, "b": bucket})
+        self._merge_sentiment(str(pulse), score, platform, bucket)
+        self._touch()
+
+    def recover(self) -> int:
+        """Replay WAL segments left behind by a previous process; returns events replayed"""
+        if self.wal is None:
+            return 0
+        self.wal.rotate()
+        replayed = 0
+        for path in self.wal.sealed():
+            if path in self._segments:
+                continue
+            for rec in self.wal.read(path):
+                if "e" in rec:
+                    self._merge_delta(rec["e"], rec["d"])
+                elif "s" in rec:
+                    self._merge_sentiment(rec["s"], rec["v"], rec["p"], rec["b"])
+                replayed += 1
+            self._segments.append(path)
+        if replayed:
+            self.oldest = self.oldest or time.monotonic()
+            self.stats["replayed"] += replayed
+            print(f"[Engagement] Replayed {replayed} events from the write-ahead log", file=sys.stderr)
+        return replayed
+
+    # --- Flushing ---
+
+    def due(self) -> bool:
+        if not len(self):
+            return False
+        return len(self) >= self.max_keys or time.monotonic() - self.oldest >= self.max_delay
+
+    def _statements(self, deltas, scores, rollups) -> Tuple[str, Dict[str, Any]]:
+        sql, params = "BEGIN TRANSACTION;\n", {}
+        if deltas:
+            metrics = sorted({m for d in deltas.values() for m in d})
+            params["deltas"] = [{"id": RecordId.parse(pid), "d": d} for pid, d in deltas.items()]
+            sql += _increments_sql(metrics)
+        if scores:
+            params["scores"] = [{"id": RecordId.parse(pid), "score": s} for pid, s in scores.items()]
+            sql += SCORES_SQL
+        if rollups:
+            params["rollups"] = [{"bucket": b, "platform": p, **r} for (b, p), r in rollups.items()]
+            sql += ROLLUP_SQL
+        return sql + "COMMIT TRANSACTION;", params
+
+    async def flush(self):
+        async with self._lock:
+            if not len(self) and not self.rollups:
+                return
+            sealed = self.wal.rotate() if self.wal is not None else None
+            if sealed:
+                self._segments.append(sealed)
+            batch = (self.deltas, self.scores, self.rollups)
+            segments = self._segments
+            self.deltas, self.scores, self.rollups = {}, {}, {}
+            self._segments, self.oldest = [], None
+            sql, params = self._statements(*batch)
+            try:
+                await self.db.query(sql, params)
+            except BaseException:
+                # Merge back under anything that arrived meanwhile; the WAL still has it all
+                self.stats["failures"] += 1
+                for pid, d in batch[0].items():
+                    self._merge_delta(pid, d)
+                for pid, s in batch[1].items():
+                    self.scores.setdefault(pid, s)
+                for key, r in batch[2].items():
+                    current = self.rollups.setdefault(key, dict.fromkeys(r, 0))
+                    for field, value in r.items():
+                        current[field] += value
+                self._segments = segments + self._segments
+                self.oldest = time.monotonic()
+                raise
+            if self.wal is not None:
+                self.wal.discard(segments)
+            self.stats["flushes"] += 1
+            self.stats["updates"] += len(batch[0]) + len(batch[1]) + len(batch[2])
+
+    async def run(self):
+        while not self._stopping.is_set():
+            try:
+                await asyncio.wait_for(self._stopping.wait(), min(0.25, self.max_delay / 4))
+            except asyncio.TimeoutError:
+                pass
+            if self.due() and not self._stopping.is_set():
+                try:
+                    await self.flush()
+                except Exception as e:
+                    print(f"[Engagement] Flush failed, will retry: {e}", file=sys.stderr)
+
+    def start(self):
+        self.recover()
+        if self._task is None:
+            self._stopping.clear()
+            self._task = asyncio.create_task(self.run())
+
+    async def stop(self):
+        if self._task is not None:
+            # Let an in-flight flush finish instead of cancelling it halfway
+            self._stopping.set()
+            await self._task
+            self._task = None
+        try:
+            await self.flush()
+        finally:
+            if self.wal is not None:
+                self.wal.close()
+
+
+async def panic_index(db: SurrealClient, hours: float = 24, platform: Optional[str] = None) -> Dict:
+    """Sentiment summary over the last `hours`, from the hourly roll-ups"""
+    since = hour_bucket(datetime.now(timezone.utc) - timedelta(hours=hours))
+    if platform:
+        res = await db.run(PANIC_PLATFORM, since=since, platform=platform)
+    else:
+        res = await db.run(PANIC, since=since)
+    rows = (res[-1].get("result") or []) if res else []
+    count = sum(r.get("count") or 0 for r in rows)
+    total = sum(r.get("sum") or 0.0 for r in rows)
+    negative = sum(r.get("negative") or 0 for r in rows)
+    positive = sum(r.get("positive") or 0 for r in rows)
+    return {
+        "since": since,
+        "platform": platform,
+        "pulses": count,
+        "mean_sentiment": round(total / count, 4) if count else None,
+        "negative_share": round(negative / count, 4) if count else None,
+        "positive_share": round(positive / count, 4) if count else None,
+        # Share of strongly negative pulses net of strongly positive ones, in [-1, 1]
+        "panic_index": round((negative - positive) / count, 4) if count else None,
+        "buckets": len(rows),
+    }
@@ -0,0 +1,280 @@
+"""
+Fast stdio startup for the MCP server.
+
+Importing FastMCP, pydantic, httpx and numpy takes a second or more, and the
+client waits for all of it before its `initialize` gets an answer. In fast
+start mode `server.py` hands stdio to `FastStart` before importing anything
+heavy:
+
+- `initialize`, `ping` and the `*/list` requests are answered immediately
+  from a manifest recorded on the previous start (keyed by the server
+  sources and the installed mcp package, so a stale one is never served);
+- the real server module is imported in a background thread meanwhile;
+- once it is loaded, the real MCP session is started on in-memory streams,
+  the handshake is replayed into it (its duplicate answers are dropped) and
+  every other message, queued or new, is forwarded unchanged.
+
+Without a valid manifest (the very first start, or after an upgrade)
+`initialize` is still answered at once, with what a stock FastMCP server
+declares, read from the installed mcp sources without importing them; the
+list requests then wait for the real server, which records a fresh manifest
+for the next start. Should the real server answer `initialize` differently,
+a warning is logged.
+"""
+import asyncio
+import hashlib
+import importlib
+import importlib.util
+import json
+import os
+import re
+import sys
+import threading
+from typing import Dict, List, Optional
+
+MANIFEST_VERSION = 1
+LIST_METHODS = ("tools/list", "resources/list", "resources/templates/list", "prompts/list")
+# Ids of the requests FastStart itself sends to the real session
+PRIVATE_ID = "__fast_start__:"
+
+
+# What FastMCP declares whatever tools, resources and prompts are registered
+FASTMCP_CAPABILITIES = {"experimental": {}, "prompts": {"listChanged": False},
+                        "resources": {"subscribe": False, "listChanged": False},
+                        "tools": {"listChanged": False}}
+
+
+def enabled() -> bool:
+    return os.getenv("MCP_FAST_START", "true").lower() in ("1", "true", "yes")
+
+
+def source_key(module_dir: str) -> str:
+    """Fingerprint of everything that shapes the handshake: server sources and the mcp version"""
+    digest = hashlib.sha1(str(MANIFEST_VERSION).encode())
+    paths = sorted(os.path.join(module_dir, f) for f in os.listdir(module_dir) if f.endswith(".py"))
+    # find_spec locates the package without importing it
+    spec = importlib.util.find_spec("mcp")
+    if spec is not None and spec.origin:
+        paths.append(spec.origin)
+    for path in paths:
+        st = os.stat(path)
+        digest.update(f"{path}:{st.st_size}:{st.st_mtime_ns}".encode())
+    return digest.hexdigest()
+
+
+def _installed_version(site_dir: str) -> str:
+    """mcp's version, from its dist-info directory name (importlib.metadata costs ~40 ms to import)"""
+    for entry in os.listdir(site_dir):
+        match = re.fullmatch(r"mcp-([^-]+)\.dist-info", entry)
+        if match:
+            return match.group(1)
+    from importlib.metadata import version
+    return version("mcp")
+
+
+def default_handshake(name: str) -> Optional[Dict]:
+    """
+    The `initialize` result of a stock FastMCP server called `name`, in the
+    manifest's shape, or None if the installed mcp package can't be read.
+    The protocol versions are parsed out of its sources: importing them is
+    what costs the second.
+    """
+    spec = importlib.util.find_spec("mcp")
+    if spec is None or not spec.origin:
+        return None
+    package_dir = os.path.dirname(spec.origin)
+    try:
+        with open(os.path.join(package_dir, "types.py"), encoding="utf-8") as f:
+            latest = re.search(r'^LATEST_PROTOCOL_VERSION\s*=\s*"([^"]+)"', f.read(), re.M)
+        with open(os.path.join(package_dir, "shared", "version.py"), encoding="utf-8") as f:
+            supported = re.search(r"^SUPPORTED_PROTOCOL_VERSIONS\b[^=]*=\s*\[(.*?)\]", f.read(), re.M | re.S)
+        server_version = _installed_version(os.path.dirname(package_dir))
+    except Exception:
+        return None
+    if latest is None or supported is None:
+        return None
+    versions = [latest.group(1)] + [v for v in re.findall(r'"([^"]+)"', supported.group(1)) if v != latest.group(1)]
+    return {"versions": versions,
+            "initialize": {"capabilities": FASTMCP_CAPABILITIES,
+                           "serverInfo": {"name": name, "version": server_version}}}
+
+
+class FastStart:
+    def __init__(self, module: str, attr: str = "mcp", manifest_path: Optional[str] = None,
+                 name: Optional[str] = None):
+        self.module = module
+        self.attr = attr
+        module_dir = os.path.dirname(os.path.abspath(__file__))
+        self.manifest_path = manifest_path or os.getenv(
+            "MCP_MANIFEST_PATH", os.path.join(module_dir, ".mcp_manifest.json"))
+        self.key = source_key(module_dir)
+        self.manifest = self._load_manifest()
+        # Answers `initialize` (only) until a manifest has been recorded
+        self.default = default_handshake(name) if name and self.manifest is None else None
+        # The `initialize` result sent ahead of the server, checked against its own answer
+        self._sent: Optional[Dict] = None
+        # Handshake results captured from the real session, to refresh the manifest
+        self._captured: Dict[str, Dict] = {}
+        self._out = sys.stdout.buffer
+
+    def _load_manifest(self) -> Optional[Dict]:
+        try:
+            with open(self.manifest_path, "r", encoding="utf-8") as f:
+                manifest = json.load(f)
+        except (OSError, ValueError):
+            return None
+        return manifest if manifest.get("key") == self.key else None
+
+    def _save_manifest(self):
+        manifest = {"key": self.key, **self._captured}
+        tmp = f"{self.manifest_path}.{os.getpid()}.tmp"
+        try:
+            with open(tmp, "w", encoding="utf-8") as f:
+                json.dump(manifest, f, separators=(",", ":"))
+            os.replace(tmp, self.manifest_path)
+        except OSError as e:
+            print(f"[FastStart] Could not write manifest {self.manifest_path}: {e}", file=sys.stderr)
+
+    def _write(self, message: Dict):
+        self._out.write(json.dumps(message, separators=(",", ":")).encode("utf-8") + b"\n")
+        self._out.flush()
+
+    def _answer(self, message: Dict) -> bool:
+        """Answer a request from the manifest if it can be; False leaves it for the real server"""
+        method = message.get("method")
+        if "id" not in message:
+            return False
+        if method == "ping":
+            result = {}
+        elif method == "initialize" and (self.manifest or self.default) is not None:
+            handshake = self.manifest or self.default
+            requested = (message.get("params") or {}).get("protocolVersion")
+            versions = handshake["versions"]
+            result = dict(handshake["initialize"],
+                          protocolVersion=requested if requested in versions else versions[0])
+            self._sent = result
+        elif self.manifest is None:
+            return False
+        elif method in LIST_METHODS and not (message.get("params") or {}).get("cursor"):
+            result = self.manifest["lists"][method]
+        else:
+            return False
+        self._write({"jsonrpc": "2.0", "id": message["id"], "result": result})
+        return True
+
+    def serve(self):
+        asyncio.run(self.run())
+
+    async def run(self):
+        loop = asyncio.get_running_loop()
+        inbox: asyncio.Queue = asyncio.Queue()
+
+        def read_stdin():
+            for line in sys.stdin.buffer:
+                loop.call_soon_threadsafe(inbox.put_nowait, line)
+            loop.call_soon_threadsafe(inbox.put_nowait, None)
+
+        threading.Thread(target=read_stdin, name="fast-start-stdin", daemon=True).start()
+        loading = loop.run_in_executor(None, importlib.import_module, self.module)
+
+        # Until the server is imported: answer what we can, queue the rest in order
+        queued: List[bytes] = []
+        initialize = None
+        answered = False
+        while not loading.done():
+            getter = asyncio.ensure_future(inbox.get())
+            await asyncio.wait({getter, loading}, return_when=asyncio.FIRST_COMPLETED)
+            if not getter.done():
+                getter.cancel()
+                break
+            line = getter.result()
+            if line is None:
+                return
+            try:
+                message = json.loads(line)
+            except ValueError:
+                queued.append(line)
+                continue
+            if message.get("method") == "initialize" and initialize is None:
+                initialize = message
+                answered = self._answer(message)
+            elif answered and self._answer(message):
+                continue
+            else:
+                queued.append(line)
+
+        try:
+            server = getattr(loading.result(), self.attr)
+        except Exception as e:
+            print(f"[FastStart] Failed to load {self.module}: {e}", file=sys.stderr)
+            raise
+        await self._handover(server, initialize, answered, queued, inbox)
+
+    async def _handover(self, server, initialize: Optional[Dict], answered: bool,
+                        queued: List[bytes], inbox: asyncio.Queue):
+        """Run the real MCP session behind in-memory streams, replaying the handshake first"""
+        import anyio
+        import mcp.types as types
+        from mcp.shared.message import SessionMessage
+        from mcp.shared.version import SUPPORTED_PROTOCOL_VERSIONS
+
+        lowlevel = server._mcp_server
+        refresh = self.manifest is None
+        init_id = initialize.get("id") if initialize is not None else None
+        versions = [types.LATEST_PROTOCOL_VERSION] + [
+            v for v in SUPPORTED_PROTOCOL_VERSIONS if v != types.LATEST_PROTOCOL_VERSION]
+        read_send, read_recv = anyio.create_memory_object_stream(0)
+        write_send, write_recv = anyio.create_memory_object_stream(0)
+
+        async def send(raw):
+            try:
+                message = types.JSONRPCMessage.model_validate_json(raw)
+            except Exception as e:
+                await read_send.send(e)
+                return
+            await read_send.send(SessionMessage(message))
+
+        async def feed():
+            pending_lists = refresh
+            async with read_send:
+                if initialize is not None:
+                    replay = dict(initialize, id=PRIVATE_ID + "initialize") if answered else initialize
+                    await send(json.dumps(replay))
+                while (raw := (queued.pop(0) if queued else await inbox.get())) is not None:
+                    await send(raw)
+                    # The list requests are only valid once the client finished its handshake
+                    if pending_lists and b"notifications/initialized" in raw:
+                        pending_lists = False
+                        for method in LIST_METHODS:
+                            await send(json.dumps({"jsonrpc": "2.0", "id": PRIVATE_ID + method, "method": method}))
+
+        async def drain():
+            async with write_recv:
+                async for session_message in write_recv:
+                    message = session_message.message.model_dump(mode="json", by_alias=True, exclude_none=True)
+                    msg_id = message.get("id")
+                    if "result" in message and msg_id in (init_id, PRIVATE_ID + "initialize"):
+                        if self._sent is not None and self._sent != message["result"]:
+                            print(f"[FastStart] initialize was answered ahead of the server with {self._sent}, "
+                                  f"the server says {message['result']}", file=sys.stderr)
+                        if refresh:
+                            self._captured["initialize"] = {k: v for k, v in message["result"].items()
+                                                            if k != "protocolVersion"}
+                            self._captured["versions"] = versions
+                    if isinstance(msg_id, str) and msg_id.startswith(PRIVATE_ID):
+                        method = msg_id[len(PRIVATE_ID):]
+                        if refresh and method in LIST_METHODS and "result" in message:
+                            self._captured.setdefault("lists", {})[method] = message["result"]
+                            if len(self._captured["lists"]) == len(LIST_METHODS):
+                                self._save_manifest()
+                        continue
+                    self._write(message)
+
+        async def run_session():
+            async with write_send:
+                await lowlevel.run(read_recv, write_send, lowlevel.create_initialization_options())
+
+        async with anyio.create_task_group() as tg:
+            tg.start_soon(drain)
+            tg.start_soon(feed)
+            tg.start_soon(run_session)
@@ -0,0 +1,183 @@
+import re
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Optional
+
+from templates import register
+
+# One `metric_series:[ticker, metric]` record per company metric, maintained on
+# every report write, so verification is a single record-id lookup instead of a
+# scan over full report rows. Expects $comp, $ticker, $period, $published_at,
+# $series ([{name, value}]) and optionally $rep in scope.
+FOLD_SERIES_SQL = """
+FOR $m IN $series {
+    UPSERT type::thing('metric_series', [$ticker, $m.name]) SET
+        company = $comp,
+        ticker = $ticker,
+        metric = $m.name,
+        points = array::append((points ?? [])[WHERE period != $period], {
+            period: $period,
+            published_at: <datetime>$published_at,
+            value: $m.value,
+            report: $rep.id
+        }),
+        updated_at = time::now();
+};
+"""
+
+LOOKUP_COMPANY_SQL = """
+LET $comp = (SELECT VALUE id FROM company WHERE ticker = $ticker LIMIT 1)[0];
+"""
+
+WRITE_REPORT_SQL = (
+    "BEGIN TRANSACTION;"
+    + LOOKUP_COMPANY_SQL
+    + """
+IF $comp = NONE { THROW "Unknown ticker: " + $ticker };
+LET $rep = (CREATE ONLY report CONTENT {
+    company: $comp,
+    period: $period,
+    type: $type,
+    metrics: $metrics,
+    url: $url ?? NONE,
+    published_at: <datetime>$published_at
+});
+"""
+    + FOLD_SERIES_SQL
+    + """
+COMMIT TRANSACTION;
+RETURN $rep;
+"""
+)
+
+SERIES_SQL = """
+SELECT ticker, metric, points FROM type::thing('metric_series', [$ticker, $metric]);
+"""
+
+# Fallback for metrics written before the series existed; uses report(company, published_at)
+REPORT_SCAN_SQL = LOOKUP_COMPANY_SQL + """
+SELECT id AS report, period, published_at, metrics[$metric] AS value
+    FROM report WHERE company = $comp ORDER BY published_at DESC LIMIT $limit;
+"""
+
+# Batched verification: one series lookup per (ticker, metric) in a single request,
+# then one request of report scans for the pairs that have no series yet
+BATCH_SERIES_STMT = "SELECT ticker, metric, points FROM type::thing('metric_series', [$ticker_{i}, $metric_{i}]);"
+
+BATCH_SCAN_STMTS = """
+LET $comp_{i} = (SELECT VALUE id FROM company WHERE ticker = $ticker_{i} LIMIT 1)[0];
+SELECT id AS report, period, published_at, metrics[$metric_{i}] AS value
+    FROM report WHERE company = $comp_{i} ORDER BY published_at DESC LIMIT $limit;
+"""
+
+BACKFILL_SQL = """
+SELECT id, company.ticker AS ticker, period, metrics, published_at
+    FROM report ORDER BY published_at ASC START $start LIMIT $limit;
+"""
+
+SERIES = register("verify_financials.series", SERIES_SQL, ticker="string", metric="string")
+REPORT_SCAN = register("verify_financials.report_scan", REPORT_SCAN_SQL,
+                       ticker="string", metric="string", limit="int")
+WRITE_REPORT = register("write_report", WRITE_REPORT_SQL, ticker="string", period="string", type="string",
+                        metrics="object", url="option<string>", published_at="datetime",
+                        series="array<object>")
+FOLD_REPORT = register("fold_report_metrics", LOOKUP_COMPANY_SQL + "LET $rep = { id: $report };" + FOLD_SERIES_SQL,
+                       ticker="string", report="record<report>", period="option<string>",
+                       published_at="datetime", series="array<object>")
+BACKFILL = register("rebuild_metric_series.page", BACKFILL_SQL, start="int", limit="int")
+
+_QUARTER_RE = re.compile(r"(\d{4})\D{0,2}Q([1-4])", re.IGNORECASE)
+
+
+def numeric_metrics(metrics: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """The metrics worth materializing: plain numbers only"""
+    return [
+        {"name": name, "value": value}
+        for name, value in (metrics or {}).items()
+        if isinstance(value, (int, float)) and not isinstance(value, bool)
+    ]
+
+
+def _parse_time(value: Any) -> Optional[datetime]:
+    if isinstance(value, datetime):
+        return value
+    if isinstance(value, str):
+        try:
+            return datetime.fromisoformat(value.replace("Z", "+00:00"))
+        except ValueError:
+            return None
+    return None
+
+
+def _timestamp(value: Any) -> float:
+    t = _parse_time(value)
+    if t is None:
+        return float("-inf")
+    return t.timestamp()
+
+
+def _pct_change(current: Any, previous: Any) -> Optional[float]:
+    if not isinstance(current, (int, float)) or not isinstance(previous, (int, float)) or previous == 0:
+        return None
+    return round((current - previous) / abs(previous), 4)
+
+
+def _year_ago(points: List[Dict], i: int) -> Optional[Dict]:
+    point = points[i]
+    quarter = _QUARTER_RE.search(str(point.get("period") or ""))
+    if quarter:
+        wanted = (int(quarter.group(1)) - 1, quarter.group(2))
+        for p in points[:i]:
+            q = _QUARTER_RE.search(str(p.get("period") or ""))
+            if q and (int(q.group(1)), q.group(2)) == wanted:
+                return p
+        return None
+    t = _parse_time(point.get("published_at"))
+    if t is None:
+        return None
+    for p in reversed(points[:i]):
+        pt = _parse_time(p.get("published_at"))
+        if pt is not None and abs((t - pt) - timedelta(days=365)) <= timedelta(days=45):
+            return p
+    return None
+
+
+def trend_direction(values: List[float], flat_tolerance: float = 0.01) -> str:
+    """Sign of the least-squares slope, relative to the mean magnitude"""
+    if len(values) < 2:
+        return "insufficient_data"
+    n = len(values)
+    mean_x = (n - 1) / 2
+    mean_y = sum(values) / n
+    denom = sum((x - mean_x) ** 2 for x in range(n))
+    slope = sum((x - mean_x) * (y - mean_y) for x, y in enumerate(values)) / denom
+    scale = abs(mean_y) or 1.0
+    if abs(slope) / scale < flat_tolerance:
+        return "flat"
+    return "increasing" if slope > 0 else "decreasing"
+
+
+def summarize(ticker: str, metric: str, points: List[Dict], periods: int, source: str) -> Dict:
+    """Order points oldest→newest, keep the last `periods` and add QoQ/YoY deltas"""
+    points = [p for p in points if isinstance(p.get("value"), (int, float))]
+    points.sort(key=lambda p: (_timestamp(p.get("published_at")), str(p.get("period"))))
+
+    enriched = []
+    for i, p in enumerate(points):
+        prev = points[i - 1] if i else None
+        year_ago = _year_ago(points, i)
+        enriched.append({
+            "period": p.get("period"),
+            "published_at": p.get("published_at"),
+            "value": p["value"],
+            "qoq": _pct_change(p["value"], prev["value"]) if prev else None,
+            "yoy": _pct_change(p["value"], year_ago["value"]) if year_ago else None,
+            "report": p.get("report"),
+        })
+    window = enriched[-periods:] if periods > 0 else enriched
+    return {
+        "ticker": ticker,
+        "metric": metric,
+        "source": source,
+        "trend": trend_direction([p["value"] for p in window]),
+        "points": window,
+    }
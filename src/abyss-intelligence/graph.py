@@ -0,0 +1,199 @@
+from typing import Any, Dict, List, Optional, Sequence, Union
+
+from db_client import RecordId
+
+# Edge tables from init_db.surql and the field each one uses as its weight
+EDGE_WEIGHTS: Dict[str, str] = {
+    "mentions": "sentiment",
+    "involves": "weight",
+    "impacts": "score",
+    "reflects_on": "weight",
+}
+
+# Fields an agent needs per node table. Embeddings and long bodies are never fetched.
+# `pagerank` is written by centrality.py and orders the nodes of each level.
+NODE_PROJECTIONS: Dict[str, List[str]] = {
+    "company": ["name", "ticker", "sector", "pagerank"],
+    "person": ["name", "role", "pagerank"],
+    "concept": ["name", "description", "pagerank"],
+    "article": ["title", "url", "source_type", "reliability", "published_at"],
+    "pulse": ["platform", "author_handle", "url", "content", "sentiment_score", "engagement", "created_at"],
+    "trend_metric": ["source", "value", "velocity", "timestamp"],
+    "report": ["period", "type", "url", "published_at"],
+}
+
+
+class NarrativeTracer:
+    """
+    Bounded breadth-first walk over the Trinity edge tables.
+
+    Each level costs exactly one request: the edges touching the current
+    frontier (both directions, every edge table) are fetched in one
+    multi-statement query, together with the projected fields of the frontier
+    nodes themselves. Visited nodes are never expanded twice, each level keeps
+    at most `max_fanout` new nodes (strongest edges first) and edges whose
+    absolute weight is below `min_weight` are pruned in the database.
+
+    The edge budget is per level, not per node: each statement reads at most
+    2 x `max_fanout` edges for the whole frontier, so a busy node's strong
+    edges can crowd out a quiet node's weak ones. A statement that fills its
+    budget marks the trace `truncated`, as the fan-out cut does.
+    """
+
+    def __init__(self, db, edge_tables: Optional[Sequence[str]] = None):
+        self.db = db
+        self.edge_tables = list(edge_tables or EDGE_WEIGHTS)
+        for table in self.edge_tables:
+            if table not in EDGE_WEIGHTS:
+                raise ValueError(f"Unknown edge table: {table}")
+
+    def _edge_statements(self, min_weight: Optional[float], frontier: str = "frontier") -> List[str]:
+        stmts = []
+        for table in self.edge_tables:
+            weight = EDGE_WEIGHTS[table]
+            prune = f" AND math::abs({weight} ?? 0) >= $min_weight" if min_weight is not None else ""
+            # One statement per direction so each can use the in/out index
+            for side in ("in", "out"):
+                stmts.append(
+                    f"SELECT in, out, {weight} AS weight, math::abs({weight} ?? 0) AS strength "
+                    f"FROM {table} WHERE {side} INSIDE ${frontier}{prune} "
+                    f"ORDER BY strength DESC LIMIT $edge_limit;"
+                )
+        return stmts
+
+    @staticmethod
+    def _node_statements(nodes: Sequence[RecordId], params: Dict[str, Any], prefix: str = "nodes") -> List[str]:
+        by_table: Dict[str, List[RecordId]] = {}
+        for node in nodes:
+            by_table.setdefault(node.table, []).append(node)
+        stmts = []
+        for i, (table, ids) in enumerate(sorted(by_table.items())):
+            fields = ", ".join(["id"] + NODE_PROJECTIONS.get(table, []))
+            params[f"{prefix}_{i}"] = ids
+            stmts.append(f"SELECT {fields} FROM ${prefix}_{i};")
+        return stmts
+
+    async def trace(self, start_node: Union[str, RecordId], depth: int = 2,
+                    max_fanout: Union[int, Sequence[int]] = 50,
+                    min_weight: Optional[float] = None) -> Dict:
+        walk = _Walk(RecordId.parse(start_node))
+        await self._walk([walk], depth, max_fanout, min_weight, strict=True)
+        return walk.result(depth)
+
+    async def trace_many(self, start_nodes: Sequence[Union[str, RecordId]], depth: int = 2,
+                         max_fanout: Union[int, Sequence[int]] = 50,
+                         min_weight: Optional[float] = None) -> List[Dict]:
+        """
+        Independent traces from several start nodes, walked in lock-step: each
+        level of all of them travels in one request. A start node that is
+        invalid or whose statements fail gets an `error` entry; the others
+        carry on.
+        """
+        walks: List[_Walk] = []
+        for start in start_nodes:
+            try:
+                walks.append(_Walk(RecordId.parse(start)))
+            except ValueError as e:
+                walks.append(_Walk(None, error=str(e), label=str(start)))
+        await self._walk([w for w in walks if w.error is None], depth, max_fanout, min_weight, strict=False)
+        return [w.result(depth) for w in walks]
+
+    async def _walk(self, walks: List["_Walk"], depth: int, max_fanout: Union[int, Sequence[int]],
+                    min_weight: Optional[float], strict: bool):
+        depth = max(0, int(depth))
+        fanouts = [max_fanout] * depth if isinstance(max_fanout, int) else list(max_fanout)
+        fanouts += [fanouts[-1] if fanouts else 50] * (depth - len(fanouts))
+
+        for level in range(depth + 1):
+            active = [w for w in walks if w.frontier and w.error is None]
+            if not active:
+                break
+            expand = level < depth
+            params: Dict[str, Any] = {}
+            stmts: List[str] = []
+            spans = []
+            for j, walk in enumerate(active):
+                # Single traces keep the plain parameter names
+                suffix = f"_{j}" if len(walks) > 1 else ""
+                params[f"frontier{suffix}"] = walk.frontier
+                node_stmts = self._node_statements(walk.frontier, params, f"nodes{suffix}")
+                edge_stmts = self._edge_statements(min_weight, f"frontier{suffix}") if expand else []
+                spans.append((len(stmts), len(node_stmts), len(edge_stmts)))
+                stmts += node_stmts + edge_stmts
+            if expand:
+                params["edge_limit"] = fanouts[level] * 2
+                if min_weight is not None:
+                    params["min_weight"] = float(min_weight)
+
+            results = await self.db.query("\n".join(stmts), params, strict=strict)
+
+            for walk, (offset, n_nodes, n_edges) in zip(active, spans):
+                own = results[offset:offset + n_nodes + n_edges]
+                failed = next((r for r in own if r.get("status") == "ERR"), None)
+                if failed is not None:
+                    walk.error = str(failed.get("result") or "query failed")
+                    continue
+                walk.absorb(level, own[:n_nodes], own[n_nodes:] if expand else None,
+                            self.edge_tables, fanouts[level] if expand else 0, params.get("edge_limit", 0))
+
+
+class _Walk:
+    """State of one bounded BFS"""
+
+    def __init__(self, start: Optional[RecordId], error: Optional[str] = None, label: Optional[str] = None):
+        self.start = start
+        self.label = label if label is not None else str(start)
+        self.error = error
+        self.level_of: Dict[RecordId, int] = {start: 0} if start is not None else {}
+        self.nodes: Dict[RecordId, Dict] = {}
+        self.edges: Dict[tuple, Dict] = {}
+        self.frontier: List[RecordId] = [start] if start is not None else []
+        self.truncated = False
+
+    def absorb(self, level: int, node_results: List[Dict], edge_results: Optional[List[Dict]],
+               edge_tables: List[str], fanout: int, edge_limit: int = 0):
+        for res in node_results:
+            for row in res.get("result") or []:
+                rid = RecordId.parse(row["id"])
+                self.nodes[rid] = {**row, "id": str(rid), "table": rid.table, "level": self.level_of.get(rid, level)}
+
+        if edge_results is None:
+            self.frontier = []
+            return
+
+        # Collect candidate neighbours, strongest edges first
+        candidates = []
+        for i, res in enumerate(edge_results):
+            table, side = edge_tables[i // 2], ("in", "out")[i % 2]
+            rows = res.get("result") or []
+            # A full page may have left edges unread
+            if edge_limit and len(rows) >= edge_limit:
+                self.truncated = True
+            for row in rows:
+                src, dst = RecordId.parse(row["in"]), RecordId.parse(row["out"])
+                neighbour = dst if side == "in" else src
+                candidates.append((row.get("strength") or 0.0, table, src, dst, neighbour, row.get("weight")))
+        candidates.sort(key=lambda c: c[0], reverse=True)
+
+        next_frontier: List[RecordId] = []
+        for _, table, src, dst, neighbour, weight in candidates:
+            if neighbour not in self.level_of:
+                if len(next_frontier) >= fanout:
+                    self.truncated = True
+                    continue
+                self.level_of[neighbour] = level + 1
+                next_frontier.append(neighbour)
+            self.edges.setdefault((table, src, dst), {"table": table, "in": str(src), "out": str(dst), "weight": weight})
+        self.frontier = next_frontier
+
+    def result(self, depth: int) -> Dict:
+        if self.error is not None:
+            return {"start": self.label, "error": self.error}
+        return {
+            "start": str(self.start),
+            "depth": max(0, int(depth)),
+            # Most central first within a level, so a truncated page keeps the important nodes
+            "nodes": sorted(self.nodes.values(), key=lambda n: (n["level"], -(n.get("pagerank") or 0.0), n["id"])),
+            "edges": list(self.edges.values()),
+            "truncated": self.truncated,
+        }
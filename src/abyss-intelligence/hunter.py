@@ -0,0 +1,313 @@
+import os
+import sys
+import time
+import uuid
+import random
+import asyncio
+import importlib
+import inspect
+from datetime import datetime, timedelta, timezone
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+from db_client import RecordId, SurrealClient
+from templates import register
+
+# Seconds between runs per directive type; HUNTER_INTERVAL_<TYPE> overrides.
+DEFAULT_INTERVALS: Dict[str, float] = {
+    "monitor_user": 900,
+    "track_replies": 600,
+    "track_keyword": 900,
+    "monitor_sentiment": 1800,
+    "fetch_10k": 86400,
+}
+FALLBACK_INTERVAL = 3600.0
+
+# `next_run` folds the per-type interval (and lease deadline) into one field, so
+# "what is due" is a range scan on directive(status, next_run), never a table scan.
+# Leasing pushes next_run to the lease deadline: if a worker dies, the directive
+# simply becomes due again when the lease expires.
+LEASE_SQL = """
+BEGIN TRANSACTION;
+LET $due = (SELECT VALUE id FROM directive
+    WHERE status = 'active' AND next_run <= time::now()
+    ORDER BY next_run ASC LIMIT $limit);
+LET $leased = (UPDATE $due SET
+        lease_owner = $owner,
+        lease_until = time::now() + <duration>$lease_ttl,
+        next_run = time::now() + <duration>$lease_ttl
+    WHERE status = 'active' AND next_run <= time::now()
+    RETURN BEFORE);
+COMMIT TRANSACTION;
+RETURN $leased;
+"""
+
+COMPLETE_SQL = """
+FOR $c IN $done {
+    UPDATE $c.id SET
+        last_run = $c.ran_at,
+        next_run = $c.next_run,
+        status = $c.status,
+        last_result = $c.result,
+        lease_owner = NONE,
+        lease_until = NONE
+    WHERE lease_owner = $owner;
+};
+"""
+
+METRICS_SQL = """
+SELECT count() AS due FROM directive WHERE status = 'active' AND next_run <= time::now() GROUP ALL;
+SELECT next_run FROM directive WHERE status = 'active' ORDER BY next_run ASC LIMIT 1;
+"""
+
+CREATE_DIRECTIVE_SQL = """
+CREATE directive CONTENT {
+    target: $target,
+    type: $type,
+    status: 'active',
+    context: $context,
+    created_at: time::now()
+};
+"""
+
+CREATE_DIRECTIVE = register("create_directive", CREATE_DIRECTIVE_SQL, target="string", type="string", context="object")
+LEASE = register("hunter.lease", LEASE_SQL, limit="int", owner="string", lease_ttl="duration")
+COMPLETE = register("hunter.complete", COMPLETE_SQL, done="array<object>", owner="string")
+METRICS = register("hunter.metrics", METRICS_SQL)
+
+Handler = Callable[[Dict[str, Any]], Awaitable[Optional[Dict[str, Any]]]]
+
+
+async def default_handler(directive: Dict[str, Any]) -> Dict[str, Any]:
+    print(f"[Hunter] No handler for type '{directive.get('type')}', skipping {directive.get('id')}",
+          file=sys.stderr)
+    return {"skipped": True}
+
+
+def load_handlers(spec: str) -> Dict[str, Handler]:
+    """
+    Handlers from a HUNTER_HANDLERS spec: comma-separated `type=module:function`
+    pairs, e.g. "monitor_user=x_scraper:monitor_user,fetch_10k=edgar:fetch_10k".
+    Each function is an async callable taking the directive row and returning
+    a small result dict (stored as last_result) or None.
+    """
+    handlers: Dict[str, Handler] = {}
+    for entry in filter(None, (part.strip() for part in spec.split(","))):
+        task_type, sep, target = entry.partition("=")
+        module, colon, attr = target.strip().partition(":")
+        if not sep or not colon or not task_type.strip() or not module or not attr:
+            raise ValueError(f"Invalid HUNTER_HANDLERS entry {entry!r} (expected type=module:function)")
+        handler = getattr(importlib.import_module(module), attr)
+        if not inspect.iscoroutinefunction(handler):
+            raise ValueError(f"HUNTER_HANDLERS: {target.strip()} is not an async function")
+        handlers[task_type.strip()] = handler
+    return handlers
+
+
+class TargetRateLimiter:
+    """Token bucket per target so one hot target cannot hog the workers"""
+
+    def __init__(self, per_minute: float):
+        self.rate = per_minute / 60.0
+        self.capacity = max(1.0, per_minute / 6.0)
+        self._buckets: Dict[str, List[float]] = {}
+
+    async def acquire(self, target: str) -> float:
+        """Wait for a token; returns the seconds waited"""
+        if self.rate <= 0:
+            return 0.0
+        waited = 0.0
+        while True:
+            now = time.monotonic()
+            tokens, last = self._buckets.get(target, (self.capacity, now))
+            tokens = min(self.capacity, tokens + (now - last) * self.rate)
+            if tokens >= 1.0:
+                self._buckets[target] = [tokens - 1.0, now]
+                return waited
+            self._buckets[target] = [tokens, now]
+            delay = (1.0 - tokens) / self.rate
+            await asyncio.sleep(delay)
+            waited += delay
+
+
+class Hunter:
+    """
+    Long-running scheduler over the `directive` table.
+
+    Each tick leases due directives (up to the free worker capacity) in one
+    transaction, hands them to a bounded pool of asyncio workers, and writes
+    completions back in batches. Intervals are per directive type with random
+    jitter; a per-target token bucket throttles repeated work on the same
+    target.
+
+    The scheduler does not fetch anything itself: the work for each directive
+    type is a handler, passed in, added with `register()`, or named in
+    HUNTER_HANDLERS for the daemon. Directives of a type without a handler
+    are skipped and rescheduled.
+    """
+
+    def __init__(self, db: SurrealClient, handlers: Optional[Dict[str, Handler]] = None,
+                 workers: Optional[int] = None, tick: Optional[float] = None,
+                 lease_ttl: Optional[float] = None, jitter: Optional[float] = None,
+                 target_rate: Optional[float] = None, flush_every: int = 100):
+        self.db = db
+        self.handlers: Dict[str, Handler] = dict(handlers or {})
+        self.workers = workers or int(os.getenv("HUNTER_WORKERS", "32"))
+        self.tick = tick or float(os.getenv("HUNTER_TICK", "5"))
+        self.lease_ttl = lease_ttl or float(os.getenv("HUNTER_LEASE_TTL", "600"))
+        self.jitter = jitter if jitter is not None else float(os.getenv("HUNTER_JITTER", "0.1"))
+        self.limiter = TargetRateLimiter(target_rate if target_rate is not None
+                                         else float(os.getenv("HUNTER_TARGET_RATE", "6")))
+        self.flush_every = flush_every
+        self.owner = f"hunter-{uuid.uuid4().hex[:8]}"
+
+        self.intervals = dict(DEFAULT_INTERVALS)
+        for key, value in os.environ.items():
+            if key.startswith("HUNTER_INTERVAL_"):
+                self.intervals[key[len("HUNTER_INTERVAL_"):].lower()] = float(value)
+
+        self.queue: "asyncio.Queue[Dict]" = asyncio.Queue(maxsize=self.workers * 2)
+        self._done: List[Dict] = []
+        self._in_flight = 0
+        self._tasks: List[asyncio.Task] = []
+        self._flush_lock = asyncio.Lock()
+        self.stats: Dict[str, Any] = {
+            "leased": 0, "completed": 0, "failed": 0, "recovered": 0,
+            "rate_limited_seconds": 0.0, "queue_depth": 0, "lag_seconds": 0.0,
+        }
+
+    def register(self, directive_type: str, handler: Handler):
+        self.handlers[directive_type] = handler
+
+    def interval_for(self, directive_type: str) -> float:
+        base = self.intervals.get(directive_type, FALLBACK_INTERVAL)
+        return base * (1.0 + random.uniform(-self.jitter, self.jitter))
+
+    # --- Leasing ---
+
+    async def lease(self, limit: int) -> List[Dict]:
+        if limit <= 0:
+            return []
+        res = await self.db.run(LEASE, limit=limit, owner=self.owner, lease_ttl=f"{int(self.lease_ttl)}s",
+                                use_cache=False)
+        rows = (res[-1].get("result") or []) if res else []
+        for row in rows:
+            if row.get("lease_owner") and row.get("lease_owner") != self.owner:
+                # Previous holder let its lease expire (crashed or stuck)
+                self.stats["recovered"] += 1
+        self.stats["leased"] += len(rows)
+        return rows
+
+    # --- Execution ---
+
+    async def _run(self, directive: Dict):
+        started = datetime.now(timezone.utc)
+        status, result = "active", None
+        try:
+            self.stats["rate_limited_seconds"] += await self.limiter.acquire(directive.get("target") or "")
+            handler = self.handlers.get(directive.get("type"), default_handler)
+            result = await handler(directive) or {}
+            if result.get("completed"):
+                status = "completed"
+            self.stats["completed"] += 1
+        except Exception as e:
+            self.stats["failed"] += 1
+            result = {"error": str(e)[:500]}
+            print(f"[Hunter] Directive {directive.get('id')} failed: {e}", file=sys.stderr)
+
+        next_run = started + timedelta(seconds=self.interval_for(directive.get("type")))
+        self._done.append({
+            "id": RecordId.parse(directive["id"]),
+            "ran_at": started,
+            "next_run": next_run,
+            "status": status,
+            "result": result,
+        })
+        if len(self._done) >= self.flush_every:
+            await self.flush()
+
+    async def _worker(self):
+        while True:
+            directive = await self.queue.get()
+            self._in_flight += 1
+            try:
+                await self._run(directive)
+            finally:
+                self._in_flight -= 1
+                self.queue.task_done()
+
+    async def flush(self):
+        """Write buffered completions back in one request"""
+        async with self._flush_lock:
+            if not self._done:
+                return
+            done, self._done = self._done, []
+            try:
+                await self.db.run(COMPLETE, done=done, owner=self.owner)
+            except Exception as e:
+                # Leases stay in place; the directives become due again when they expire
+                print(f"[Hunter] Failed to record {len(done)} completions: {e}", file=sys.stderr)
+
+    # --- Scheduling ---
+
+    async def refresh_metrics(self):
+        res = await self.db.run(METRICS, use_cache=False)
+        due_rows = res[0].get("result") or []
+        self.stats["queue_depth"] = due_rows[0]["due"] if due_rows else 0
+        oldest = res[1].get("result") or []
+        lag = 0.0
+        if oldest and oldest[0].get("next_run"):
+            next_run = datetime.fromisoformat(str(oldest[0]["next_run"]).replace("Z", "+00:00"))
+            lag = max(0.0, (datetime.now(timezone.utc) - next_run).total_seconds())
+        self.stats["lag_seconds"] = round(lag, 3)
+
+    def metrics(self) -> Dict[str, Any]:
+        return {**self.stats, "in_flight": self._in_flight, "buffered": self.queue.qsize(),
+                "pending_writes": len(self._done), "owner": self.owner}
+
+    async def run_once(self):
+        """One scheduler tick: lease into free capacity, flush completions"""
+        free = self.queue.maxsize - self.queue.qsize()
+        for directive in await self.lease(free):
+            await self.queue.put(directive)
+        await self.flush()
+
+    async def run(self, metrics_every: float = 60.0):
+        self._tasks = [asyncio.create_task(self._worker()) for _ in range(self.workers)]
+        last_report = 0.0
+        try:
+            while True:
+                try:
+                    await self.run_once()
+                    if time.monotonic() - last_report >= metrics_every:
+                        await self.refresh_metrics()
+                        print(f"[Hunter] {self.metrics()}", file=sys.stderr)
+                        last_report = time.monotonic()
+                except Exception as e:
+                    print(f"[Hunter] Tick failed: {e}", file=sys.stderr)
+                await asyncio.sleep(self.tick)
+        finally:
+            await self.stop()
+
+    async def stop(self):
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+        await self.flush()
+
+
+async def main():
+    handlers = load_handlers(os.getenv("HUNTER_HANDLERS", ""))
+    if not handlers:
+        print("[Hunter] No HUNTER_HANDLERS configured: directives are leased and rescheduled, "
+              "nothing is executed", file=sys.stderr)
+    db = SurrealClient()
+    await db.start()
+    try:
+        await Hunter(db, handlers=handlers).run()
+    finally:
+        await db.close()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
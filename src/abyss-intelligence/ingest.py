@@ -0,0 +1,516 @@
+import os
+import re
+import sys
+import time
+import asyncio
+import hashlib
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from typing import Dict, List, Optional, Tuple
+from xml.etree import ElementTree
+
+import httpx
+
+from db_client import RecordId, SurrealClient
+from dedup import Deduplicator, canonical_url, encode_signature
+from embeddings import EmbeddingStage
+from engagement import EngagementAggregator
+
+# Rows are inserted with deterministic ids derived from the canonical URL, so a
+# re-delivered item is skipped by INSERT IGNORE without a read round trip.
+# Duplicates are merged into the row they copy: their URLs are added to
+# `sources` once each, so replaying a merge doesn't count it twice.
+FLUSH_SQL = """
+BEGIN TRANSACTION;
+INSERT IGNORE INTO article $articles;
+INSERT IGNORE INTO pulse $pulses;
+INSERT RELATION IGNORE INTO mentions $mentions;
+FOR $m IN $merges {
+    UPDATE $m.id SET sources = array::union(sources ?? [], array::complement($m.urls, [url])),
+        dup_count = array::len(sources) + 1;
+};
+COMMIT TRANSACTION;
+"""
+
+ENTITIES_SQL = """
+SELECT id, name, ticker FROM company;
+SELECT id, name FROM concept;
+"""
+
+_TAG_RE = re.compile(r"<[^>]+>")
+_ATOM = "{http://www.w3.org/2005/Atom}"
+
+
+@dataclass
+class FeedSource:
+    """One RSSHub route. `kind` is the table its items land in."""
+    url: str
+    kind: str = "article"  # "article" | "pulse"
+    source_type: str = "news"  # article.source_type
+    platform: str = ""  # pulse.platform
+    reliability: float = 0.5
+    etag: Optional[str] = None
+    last_modified: Optional[str] = None
+
+
+@dataclass
+class FeedItem:
+    kind: str
+    url: str
+    title: str
+    content: str
+    author: str
+    published_at: datetime
+    source: FeedSource = field(repr=False)
+
+
+def record_id_for(table: str, key: str) -> RecordId:
+    return RecordId(table, hashlib.sha1(key.encode("utf-8")).hexdigest()[:24])
+
+
+def _text(el: Optional[ElementTree.Element]) -> str:
+    if el is None:
+        return ""
+    return (el.text or "").strip()
+
+
+def _parse_date(value: str) -> datetime:
+    if value:
+        try:
+            return parsedate_to_datetime(value)
+        except (TypeError, ValueError):
+            pass
+        try:
+            return datetime.fromisoformat(value.replace("Z", "+00:00"))
+        except ValueError:
+            pass
+    return datetime.now(timezone.utc)
+
+
+def parse_feed(body: bytes, source: FeedSource) -> List[FeedItem]:
+    """Parse an RSS 2.0 or Atom document into FeedItems"""
+    root = ElementTree.fromstring(body)
+    items = []
+    for node in root.iter("item"):
+        description = _text(node.find("description"))
+        items.append(FeedItem(
+            kind=source.kind,
+            url=_text(node.find("link")) or _text(node.find("guid")),
+            title=_text(node.find("title")),
+            content=_TAG_RE.sub("", description),
+            author=_text(node.find("author")) or _text(node.find("{http://purl.org/dc/elements/1.1/}creator")),
+            published_at=_parse_date(_text(node.find("pubDate"))),
+            source=source,
+        ))
+    for node in root.iter(f"{_ATOM}entry"):
+        link = node.find(f"{_ATOM}link")
+        body_el = node.find(f"{_ATOM}content")
+        if body_el is None:
+            body_el = node.find(f"{_ATOM}summary")
+        items.append(FeedItem(
+            kind=source.kind,
+            url=(link.get("href") if link is not None else "") or _text(node.find(f"{_ATOM}id")),
+            title=_text(node.find(f"{_ATOM}title")),
+            content=_TAG_RE.sub("", _text(body_el)),
+            author=_text(node.find(f"{_ATOM}author/{_ATOM}name")),
+            published_at=_parse_date(_text(node.find(f"{_ATOM}published")) or _text(node.find(f"{_ATOM}updated"))),
+            source=source,
+        ))
+    return [item for item in items if item.url]
+
+
+class EntityMatcher:
+    """Case-insensitive keyword matcher for known company/concept names and tickers"""
+
+    def __init__(self, entities: Optional[Dict[str, RecordId]] = None):
+        self.entities: Dict[str, RecordId] = {}
+        self._pattern: Optional[re.Pattern] = None
+        for term, rid in (entities or {}).items():
+            self.add(term, rid)
+
+    def add(self, term: str, rid: RecordId):
+        if term and len(term) >= 2:
+            self.entities[term.lower()] = rid
+            self._pattern = None
+
+    def match(self, text: str) -> List[RecordId]:
+        if not self.entities:
+            return []
+        if self._pattern is None:
+            terms = sorted(self.entities, key=len, reverse=True)
+            self._pattern = re.compile(r"\b(" + "|".join(re.escape(t) for t in terms) + r")\b", re.IGNORECASE)
+        found = {self.entities[m.lower()] for m in self._pattern.findall(text)}
+        return sorted(found, key=str)
+
+    @classmethod
+    async def load(cls, db: SurrealClient) -> "EntityMatcher":
+        matcher = cls()
+        res = await db.query(ENTITIES_SQL, use_cache=False)
+        for statement in res:
+            for row in statement.get("result") or []:
+                rid = RecordId.parse(row["id"])
+                matcher.add(row.get("name") or "", rid)
+                matcher.add(row.get("ticker") or "", rid)
+        return matcher
+
+
+class SeenUrls:
+    """Bounded LRU of recently ingested URLs (the DB's INSERT IGNORE is the real guard)"""
+
+    def __init__(self, capacity: int = 200_000):
+        self.capacity = capacity
+        self._urls: "OrderedDict[str, None]" = OrderedDict()
+
+    def add(self, url: str) -> bool:
+        """Returns False if `url` was already seen"""
+        if url in self._urls:
+            self._urls.move_to_end(url)
+            return False
+        self._urls[url] = None
+        if len(self._urls) > self.capacity:
+            self._urls.popitem(last=False)
+        return True
+
+
+class BatchWriter:
+    """
+    Buffers rows and edges and flushes them as one multi-statement transaction
+    once `max_rows`, `max_bytes` or `max_delay` seconds is reached. With an
+    `embedder`, rows are embedded just before the flush; if that fails they
+    are written without embeddings and left to `embeddings.py` backfill.
+    """
+
+    def __init__(self, db: SurrealClient, max_rows: int = 500, max_bytes: int = 2 * 1024 * 1024,
+                 max_delay: float = 2.0, embedder: Optional[EmbeddingStage] = None):
+        self.db = db
+        self.embedder = embedder
+        self.max_rows = max_rows
+        self.max_bytes = max_bytes
+        self.max_delay = max_delay
+        self.articles: List[Dict] = []
+        self.pulses: List[Dict] = []
+        self.mentions: List[Dict] = []
+        self.merges: Dict[str, Dict] = {}
+        self.bytes = 0
+        self.oldest: Optional[float] = None
+        self.flushes = 0
+        self.rows_written = 0
+        self.rows_merged = 0
+        self._lock = asyncio.Lock()
+
+    def __len__(self) -> int:
+        return len(self.articles) + len(self.pulses) + len(self.merges)
+
+    def add(self, table: str, row: Dict, mentions: List[Dict], size: int):
+        (self.articles if table == "article" else self.pulses).append(row)
+        self.mentions.extend(mentions)
+        self.bytes += size
+        if self.oldest is None:
+            self.oldest = time.monotonic()
+
+    def merge(self, rid: RecordId, url: str):
+        """Record `url` as another source of the existing row `rid`"""
+        merge = self.merges.setdefault(str(rid), {"id": rid, "urls": []})
+        if url not in merge["urls"]:
+            merge["urls"].append(url)
+        if self.oldest is None:
+            self.oldest = time.monotonic()
+
+    def due(self) -> bool:
+        if not len(self):
+            return False
+        return (len(self) >= self.max_rows or self.bytes >= self.max_bytes
+                or time.monotonic() - self.oldest >= self.max_delay)
+
+    def backlogged(self) -> bool:
+        """True when failed flushes have piled up and intake should pause"""
+        return len(self) >= self.max_rows * 4
+
+    async def flush(self):
+        async with self._lock:
+            if not len(self):
+                return
+            if self.embedder is not None:
+                await self._embed()
+            batch = (self.articles, self.pulses, self.mentions, self.bytes, self.merges)
+            params = {"articles": self.articles, "pulses": self.pulses, "mentions": self.mentions,
+                      "merges": list(self.merges.values())}
+            rows = len(self.articles) + len(self.pulses)
+            self.articles, self.pulses, self.mentions, self.merges = [], [], [], {}
+            self.bytes, self.oldest = 0, None
+            try:
+                await self.db.query(FLUSH_SQL, params)
+            except Exception:
+                # Keep the batch for the next attempt; inserts are idempotent
+                self.articles = batch[0] + self.articles
+                self.pulses = batch[1] + self.pulses
+                self.mentions = batch[2] + self.mentions
+                self.bytes += batch[3]
+                for key, merge in self.merges.items():
+                    urls = batch[4].setdefault(key, merge)["urls"]
+                    urls.extend(u for u in merge["urls"] if u not in urls)
+                self.merges = batch[4]
+                self.oldest = time.monotonic()
+                raise
+            self.flushes += 1
+            self.rows_written += rows
+            self.rows_merged += len(params["merges"])
+
+    async def _embed(self):
+        for table, rows in (("article", self.articles), ("pulse", self.pulses)):
+            try:
+                await self.embedder.embed_rows(table, rows)
+            except Exception as e:
+                print(f"[Ingest] Embedding {len(rows)} {table} rows failed, writing them without: {e}",
+                      file=sys.stderr)
+
+
+class FeedIngestor:
+    """
+    Polls RSSHub feeds concurrently and writes new items into `article` /
+    `pulse` plus `mentions` edges, through a BatchWriter.
+
+    Feeds are fetched with conditional GET (ETag / Last-Modified), re-delivered
+    items are dropped by URL, copies of an existing row (same canonical URL or
+    near-identical content, see dedup.py) are merged into it instead of being
+    inserted and embedded again, and a bounded queue between pollers and the
+    writer keeps memory flat when the database falls behind. With an
+    `engagement` aggregator, each near-duplicate copy of a pulse merged into
+    its original counts as a repost of it; a re-delivery of a URL already
+    ingested or merged is not a repost.
+    """
+
+    def __init__(self, db: SurrealClient, feeds: List[FeedSource], matcher: Optional[EntityMatcher] = None,
+                 poll_interval: Optional[float] = None, concurrency: Optional[int] = None,
+                 writer: Optional[BatchWriter] = None, queue_size: int = 10_000,
+                 dedup: Optional[Deduplicator] = None, engagement: Optional[EngagementAggregator] = None):
+        self.db = db
+        self.feeds = feeds
+        self.matcher = matcher or EntityMatcher()
+        self.poll_interval = poll_interval or float(os.getenv("INGEST_POLL_INTERVAL", "300"))
+        self.concurrency = concurrency or int(os.getenv("INGEST_CONCURRENCY", "16"))
+        self.writer = writer if writer is not None else BatchWriter(db)
+        self.queue: "asyncio.Queue[FeedItem]" = asyncio.Queue(maxsize=queue_size)
+        self.seen = SeenUrls()
+        self.dedup = dedup or Deduplicator()
+        self.engagement = engagement
+        self.http = httpx.AsyncClient(timeout=30.0, follow_redirects=True,
+                                      limits=httpx.Limits(max_connections=self.concurrency))
+        self.stats = {"polls": 0, "not_modified": 0, "fetch_errors": 0, "items": 0, "duplicates": 0,
+                      "merged": 0}
+        self._tasks: List[asyncio.Task] = []
+
+    # --- Fetching ---
+
+    async def fetch(self, source: FeedSource) -> List[FeedItem]:
+        headers = {}
+        if source.etag:
+            headers["If-None-Match"] = source.etag
+        if source.last_modified:
+            headers["If-Modified-Since"] = source.last_modified
+        self.stats["polls"] += 1
+        try:
+            resp = await self.http.get(source.url, headers=headers)
+            if resp.status_code == 304:
+                self.stats["not_modified"] += 1
+                return []
+            resp.raise_for_status()
+            source.etag = resp.headers.get("ETag", source.etag)
+            source.last_modified = resp.headers.get("Last-Modified", source.last_modified)
+            return parse_feed(resp.content, source)
+        except Exception as e:
+            self.stats["fetch_errors"] += 1
+            print(f"[Ingest] Fetch failed for {source.url}: {e}", file=sys.stderr)
+            return []
+
+    async def load(self):
+        """Restore dedup state after a restart: signatures in the window, and their URLs and sources as seen"""
+        for url in await self.dedup.load(self.db):
+            self.seen.add(url)
+
+    async def poll_once(self):
+        """Fetch every feed once (bounded concurrency) and enqueue new items"""
+        sem = asyncio.Semaphore(self.concurrency)
+
+        async def one(source: FeedSource):
+            async with sem:
+                items = await self.fetch(source)
+            for item in items:
+                if self.seen.add(item.url):
+                    await self.queue.put(item)
+                else:
+                    self.stats["duplicates"] += 1
+
+        await asyncio.gather(*(one(s) for s in self.feeds))
+
+    # --- Writing ---
+
+    def to_row(self, item: FeedItem, signature=None) -> Tuple[str, Dict, List[Dict]]:
+        url_key = canonical_url(item.url)
+        rid = record_id_for(item.kind, url_key)
+        if item.kind == "pulse":
+            row = {
+                "id": rid,
+                "content": item.content or item.title,
+                "platform": item.source.platform,
+                "author_handle": item.author,
+                "url": item.url,
+                "engagement": {},
+                "created_at": item.published_at,
+                "url_key": url_key,
+            }
+        else:
+            row = {
+                "id": rid,
+                "url": item.url,
+                "title": item.title,
+                "content": item.content,
+                "source_type": item.source.source_type,
+                "reliability": item.source.reliability,
+                "published_at": item.published_at,
+                "url_key": url_key,
+            }
+        if signature is not None:
+            row["minhash"] = encode_signature(signature)
+        mentions = [
+            {"id": record_id_for("mentions", f"{rid}->{entity}"), "in": rid, "out": entity}
+            for entity in self.matcher.match(f"{item.title}\n{item.content}")
+        ]
+        return item.kind, row, mentions
+
+    def stage(self, item: FeedItem, size: int):
+        """Hand `item` to the writer: a new row, or a merge into the row it duplicates"""
+        text = item.content or item.title
+        signature = self.dedup.fingerprint(text)
+        rid = record_id_for(item.kind, canonical_url(item.url))
+        original = self.dedup.check(item.kind, rid, signature)
+        if original is not None:
+            self.writer.merge(original, item.url)
+            self.stats["merged"] += 1
+            # Same canonical URL: the item itself again, not a copy
+            if self.engagement is not None and item.kind == "pulse" and original != rid:
+                self.count_repost(original)
+            return
+        table, row, mentions = self.to_row(item, signature)
+        self.writer.add(table, row, mentions, size)
+
+    def count_repost(self, rid: RecordId):
+        key = str(rid)
+        for row in self.writer.pulses:
+            if str(row["id"]) == key:
+                # Not written yet, so an increment would find no record: count it on the row
+                row["engagement"]["reposts"] = row["engagement"].get("reposts", 0) + 1
+                return
+        self.engagement.add(rid, {"reposts": 1})
+
+    async def write_loop(self):
+        while True:
+            if self.writer.backlogged():
+                # The DB is failing; stop draining the queue so pollers block on it
+                await asyncio.sleep(1.0)
+            else:
+                try:
+                    timeout = self.writer.max_delay if len(self.writer) else None
+                    item = await asyncio.wait_for(self.queue.get(), timeout)
+                    self.stage(item, len(item.content) + len(item.title) + 256)
+                    self.stats["items"] += 1
+                    self.queue.task_done()
+                except asyncio.TimeoutError:
+                    pass
+            if self.writer.due():
+                try:
+                    await self.writer.flush()
+                except Exception as e:
+                    print(f"[Ingest] Flush failed: {e}", file=sys.stderr)
+
+    async def poll_loop(self):
+        while True:
+            await self.poll_once()
+            await asyncio.sleep(self.poll_interval)
+
+    # --- Lifecycle ---
+
+    async def start(self):
+        self._tasks = [asyncio.create_task(self.write_loop()), asyncio.create_task(self.poll_loop())]
+
+    async def drain(self):
+        """Wait until queued items are written"""
+        await self.queue.join()
+        await self.writer.flush()
+
+    async def stop(self):
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+        while not self.queue.empty():
+            self.stage(self.queue.get_nowait(), 0)
+        await self.writer.flush()
+        await self.http.aclose()
+
+
+def load_feeds(path: str) -> List[FeedSource]:
+    """One feed per line: `<kind> <url> [source_type|platform]`; `#` starts a comment"""
+    feeds = []
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            line = line.split("#", 1)[0].strip()
+            if not line:
+                continue
+            parts = line.split()
+            kind, url = parts[0], parts[1]
+            extra = parts[2] if len(parts) > 2 else ""
+            if kind == "pulse":
+                feeds.append(FeedSource(url=url, kind="pulse", platform=extra))
+            else:
+                feeds.append(FeedSource(url=url, kind="article", source_type=extra or "news"))
+    return feeds
+
+
+async def main():
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Poll RSSHub feeds into SurrealDB")
+    parser.add_argument("feeds", help="feed list file (`<kind> <url> [source_type|platform]` per line)")
+    parser.add_argument("--once", action="store_true", help="poll every feed once, flush and exit")
+    args = parser.parse_args()
+
+    db = SurrealClient()
+    await db.start()
+    embedder = EmbeddingStage.from_env(db)
+    engagement = None
+    if os.getenv("ENGAGEMENT_ENABLED", "true").lower() in ("1", "true", "yes"):
+        engagement = EngagementAggregator(db)
+        engagement.start()
+    ingestor = FeedIngestor(db, load_feeds(args.feeds), matcher=await EntityMatcher.load(db),
+                            writer=BatchWriter(db, embedder=embedder), engagement=engagement)
+    await ingestor.load()
+    try:
+        if args.once:
+            writer_task = asyncio.create_task(ingestor.write_loop())
+            await ingestor.poll_once()
+            await ingestor.drain()
+            writer_task.cancel()
+        else:
+            await ingestor.start()
+            await asyncio.Event().wait()
+    finally:
+        await ingestor.stop()
+        if engagement is not None:
+            # Reposts are counted on rows the writer has just flushed
+            await engagement.stop()
+        if embedder is not None:
+            await embedder.close()
+        await db.close()
+        print(f"[Ingest] {ingestor.stats} flushes={ingestor.writer.flushes} rows={ingestor.writer.rows_written} "
+              f"merges={ingestor.writer.rows_merged} dedup={ingestor.dedup.stats}", file=sys.stderr)
+        if embedder is not None:
+            metrics = embedder.metrics()
+            print(f"[Ingest] embeddings: {metrics['embedded']} rows, hit rate {metrics['hit_rate']:.1%}, "
+                  f"{metrics['calls']} provider calls", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,168 @@
+import json
+import codecs
+from typing import Any, Dict, List, Tuple
+
+# Events produced by ResultStream.feed(): ("row", statement, value) for each
+# element of a statement's result array, and ("end", statement, {status, time,
+# ...}) when its object closes. A result that is not an array (an error
+# message, a scalar, `FROM ONLY` objects) arrives whole as meta["result"].
+Event = Tuple[str, int, Any]
+
+_WS = " \t\r\n"
+# Consumed text is dropped from the buffer once this much has piled up
+_COMPACT_AT = 1 << 16
+
+
+class ResultStream:
+    """
+    Incremental decoder for SurrealDB `/sql` responses:
+
+        [{"result": [row, row, ...], "status": "OK", "time": "..."}, ...]
+
+    Bytes go in as they arrive; rows come out one by one as soon as they are
+    complete, so only the row being decoded (plus one network chunk) is ever
+    held, whatever the size of the whole response. Anything that is not a
+    result array (status, time, error strings, scalar results) is decoded as
+    a whole value.
+    """
+
+    def __init__(self):
+        self._text = codecs.getincrementaldecoder("utf-8")()
+        self._decode = json.JSONDecoder().raw_decode
+        self._buf = ""
+        self._pos = 0
+        self._state = "start"
+        self._statement = -1
+        self._meta: Dict[str, Any] = {}
+        self._key = ""
+        # After a value failed to decode for lack of data, wait until the
+        # pending text has doubled before trying again (keeps big values linear)
+        self._retry_at = 0
+        self._chunks: List[str] = []
+        self._chunked = 0
+        self.bytes = 0
+        self.rows = 0
+        self.done = False
+
+    def feed(self, chunk: bytes) -> List[Event]:
+        self.bytes += len(chunk)
+        text = self._text.decode(chunk)
+        if self._retry_at:
+            # Still short of the value being waited for: don't rebuild the buffer yet
+            self._chunks.append(text)
+            self._chunked += len(text)
+            if len(self._buf) - self._pos + self._chunked < self._retry_at:
+                return []
+            text = "".join(self._chunks)
+            self._chunks, self._chunked = [], 0
+        self._buf += text
+        return self._parse(final=False)
+
+    def close(self) -> List[Event]:
+        """Flush at end of body; raises ValueError if the document is incomplete"""
+        self._buf += "".join(self._chunks) + self._text.decode(b"", final=True)
+        self._chunks, self._chunked = [], 0
+        self._retry_at = 0
+        events = self._parse(final=True)
+        if not self.done:
+            raise ValueError(f"Truncated SurrealDB response (in {self._state} at statement {self._statement})")
+        return events
+
+    # --- Parsing ---
+
+    def _skip(self) -> str:
+        """Skip whitespace; the next character, or '' if the buffer is exhausted"""
+        buf, pos = self._buf, self._pos
+        while pos < len(buf) and buf[pos] in _WS:
+            pos += 1
+        self._pos = pos
+        return buf[pos] if pos < len(buf) else ""
+
+    def _value(self, final: bool):
+        """Decode one complete JSON value at the cursor, or return `self` if more data is needed"""
+        pending = len(self._buf) - self._pos
+        try:
+            value, end = self._decode(self._buf, self._pos)
+        except json.JSONDecodeError:
+            if final:
+                raise ValueError(f"Malformed SurrealDB response near offset {self.bytes - pending}")
+            self._retry_at = pending * 2
+            return self
+        # A number at the end of the buffer may continue in the next chunk
+        if end == len(self._buf) and not final and not isinstance(value, (dict, list, str)):
+            self._retry_at = pending + 1
+            return self
+        self._retry_at = 0
+        self._pos = end
+        return value
+
+    def _expect(self, char: str):
+        if self._buf[self._pos] != char:
+            raise ValueError(f"Malformed SurrealDB response: expected {char!r}, got {self._buf[self._pos]!r}")
+        self._pos += 1
+
+    def _parse(self, final: bool) -> List[Event]:
+        events: List[Event] = []
+        while not self.done:
+            c = self._skip()
+            if not c:
+                break
+            state = self._state
+            if state == "start":
+                self._expect("[")
+                self._state = "list"
+            elif state == "list":
+                if c == "]":
+                    self._pos += 1
+                    self.done = True
+                elif c == ",":
+                    self._pos += 1
+                else:
+                    self._expect("{")
+                    self._statement += 1
+                    self._meta = {}
+                    self._state = "key"
+            elif state == "key":
+                if c == "}":
+                    self._pos += 1
+                    events.append(("end", self._statement, self._meta))
+                    self._state = "list"
+                elif c == ",":
+                    self._pos += 1
+                else:
+                    key = self._value(final)
+                    if key is self:
+                        break
+                    if not isinstance(key, str):
+                        raise ValueError("Malformed SurrealDB response: object key is not a string")
+                    self._key = key
+                    self._state = "colon"
+            elif state == "colon":
+                self._expect(":")
+                self._state = "value"
+            elif state == "value":
+                if self._key == "result" and c == "[":
+                    self._pos += 1
+                    self._state = "rows"
+                    continue
+                value = self._value(final)
+                if value is self:
+                    break
+                self._meta[self._key] = value
+                self._state = "key"
+            elif state == "rows":
+                if c == "]":
+                    self._pos += 1
+                    self._state = "key"
+                elif c == ",":
+                    self._pos += 1
+                else:
+                    value = self._value(final)
+                    if value is self:
+                        break
+                    self.rows += 1
+                    events.append(("row", self._statement, value))
+        if self._pos >= _COMPACT_AT:
+            self._buf = self._buf[self._pos:]
+            self._pos = 0
+        return events
@@ -0,0 +1,289 @@
+import os
+import re
+import sys
+import asyncio
+from collections import OrderedDict, deque
+from datetime import datetime, timezone
+from typing import Any, Deque, Dict, List, Optional
+
+# Field used to resume a table's stream after a gap (reconnect or overflow)
+TIME_FIELDS = {
+    "pulse": "created_at",
+    "article": "created_at",
+    "trend_metric": "timestamp",
+    "directive": "created_at",
+    "mentions": "created_at",
+}
+DEFAULT_TIME_FIELD = "created_at"
+
+_TABLE_RE = re.compile(r"^[A-Za-z_][A-Za-z0-9_]*$")
+
+CATCH_UP_SQL = "SELECT * FROM type::table($table) WHERE {field} > <datetime>$since ORDER BY {field} ASC LIMIT $limit;"
+
+
+def _parse_time(value: Any) -> Optional[datetime]:
+    if isinstance(value, datetime):
+        return value if value.tzinfo else value.replace(tzinfo=timezone.utc)
+    if isinstance(value, str):
+        try:
+            parsed = datetime.fromisoformat(value.replace("Z", "+00:00"))
+        except ValueError:
+            return None
+        return parsed if parsed.tzinfo else parsed.replace(tzinfo=timezone.utc)
+    return None
+
+
+class LiveSubscription:
+    """
+    Async iterator over `LIVE SELECT` notifications for one table.
+
+    Events are buffered in a bounded queue. When the consumer falls behind and
+    the queue fills, further notifications are dropped and the stream switches
+    to catch-up mode: once the queue is drained, rows newer than the last
+    delivered timestamp are read back page by page, then live delivery
+    resumes. The same catch-up fills the gap after a reconnect, where the live
+    query is re-issued automatically. Catch-up only sees rows by their time
+    field, so it replays creations; updates and deletes lost in a gap are
+    counted in `dropped`.
+    """
+
+    def __init__(self, db, table: str, where: Optional[str] = None, params: Optional[Dict] = None,
+                 since: Optional[datetime] = None, max_queue: int = 1000,
+                 time_field: Optional[str] = None):
+        if not _TABLE_RE.match(table or ""):
+            raise ValueError(f"Invalid table name: {table!r}")
+        self.db = db
+        self.table = table
+        self.where = where
+        self.params = params or {}
+        self.time_field = time_field or TIME_FIELDS.get(table, DEFAULT_TIME_FIELD)
+        if not _TABLE_RE.match(self.time_field):
+            raise ValueError(f"Invalid time field: {self.time_field!r}")
+        self.max_queue = max_queue
+        self.live_id: Optional[str] = None
+        self.since = _parse_time(since)
+
+        self.delivered = 0
+        self.dropped = 0
+        self.caught_up = 0
+        self.resubscribes = 0
+
+        self._rpc = None
+        self._queue: "asyncio.Queue[Optional[Dict]]" = asyncio.Queue(maxsize=max_queue)
+        self._backlog: Deque[Dict] = deque()
+        self._needs_catch_up = self.since is not None
+        self._closed = False
+        self._resubscribe_task: Optional[asyncio.Task] = None
+        # Ids of recently delivered creations, so catch-up rows are not replayed twice
+        self._recent: "OrderedDict[str, None]" = OrderedDict()
+
+    @property
+    def sql(self) -> str:
+        sql = f"LIVE SELECT * FROM {self.table}"
+        if self.where:
+            sql += f" WHERE {self.where}"
+        return sql + ";"
+
+    async def start(self) -> "LiveSubscription":
+        self._rpc = self.db.live_transport()
+        self._rpc.on_disconnect(self._on_disconnect)
+        if self.since is None:
+            self.since = datetime.now(timezone.utc)
+        await self._subscribe()
+        return self
+
+    async def close(self):
+        self._closed = True
+        if self._rpc is not None:
+            self._rpc.remove_disconnect_handler(self._on_disconnect)
+        if self._resubscribe_task is not None:
+            self._resubscribe_task.cancel()
+            self._resubscribe_task = None
+        if self.live_id is not None and self._rpc is not None:
+            try:
+                await self._rpc.kill(self.live_id)
+            except Exception:
+                pass
+            self.live_id = None
+        self._wake()
+
+    async def _subscribe(self):
+        self.live_id = await self._rpc.live(self.sql, self.params, self._on_notification)
+
+    # --- Producer side (RPC reader) ---
+
+    def _on_notification(self, notification: Dict):
+        action = notification.get("action")
+        if action not in ("CREATE", "UPDATE", "DELETE"):
+            return
+        if self._needs_catch_up and action == "CREATE":
+            # Catch-up will read this row back in order
+            return
+        if self._queue.full():
+            self.dropped += 1
+            self._needs_catch_up = True
+            return
+        self._queue.put_nowait(self._event(action, notification.get("result")))
+
+    def _on_disconnect(self):
+        self.live_id = None
+        if self._closed or (self._resubscribe_task is not None and not self._resubscribe_task.done()):
+            return
+        self._resubscribe_task = asyncio.create_task(self._resubscribe())
+
+    async def _resubscribe(self, max_backoff: float = 30.0):
+        backoff = 0.5
+        while not self._closed:
+            try:
+                await self._subscribe()
+                self.resubscribes += 1
+                self._needs_catch_up = True
+                self._wake()
+                print(f"[Live] Resubscribed to {self.table}", file=sys.stderr)
+                return
+            except Exception as e:
+                print(f"[Live] Resubscribe to {self.table} failed: {e}", file=sys.stderr)
+                await asyncio.sleep(backoff)
+                backoff = min(backoff * 2, max_backoff)
+
+    def _wake(self):
+        if not self._queue.full():
+            self._queue.put_nowait(None)
+
+    def _event(self, action: str, record: Any, source: str = "live") -> Dict:
+        record = record if isinstance(record, dict) else {"value": record}
+        return {
+            "table": self.table,
+            "action": action,
+            "id": str(record.get("id")) if record.get("id") is not None else None,
+            "record": record,
+            "source": source,
+            "received_at": datetime.now(timezone.utc).isoformat(),
+        }
+
+    # --- Consumer side ---
+
+    async def _catch_up_page(self):
+        self._needs_catch_up = False
+        sql = CATCH_UP_SQL.format(field=self.time_field)
+        res = await self.db.query(sql, {"table": self.table, "since": self.since.isoformat(),
+                                        "limit": self.max_queue}, use_cache=False)
+        rows = (res[-1].get("result") or []) if res else []
+        for row in rows:
+            self._backlog.append(self._event("CREATE", row, source="catch_up"))
+        if len(rows) >= self.max_queue:
+            # More pages after this one is consumed
+            self._needs_catch_up = True
+
+    def _accept(self, event: Dict) -> bool:
+        if event["action"] != "CREATE":
+            return True
+        if event["id"] is not None:
+            if event["id"] in self._recent:
+                return False
+            self._recent[event["id"]] = None
+            if len(self._recent) > self.max_queue * 4:
+                self._recent.popitem(last=False)
+        ts = _parse_time(event["record"].get(self.time_field))
+        if ts is not None and (self.since is None or ts > self.since):
+            self.since = ts
+        if event["source"] == "catch_up":
+            self.caught_up += 1
+        return True
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self) -> Dict:
+        while True:
+            if self._backlog:
+                event = self._backlog.popleft()
+            elif not self._queue.empty():
+                event = self._queue.get_nowait()
+            elif self._needs_catch_up and not self._closed:
+                await self._catch_up_page()
+                continue
+            elif self._closed:
+                raise StopAsyncIteration
+            else:
+                event = await self._queue.get()
+            if event is None or not self._accept(event):
+                continue
+            self.delivered += 1
+            return event
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "table": self.table,
+            "live_id": self.live_id,
+            "queued": self._queue.qsize(),
+            "delivered": self.delivered,
+            "dropped": self.dropped,
+            "caught_up": self.caught_up,
+            "resubscribes": self.resubscribes,
+            "since": self.since.isoformat() if self.since else None,
+        }
+
+
+class LiveFeed:
+    """
+    Keeps the latest `size` change events per watched table in memory, fed by
+    one live subscription per table, so tools can read recent activity
+    without querying the database.
+    """
+
+    def __init__(self, db, tables: Optional[List[str]] = None, size: Optional[int] = None,
+                 max_queue: Optional[int] = None):
+        self.db = db
+        self.tables = tables or [
+            t.strip() for t in os.getenv("LIVE_TABLES", "pulse,trend_metric,directive").split(",") if t.strip()
+        ]
+        self.size = size or int(os.getenv("LIVE_BUFFER_SIZE", "200"))
+        self.max_queue = max_queue or int(os.getenv("LIVE_QUEUE_SIZE", "1000"))
+        self.buffers: Dict[str, Deque[Dict]] = {t: deque(maxlen=self.size) for t in self.tables}
+        self.subscriptions: Dict[str, LiveSubscription] = {}
+        self._tasks: List[asyncio.Task] = []
+
+    def start(self):
+        """Start watching in the background; failures are retried, never raised"""
+        if not self._tasks:
+            self._tasks = [asyncio.create_task(self._watch(t)) for t in self.tables]
+
+    async def _watch(self, table: str, max_backoff: float = 30.0):
+        backoff = 1.0
+        since = None
+        while True:
+            sub = self.db.subscribe(table, since=since, max_queue=self.max_queue)
+            try:
+                await sub.start()
+                self.subscriptions[table] = sub
+                backoff = 1.0
+                async for event in sub:
+                    self.buffers[table].append(event)
+            except asyncio.CancelledError:
+                await sub.close()
+                raise
+            except Exception as e:
+                print(f"[Live] Watching {table} failed: {e}", file=sys.stderr)
+            since = sub.since
+            await sub.close()
+            await asyncio.sleep(backoff)
+            backoff = min(backoff * 2, max_backoff)
+
+    def latest(self, table: str, limit: int = 20) -> List[Dict]:
+        """Newest first"""
+        if table not in self.buffers:
+            raise ValueError(f"Table {table!r} is not watched (watching: {', '.join(self.tables)})")
+        events = list(self.buffers[table])[-max(limit, 0):] if limit > 0 else []
+        return events[::-1]
+
+    def stats(self) -> Dict[str, Any]:
+        return {t: {**(self.subscriptions[t].stats() if t in self.subscriptions else {"table": t}),
+                    "buffered": len(self.buffers[t])}
+                for t in self.tables}
+
+    async def stop(self):
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
@@ -0,0 +1,174 @@
+import base64
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+# Compact embeddings are stored next to the full vector as
+#   embedding_q:     "<mode>:<base64 of the quantized components>"
+#   embedding_scale: float multiplier that maps int8 codes back to floats
+# Vectors are L2-normalized before quantizing; cosine ranking only needs direction.
+MODES = ("int8", "float16")
+_PREFIX = {"int8": "i8", "float16": "f16"}
+_MODE_OF = {v: k for k, v in _PREFIX.items()}
+
+
+def _normalized(vector: Sequence[float]) -> np.ndarray:
+    v = np.asarray(vector, dtype=np.float32)
+    norm = float(np.linalg.norm(v))
+    return v / norm if norm else v
+
+
+def encode(vector: Sequence[float], mode: str = "int8") -> Dict[str, object]:
+    """Fields to store for `vector` in compact mode"""
+    if mode not in MODES:
+        raise ValueError(f"Unknown quantization mode {mode!r} (expected one of {', '.join(MODES)})")
+    v = _normalized(vector)
+    if mode == "int8":
+        peak = float(np.max(np.abs(v))) if v.size else 0.0
+        scale = peak / 127.0 if peak else 1.0
+        codes = np.clip(np.rint(v / scale), -127, 127).astype(np.int8)
+    else:
+        scale = 1.0
+        codes = v.astype("<f2")
+    text = base64.b64encode(codes.tobytes()).decode("ascii")
+    return {"embedding_q": f"{_PREFIX[mode]}:{text}", "embedding_scale": scale}
+
+
+def decode(embedding_q: str, scale: Optional[float] = None) -> np.ndarray:
+    """Back to a float32 vector (approximate)"""
+    prefix, _, text = embedding_q.partition(":")
+    mode = _MODE_OF.get(prefix)
+    if mode is None:
+        raise ValueError(f"Unrecognized compact embedding prefix {prefix!r}")
+    raw = base64.b64decode(text)
+    if mode == "int8":
+        return np.frombuffer(raw, dtype=np.int8).astype(np.float32) * float(scale or 1.0)
+    return np.frombuffer(raw, dtype="<f2").astype(np.float32)
+
+
+def cosine(query: np.ndarray, vectors: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(vectors, axis=1) * (np.linalg.norm(query) or 1.0)
+    norms[norms == 0] = 1.0
+    return (vectors @ query) / norms
+
+
+class QuantizedIndex:
+    """
+    In-process brute-force index over compact embeddings.
+
+    In int8 mode it holds one int8 row per record plus its scale (1.5 KB per
+    1536-dim vector) and scans in small float32 chunks, so memory stays
+    proportional to the compact matrix. NumPy has no fast float16 kernels, so
+    float16 rows are widened to float32 on load: that mode saves wire and
+    disk bytes, not index memory. Removed records are masked out of searches
+    and their rows reclaimed once they make up half the matrix.
+    """
+
+    def __init__(self, mode: str = "int8", dimension: int = 1536, chunk_rows: int = 256):
+        if mode not in MODES:
+            raise ValueError(f"Unknown quantization mode {mode!r}")
+        self.mode = mode
+        self.dimension = dimension
+        self.chunk_rows = chunk_rows
+        self._dtype = np.int8 if mode == "int8" else np.float32
+        self._pos: Dict[str, int] = {}
+        self._ids: List[str] = []
+        self._codes = np.empty((0, dimension), dtype=self._dtype)
+        self._scales = np.empty(0, dtype=np.float32)
+        self._dead = np.zeros(0, dtype=bool)
+        self._pending: List[Tuple[str, np.ndarray, float]] = []
+
+    def __len__(self) -> int:
+        # _pos holds live records only; pending rows may replace some of them
+        return len(self._pos) + len({p[0] for p in self._pending} - self._pos.keys())
+
+    @property
+    def nbytes(self) -> int:
+        return int(self._codes.nbytes + self._scales.nbytes)
+
+    def add(self, record_id: str, embedding_q: str, scale: Optional[float] = None):
+        """Add or replace one record from its stored compact fields"""
+        prefix = embedding_q.partition(":")[0]
+        if _MODE_OF.get(prefix) == self.mode:
+            raw = base64.b64decode(embedding_q.partition(":")[2])
+            codes = np.frombuffer(raw, dtype=np.int8 if self.mode == "int8" else "<f2").astype(self._dtype)
+            scale = float(scale or 1.0)
+        else:
+            # Stored in the other mode: re-encode to this index's mode
+            fields = encode(decode(embedding_q, scale), self.mode)
+            return self.add(record_id, fields["embedding_q"], fields["embedding_scale"])
+        if codes.shape[0] != self.dimension:
+            raise ValueError(f"{record_id}: dimension {codes.shape[0]}, expected {self.dimension}")
+        self._pending.append((str(record_id), codes, scale))
+
+    def remove(self, record_ids: Sequence[str]) -> int:
+        """Drop records (deleted, or their compact copy cleared); returns how many were indexed"""
+        gone = {str(r) for r in record_ids}
+        before = len(self._pending)
+        self._pending = [p for p in self._pending if p[0] not in gone]
+        removed = before - len(self._pending)
+        for record_id in gone:
+            pos = self._pos.pop(record_id, None)
+            if pos is not None and not self._dead[pos]:
+                self._dead[pos] = True
+                removed += 1
+        if self._dead.sum() * 2 > len(self._ids):
+            self._compact()
+        return removed
+
+    def _compact(self):
+        keep = ~self._dead
+        self._codes, self._scales = self._codes[keep], self._scales[keep]
+        self._ids = [record_id for record_id, alive in zip(self._ids, keep) if alive]
+        self._pos = {record_id: i for i, record_id in enumerate(self._ids)}
+        self._dead = np.zeros(len(self._ids), dtype=bool)
+
+    def add_vector(self, record_id: str, vector: Sequence[float]):
+        fields = encode(vector, self.mode)
+        self.add(record_id, fields["embedding_q"], fields["embedding_scale"])
+
+    def _flush(self):
+        if not self._pending:
+            return
+        new_codes, new_scales = [], []
+        for record_id, codes, scale in self._pending:
+            pos = self._pos.get(record_id)
+            if pos is not None:
+                self._codes[pos] = codes
+                self._scales[pos] = scale
+                continue
+            self._pos[record_id] = len(self._ids)
+            self._ids.append(record_id)
+            new_codes.append(codes)
+            new_scales.append(scale)
+        if new_codes:
+            self._codes = np.vstack([self._codes, np.asarray(new_codes, dtype=self._dtype)])
+            self._scales = np.concatenate([self._scales, np.asarray(new_scales, dtype=np.float32)])
+            self._dead = np.concatenate([self._dead, np.zeros(len(new_codes), dtype=bool)])
+        self._pending = []
+
+    def search(self, queries: Sequence[Sequence[float]], n: int) -> List[List[Tuple[str, float]]]:
+        """Approximate top-`n` (id, cosine) per query"""
+        self._flush()
+        q = np.stack([_normalized(v) for v in queries]).astype(np.float32)
+        total = len(self._ids)
+        live = total - int(self._dead.sum())
+        if not live:
+            return [[] for _ in range(len(q))]
+        n = min(n, live)
+        scores = np.empty((len(q), total), dtype=np.float32)
+        if self._codes.dtype == np.float32:
+            scores[:] = (q @ self._codes.T) * self._scales
+        else:
+            # Cache-sized chunks: the float32 copy of each block never leaves L2
+            for start in range(0, total, self.chunk_rows):
+                block = self._codes[start:start + self.chunk_rows].astype(np.float32)
+                scores[:, start:start + len(block)] = (q @ block.T) * self._scales[start:start + len(block)]
+        if live < total:
+            scores[:, self._dead] = -np.inf
+        top = np.argpartition(-scores, n - 1, axis=1)[:, :n]
+        results = []
+        for row, idx in zip(scores, top):
+            ordered = idx[np.argsort(-row[idx])]
+            results.append([(self._ids[i], float(row[i])) for i in ordered])
+        return results
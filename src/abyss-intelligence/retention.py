@@ -0,0 +1,377 @@
+import os
+import sys
+import time
+import asyncio
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, List, Optional, Tuple
+
+from db_client import RecordId, SurrealClient
+from templates import register
+
+# Seconds per rollup resolution (trend_rollup.resolution)
+RESOLUTIONS = {"1h": 3600, "1d": 86400}
+
+# Tiers in the order a run applies them; expired pulses are deleted before the
+# rest are compacted, raw points are rolled up before the hourly rows are
+TIERS = ("pulse.delete", "pulse.compact", "trend.hourly", "trend.daily", "trend.expire")
+
+# Rough stored size of one trend_rollup row, for the dry-run estimate
+ROLLUP_ROW_BYTES = 256
+
+RAW_PAGE_SQL = """
+SELECT id, concept, source, value, timestamp FROM trend_metric
+    WHERE timestamp < <datetime>$before ORDER BY timestamp ASC LIMIT $limit;
+"""
+
+HOURLY_PAGE_SQL = """
+SELECT id, concept, source, count, sum, min, max, last, last_at, bucket AS timestamp FROM trend_rollup
+    WHERE resolution = '1h' AND bucket < <datetime>$before ORDER BY bucket ASC LIMIT $limit;
+"""
+
+# Rollups are merged into existing buckets (a bucket can span pages and runs)
+# and their source rows deleted in the same transaction, so a failed batch is
+# retried whole and never counted twice. `mean` is set before `count`/`sum`
+# change.
+ROLLUP_SQL = """
+BEGIN TRANSACTION;
+FOR $r IN $rollups {
+    UPSERT type::thing('trend_rollup', [$r.concept, $r.source, $r.resolution, <datetime>$r.bucket]) SET
+        concept = $r.concept,
+        source = $r.source,
+        resolution = $r.resolution,
+        bucket = <datetime>$r.bucket,
+        mean = ((sum ?? 0) + $r.sum) / ((count ?? 0) + $r.count),
+        count = (count ?? 0) + $r.count,
+        sum = (sum ?? 0) + $r.sum,
+        min = math::min([min ?? $r.min, $r.min]),
+        max = math::max([max ?? $r.max, $r.max]),
+        last = IF last_at = NONE OR <datetime>$r.last_at >= last_at THEN $r.last ELSE last END,
+        last_at = IF last_at = NONE OR <datetime>$r.last_at >= last_at THEN <datetime>$r.last_at ELSE last_at END,
+        updated_at = time::now()
+    RETURN NONE;
+};
+FOR $id IN $ids { DELETE $id RETURN NONE; };
+COMMIT TRANSACTION;
+"""
+
+EXPIRED_SQL = "SELECT VALUE id FROM {table} WHERE {field} < <datetime>$before{extra} LIMIT $limit;"
+
+DELETE_SQL = "FOR $id IN $ids { DELETE $id RETURN NONE; };"
+
+# Compacted pulses keep engagement, sentiment_score and their metadata
+COMPACT_SQL = """
+FOR $id IN $ids {
+    UPDATE $id SET content = '', embedding = NONE, embedding_q = NONE, embedding_scale = NONE,
+        compacted_at = time::now() RETURN NONE;
+};
+"""
+
+# Dry run: rows each tier would touch, their stored size, and rows it would add
+REPORT_SQL = {
+    "pulse.delete": """
+SELECT count() AS rows, math::sum(string::len(<string> $this)) AS bytes FROM pulse
+    WHERE created_at < <datetime>$before GROUP ALL;
+""",
+    "pulse.compact": """
+SELECT count() AS rows, math::sum(string::len(content)) AS content_bytes,
+    math::sum(array::len(embedding ?? [])) AS floats, math::sum(string::len(embedding_q ?? '')) AS q_bytes
+    FROM pulse WHERE created_at >= <datetime>$since AND created_at < <datetime>$before AND compacted_at = NONE
+    GROUP ALL;
+""",
+    "trend.hourly": """
+SELECT count() AS rows, math::sum(string::len(<string> $this)) AS bytes FROM trend_metric
+    WHERE timestamp < <datetime>$before GROUP ALL;
+SELECT count() AS added FROM (
+    SELECT concept, source, time::floor(timestamp, 1h) AS bucket FROM trend_metric
+        WHERE timestamp < <datetime>$before GROUP BY concept, source, bucket
+) GROUP ALL;
+""",
+    "trend.daily": """
+SELECT count() AS rows, math::sum(string::len(<string> $this)) AS bytes FROM trend_rollup
+    WHERE resolution = '1h' AND bucket < <datetime>$before GROUP ALL;
+SELECT count() AS added FROM (
+    SELECT concept, source, time::floor(bucket, 1d) AS day FROM trend_rollup
+        WHERE resolution = '1h' AND bucket < <datetime>$before GROUP BY concept, source, day
+) GROUP ALL;
+""",
+    "trend.expire": """
+SELECT count() AS rows, math::sum(string::len(<string> $this)) AS bytes FROM trend_rollup
+    WHERE resolution = '1d' AND bucket < <datetime>$before GROUP ALL;
+""",
+}
+
+RAW_PAGE = register("retention.trend.raw", RAW_PAGE_SQL, before="datetime", limit="int")
+HOURLY_PAGE = register("retention.trend.hourly", HOURLY_PAGE_SQL, before="datetime", limit="int")
+ROLLUP = register("retention.trend.rollup", ROLLUP_SQL, rollups="array<object>", ids="array<record>")
+EXPIRED = {
+    "pulse.delete": register("retention.expired.pulse", EXPIRED_SQL.format(
+        table="pulse", field="created_at", extra=""), before="datetime", limit="int"),
+    "pulse.compact": register("retention.expired.pulse_content", EXPIRED_SQL.format(
+        table="pulse", field="created_at", extra=" AND compacted_at = NONE"), before="datetime", limit="int"),
+    "trend.expire": register("retention.expired.trend_rollup", EXPIRED_SQL.format(
+        table="trend_rollup", field="bucket", extra=" AND resolution = '1d'"), before="datetime", limit="int"),
+}
+DELETE = register("retention.delete", DELETE_SQL, ids="array<record>")
+COMPACT = register("retention.compact", COMPACT_SQL, ids="array<record<pulse>>")
+REPORT = {tier: register(f"retention.report.{tier}", sql, before="datetime",
+                         **({"since": "datetime"} if tier == "pulse.compact" else {}))
+          for tier, sql in REPORT_SQL.items()}
+
+
+def _seconds(value: Any) -> float:
+    t = datetime.fromisoformat(value.replace("Z", "+00:00")) if isinstance(value, str) else value
+    if t.tzinfo is None:
+        t = t.replace(tzinfo=timezone.utc)
+    return t.timestamp()
+
+
+def _iso(seconds: float) -> str:
+    return datetime.fromtimestamp(seconds, timezone.utc).isoformat()
+
+
+def rollup(rows: List[Dict], resolution: str) -> List[Dict]:
+    """
+    Fold trend_metric points (or finer rollup rows) into `resolution` buckets
+    per (concept, source): count, sum, min, max and the last value by time.
+    """
+    step = RESOLUTIONS[resolution]
+    groups: Dict[Tuple[str, str, float], Dict] = {}
+    for row in rows:
+        ts = _seconds(row["timestamp"])
+        if "value" in row:
+            v = float(row["value"])
+            part = {"count": 1, "sum": v, "min": v, "max": v, "last": v, "last_at": ts}
+        else:
+            part = {"count": int(row["count"]), "sum": float(row["sum"]), "min": float(row["min"]),
+                    "max": float(row["max"]), "last": float(row["last"]), "last_at": _seconds(row["last_at"])}
+        key = (str(row["concept"]), row["source"], ts - ts % step)
+        group = groups.get(key)
+        if group is None:
+            groups[key] = part
+            continue
+        group["count"] += part["count"]
+        group["sum"] += part["sum"]
+        group["min"] = min(group["min"], part["min"])
+        group["max"] = max(group["max"], part["max"])
+        if part["last_at"] >= group["last_at"]:
+            group["last"], group["last_at"] = part["last"], part["last_at"]
+    return [{"concept": RecordId.parse(concept), "source": source, "resolution": resolution, "bucket": _iso(bucket),
+             **group, "last_at": _iso(group["last_at"])}
+            for (concept, source, bucket), group in groups.items()]
+
+
+def _setting(value, env: str, default: str, cast=float):
+    """Explicit argument (0 included), else the environment"""
+    return value if value is not None else cast(os.getenv(env, default))
+
+
+def _first(res: List[Dict], statement: int = -1) -> Dict:
+    rows = (res[statement].get("result") or []) if res else []
+    return rows[0] if rows else {}
+
+
+class RetentionEngine:
+    """
+    Time-tiered retention for the high-frequency L3 tables.
+
+    pulse: full rows for `pulse_full_days`; older ones are compacted (content
+    and embeddings dropped, engagement and sentiment_score kept) and deleted
+    after `pulse_max_days` (0 keeps them).
+
+    trend_metric: raw points for `trend_raw_days`, then folded into hourly
+    trend_rollup rows (count/sum/min/max/mean/last), which become daily rows
+    after `trend_hourly_days`; daily rows are deleted after `trend_daily_days`
+    (0 keeps them).
+
+    Work is done in batches of `batch` rows, each a short statement or
+    transaction followed by a `pause`, so ingestion writes interleave with a
+    run instead of queueing behind it. A run does at most `max_batches` per
+    tier; the rest waits for the next run, every `interval` seconds.
+
+    An age of 0 disables its tier, whether passed in or set in the environment.
+    """
+
+    def __init__(self, db, pulse_full_days: Optional[float] = None, pulse_max_days: Optional[float] = None,
+                 trend_raw_days: Optional[float] = None, trend_hourly_days: Optional[float] = None,
+                 trend_daily_days: Optional[float] = None, batch: Optional[int] = None,
+                 pause: Optional[float] = None, max_batches: Optional[int] = None,
+                 interval: Optional[float] = None):
+        self.db = db
+        self.pulse_full_days = _setting(pulse_full_days, "RETENTION_PULSE_FULL_DAYS", "30")
+        self.pulse_max_days = _setting(pulse_max_days, "RETENTION_PULSE_MAX_DAYS", "365")
+        # Raw history should cover TREND_HISTORY_DAYS, which the trend engine loads on start
+        self.trend_raw_days = _setting(trend_raw_days, "RETENTION_TREND_RAW_DAYS", "90")
+        self.trend_hourly_days = _setting(trend_hourly_days, "RETENTION_TREND_HOURLY_DAYS", "365")
+        self.trend_daily_days = _setting(trend_daily_days, "RETENTION_TREND_DAILY_DAYS", "0")
+        self.batch = _setting(batch, "RETENTION_BATCH", "500", int)
+        self.pause = _setting(pause, "RETENTION_PAUSE", "0.2")
+        self.max_batches = _setting(max_batches, "RETENTION_MAX_BATCHES", "1000", int)
+        self.interval = _setting(interval, "RETENTION_INTERVAL", "3600")
+        if self.batch < 1 or self.max_batches < 1:
+            raise ValueError("RETENTION_BATCH and RETENTION_MAX_BATCHES must be at least 1")
+        if self.pulse_max_days and self.pulse_max_days < self.pulse_full_days:
+            raise ValueError("RETENTION_PULSE_MAX_DAYS must be 0 or at least RETENTION_PULSE_FULL_DAYS")
+        if self.trend_hourly_days and self.trend_hourly_days < self.trend_raw_days:
+            raise ValueError("RETENTION_TREND_HOURLY_DAYS must be 0 or at least RETENTION_TREND_RAW_DAYS")
+        if self.trend_daily_days and self.trend_daily_days < max(self.trend_hourly_days, self.trend_raw_days):
+            raise ValueError("RETENTION_TREND_DAILY_DAYS must be 0 or at least RETENTION_TREND_HOURLY_DAYS")
+
+        self._lock = asyncio.Lock()
+        self._task: Optional[asyncio.Task] = None
+        self._stopping = asyncio.Event()
+        self.last_run: Dict[str, int] = {}
+        self.stats: Dict[str, Any] = {"runs": 0, "deleted": 0, "compacted": 0, "rolled_up": 0, "rollups": 0,
+                                      "batches": 0, "failures": 0, "run_s": 0.0}
+
+    def cutoffs(self, now: Optional[datetime] = None) -> Dict[str, Optional[str]]:
+        """Upper time bound per tier (None: tier disabled)"""
+        now = now or datetime.now(timezone.utc)
+        days = {"pulse.delete": self.pulse_max_days, "pulse.compact": self.pulse_full_days,
+                "trend.hourly": self.trend_raw_days, "trend.daily": self.trend_hourly_days,
+                "trend.expire": self.trend_daily_days}
+        return {tier: (now - timedelta(days=d)).isoformat() if d else None for tier, d in days.items()}
+
+    # --- Dry run ---
+
+    async def report(self, now: Optional[datetime] = None) -> Dict[str, Any]:
+        """Rows each tier would touch and the bytes it would reclaim (estimates; index space not included)"""
+        cutoffs = self.cutoffs(now)
+        tiers: Dict[str, Dict] = {}
+        for tier in TIERS:
+            before = cutoffs[tier]
+            if before is None:
+                continue
+            extra = {"since": cutoffs["pulse.delete"] or _iso(0)} if tier == "pulse.compact" else {}
+            res = await self.db.run(REPORT[tier], before=before, use_cache=False, **extra)
+            rolls_up = tier in ("trend.hourly", "trend.daily")
+            row = _first(res, -2 if rolls_up else -1)
+            rows = int(row.get("rows") or 0)
+            if tier == "pulse.compact":
+                stored = int(row.get("content_bytes") or 0) + int(row.get("q_bytes") or 0)
+                # SurrealDB keeps embedding elements as 8-byte floats
+                reclaim = stored + 8 * int(row.get("floats") or 0)
+                added = 0
+            else:
+                reclaim = int(row.get("bytes") or 0)
+                added = int(_first(res).get("added") or 0) if rolls_up else 0
+                reclaim = max(0, reclaim - added * ROLLUP_ROW_BYTES)
+            tiers[tier] = {"before": before, "rows": rows, "rows_added": added, "reclaim_bytes": reclaim}
+        return {"tiers": tiers, "reclaim_bytes": sum(t["reclaim_bytes"] for t in tiers.values())}
+
+    # --- Runs ---
+
+    async def _tier(self, tier: str, before: str) -> int:
+        """Apply one tier batch by batch; returns source rows processed"""
+        done = 0
+        for _ in range(self.max_batches):
+            if self._stopping.is_set():
+                break
+            try:
+                if tier in ("trend.hourly", "trend.daily"):
+                    page = RAW_PAGE if tier == "trend.hourly" else HOURLY_PAGE
+                    res = await self.db.run(page, before=before, limit=self.batch, use_cache=False)
+                    rows = (res[-1].get("result") or []) if res else []
+                    if not rows:
+                        break
+                    rollups = rollup(rows, "1h" if tier == "trend.hourly" else "1d")
+                    await self.db.run(ROLLUP, rollups=rollups, ids=[r["id"] for r in rows], use_cache=False)
+                    self.stats["rolled_up"] += len(rows)
+                    self.stats["rollups"] += len(rollups)
+                else:
+                    res = await self.db.run(EXPIRED[tier], before=before, limit=self.batch, use_cache=False)
+                    ids = (res[-1].get("result") or []) if res else []
+                    if not ids:
+                        break
+                    if tier == "pulse.compact":
+                        await self.db.run(COMPACT, ids=ids, use_cache=False)
+                        self.stats["compacted"] += len(ids)
+                    else:
+                        await self.db.run(DELETE, ids=ids, use_cache=False)
+                        self.stats["deleted"] += len(ids)
+                    rows = ids
+            except Exception as e:
+                # Nothing of a failed batch is half-applied; the next run picks it up again
+                self.stats["failures"] += 1
+                print(f"[Retention] {tier} batch failed, leaving the rest for the next run: {e}", file=sys.stderr)
+                break
+            done += len(rows)
+            self.stats["batches"] += 1
+            if len(rows) < self.batch:
+                break
+            await asyncio.sleep(self.pause)
+        return done
+
+    async def run_once(self, now: Optional[datetime] = None) -> Dict[str, int]:
+        """One pass over every enabled tier; returns rows processed per tier"""
+        async with self._lock:
+            t0 = time.perf_counter()
+            cutoffs = self.cutoffs(now)
+            self.last_run = {tier: await self._tier(tier, cutoffs[tier]) for tier in TIERS if cutoffs[tier]}
+            self.stats["runs"] += 1
+            self.stats["run_s"] = round(time.perf_counter() - t0, 3)
+            return self.last_run
+
+    # --- Background loop ---
+
+    async def run(self):
+        while not self._stopping.is_set():
+            try:
+                done = await self.run_once()
+                if any(done.values()):
+                    print(f"[Retention] {done} in {self.stats['run_s']}s", file=sys.stderr)
+            except Exception as e:
+                print(f"[Retention] Run failed, will retry: {e}", file=sys.stderr)
+            try:
+                await asyncio.wait_for(self._stopping.wait(), self.interval)
+            except asyncio.TimeoutError:
+                pass
+
+    def start(self):
+        if self._task is None:
+            self._stopping.clear()
+            self._task = asyncio.create_task(self.run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._stopping.set()
+            try:
+                await self._task
+            except Exception as e:
+                print(f"[Retention] Engine stopped with error: {e}", file=sys.stderr)
+            self._task = None
+
+
+def _size(n: int) -> str:
+    for unit in ("B", "KiB", "MiB", "GiB"):
+        if n < 1024 or unit == "GiB":
+            return f"{n:.0f} {unit}" if unit == "B" else f"{n:.1f} {unit}"
+        n /= 1024
+
+
+async def main():
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Compact, downsample and expire old pulse / trend_metric rows")
+    parser.add_argument("--dry-run", action="store_true", help="report what each tier would reclaim, change nothing")
+    args = parser.parse_args()
+
+    db = SurrealClient()
+    await db.start()
+    engine = RetentionEngine(db)
+    try:
+        if args.dry_run:
+            report = await engine.report()
+            for tier, row in report["tiers"].items():
+                added = f", +{row['rows_added']} rollup rows" if row["rows_added"] else ""
+                print(f"{tier:<14} before {row['before'][:19]}  {row['rows']:>10} rows{added}  "
+                      f"~{_size(row['reclaim_bytes'])}")
+            print(f"[Retention] Would reclaim ~{_size(report['reclaim_bytes'])}", file=sys.stderr)
+        else:
+            done = await engine.run_once()
+            print(f"[Retention] {done} in {engine.stats['run_s']}s ({engine.stats})", file=sys.stderr)
+    finally:
+        await db.close()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
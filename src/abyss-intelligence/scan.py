@@ -0,0 +1,52 @@
+from contextlib import aclosing
+from typing import Any, AsyncIterator, Optional
+
+from templates import register
+
+# Tables an agent may page through, with the time field they are ordered by and
+# the fields never worth sending (vectors, signatures)
+SCAN_TABLES = {
+    "pulse": ("created_at", "embedding, embedding_q, minhash"),
+    "article": ("published_at", "embedding, embedding_q, minhash"),
+    "trend_metric": ("timestamp", ""),
+    "directive": ("created_at", ""),
+    "mentions": ("created_at", ""),
+}
+MAX_SCAN_ROWS = 100_000
+EPOCH = "1970-01-01T00:00:00Z"
+END_OF_TIME = "9999-12-31T23:59:59Z"
+
+SCAN_SQL = """
+SELECT * {omit} FROM {table}
+    WHERE {field} >= <datetime>$since AND {field} < <datetime>$until
+    ORDER BY {field} DESC LIMIT $limit START $start;
+"""
+
+SCANS = {
+    table: register(f"scan_records.{table}",
+                    SCAN_SQL.format(table=table, field=field, omit=f"OMIT {omit}" if omit else ""),
+                    since="datetime", until="datetime", limit="int", start="int")
+    for table, (field, omit) in SCAN_TABLES.items()
+}
+
+
+def scan(db, table: str, since: Optional[str] = None, until: Optional[str] = None, start: int = 0,
+         limit: int = 1000) -> AsyncIterator[Any]:
+    """
+    Rows of `table` between `since` and `until`, newest first, skipping the
+    first `start`, streamed from the response as they arrive (see
+    SurrealClient.stream). `limit` counts from the beginning of the scan.
+    """
+    if table not in SCANS:
+        raise ValueError(f"table must be one of {', '.join(SCAN_TABLES)}")
+    if not 1 <= limit <= MAX_SCAN_ROWS:
+        raise ValueError(f"limit must be between 1 and {MAX_SCAN_ROWS}")
+    return _rows(db.stream("", {"since": since or EPOCH, "until": until or END_OF_TIME,
+                                "limit": max(limit - start, 0), "start": start}, template=SCANS[table]))
+
+
+async def _rows(stream):
+    # Closing this generator early closes the HTTP response underneath
+    async with aclosing(stream):
+        async for _, row in stream:
+            yield row
@@ -0,0 +1,289 @@
+import os
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, List, Optional, Sequence, Union
+
+import numpy as np
+
+from db_client import RecordId
+from templates import register
+from quantize import QuantizedIndex, cosine, decode
+
+# Tables with an HNSW index on `embedding` (init_db.surql) and what to return for each hit
+SEARCH_TABLES: Dict[str, Dict[str, Any]] = {
+    "pulse": {
+        "time": "created_at",
+        "snippet": "content",
+        "fields": ["platform", "author_handle", "url", "sentiment_score", "created_at"],
+        "filters": {"platform"},
+    },
+    "article": {
+        "time": "published_at",
+        "snippet": "content",
+        "fields": ["title", "url", "source_type", "reliability", "published_at"],
+        "filters": {"source_type", "reliability"},
+    },
+    "concept": {
+        "time": None,
+        "snippet": "description",
+        "fields": ["name"],
+        "filters": set(),
+    },
+}
+
+EMBEDDING_DIMENSION = 1536
+MAX_QUERY_VECTORS = 32
+MAX_K = 100
+# "index" uses the HNSW index on `embedding`; "int8"/"float16" scan the compact
+# `embedding_q` copies in process and re-rank the best candidates exactly.
+SEARCH_MODES = ("index", "int8", "float16")
+
+# Compact copies are loaded incrementally by `embedded_at`, which is set whenever
+# embedding_q is written (rows can be embedded long after they are created).
+COMPACT_PAGE_SQL = """
+SELECT id, embedding_q, embedding_scale, embedded_at FROM {table}
+    WHERE embedded_at > <datetime>$since ORDER BY embedded_at ASC LIMIT $limit;
+"""
+
+LIKE_EMBEDDING = register("semantic_search.like", "SELECT embedding, embedding_q, embedding_scale FROM ONLY $like;",
+                          like="record")
+
+class VectorSearch:
+    """
+    KNN over the HNSW `embedding` indexes.
+
+    Every query vector becomes one `<|k,ef|>` statement and all of them travel
+    in a single multi-statement request. Filters are applied in the same
+    statement; since the index returns candidates before the filters run, the
+    search over-fetches `overfetch * k` candidates when any filter is set and
+    trims back to `k`. Vectors are never returned, only ids, scores, the
+    table's projected fields and a short snippet.
+
+    In compact mode (int8/float16) candidates come from an in-process
+    `QuantizedIndex` loaded from `embedding_q`, refreshed incrementally by
+    `embedded_at`. Only the top `rerank * k` candidates are fetched
+    with their full-precision vector, filtered in the database and re-ranked
+    by exact cosine. Candidates that were deleted or compacted since they
+    were loaded are dropped from the results and evicted from the index.
+    """
+
+    def __init__(self, db, ef: Optional[int] = None, overfetch: Optional[int] = None,
+                 snippet_chars: Optional[int] = None, mode: Optional[str] = None,
+                 rerank: Optional[int] = None, refresh_interval: Optional[float] = None):
+        self.db = db
+        self.ef = ef or int(os.getenv("VECTOR_SEARCH_EF", "64"))
+        self.overfetch = overfetch or int(os.getenv("VECTOR_SEARCH_OVERFETCH", "4"))
+        self.snippet_chars = snippet_chars or int(os.getenv("VECTOR_SEARCH_SNIPPET", "200"))
+        self.mode = (mode or os.getenv("VECTOR_SEARCH_MODE", "index")).lower()
+        if self.mode not in SEARCH_MODES:
+            raise ValueError(f"Unknown VECTOR_SEARCH_MODE {self.mode!r} (expected one of {', '.join(SEARCH_MODES)})")
+        self.rerank = rerank or int(os.getenv("VECTOR_RERANK_FACTOR", "4"))
+        self.refresh_interval = (refresh_interval if refresh_interval is not None
+                                 else float(os.getenv("VECTOR_INDEX_REFRESH", "60")))
+        self._indexes: Dict[str, Any] = {}
+        self._loaded_at: Dict[str, float] = {}
+        self._since: Dict[str, str] = {}
+        # Index entries dropped because their row was gone or compacted
+        self.evicted = 0
+
+    @staticmethod
+    def _vector(value: Sequence[float]) -> List[float]:
+        vector = [float(x) for x in value]
+        if len(vector) != EMBEDDING_DIMENSION:
+            raise ValueError(f"Query vector has dimension {len(vector)}, expected {EMBEDDING_DIMENSION}")
+        return vector
+
+    def _conditions(self, table: str, params: Dict[str, Any], since: Optional[str], until: Optional[str],
+                    within_hours: Optional[float], platform: Optional[str], source_type: Optional[str],
+                    min_reliability: Optional[float]) -> List[str]:
+        spec = SEARCH_TABLES[table]
+        requested = {
+            "platform": platform is not None,
+            "source_type": source_type is not None,
+            "reliability": min_reliability is not None,
+        }
+        for name, used in requested.items():
+            if used and name not in spec["filters"]:
+                raise ValueError(f"Filter '{name}' is not available on {table}")
+        if (since or until or within_hours) and not spec["time"]:
+            raise ValueError(f"Time filters are not available on {table}")
+
+        conds = []
+        if within_hours is not None:
+            since = (datetime.now(timezone.utc) - timedelta(hours=float(within_hours))).isoformat()
+        if since:
+            params["since"] = since
+            conds.append(f"{spec['time']} >= <datetime>$since")
+        if until:
+            params["until"] = until
+            conds.append(f"{spec['time']} <= <datetime>$until")
+        if platform is not None:
+            params["platform"] = platform
+            conds.append("platform = $platform")
+        if source_type is not None:
+            params["source_type"] = source_type
+            conds.append("source_type = $source_type")
+        if min_reliability is not None:
+            params["min_reliability"] = float(min_reliability)
+            conds.append("reliability >= $min_reliability")
+        return conds
+
+    async def search(self, table: str, vectors: Optional[Sequence[Sequence[float]]] = None,
+                     like: Optional[Union[str, RecordId]] = None, k: int = 10,
+                     since: Optional[str] = None, until: Optional[str] = None,
+                     within_hours: Optional[float] = None, platform: Optional[str] = None,
+                     source_type: Optional[str] = None, min_reliability: Optional[float] = None,
+                     ef: Optional[int] = None) -> Dict:
+        """
+        Nearest neighbours of each query vector (or of the stored embedding of
+        record `like`). Returns hits tagged with the index of their query.
+        """
+        if table not in SEARCH_TABLES:
+            raise ValueError(f"Unknown table '{table}' (searchable: {', '.join(SEARCH_TABLES)})")
+        k = max(1, min(int(k), MAX_K))
+        ef = max(k, int(ef or self.ef))
+        vectors = [self._vector(v) for v in (vectors or [])]
+        if like is None and not vectors:
+            raise ValueError("Provide query vectors or a record id to search like")
+        if len(vectors) > MAX_QUERY_VECTORS:
+            raise ValueError(f"At most {MAX_QUERY_VECTORS} query vectors per request")
+
+        params: Dict[str, Any] = {}
+        conds = self._conditions(table, params, since, until, within_hours, platform, source_type,
+                                 min_reliability)
+        spec = SEARCH_TABLES[table]
+        if self.mode != "index":
+            return await self._search_compact(table, vectors, like, k, conds, params)
+        candidates = k * self.overfetch if conds else k
+        ef = max(ef, candidates)
+
+        stmts = []
+        if like is not None:
+            like = RecordId.parse(like)
+            if like.table != table:
+                raise ValueError(f"Record {like} is not in table {table}")
+            params["like"] = like
+            stmts.append("LET $v_like = (SELECT VALUE embedding FROM ONLY $like);")
+            conds.append("id != $like")
+        names = [f"v{i}" for i in range(len(vectors))] + (["v_like"] if like is not None else [])
+        for i, vector in enumerate(vectors):
+            params[f"v{i}"] = vector
+
+        fields = ", ".join(["id"] + spec["fields"])
+        where_extra = "".join(f" AND {c}" for c in conds)
+        snippet = f"string::slice({spec['snippet']} ?? '', 0, {int(self.snippet_chars)}) AS snippet"
+        for name in names:
+            stmts.append(
+                f"SELECT {fields}, {snippet}, vector::distance::knn() AS distance FROM {table} "
+                f"WHERE embedding <|{candidates},{ef}|> ${name}{where_extra} "
+                f"ORDER BY distance ASC LIMIT {k};"
+            )
+
+        res = await self.db.query("\n".join(stmts), params)
+        # Drop the LET result so the rest lines up with `names`
+        res = res[-len(names):]
+        hits = []
+        for q, stmt in enumerate(res):
+            for rank, row in enumerate(stmt.get("result") or []):
+                distance = row.pop("distance", None)
+                hits.append({
+                    "query": "like" if names[q] == "v_like" else q,
+                    "rank": rank,
+                    "score": round(1.0 - distance, 6) if isinstance(distance, (int, float)) else None,
+                    **row,
+                })
+        return {"table": table, "k": k, "ef": ef, "queries": len(names), "hits": hits}
+
+    # --- Compact (quantized) mode ---
+
+    def _index(self, table: str) -> QuantizedIndex:
+        if table not in self._indexes:
+            self._indexes[table] = QuantizedIndex(self.mode, EMBEDDING_DIMENSION)
+        return self._indexes[table]
+
+    async def refresh(self, table: str, page: int = 2000, force: bool = False):
+        """Pull compact embeddings written since the last refresh into the in-process index"""
+        now = time.monotonic()
+        if not force and table in self._loaded_at and now - self._loaded_at[table] < self.refresh_interval:
+            return
+        index = self._index(table)
+        sql = COMPACT_PAGE_SQL.format(table=table)
+        while True:
+            since = self._since.get(table, "1970-01-01T00:00:00Z")
+            res = await self.db.query(sql, {"since": since, "limit": page}, use_cache=False)
+            rows = (res[-1].get("result") or []) if res else []
+            for row in rows:
+                if row.get("embedding_q"):
+                    index.add(str(row["id"]), row["embedding_q"], row.get("embedding_scale"))
+                else:
+                    index.remove([str(row["id"])])
+            if rows:
+                self._since[table] = str(rows[-1]["embedded_at"])
+            if len(rows) < page:
+                break
+        self._loaded_at[table] = now
+
+    async def _search_compact(self, table: str, vectors: List[List[float]], like: Optional[Union[str, RecordId]],
+                              k: int, conds: List[str], params: Dict[str, Any]) -> Dict:
+        await self.refresh(table)
+        spec = SEARCH_TABLES[table]
+        queries: List[Any] = list(vectors)
+        labels: List[Any] = list(range(len(vectors)))
+        if like is not None:
+            like = RecordId.parse(like)
+            if like.table != table:
+                raise ValueError(f"Record {like} is not in table {table}")
+            res = await self.db.run(LIKE_EMBEDDING, like=like)
+            row = (res[-1].get("result") if res else None) or {}
+            if row.get("embedding"):
+                queries.append(row["embedding"])
+            elif row.get("embedding_q"):
+                queries.append(decode(row["embedding_q"], row.get("embedding_scale")).tolist())
+            else:
+                raise ValueError(f"Record {like} has no embedding")
+            labels.append("like")
+            params["like"] = like
+            conds = conds + ["id != $like"]
+
+        n_candidates = k * self.rerank * (self.overfetch if conds else 1)
+        candidates = self._index(table).search(queries, n_candidates)
+
+        fields = ", ".join(["id"] + spec["fields"])
+        # Rows compacted by retention keep their id but lose the compact copy
+        where = " AND ".join(conds + ["embedding_q != NONE"])
+        snippet = f"string::slice({spec['snippet']} ?? '', 0, {int(self.snippet_chars)}) AS snippet"
+        stmts = []
+        for i, found in enumerate(candidates):
+            params[f"cand_{i}"] = [RecordId.parse(rid) for rid, _ in found]
+            stmts.append(f"SELECT {fields}, {snippet}, embedding FROM $cand_{i} WHERE {where};")
+        # Which candidates still exist with a compact copy, whatever the filters say
+        ids = list(dict.fromkeys(rid for found in candidates for rid, _ in found))
+        params["cand_all"] = [RecordId.parse(rid) for rid in ids]
+        stmts.append("SELECT VALUE id FROM $cand_all WHERE embedding_q != NONE;")
+        res = await self.db.query("\n".join(stmts), params)
+
+        alive = {str(rid) for rid in (res[-1].get("result") or [])}
+        dangling = [rid for rid in ids if rid not in alive]
+        if dangling:
+            # Deleted or compacted since they were loaded: stop returning them as candidates
+            self._index(table).remove(dangling)
+            self.evicted += len(dangling)
+
+        hits = []
+        for q, (stmt, found) in enumerate(zip(res[:-1], candidates)):
+            approx = dict(found)
+            rows = stmt.get("result") or []
+            fulls = [row.pop("embedding", None) for row in rows]
+            scores = [approx.get(str(row.get("id")), 0.0) for row in rows]
+            exact = [i for i, full in enumerate(fulls) if full]
+            if exact:
+                # Re-rank with the full-precision vectors of the candidates
+                sims = cosine(np.asarray(queries[q], dtype=np.float32),
+                              np.asarray([fulls[i] for i in exact], dtype=np.float32))
+                for i, sim in zip(exact, sims):
+                    scores[i] = float(sim)
+            order = sorted(range(len(rows)), key=lambda i: -scores[i])[:k]
+            for rank, i in enumerate(order):
+                hits.append({"query": labels[q], "rank": rank, "score": round(scores[i], 6), **rows[i]})
+        return {"table": table, "k": k, "mode": self.mode, "candidates": n_candidates,
+                "queries": len(queries), "hits": hits}
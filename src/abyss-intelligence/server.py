@@ -1,28 +1,231 @@
-from mcp.server.fastmcp import FastMCP
+import os
+import sys
+
+if __name__ == "__main__":
+    # Answer the MCP handshake before the heavy imports below; fast_start
+    # re-imports this file as the `server` module in the background.
+    from dotenv import load_dotenv
+    load_dotenv()
+    from fast_start import FastStart, enabled
+    if enabled():
+        FastStart("server", name="abyss-intelligence").serve()
+        sys.exit(0)
+
+from contextlib import asynccontextmanager
+from mcp.server.fastmcp import Context, FastMCP
 from db_client import SurrealClient
+from live import LiveFeed
+from shaping import ResponseShaper, dumps
+from telemetry import current_span, log_level_name
+from templates import validate_all
+from trends import TrendEngine
+from centrality import CentralityEngine
+from embeddings import EmbeddingStage
+from retention import RetentionEngine
+from engagement import EngagementAggregator, panic_index
 import asyncio
+import functools
 import json
 
-# Initialize FastMCP Server
-mcp = FastMCP("abyss-intelligence")
+def _flag(name: str, default: str) -> bool:
+    return os.getenv(name, default).lower() in ("1", "true", "yes")
+
+# Nothing below connects or allocates at import: the client and the engines are
+# built on first use (warm-up, a tool call or a resource read), so a cold start
+# only pays for the imports.
+live_events_enabled = _flag("LIVE_EVENTS_ENABLED", "true")
+trend_engine_live = _flag("TREND_ENGINE_ENABLED", "true")
+centrality_engine_live = _flag("CENTRALITY_ENGINE_ENABLED", "true")
+# Deletes data: opt-in
+retention_engine_live = _flag("RETENTION_ENGINE_ENABLED", "false")
+engagement_enabled = _flag("ENGAGEMENT_ENABLED", "true")
+
+# Every tool response goes through the same projection / byte budget
+shaper = ResponseShaper()
+
+@functools.cache
+def get_db() -> SurrealClient:
+    """The pooled client shared by all tools; its lifecycle follows the server"""
+    return SurrealClient()
+
+@functools.cache
+def get_live_feed() -> LiveFeed | None:
+    """Latest change events per table, pushed by SurrealDB live queries"""
+    return LiveFeed(get_db()) if live_events_enabled else None
+
+@functools.cache
+def get_trend_engine() -> TrendEngine:
+    """Rolling velocity / z-score / change-point state per trend_metric series"""
+    return TrendEngine(get_db())
+
+@functools.cache
+def get_centrality_engine() -> CentralityEngine:
+    """PageRank / influence / co-mention scores, recomputed as edges arrive"""
+    return CentralityEngine(get_db())
+
+@functools.cache
+def get_retention_engine() -> RetentionEngine:
+    """Compaction / downsampling / expiry of old pulse and trend_metric rows"""
+    return RetentionEngine(get_db())
+
+@functools.cache
+def get_engagement() -> EngagementAggregator | None:
+    """Coalesced pulse engagement deltas and sentiment roll-ups (WAL-backed, batched writes)"""
+    return EngagementAggregator(get_db()) if engagement_enabled else None
+
+@functools.cache
+def get_embedding_stage() -> EmbeddingStage | None:
+    """Batched, content-cached embeddings for text queries (None without EMBEDDING_PROVIDER)"""
+    return EmbeddingStage.from_env(get_db())
+
+async def warm_up():
+    """Connect and start the background engines; tool calls don't wait for this"""
+    await get_db().start()
+    if live_events_enabled:
+        get_live_feed().start()
+    if trend_engine_live:
+        get_trend_engine().start()
+    if centrality_engine_live:
+        get_centrality_engine().start()
+    if retention_engine_live:
+        get_retention_engine().start()
+    if engagement_enabled:
+        get_engagement().start()
 
-# Initialize DB Client
-# Note: We need to handle async startup/shutdown properly
-db = SurrealClient()
+@asynccontextmanager
+async def lifespan(server: FastMCP):
+    # Every declared query template is checked before the first tool call
+    print(f"[SurrealDB] {validate_all()} query templates validated", file=sys.stderr)
+    # Queries work on the pooled client before the health check has answered
+    warming = asyncio.create_task(warm_up())
+    try:
+        yield
+    finally:
+        warming.cancel()
+        await asyncio.gather(warming, return_exceptions=True)
+        # Engines never started have nothing to stop
+        if trend_engine_live:
+            await get_trend_engine().stop()
+        if centrality_engine_live:
+            await get_centrality_engine().stop()
+        if retention_engine_live:
+            await get_retention_engine().stop()
+        if engagement_enabled:
+            await get_engagement().stop()
+        # Only built once a tool embedded query texts
+        if get_embedding_stage.cache_info().currsize and get_embedding_stage() is not None:
+            await get_embedding_stage().close()
+        if live_events_enabled:
+            await get_live_feed().stop()
+        await get_db().close()
+
+class InstrumentedMCP(FastMCP):
+    """FastMCP that opens a telemetry span per tool call (decode, handler, shape, serialize, encode)"""
+
+    def tool(self, *args, **kwargs):
+        register = super().tool(*args, **kwargs)
+        return lambda fn: register(self._timed(fn))
+
+    @staticmethod
+    def _timed(fn):
+        @functools.wraps(fn)
+        async def wrapper(*args, **kwargs):
+            # Argument validation by FastMCP happened between call_tool() and here
+            current_span.get().lap("decode")
+            result = await fn(*args, **kwargs)
+            current_span.get().lap("handler")
+            return result
+        return wrapper
+
+    async def call_tool(self, name, arguments):
+        telemetry = get_db().telemetry
+        span = telemetry.span("tool", name)
+        token = current_span.set(span)
+        try:
+            result = await super().call_tool(name, arguments)
+        except Exception as e:
+            span.finish(error=str(e)[:200])
+            raise
+        finally:
+            current_span.reset(token)
+        span.lap("encode")
+        if telemetry.enabled:
+            # (content blocks, structured output) for tools with an output schema
+            blocks = result[0] if isinstance(result, tuple) else result
+            span.finish(sum(len(getattr(block, "text", "").encode("utf-8")) for block in blocks))
+        return result
+
+# Initialize FastMCP Server
+mcp = InstrumentedMCP("abyss-intelligence", lifespan=lifespan, log_level=log_level_name())
 
 @mcp.resource("config://surreal")
 def get_db_config() -> str:
     """Return current DB configuration"""
+    db = get_db()
     return json.dumps({
         "host": db.host,
         "namespace": db.namespace,
         "database": db.database
     })
 
+@mcp.resource("metrics://latency")
+def get_latency_metrics() -> str:
+    """Return rolling latency/size histograms per tool and query stage, plus the slow-query log"""
+    return json.dumps(get_db().telemetry.snapshot())
+
+@mcp.resource("stats://cache")
+def get_cache_stats() -> str:
+    """Return query cache hit/miss/eviction counters"""
+    return json.dumps(get_db().cache.stats())
+
+@mcp.resource("stats://live")
+def get_live_stats() -> str:
+    """Return live subscription counters per watched table"""
+    live_feed = get_live_feed()
+    return json.dumps(live_feed.stats() if live_feed is not None else {})
+
+@mcp.resource("stats://trends")
+def get_trend_stats() -> str:
+    """Return trend engine counters (series tracked, points, batched write-backs)"""
+    trend_engine = get_trend_engine()
+    return json.dumps({"series": len(trend_engine.windows), "late": trend_engine.windows.late,
+                       "window_bytes": trend_engine.windows.nbytes, "live": trend_engine.live,
+                       **trend_engine.stats})
+
+@mcp.resource("stats://centrality")
+def get_centrality_stats() -> str:
+    """Return centrality engine counters (graph size, PageRank iterations, batched write-backs)"""
+    centrality_engine = get_centrality_engine()
+    return json.dumps({"nodes": len(centrality_engine.graph), "edges": centrality_engine.graph.edges,
+                       "edge_bytes": centrality_engine.graph.nbytes, "live": centrality_engine.live,
+                       **centrality_engine.stats})
+
+@mcp.resource("stats://retention")
+def get_retention_stats() -> str:
+    """Return retention counters (rows compacted, rolled up and deleted; rows per tier in the last run)"""
+    retention_engine = get_retention_engine()
+    return json.dumps({"enabled": retention_engine_live, "cutoffs": retention_engine.cutoffs(),
+                       "last_run": retention_engine.last_run, **retention_engine.stats})
+
+@mcp.resource("stats://engagement")
+def get_engagement_stats() -> str:
+    """Return engagement aggregator counters (events buffered, flushes, rows written, WAL replays)"""
+    engagement = get_engagement()
+    if engagement is None:
+        return json.dumps({"enabled": False})
+    return json.dumps({"enabled": True, "buffered": len(engagement), **engagement.stats})
+
+@mcp.resource("stats://embeddings")
+def get_embedding_stats() -> str:
+    """Return embedding counters (cache hit rate, batch sizes, provider latency)"""
+    embedding_stage = get_embedding_stage()
+    return json.dumps(embedding_stage.metrics() if embedding_stage is not None else {"enabled": False})
+
 # --- Tools Definition ---
 
 @mcp.tool()
-async def trace_narrative_chain(start_node: str, depth: int = 2) -> str:
+async def trace_narrative_chain(start_node: str, depth: int = 2, max_fanout: int = 50,
+                                min_weight: float | None = None, cursor: str | None = None) -> str:
     """
     Explore the knowledge graph starting from a specific node (e.g., 'company:catl').
     Useful for Analysts (L2) to find hidden connections.
@@ -30,13 +233,68 @@ async def trace_narrative_chain(start_node: str, depth: int = 2) -> str:
     Args:
         start_node: The record ID to start from (e.g., 'company:catl', 'concept:solid_state_battery')
         depth: Traversal depth (default 2)
+        max_fanout: Max new nodes kept per level, strongest edges first (default 50)
+        min_weight: Prune edges whose absolute weight/score/sentiment is below this
+        cursor: `next_cursor` from a previous truncated response, to fetch the rest
     """
-    await db.connect()
+    args = {"start_node": start_node, "depth": depth, "max_fanout": max_fanout, "min_weight": min_weight}
     try:
-        result = await db.trace_narrative_chain(start_node, depth)
-        return json.dumps(result, indent=2, default=str)
-    finally:
-        await db.close()
+        result = await get_db().trace_narrative_chain(start_node, depth, max_fanout, min_weight)
+        return shaper.render(result, ["nodes", "edges"], "trace_narrative_chain", args, cursor)
+    except ValueError as e:
+        return f"Invalid request: {e}"
+
+@mcp.tool()
+async def trace_narrative_chains(start_nodes: list[str], depth: int = 2, max_fanout: int = 50,
+                                 min_weight: float | None = None, cursor: str | None = None) -> str:
+    """
+    Batch version of trace_narrative_chain: explore the graph from several nodes in one call.
+    All traces advance level by level together, one database round trip per level.
+    Useful for Analysts comparing how several concepts or companies connect.
+
+    Args:
+        start_nodes: Record IDs to start from (e.g. ['concept:biotech', 'concept:real_estate'])
+        depth: Traversal depth (default 2)
+        max_fanout: Max new nodes kept per level and trace, strongest edges first (default 50)
+        min_weight: Prune edges whose absolute weight/score/sentiment is below this
+        cursor: `next_cursor` from a previous truncated response, to fetch the rest
+    """
+    args = {"start_nodes": start_nodes, "depth": depth, "max_fanout": max_fanout, "min_weight": min_weight}
+    try:
+        result = await get_db().trace_narrative_chains(start_nodes, depth, max_fanout, min_weight)
+        return shaper.render(result, ["items"], "trace_narrative_chains", args, cursor)
+    except ValueError as e:
+        return f"Invalid request: {e}"
+
+@mcp.tool()
+async def rank_related(node: str, by: str = "influence", k: int = 20, cursor: str | None = None) -> str:
+    """
+    Top-k neighbours of a node ranked by precomputed graph scores, strongest first.
+    Useful for Analysts asking "who benefits if X happens" without sorting a whole trace.
+
+    Args:
+        node: Record ID (e.g. 'concept:solid_state_battery', 'company:catl')
+        by: 'influence' (companies of a concept, or concepts of a company: direct
+            involvement + article impacts + co-mentions) or 'co_mention' (entities
+            mentioned in the same documents)
+        k: Number of results (default 20, max 200); each carries the node's pagerank
+        cursor: `next_cursor` from a previous truncated response, to fetch the rest
+    """
+    args = {"node": node, "by": by, "k": k}
+    try:
+        result = await get_db().rank_related(node, by, k)
+        return shaper.render(result, ["results"], "rank_related", args, cursor)
+    except ValueError as e:
+        return f"Invalid request: {e}"
+
+def _parse_context(detailed_context) -> dict:
+    if isinstance(detailed_context, dict):
+        return detailed_context
+    try:
+        context = json.loads(detailed_context or "{}")
+    except (TypeError, ValueError):
+        return {"raw": detailed_context}
+    return context if isinstance(context, dict) else {"raw": detailed_context}
 
 @mcp.tool()
 async def create_surveillance_directive(target: str, task_type: str, detailed_context: str) -> str:
@@ -49,20 +307,35 @@ async def create_surveillance_directive(target: str, task_type: str, detailed_co
         task_type: Type of task ('track_replies', 'monitor_sentiment', 'fetch_10k')
         detailed_context: Extra parameters in JSON string format (e.g., '{"platform": "x"}')
     """
-    await db.connect()
+    result = await get_db().create_directive(target, task_type, _parse_context(detailed_context))
+    return f"Directive created successfully: {dumps(shaper.shape(result))}"
+
+@mcp.tool()
+async def create_surveillance_directives(directives: list[dict]) -> str:
+    """
+    Batch version of create_surveillance_directive: create several Hunter tasks in one call.
+    Each directive succeeds or fails on its own; failures are reported per item.
+
+    Args:
+        directives: Objects with 'target', 'task_type' and optional 'detailed_context'
+            (JSON string or object), e.g. [{"target": "XBI", "task_type": "monitor_sentiment"}]
+    """
+    items = []
+    for i, d in enumerate(directives or []):
+        target, task_type = (d or {}).get("target"), (d or {}).get("task_type")
+        if not isinstance(target, str) or not target.strip() or not isinstance(task_type, str) or not task_type.strip():
+            return f"Invalid request: directive {i} needs non-empty 'target' and 'task_type'"
+        items.append({"target": target, "type": task_type, "context": _parse_context(d.get("detailed_context"))})
     try:
-        try:
-            context_dict = json.loads(detailed_context)
-        except:
-            context_dict = {"raw": detailed_context}
-            
-        result = await db.create_directive(target, task_type, context_dict)
-        return f"Directive created successfully: {json.dumps(result, default=str)}"
-    finally:
-        await db.close()
+        result = await get_db().create_directives(items)
+    except ValueError as e:
+        return f"Invalid request: {e}"
+    # Not paged: a cursor would replay the writes
+    return f"Directives created ({result['count'] - result['failed']}/{result['count']}): {dumps(shaper.shape(result))}"
 
 @mcp.tool()
-async def verify_financial_claim(ticker: str, metric_name: str) -> str:
+async def verify_financial_claim(ticker: str, metric_name: str, periods: int = 4,
+                                 cursor: str | None = None) -> str:
     """
     Verify a financial claim against L1 Truth (Report table).
     Useful for Auditor.
@@ -70,17 +343,221 @@ async def verify_financial_claim(ticker: str, metric_name: str) -> str:
     Args:
         ticker: Company ticker symbol (e.g., 'TSLA')
         metric_name: The metric to check (e.g., 'cash_equivalents', 'gross_margin')
+        periods: Number of most recent reporting periods to return (default 4)
+        cursor: `next_cursor` from a previous truncated response, to fetch the rest
     """
-    await db.connect()
+    series = await get_db().verify_financials(ticker, metric_name, periods)
+    if not series["points"]:
+        return f"No reports found for ticker {ticker}. Hunter directive might differ."
+
+    # Only the requested metric, per period, with QoQ/YoY deltas and trend
     try:
-        reports = await db.verify_financials(ticker, metric_name)
-        if not reports or not reports[0].get('result'):
-            return f"No reports found for ticker {ticker}. Hunter directive might differ."
-        
-        # Process logic could be added here to filter specific metric
-        return json.dumps(reports, indent=2, default=str)
-    finally:
-        await db.close()
+        return shaper.render(series, ["points"], "verify_financial_claim",
+                             {"ticker": ticker, "metric_name": metric_name, "periods": periods}, cursor)
+    except ValueError as e:
+        return f"Invalid request: {e}"
+
+@mcp.tool()
+async def verify_financial_claims(claims: list[dict[str, str] | list[str]], periods: int = 4,
+                                  cursor: str | None = None) -> str:
+    """
+    Batch version of verify_financial_claim: check several (ticker, metric) pairs in one call.
+    Each item returns the metric per period with QoQ/YoY deltas and trend, or its own error.
+
+    Args:
+        claims: Pairs to verify, as objects {"ticker": "TSLA", "metric_name": "gross_margin"}
+            or as ["TSLA", "gross_margin"]
+        periods: Number of most recent reporting periods per pair (default 4)
+        cursor: `next_cursor` from a previous truncated response, to fetch the rest
+    """
+    pairs = []
+    for i, claim in enumerate(claims or []):
+        if isinstance(claim, dict):
+            pair = (claim.get("ticker"), claim.get("metric_name") or claim.get("metric"))
+        else:
+            pair = tuple(claim) if len(claim) == 2 else (None, None)
+        if not all(isinstance(v, str) and v for v in pair):
+            return f"Invalid request: claim {i} needs a ticker and a metric name"
+        pairs.append(pair)
+    try:
+        result = await get_db().verify_financials_batch(pairs, periods)
+        return shaper.render(result, ["items"], "verify_financial_claims",
+                             {"claims": [list(p) for p in pairs], "periods": periods}, cursor)
+    except ValueError as e:
+        return f"Invalid request: {e}"
+
+@mcp.tool()
+async def semantic_search(table: str, query_vectors: list[list[float]] | None = None,
+                          query_texts: list[str] | None = None, like: str | None = None, k: int = 10,
+                          within_hours: float | None = None, since: str | None = None,
+                          until: str | None = None, platform: str | None = None,
+                          source_type: str | None = None, min_reliability: float | None = None,
+                          cursor: str | None = None) -> str:
+    """
+    Find the most similar pulses, articles or concepts by embedding (HNSW KNN).
+    Useful for Analyst to find related narratives, or Watcher to find echoes of a pulse.
+
+    Args:
+        table: 'pulse', 'article' or 'concept'
+        query_vectors: One or more 1536-dim query embeddings, searched in one round trip
+        query_texts: Query texts, embedded server-side and searched alongside query_vectors
+        like: A record id (e.g. 'pulse:abc') whose stored embedding is used as the query
+        k: Hits per query (default 10, max 100)
+        within_hours: Only items from the last N hours (pulse/article)
+        since: ISO datetime lower bound (pulse/article)
+        until: ISO datetime upper bound (pulse/article)
+        platform: Pulse platform, e.g. 'x', 'weibo'
+        source_type: Article source type, e.g. 'news', 'report', 'blog'
+        min_reliability: Minimum article reliability (0-1)
+        cursor: `next_cursor` from a previous truncated response, to fetch the rest
+    """
+    filters = {"within_hours": within_hours, "since": since, "until": until, "platform": platform,
+               "source_type": source_type, "min_reliability": min_reliability}
+    try:
+        vectors = query_vectors
+        if query_texts:
+            embedding_stage = get_embedding_stage()
+            if embedding_stage is None:
+                return "Invalid request: query_texts needs EMBEDDING_PROVIDER to be configured"
+            try:
+                embedded = await embedding_stage.batcher.embed(query_texts)
+            except Exception as e:
+                return f"Embedding failed: {e}"
+            vectors = (query_vectors or []) + [v.tolist() for v in embedded]
+        result = await get_db().semantic_search(table, vectors, like=like, k=k, **filters)
+        args = {"table": table, "query_vectors": query_vectors, "query_texts": query_texts, "like": like, "k": k,
+                **filters}
+        return shaper.render(result, ["hits"], "semantic_search", args, cursor)
+    except ValueError as e:
+        return f"Invalid request: {e}"
+
+@mcp.tool()
+async def scan_records(table: str, since: str | None = None, until: str | None = None, limit: int = 1000,
+                       cursor: str | None = None, ctx: Context = None) -> str:
+    """
+    Page through raw rows of a time-ordered table, newest first (vectors omitted).
+    Useful for Analysts (L2) to review everything that arrived in a time window.
+    Rows are streamed from the database and the response stops at the size budget;
+    clients that send a progressToken get progress notifications while rows arrive.
+
+    Args:
+        table: 'pulse', 'article', 'trend_metric', 'directive' or 'mentions'
+        since: ISO 8601 start of the window (inclusive), e.g. '2025-01-01T00:00:00Z'
+        until: ISO 8601 end of the window (exclusive)
+        limit: Max rows over all pages (default 1000, at most 100000)
+        cursor: `next_cursor` from a previous truncated response, to fetch the rest
+    """
+    args = {"table": table, "since": since, "until": until, "limit": limit}
+
+    async def progress(rows: int, nbytes: int):
+        if ctx is not None:
+            await ctx.report_progress(offset + rows, limit, f"{offset + rows} rows, {nbytes} bytes")
+
+    try:
+        offset = shaper.offset("scan_records", args, cursor)
+        rows = get_db().scan_records(table, since, until, offset, limit)
+        return await shaper.render_stream({"table": table}, rows, "rows", "scan_records", args, offset, progress)
+    except ValueError as e:
+        return f"Invalid request: {e}"
+
+@mcp.tool()
+async def get_live_events(table: str, limit: int = 20, cursor: str | None = None) -> str:
+    """
+    Latest change events (CREATE/UPDATE/DELETE) pushed by the database for a watched table.
+    Useful for Watcher to react to new pulses, trend spikes or directive changes without polling.
+
+    Args:
+        table: Watched table ('pulse', 'trend_metric', 'directive')
+        limit: Number of most recent events, newest first (default 20)
+        cursor: `next_cursor` from a previous truncated response, to fetch the rest
+    """
+    live_feed = get_live_feed()
+    if live_feed is None:
+        return "Live events are disabled (LIVE_EVENTS_ENABLED=false)."
+    try:
+        events = live_feed.latest(table, limit)
+        return shaper.render({"table": table, "events": events}, ["events"], "get_live_events",
+                             {"table": table, "limit": limit}, cursor)
+    except ValueError as e:
+        return f"Invalid request: {e}"
+
+@mcp.tool()
+async def detect_trend_anomalies(flags: list[str] | None = None, source: str | None = None,
+                                 concept: str | None = None, min_abs_z: float | None = None,
+                                 limit: int = 50, cursor: str | None = None) -> str:
+    """
+    Concepts whose trend metrics just hit an inflection point: spikes/drops against their
+    rolling window, level shifts, or reversals in direction. Only flagged series are returned.
+    Useful for Watcher to spot emerging or collapsing narratives.
+
+    Args:
+        flags: Only these flags ('spike', 'drop', 'shift_up', 'shift_down', 'reversal_up', 'reversal_down')
+        source: Only this trend source (e.g. 'google_trends', 'github')
+        concept: Only this concept (e.g. 'concept:solid_state_battery')
+        min_abs_z: Minimum absolute z-score of the latest value
+        limit: Max series returned, strongest first (default 50)
+        cursor: `next_cursor` from a previous truncated response, to fetch the rest
+    """
+    args = {"flags": flags, "source": source, "concept": concept, "min_abs_z": min_abs_z, "limit": limit}
+    try:
+        result = await get_trend_engine().detect(**args)
+        return shaper.render(result, ["anomalies"], "detect_trend_anomalies", args, cursor)
+    except ValueError as e:
+        return f"Invalid request: {e}"
+
+@mcp.tool()
+async def record_pulse_signals(signals: list[dict]) -> str:
+    """
+    Report engagement changes and sentiment scores for pulses, many at once.
+    Deltas for the same pulse are summed and written in batches; scoring a pulse
+    again replaces its earlier score. Feeds the panic index.
+    Useful for Hunter/Watcher to push what they observed on a post.
+
+    Args:
+        signals: Objects with 'pulse' (record id) and any of 'engagement' (integer
+            deltas, e.g. {"likes": 3, "reposts": 1}), 'sentiment' (-1 to 1),
+            'platform' and 'created_at' (ISO 8601; the roll-up hour of the score),
+            e.g. [{"pulse": "pulse:abc", "engagement": {"likes": 12}, "sentiment": -0.8, "platform": "x"}]
+    """
+    engagement = get_engagement()
+    if engagement is None:
+        return "Engagement tracking is disabled (ENGAGEMENT_ENABLED=false)."
+    # Validate everything first so a bad item does not leave half the batch applied
+    for i, signal in enumerate(signals or []):
+        if not isinstance(signal, dict) or not isinstance(signal.get("pulse"), str) \
+                or not signal["pulse"].startswith("pulse:"):
+            return f"Invalid request: signal {i} needs a 'pulse' record id"
+        deltas = signal.get("engagement") or {}
+        if not isinstance(deltas, dict) or not all(type(v) is int for v in deltas.values()):
+            return f"Invalid request: signal {i} 'engagement' must be an object of integer deltas"
+        sentiment = signal.get("sentiment")
+        if sentiment is not None and (isinstance(sentiment, bool) or not isinstance(sentiment, (int, float))):
+            return f"Invalid request: signal {i} 'sentiment' must be a number"
+    try:
+        for signal in signals or []:
+            if signal.get("engagement"):
+                engagement.add(signal["pulse"], signal["engagement"])
+            if signal.get("sentiment") is not None:
+                engagement.add_sentiment(signal["pulse"], signal["sentiment"], signal.get("platform") or "unknown",
+                                         signal.get("created_at"))
+    except ValueError as e:
+        return f"Invalid request: {e}"
+    return f"Recorded {len(signals or [])} signals; written within {engagement.max_delay:g}s"
+
+@mcp.tool()
+async def get_panic_index(hours: float = 24, platform: str | None = None) -> str:
+    """
+    Crowd sentiment over a recent window from hourly roll-ups: mean sentiment, the share
+    of strongly negative and positive pulses, and the panic index (negative share net of
+    positive, -1 to 1). Useful for Watcher to gauge market mood.
+
+    Args:
+        hours: Window length in hours (default 24)
+        platform: Only pulses from this platform (e.g. 'x', 'weibo')
+    """
+    if hours <= 0:
+        return "Invalid request: hours must be positive"
+    return dumps(shaper.shape(await panic_index(get_db(), hours, platform)))
 
 if __name__ == "__main__":
     mcp.run()
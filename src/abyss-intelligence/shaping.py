@@ -0,0 +1,185 @@
+import os
+import json
+import base64
+import hashlib
+from contextlib import aclosing
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, List, Optional, Sequence, Tuple
+
+from telemetry import current_span
+
+# Fields dropped from rows of each table before they reach the client.
+# Vectors, their compact copies and MinHash signatures are always dropped;
+# article bodies are too long to be useful inline.
+ALWAYS_DROP = {"embedding", "embedding_q", "embedding_scale", "minhash"}
+DROP_FIELDS: Dict[str, set] = {
+    "pulse": ALWAYS_DROP,
+    "concept": ALWAYS_DROP,
+    "article": ALWAYS_DROP | {"content"},
+}
+
+
+class CursorError(ValueError):
+    pass
+
+
+def dumps(value: Any) -> str:
+    """Compact JSON used for every tool response"""
+    return json.dumps(value, separators=(",", ":"), ensure_ascii=False, default=str)
+
+
+class ResponseShaper:
+    """
+    Shared response-shaping layer for MCP tool outputs.
+
+    Drops vectors and long bodies per table, truncates strings to
+    `max_string` characters, and pages list payloads so a single response
+    stays under `max_bytes` (and `max_tokens`, estimated at ~4 bytes per
+    token). When a response is cut, it carries a `next_cursor` that the
+    caller passes back to the same tool to get the rest.
+    """
+
+    def __init__(self, max_bytes: Optional[int] = None, max_tokens: Optional[int] = None,
+                 max_string: Optional[int] = None):
+        self.max_bytes = max_bytes or int(os.getenv("RESPONSE_MAX_BYTES", "16000"))
+        max_tokens = max_tokens or int(os.getenv("RESPONSE_MAX_TOKENS", "0"))
+        if max_tokens:
+            self.max_bytes = min(self.max_bytes, max_tokens * 4)
+        self.max_string = max_string or int(os.getenv("RESPONSE_MAX_STRING", "500"))
+
+    # --- Projection ---
+
+    def shape(self, value: Any, table: Optional[str] = None) -> Any:
+        """Recursively project rows and truncate strings"""
+        if isinstance(value, dict):
+            row_table = table
+            rid = value.get("id")
+            if isinstance(rid, str) and ":" in rid:
+                row_table = rid.split(":", 1)[0]
+            drop = DROP_FIELDS.get(row_table, ALWAYS_DROP)
+            return {k: self.shape(v) for k, v in value.items() if k not in drop}
+        if isinstance(value, list):
+            return [self.shape(v, table) for v in value]
+        if isinstance(value, str) and len(value) > self.max_string:
+            return value[:self.max_string] + "…"
+        return value
+
+    # --- Paging ---
+
+    @staticmethod
+    def fingerprint(tool: str, args: Dict[str, Any]) -> str:
+        raw = dumps({"tool": tool, "args": args}).encode("utf-8")
+        return hashlib.sha1(raw).hexdigest()[:12]
+
+    @staticmethod
+    def encode_cursor(fingerprint: str, offset: int) -> str:
+        raw = dumps({"k": fingerprint, "o": offset}).encode("utf-8")
+        return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+    @staticmethod
+    def decode_cursor(cursor: Optional[str], fingerprint: str) -> int:
+        if not cursor:
+            return 0
+        try:
+            padded = cursor + "=" * (-len(cursor) % 4)
+            data = json.loads(base64.urlsafe_b64decode(padded))
+            offset = int(data["o"])
+        except Exception:
+            raise CursorError("Malformed cursor")
+        if data.get("k") != fingerprint or offset < 0:
+            raise CursorError("Cursor does not belong to this request")
+        return offset
+
+    def render(self, payload: Dict[str, Any], list_keys: Sequence[str], tool: str,
+               args: Dict[str, Any], cursor: Optional[str] = None) -> str:
+        """
+        Shape `payload` and serialize it within the byte budget.
+
+        The lists named in `list_keys` are paged as one continuous sequence;
+        every other key is treated as a small header and repeated on each page.
+        """
+        # Time since the tool started (mostly database work) vs. shaping and encoding
+        span = current_span.get()
+        span.lap("handler")
+        key = self.fingerprint(tool, args)
+        offset = self.decode_cursor(cursor, key)
+
+        header = {k: self.shape(v) for k, v in payload.items() if k not in list_keys}
+        shaped = [(list_key, self.shape(item)) for list_key in list_keys for item in payload.get(list_key) or []]
+        span.lap("shape")
+        items: List[Tuple[str, str]] = [(list_key, dumps(item)) for list_key, item in shaped]
+
+        # Reserve room for the header, list brackets and a cursor
+        used = len(dumps(header).encode("utf-8")) + 96 + sum(len(k) + 5 for k in list_keys)
+        page: Dict[str, List[str]] = {k: [] for k in list_keys}
+        end = offset
+        while end < len(items):
+            list_key, encoded = items[end]
+            size = len(encoded.encode("utf-8")) + 1
+            # Always emit at least one item so paging makes progress
+            if used + size > self.max_bytes and end > offset:
+                break
+            page[list_key].append(encoded)
+            used += size
+            end += 1
+
+        parts = [dumps(header)[1:-1]] if header else []
+        for list_key in list_keys:
+            parts.append(f"{dumps(list_key)}:[{','.join(page[list_key])}]")
+        parts.append(f'"total":{len(items)}')
+        if offset:
+            parts.append(f'"offset":{offset}')
+        if end < len(items):
+            parts.append(f'"next_cursor":{dumps(self.encode_cursor(key, end))}')
+        text = "{" + ",".join(parts) + "}"
+        span.lap("serialize")
+        return text
+
+    def offset(self, tool: str, args: Dict[str, Any], cursor: Optional[str]) -> int:
+        """Where the page named by `cursor` starts, for tools that push the offset into their query"""
+        return self.decode_cursor(cursor, self.fingerprint(tool, args))
+
+    async def render_stream(self, header: Dict[str, Any], rows: AsyncIterator[Any], list_key: str, tool: str,
+                            args: Dict[str, Any], offset: int = 0,
+                            progress: Optional[Callable[[int, int], Awaitable[None]]] = None,
+                            progress_every: int = 500) -> str:
+        """
+        render() for one list whose rows arrive from an async iterator already
+        positioned at `offset` (e.g. a SurrealClient.stream). Rows are shaped
+        and encoded as they come in, and the iterator is closed as soon as
+        the page is full, so no more than a page is held or read. `total` is
+        only known, and reported, when the rows ran out within the page.
+        `progress(rows, bytes)` is awaited every `progress_every` rows.
+        """
+        span = current_span.get()
+        span.lap("handler")
+        key = self.fingerprint(tool, args)
+        header = {k: self.shape(v) for k, v in header.items()}
+        used = len(dumps(header).encode("utf-8")) + 96 + len(list_key) + 5
+        page: List[str] = []
+        more = False
+        async with aclosing(rows):
+            async for row in rows:
+                encoded = dumps(self.shape(row))
+                size = len(encoded.encode("utf-8")) + 1
+                if used + size > self.max_bytes and page:
+                    more = True
+                    break
+                page.append(encoded)
+                used += size
+                if progress is not None and len(page) % progress_every == 0:
+                    await progress(len(page), used)
+        if progress is not None:
+            await progress(len(page), used)
+        span.lap("shape")
+
+        parts = [dumps(header)[1:-1]] if header else []
+        parts.append(f"{dumps(list_key)}:[{','.join(page)}]")
+        if not more:
+            parts.append(f'"total":{offset + len(page)}')
+        if offset:
+            parts.append(f'"offset":{offset}')
+        if more:
+            parts.append(f'"next_cursor":{dumps(self.encode_cursor(key, offset + len(page)))}')
+        text = "{" + ",".join(parts) + "}"
+        span.lap("serialize")
+        return text
@@ -0,0 +1,606 @@
+import os
+import re
+import sys
+import json
+import mmap
+import zlib
+import time
+import asyncio
+from contextlib import aclosing
+from datetime import datetime, timezone
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from db_client import Literal, RecordId, SurrealClient
+from templates import register
+
+# Tables a snapshot covers by default. Nodes are restored before edges.
+NODE_TABLES = ("company", "report", "concept", "article", "pulse", "trend_metric", "directive")
+EDGE_TABLES = ("mentions", "involves", "impacts", "reflects_on")
+# String values naming a record of one of these tables are kept (and restored) as record links
+LINK_TABLES = set(NODE_TABLES + EDGE_TABLES) | {"person", "metric_series", "market_metric", "sentiment_rollup"}
+VECTOR_FIELD = "embedding"
+VECTOR_DTYPES = {"float32": "<f4", "float16": "<f2"}
+
+FORMAT = "abyss-snapshot"
+VERSION = 1
+MANIFEST = "manifest.json"
+CHUNK_ROWS = 65536
+_ALIGN = 8
+_TABLE_RE = re.compile(r"^[A-Za-z_][A-Za-z0-9_]*$")
+_TIME_RE = re.compile(r"^\d{4}-\d{2}-\d{2}T\d{2}:\d{2}:\d{2}(?:\.\d{1,9})?Z$")
+_LINK_RE = re.compile(r"^([A-Za-z_][A-Za-z0-9_]*):(?:[A-Za-z0-9_]+|⟨(?:[^⟩\\]|\\.)*⟩)$")
+_NUMERIC = {"bool": "|u1", "int": "<i8", "float": "<f8", "time": "<i8"}
+
+# Keyset pages: each page starts after the last id of the previous one
+FIRST_PAGE = register("snapshot.first_page", "SELECT * FROM type::table($table) ORDER BY id LIMIT $limit;",
+                      table="string", limit="int")
+NEXT_PAGE = register("snapshot.next_page",
+                     "SELECT * FROM type::table($table) WHERE id > $after ORDER BY id LIMIT $limit;",
+                     table="string", after="record", limit="int")
+# Restore batches; $rows is bound pre-rendered, so only this short text is parsed client-side
+INSERT_SQL = {
+    "node": "BEGIN TRANSACTION;\nINSERT IGNORE INTO {table} $rows;\nCOMMIT TRANSACTION;",
+    "edge": "BEGIN TRANSACTION;\nINSERT RELATION IGNORE INTO {table} $rows;\nCOMMIT TRANSACTION;",
+}
+
+
+def _classify(values: List[Any]) -> Tuple[str, Any]:
+    """Storage kind of a chunk's non-null values, and the values converted for it"""
+    types = set(map(type, values))
+    if types == {bool}:
+        return "bool", values
+    if types <= {int}:
+        try:
+            return "int", np.array(values, dtype="<i8")
+        except OverflowError:
+            return "json", values
+    if types <= {int, float}:
+        return "float", values
+    if types != {str}:
+        return "json", values
+    # SurrealDB returns datetimes and record ids as plain strings
+    if all(_TIME_RE.match(v) and "1678" < v[:4] < "2262" for v in values):
+        return "time", np.array([v[:-1] for v in values], dtype="datetime64[ns]").view("<i8")
+    links = [_LINK_RE.match(v) for v in values]
+    if all(m is not None and m.group(1) in LINK_TABLES for m in links):
+        return "link", values
+    return "str", values
+
+
+def _format_times(ns: np.ndarray) -> List[str]:
+    """int64 ns -> RFC 3339 the way SurrealDB prints it (no trailing zeros in the fraction)"""
+    values = ns.view("datetime64[ns]")
+    if not (ns.view("<i8") % 1_000_000_000).any():
+        return [t + "Z" for t in np.datetime_as_string(values, unit="s").tolist()]
+    return [(t.rstrip("0").rstrip(".") if "." in t else t) + "Z"
+            for t in np.datetime_as_string(values, unit="ns").tolist()]
+
+
+class _TableWriter:
+    """Appends rows of one table; every `chunk_rows` rows become one column chunk per field"""
+
+    def __init__(self, root: str, name: str, vector_dtype: str, chunk_rows: int, level: int):
+        self.root = root
+        self.name = name
+        self.kind = "node"
+        self.vector_dtype = np.dtype(VECTOR_DTYPES[vector_dtype])
+        self.chunk_rows = chunk_rows
+        self.level = level
+        self.rows = 0
+        self.chunks: List[Dict] = []
+        self._pending: List[Dict] = []
+        self._valid: List[bool] = []
+        self._file = open(os.path.join(root, f"{name}.cols"), "wb")
+        # Vectors go to their own file, one fixed-width row per table row (zeros where missing)
+        self._vec = None
+        self.dim = 0
+
+    def append(self, row: Dict[str, Any]):
+        """Add one row as returned by SurrealDB (the embedding is taken out of `row`)"""
+        if not self.rows and not self._pending and "in" in row and "out" in row:
+            self.kind = "edge"
+        vector = row.get(VECTOR_FIELD)
+        if isinstance(vector, list):
+            del row[VECTOR_FIELD]
+            self._vector(np.asarray(vector, dtype=np.float32))
+        else:
+            self._vector(None)
+        self._pending.append(row)
+        if len(self._pending) >= self.chunk_rows:
+            self.flush()
+
+    def _vector(self, vector: Optional[np.ndarray]):
+        stride = self.dim * self.vector_dtype.itemsize
+        if vector is None:
+            if self._vec is not None:
+                # Leave a hole; the file is zero-filled up to its final length on close
+                self._vec.seek(stride, os.SEEK_CUR)
+            self._valid.append(False)
+            return
+        if self._vec is None:
+            self._vec = open(os.path.join(self.root, f"{self.name}.vec"), "wb")
+            self.dim = len(vector)
+            stride = self.dim * self.vector_dtype.itemsize
+            self._vec.seek((self.rows + len(self._pending)) * stride)
+        elif len(vector) != self.dim:
+            raise ValueError(f"{self.name}.{VECTOR_FIELD}: expected {self.dim} dimensions, got {len(vector)}")
+        self._vec.write(vector.astype(self.vector_dtype).tobytes())
+        self._valid.append(True)
+
+    def _put(self, data: bytes) -> List[int]:
+        """Write `data` at the next aligned offset of the column file; returns [offset, length]"""
+        pad = -self._file.tell() % _ALIGN
+        if pad:
+            self._file.write(b"\0" * pad)
+        offset = self._file.tell()
+        self._file.write(data)
+        return [offset, len(data)]
+
+    def _text(self, meta: Dict, strings: List[str]):
+        encoded = [s.encode("utf-8") for s in strings]
+        offsets = np.zeros(len(encoded) + 1, dtype="<i8")
+        np.cumsum([len(b) for b in encoded], out=offsets[1:])
+        meta["enc"] = "text"
+        meta["offsets"] = self._put(offsets.tobytes())
+        meta["data"] = self._put(zlib.compress(b"".join(encoded), self.level))
+
+    def _column(self, values: List[Any]) -> Dict[str, Any]:
+        n = len(values)
+        valid = np.fromiter((v is not None for v in values), dtype=bool, count=n)
+        present = [v for v in values if v is not None]
+        meta: Dict[str, Any] = {"kind": "null", "nulls": n - len(present)}
+        if not present:
+            return meta
+        if meta["nulls"]:
+            meta["mask"] = self._put(np.packbits(valid, bitorder="little").tobytes())
+        kind, data = _classify(present)
+        meta["kind"] = kind
+        if kind in _NUMERIC:
+            out = np.zeros(n, dtype=_NUMERIC[kind])
+            out[valid] = data
+            meta["values"] = self._put(out.tobytes())
+        elif kind in ("str", "link"):
+            distinct = dict.fromkeys(present)
+            if len(distinct) * 4 <= len(present):
+                # Low cardinality (platform, source, sector...): codes into a dictionary
+                index = {v: i for i, v in enumerate(distinct)}
+                codes = np.zeros(n, dtype="<u2" if len(index) < 65536 else "<i4")
+                codes[valid] = [index[v] for v in present]
+                meta["enc"] = "dict"
+                meta["codes"] = self._put(codes.tobytes())
+                meta["dtype"] = codes.dtype.str
+                meta["dictionary"] = self._put(zlib.compress(json.dumps(list(distinct)).encode("utf-8"),
+                                                             self.level))
+            else:
+                self._text(meta, [v if v is not None else "" for v in values])
+        else:
+            self._text(meta, [json.dumps(v, separators=(",", ":"), ensure_ascii=False) if v is not None else ""
+                              for v in values])
+        return meta
+
+    def flush(self):
+        rows, self._pending = self._pending, []
+        valid, self._valid = self._valid, []
+        if not rows:
+            return
+        names = dict.fromkeys(k for row in rows for k in row)
+        columns = {name: self._column([row.get(name) for row in rows]) for name in names}
+        if self._vec is not None:
+            nulls = valid.count(False)
+            meta = {"kind": "vector", "nulls": nulls}
+            if nulls:
+                meta["mask"] = self._put(np.packbits(np.array(valid), bitorder="little").tobytes())
+            columns[VECTOR_FIELD] = meta
+        self.chunks.append({"rows": len(rows), "columns": columns})
+        self.rows += len(rows)
+
+    def close(self) -> Dict[str, Any]:
+        self.flush()
+        self._file.close()
+        info: Dict[str, Any] = {"kind": self.kind, "rows": self.rows, "chunks": self.chunks}
+        if self._vec is not None:
+            self._vec.truncate(self.rows * self.dim * self.vector_dtype.itemsize)
+            self._vec.close()
+            info["vector"] = {"field": VECTOR_FIELD, "dim": self.dim, "dtype": self.vector_dtype.str}
+        return info
+
+
+class SnapshotWriter:
+    """
+    Writes a snapshot directory:
+
+        manifest.json   tables, row counts and where every column chunk lives
+        <table>.cols    column chunks, CHUNK_ROWS rows each
+        <table>.vec     embeddings, one fixed-width row per table row
+
+    Numbers, booleans and datetimes (int64 ns) are stored raw, so a reader
+    can map them without decoding. Strings, record links and JSON values
+    are zlib-compressed; low-cardinality strings are dictionary-encoded
+    first. The manifest is written last: a directory without one is an
+    incomplete export.
+    """
+
+    def __init__(self, path: str, vector_dtype: str = "float32", chunk_rows: int = CHUNK_ROWS, level: int = 6):
+        if vector_dtype not in VECTOR_DTYPES:
+            raise ValueError(f"vector_dtype must be one of {', '.join(VECTOR_DTYPES)}")
+        os.makedirs(path, exist_ok=True)
+        manifest = os.path.join(path, MANIFEST)
+        if os.path.exists(manifest):
+            os.remove(manifest)
+        self.path = path
+        self.vector_dtype = vector_dtype
+        self.chunk_rows = chunk_rows
+        self.level = level
+        self.tables: Dict[str, Dict] = {}
+
+    def table(self, name: str) -> _TableWriter:
+        if not _TABLE_RE.match(name):
+            raise ValueError(f"Invalid table name: {name!r}")
+        return _TableWriter(self.path, name, self.vector_dtype, self.chunk_rows, self.level)
+
+    def add(self, writer: _TableWriter):
+        self.tables[writer.name] = writer.close()
+
+    def close(self, **source):
+        manifest = {"format": FORMAT, "version": VERSION,
+                    "created_at": datetime.now(timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ"),
+                    "source": source, "tables": self.tables}
+        tmp = os.path.join(self.path, MANIFEST + ".tmp")
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(manifest, f, separators=(",", ":"))
+        os.replace(tmp, os.path.join(self.path, MANIFEST))
+
+
+class Snapshot:
+    """
+    Read-only view of a snapshot directory, usable without a database.
+
+    Files are memory-mapped: raw columns of a single chunk and the embedding
+    matrix are zero-copy views, and compressed columns are inflated one
+    chunk at a time when read.
+    """
+
+    def __init__(self, path: str):
+        try:
+            with open(os.path.join(path, MANIFEST), encoding="utf-8") as f:
+                manifest = json.load(f)
+        except FileNotFoundError:
+            raise ValueError(f"No snapshot at {path} (missing {MANIFEST}; was the export interrupted?)")
+        if manifest.get("format") != FORMAT or manifest.get("version") != VERSION:
+            raise ValueError(f"Unsupported snapshot format in {path}")
+        self.path = path
+        self.manifest = manifest
+        self.tables: Dict[str, Dict] = manifest["tables"]
+        self._maps: Dict[str, Any] = {}
+
+    def close(self):
+        for m in self._maps.values():
+            if isinstance(m, mmap.mmap):
+                try:
+                    m.close()
+                except BufferError:
+                    # Arrays returned by column() still view it; unmapped when they are freed
+                    pass
+        self._maps.clear()
+
+    def __enter__(self) -> "Snapshot":
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def _info(self, table: str) -> Dict:
+        if table not in self.tables:
+            raise KeyError(f"Table {table!r} is not in this snapshot")
+        return self.tables[table]
+
+    def _map(self, table: str):
+        if table not in self._maps:
+            with open(os.path.join(self.path, f"{table}.cols"), "rb") as f:
+                size = os.fstat(f.fileno()).st_size
+                self._maps[table] = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) if size else b""
+        return self._maps[table]
+
+    def _raw(self, table: str, span: List[int], dtype: str) -> np.ndarray:
+        return np.frombuffer(self._map(table), dtype=dtype, count=span[1] // np.dtype(dtype).itemsize,
+                             offset=span[0])
+
+    def _bytes(self, table: str, span: List[int]) -> bytes:
+        return zlib.decompress(memoryview(self._map(table))[span[0]:span[0] + span[1]])
+
+    def rows(self, table: str) -> int:
+        return self._info(table)["rows"]
+
+    def columns(self, table: str) -> Dict[str, str]:
+        """Field name -> storage kind (the first non-null kind across chunks)"""
+        out: Dict[str, str] = {}
+        for chunk in self._info(table)["chunks"]:
+            for name, meta in chunk["columns"].items():
+                if out.get(name, "null") == "null":
+                    out[name] = meta["kind"]
+        return out
+
+    def _decode(self, table: str, chunk: Dict, name: str,
+                parse_json: bool = True) -> Tuple[str, Any, Optional[np.ndarray]]:
+        """(kind, values, valid mask or None) of one column chunk; values are an array or a list"""
+        n = chunk["rows"]
+        meta = chunk["columns"].get(name)
+        if meta is None or meta["kind"] == "null":
+            return "null", [None] * n, np.zeros(n, dtype=bool)
+        valid = None
+        if "mask" in meta:
+            valid = np.unpackbits(self._raw(table, meta["mask"], "|u1"), count=n, bitorder="little").view(bool)
+        kind = meta["kind"]
+        if kind == "vector":
+            return kind, None, valid
+        if kind in _NUMERIC:
+            values = self._raw(table, meta["values"], _NUMERIC[kind])
+            return kind, values.view(bool) if kind == "bool" else values, valid
+        if meta["enc"] == "dict":
+            dictionary = np.array(json.loads(self._bytes(table, meta["dictionary"])), dtype=object)
+            return kind, dictionary[self._raw(table, meta["codes"], meta["dtype"])], valid
+        offsets = self._raw(table, meta["offsets"], "<i8").tolist()
+        data = self._bytes(table, meta["data"])
+        values = [data[offsets[i]:offsets[i + 1]].decode("utf-8") for i in range(n)]
+        if kind == "json" and parse_json:
+            values = [json.loads(v) if v else None for v in values]
+        return kind, values, valid
+
+    def column(self, table: str, name: str) -> np.ndarray:
+        """
+        One field over the whole table. Numbers and booleans come back as
+        numeric arrays (masked where null), datetimes as datetime64[ns],
+        strings, links and JSON values as object arrays with None for null.
+        """
+        parts = []
+        for chunk in self._info(table)["chunks"]:
+            kind, values, valid = self._decode(table, chunk, name)
+            if kind == "vector":
+                raise ValueError(f"{table}.{name} holds vectors; use vectors()")
+            if kind == "time":
+                values = values.view("datetime64[ns]")
+            elif kind not in _NUMERIC:
+                values = np.array(values, dtype=object)
+                if valid is not None and kind != "null":
+                    values[~valid] = None
+                valid = None if kind != "null" else valid
+            parts.append((values, valid))
+        if not parts:
+            return np.empty(0, dtype=object)
+        if len(parts) == 1 and parts[0][1] is None:
+            return parts[0][0]
+        kinds = [p[0].dtype for p in parts if p[0].dtype != object or p[1] is None or p[1].any()]
+        dtype = np.result_type(*kinds) if kinds and object not in kinds else object
+        values = np.concatenate([p[0].astype(dtype) if p[0].dtype != object or dtype == object
+                                 else np.zeros(len(p[0]), dtype) for p in parts])
+        if dtype == object:
+            return values
+        valid = np.concatenate([p[1] if p[1] is not None else np.ones(len(p[0]), bool) for p in parts])
+        return np.ma.masked_array(values, mask=~valid) if not valid.all() else values
+
+    def vectors(self, table: str) -> Tuple[np.ndarray, np.ndarray]:
+        """(rows x dim matrix mapped from disk, mask of rows that have a vector)"""
+        info = self._info(table)
+        if "vector" not in info:
+            raise ValueError(f"{table} has no vectors in this snapshot")
+        spec = info["vector"]
+        matrix = np.memmap(os.path.join(self.path, f"{table}.vec"), dtype=spec["dtype"], mode="r",
+                           shape=(info["rows"], spec["dim"]))
+        valid = []
+        for chunk in info["chunks"]:
+            _, _, mask = self._decode(table, chunk, spec["field"])
+            valid.append(np.ones(chunk["rows"], bool) if mask is None else mask)
+        return matrix, np.concatenate(valid) if valid else np.zeros(0, bool)
+
+    def chunks(self, table: str, parse_json: bool = True) -> Iterator[Tuple[int, int, Dict[str, Tuple]]]:
+        """(first row, rows, {field: (kind, values, valid)}) per chunk"""
+        start = 0
+        for chunk in self._info(table)["chunks"]:
+            yield start, chunk["rows"], {name: self._decode(table, chunk, name, parse_json)
+                                         for name in chunk["columns"]}
+            start += chunk["rows"]
+
+    def records(self, table: str) -> Iterator[Dict[str, Any]]:
+        """
+        Rows as SurrealDB returned them (datetimes as ISO strings, links as
+        `table:key`), with the embedding as a float32 array. Null fields are
+        left out.
+        """
+        matrix = self.vectors(table)[0] if "vector" in self._info(table) else None
+        for start, n, columns in self.chunks(table):
+            fields = []
+            for name, (kind, values, valid) in columns.items():
+                if kind == "vector":
+                    values = np.asarray(matrix[start:start + n], dtype=np.float32)
+                elif kind == "time":
+                    values = _format_times(values)
+                elif kind in _NUMERIC:
+                    values = values.tolist()
+                fields.append((name, values, valid.tolist() if valid is not None else None))
+            for i in range(n):
+                yield {name: values[i] for name, values, valid in fields if valid is None or valid[i]}
+
+
+def _literals(kind: str, values: Any, lo: int, hi: int) -> List[str]:
+    """SurrealQL literal text for rows lo..hi of one decoded column chunk"""
+    if kind == "vector":
+        return ["[" + ",".join(["%.9g" % x for x in row]) + "]"
+                for row in np.asarray(values[lo:hi], dtype=np.float32).tolist()]
+    values = values[lo:hi]
+    if kind == "bool":
+        return ["true" if v else "false" for v in values.tolist()]
+    if kind in ("int", "float"):
+        return list(map(repr, values.tolist()))
+    if kind == "time":
+        return [f'd"{t}"' for t in _format_times(values)]
+    if kind in ("link", "json"):
+        # Links are already in SurrealQL syntax, JSON values were stored as their text
+        return list(values)
+    return [json.dumps(v, ensure_ascii=False) for v in values]
+
+
+def insert_batches(snap: Snapshot, table: str, batch: int = 1000) -> Iterator[Tuple[Literal, int]]:
+    """(array literal, rows) per batch of `table`, rendered column by column"""
+    info = snap._info(table)
+    matrix = snap.vectors(table)[0] if "vector" in info else None
+    for start, n, columns in snap.chunks(table, parse_json=False):
+        for lo in range(0, n, batch):
+            hi = min(lo + batch, n)
+            fields = []
+            for name, (kind, values, valid) in columns.items():
+                if kind == "null":
+                    continue
+                if kind == "str" and name in ("id", "in", "out"):
+                    kind = "link"
+                # The vector file is indexed by table row, columns by row within the chunk
+                literals = (_literals(kind, matrix, start + lo, start + hi) if kind == "vector"
+                            else _literals(kind, values, lo, hi))
+                fields.append((json.dumps(name) + ": ", literals,
+                               valid[lo:hi].tolist() if valid is not None else None))
+            rows = ["{" + ", ".join(key + literals[i] for key, literals, valid in fields
+                                    if valid is None or valid[i]) + "}" for i in range(hi - lo)]
+            yield Literal("[" + ", ".join(rows) + "]"), hi - lo
+
+
+async def export_snapshot(db: SurrealClient, path: str, tables: Sequence[str] = NODE_TABLES + EDGE_TABLES,
+                          batch: int = 5000, concurrency: int = 4, vector_dtype: str = "float32",
+                          chunk_rows: int = CHUNK_ROWS, level: int = 6) -> Dict[str, int]:
+    """
+    Page every table out of the database (keyset pages of `batch` rows,
+    `concurrency` tables at a time, each page streamed) into a snapshot at
+    `path`. Returns rows per table.
+    """
+    writer = SnapshotWriter(path, vector_dtype, chunk_rows, level)
+    limit = asyncio.Semaphore(concurrency)
+
+    async def one(table: str):
+        async with limit:
+            out = writer.table(table)
+            after = None
+            while True:
+                if after is None:
+                    stream = db.stream("", {"table": table, "limit": batch}, template=FIRST_PAGE)
+                else:
+                    stream = db.stream("", {"table": table, "after": after, "limit": batch}, template=NEXT_PAGE)
+                last, n = None, 0
+                async with aclosing(stream):
+                    async for _, row in stream:
+                        last = row.get("id")
+                        out.append(row)
+                        n += 1
+                if n < batch:
+                    break
+                after = RecordId.parse(last)
+            writer.add(out)
+            print(f"[Snapshot] {table}: {out.rows} rows exported", file=sys.stderr)
+
+    await asyncio.gather(*(one(t) for t in tables))
+    writer.close(namespace=db.namespace, database=db.database)
+    return {t: writer.tables[t]["rows"] for t in tables}
+
+
+async def import_snapshot(db: SurrealClient, path: str, tables: Optional[Sequence[str]] = None,
+                          batch: int = 1000, concurrency: int = 8) -> Dict[str, int]:
+    """
+    Restore a snapshot: each batch of `batch` rows is one
+    `INSERT IGNORE` transaction, `concurrency` in flight. Node tables go
+    first, edges after, so relations land on existing records. Records that
+    already exist are left as they are, so an interrupted restore can simply
+    be run again. Returns rows sent per table.
+    """
+    snap = Snapshot(path)
+    names = list(tables or snap.tables)
+    for name in names:
+        snap._info(name)
+        if not _TABLE_RE.match(name):
+            raise ValueError(f"Invalid table name: {name!r}")
+    counts = {name: 0 for name in names}
+    queue: asyncio.Queue = asyncio.Queue(maxsize=concurrency * 2)
+
+    async def worker():
+        while True:
+            item = await queue.get()
+            if item is None:
+                return
+            table, rows, n = item
+            await db.query(INSERT_SQL[snap.tables[table]["kind"]].format(table=table), {"rows": rows},
+                           use_cache=False)
+            counts[table] += n
+
+    try:
+        for kind in ("node", "edge"):
+            phase = [t for t in names if snap.tables[t]["kind"] == kind]
+            if not phase:
+                continue
+            async with asyncio.TaskGroup() as group:
+                workers = [group.create_task(worker()) for _ in range(concurrency)]
+                for table in phase:
+                    for rows, n in insert_batches(snap, table, batch):
+                        await queue.put((table, rows, n))
+                    print(f"[Snapshot] {table}: {snap.rows(table)} rows queued", file=sys.stderr)
+                for _ in workers:
+                    await queue.put(None)
+    finally:
+        snap.close()
+    return counts
+
+
+def describe(path: str) -> str:
+    """Per-table rows, bytes on disk and column kinds of a snapshot"""
+    snap = Snapshot(path)
+    lines = [f"{path}: created {snap.manifest['created_at']} from {snap.manifest.get('source') or '-'}"]
+    for table, info in snap.tables.items():
+        size = sum(os.path.getsize(os.path.join(path, f"{table}.{ext}")) for ext in ("cols", "vec")
+                   if os.path.exists(os.path.join(path, f"{table}.{ext}")))
+        vector = f", {info['vector']['dim']}-dim {info['vector']['dtype']} vectors" if "vector" in info else ""
+        kinds = ", ".join(f"{name}:{kind}" for name, kind in snap.columns(table).items())
+        lines.append(f"  {table:<14} {info['kind']:<5} {info['rows']:>9} rows {size / 1024 / 1024:>8.1f} MiB{vector}")
+        lines.append(f"  {'':<14} {kinds}")
+    snap.close()
+    return "\n".join(lines)
+
+
+async def main():
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Columnar snapshots of the Trinity graph")
+    sub = parser.add_subparsers(dest="command", required=True)
+    export = sub.add_parser("export", help="write the database out to a snapshot directory")
+    export.add_argument("path")
+    export.add_argument("--tables", nargs="+", default=list(NODE_TABLES + EDGE_TABLES))
+    export.add_argument("--batch", type=int, default=5000, help="rows per keyset page")
+    export.add_argument("--concurrency", type=int, default=4, help="tables exported at once")
+    export.add_argument("--vector-dtype", choices=list(VECTOR_DTYPES), default="float32")
+    export.add_argument("--level", type=int, default=6, help="zlib level for text columns")
+    restore = sub.add_parser("import", help="load a snapshot into the database")
+    restore.add_argument("path")
+    restore.add_argument("--tables", nargs="+")
+    restore.add_argument("--batch", type=int, default=1000, help="rows per transaction")
+    restore.add_argument("--concurrency", type=int, default=8, help="transactions in flight")
+    info = sub.add_parser("info", help="describe a snapshot (no database needed)")
+    info.add_argument("path")
+    args = parser.parse_args()
+
+    if args.command == "info":
+        print(describe(args.path))
+        return
+    db = SurrealClient()
+    await db.start()
+    t0 = time.perf_counter()
+    try:
+        if args.command == "export":
+            counts = await export_snapshot(db, args.path, args.tables, args.batch, args.concurrency,
+                                           args.vector_dtype, level=args.level)
+        else:
+            counts = await import_snapshot(db, args.path, args.tables, args.batch, args.concurrency)
+    finally:
+        await db.close()
+    elapsed = time.perf_counter() - t0
+    rows = sum(counts.values())
+    print(f"[Snapshot] {args.command}: {rows} rows in {elapsed:.1f}s ({rows / elapsed:,.0f} rows/s)", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,240 @@
+import os
+import sys
+import time
+from bisect import bisect_left
+from collections import deque
+from contextvars import ContextVar
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional, Tuple
+
+from cache import normalize_sql, tables_in
+
+LEVELS = {"DEBUG": 10, "INFO": 20, "WARNING": 30, "ERROR": 40, "CRITICAL": 50}
+
+# Log-spaced bucket upper bounds: 0.05 ms .. ~26 s, and 64 B .. 2 MB
+LATENCY_BOUNDS_MS = [0.05 * 2 ** i for i in range(20)]
+SIZE_BOUNDS = [64 * 2 ** i for i in range(16)]
+
+SLOW_SQL_CHARS = 500
+LABEL_CACHE_SIZE = 512
+
+
+class Histogram:
+    """
+    Bucketed distribution over the last `window` seconds.
+
+    The window is kept as `slots` rotating sub-windows, so old samples age
+    out in steps of window/slots without storing the samples themselves.
+    Percentiles are reported as the upper bound of their bucket (capped by
+    the observed max), i.e. within a factor of two of the true value.
+    """
+
+    __slots__ = ("bounds", "slot_len", "counts", "sums", "maxes", "epochs", "total")
+
+    def __init__(self, bounds: List[float], window: float, slots: int = 6):
+        self.bounds = bounds
+        self.slot_len = window / slots
+        self.counts = [[0] * (len(bounds) + 1) for _ in range(slots)]
+        self.sums = [0.0] * slots
+        self.maxes = [0.0] * slots
+        self.epochs = [-1] * slots
+        # Lifetime count, never aged out
+        self.total = 0
+
+    def record(self, value: float, now: float):
+        epoch = int(now / self.slot_len)
+        i = epoch % len(self.epochs)
+        if self.epochs[i] != epoch:
+            self.epochs[i] = epoch
+            self.counts[i] = [0] * (len(self.bounds) + 1)
+            self.sums[i] = 0.0
+            self.maxes[i] = 0.0
+        self.counts[i][bisect_left(self.bounds, value)] += 1
+        self.sums[i] += value
+        if value > self.maxes[i]:
+            self.maxes[i] = value
+        self.total += 1
+
+    def snapshot(self, now: float) -> Dict[str, Any]:
+        oldest = int(now / self.slot_len) - len(self.epochs) + 1
+        live = [i for i, e in enumerate(self.epochs) if e >= oldest]
+        counts = [sum(self.counts[i][b] for i in live) for b in range(len(self.bounds) + 1)]
+        n = sum(counts)
+        if not n:
+            return {"count": 0, "total": self.total}
+        top = max(self.maxes[i] for i in live)
+        out = {"count": n, "total": self.total, "mean": round(sum(self.sums[i] for i in live) / n, 3)}
+        for name, q in (("p50", 0.5), ("p90", 0.9), ("p99", 0.99)):
+            rank, seen = q * n, 0
+            for b, c in enumerate(counts):
+                seen += c
+                if seen >= rank:
+                    out[name] = round(min(self.bounds[b], top) if b < len(self.bounds) else top, 3)
+                    break
+        out["max"] = round(top, 3)
+        return out
+
+
+class Span:
+    """
+    Timing of one tool call or query, split into named stages.
+
+    `lap(stage)` charges the time since the previous lap (or the start) to
+    `stage`; `finish()` records the total and every stage into the owning
+    Telemetry's histograms.
+    """
+
+    __slots__ = ("telemetry", "kind", "name", "t0", "last", "stages", "tool")
+
+    def __init__(self, telemetry: "Telemetry", kind: str, name: str):
+        self.telemetry = telemetry
+        self.kind = kind
+        self.name = name
+        self.t0 = self.last = time.perf_counter()
+        self.stages: Dict[str, float] = {}
+        # Tool call this span runs under, if any
+        parent = current_span.get()
+        self.tool = parent.name if parent is not NULL_SPAN else None
+
+    def lap(self, stage: str):
+        now = time.perf_counter()
+        self.stages[stage] = self.stages.get(stage, 0.0) + (now - self.last)
+        self.last = now
+
+    def add(self, stage: str, seconds: float):
+        self.stages[stage] = self.stages.get(stage, 0.0) + seconds
+
+    def finish(self, nbytes: Optional[int] = None, rows: Optional[int] = None, sql: Optional[str] = None,
+               error: Optional[str] = None):
+        self.telemetry.record(self, (time.perf_counter() - self.t0) * 1000, nbytes, rows, sql, error)
+
+
+class _NullSpan:
+    """Stand-in used while telemetry is disabled; every call is a no-op"""
+
+    __slots__ = ()
+    name = None
+    kind = None
+
+    def lap(self, stage: str):
+        pass
+
+    def add(self, stage: str, seconds: float):
+        pass
+
+    def finish(self, nbytes=None, rows=None, sql=None, error=None):
+        pass
+
+
+NULL_SPAN = _NullSpan()
+
+# Tool span of the current MCP request (set by the server around each call)
+current_span: ContextVar = ContextVar("abyss_span", default=NULL_SPAN)
+
+
+def count_rows(json_resp: Any) -> int:
+    """Rows returned across all statements of a query response"""
+    if not isinstance(json_resp, list):
+        return 0
+    return sum(len(r["result"]) for r in json_resp
+               if isinstance(r, dict) and isinstance(r.get("result"), list))
+
+
+def log_level_name() -> str:
+    """LOG_LEVEL, falling back to INFO when unset or unknown"""
+    name = os.getenv("LOG_LEVEL", "INFO").upper()
+    return name if name in LEVELS else "INFO"
+
+
+class Telemetry:
+    """
+    Latency spans, rolling histograms and a slow-query log.
+
+    Histograms are keyed by (kind, name, stage), e.g. ("tool",
+    "semantic_search", "serialize") or ("query", "verify_financials.series",
+    "network"); the "total" stage is the whole span and "bytes" the response
+    size. Queries slower than `slow_ms` are kept in a bounded log with their
+    normalized SQL and row count and are logged at WARNING.
+
+    With TELEMETRY_ENABLED=false `span()` hands out a shared no-op span.
+    """
+
+    def __init__(self):
+        self.enabled = os.getenv("TELEMETRY_ENABLED", "true").lower() in ("1", "true", "yes")
+        self.level_name = log_level_name()
+        self.level = LEVELS[self.level_name]
+        self.window = float(os.getenv("TELEMETRY_WINDOW", "300"))
+        self.slow_ms = float(os.getenv("SLOW_QUERY_MS", "500"))
+        self.slow_log: deque = deque(maxlen=int(os.getenv("SLOW_QUERY_LOG_SIZE", "50")))
+        self.histograms: Dict[Tuple[str, str, str], Histogram] = {}
+        self.errors: Dict[Tuple[str, str], int] = {}
+        self._labels: Dict[str, str] = {}
+
+    def label(self, sql: str) -> str:
+        """Histogram name for an ad-hoc query: its first keyword and the tables it touches"""
+        label = self._labels.get(sql)
+        if label is None:
+            words = sql.split(None, 1)
+            verb = words[0].lower() if words else "sql"
+            label = f"{verb}:{','.join(sorted(tables_in(sql))) or '-'}"
+            if len(self._labels) >= LABEL_CACHE_SIZE:
+                self._labels.clear()
+            self._labels[sql] = label
+        return label
+
+    def log(self, level: str, prefix: str, message: str):
+        if LEVELS[level] >= self.level:
+            print(f"{prefix} {message}", file=sys.stderr)
+
+    def span(self, kind: str, name: str):
+        return Span(self, kind, name) if self.enabled else NULL_SPAN
+
+    def _hist(self, key: Tuple[str, str, str], bounds: List[float]) -> Histogram:
+        hist = self.histograms.get(key)
+        if hist is None:
+            hist = self.histograms[key] = Histogram(bounds, self.window)
+        return hist
+
+    def record(self, span: Span, total_ms: float, nbytes: Optional[int], rows: Optional[int],
+               sql: Optional[str], error: Optional[str]):
+        now = time.monotonic()
+        kind, name = span.kind, span.name
+        self._hist((kind, name, "total"), LATENCY_BOUNDS_MS).record(total_ms, now)
+        for stage, seconds in span.stages.items():
+            self._hist((kind, name, stage), LATENCY_BOUNDS_MS).record(seconds * 1000, now)
+        if nbytes is not None:
+            self._hist((kind, name, "bytes"), SIZE_BOUNDS).record(nbytes, now)
+        if error is not None:
+            self.errors[(kind, name)] = self.errors.get((kind, name), 0) + 1
+
+        if self.level <= LEVELS["DEBUG"]:
+            stages = " ".join(f"{k}={v * 1000:.2f}" for k, v in span.stages.items())
+            self.log("DEBUG", "[Telemetry]", f"{kind} {name} {total_ms:.2f} ms ({stages}) bytes={nbytes} rows={rows}")
+
+        if kind == "query" and total_ms >= self.slow_ms:
+            text = normalize_sql(sql or "")[:SLOW_SQL_CHARS]
+            self.slow_log.append({
+                "at": datetime.now(timezone.utc).isoformat(),
+                "name": name,
+                "tool": span.tool,
+                "ms": round(total_ms, 2),
+                "stages": {k: round(v * 1000, 2) for k, v in span.stages.items()},
+                "rows": rows,
+                "bytes": nbytes,
+                "error": error,
+                "sql": text,
+            })
+            self.log("WARNING", "[SurrealDB]", f"Slow query {name} {total_ms:.0f} ms rows={rows}: {text[:200]}")
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Rolling histograms grouped as {kind: {name: {stage: stats}}} plus the slow-query log"""
+        now = time.monotonic()
+        out: Dict[str, Any] = {"enabled": self.enabled, "window_s": self.window, "slow_query_ms": self.slow_ms,
+                               "tools": {}, "queries": {}}
+        for (kind, name, stage), hist in sorted(self.histograms.items()):
+            group = out["tools" if kind == "tool" else "queries"].setdefault(name, {})
+            group[stage] = hist.snapshot(now)
+        for (kind, name), count in self.errors.items():
+            out["tools" if kind == "tool" else "queries"].setdefault(name, {})["errors"] = count
+        out["slow_queries"] = list(self.slow_log)
+        return out
@@ -0,0 +1,217 @@
+import re
+import json
+import importlib
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Set, Tuple, Union
+
+from cache import is_write, normalize_sql, tables_in, _param_tables
+from db_client import RecordId, to_surql
+
+# Modules that declare templates at import time; imported by `validate_all()`
+# so a broken declaration fails at server startup, not on the first tool call.
+TEMPLATE_MODULES = ("financials", "hunter", "trends", "engagement", "search", "scan", "snapshot", "centrality",
+                    "embeddings", "retention")
+
+# Variables SurrealQL defines itself
+BUILTIN_VARS = {"this", "parent", "value", "before", "after", "auth", "session", "input", "event", "token",
+                "access"}
+
+SCALAR_TYPES = {"string", "int", "float", "number", "bool", "datetime", "duration", "object", "array", "any"}
+
+_VAR_RE = re.compile(r"\$([A-Za-z_][A-Za-z0-9_]*)")
+_DECLARED_RE = re.compile(r"\b(?:LET|FOR)\s+\$([A-Za-z_][A-Za-z0-9_]*)", re.IGNORECASE)
+_STRING_RE = re.compile(r"'(?:[^'\\]|\\.)*'|\"(?:[^\"\\]|\\.)*\"")
+_TYPE_RE = re.compile(r"^(option<)?(array<)?(record(?:<([A-Za-z_][A-Za-z0-9_]*)>)?|[a-z]+)(>)?(>)?$")
+_DURATION_RE = re.compile(r"^(\d+(ns|us|µs|ms|s|m|h|d|w|y))+$")
+_PAIRS = {")": "(", "]": "[", "}": "{"}
+
+TEMPLATES: Dict[str, "QueryTemplate"] = {}
+
+
+class ParamType:
+    """A parameter type in SurrealQL notation: string, int, record<company>, array<record>, option<...>"""
+
+    __slots__ = ("spec", "optional", "array", "base", "table")
+
+    def __init__(self, spec: str):
+        m = _TYPE_RE.match(spec.replace(" ", ""))
+        if not m:
+            raise ValueError(f"Invalid parameter type {spec!r}")
+        optional, array, base, table, close1, close2 = m.groups()
+        closes = (close1 is not None) + (close2 is not None)
+        if closes != (optional is not None) + (array is not None):
+            raise ValueError(f"Invalid parameter type {spec!r}")
+        if not base.startswith("record") and base not in SCALAR_TYPES:
+            raise ValueError(f"Unknown parameter type {base!r} in {spec!r}")
+        self.spec = spec
+        self.optional = optional is not None
+        self.array = array is not None
+        self.base = "record" if base.startswith("record") else base
+        self.table = table
+
+    def _scalar(self, name: str, value: Any) -> Any:
+        base = self.base
+        if base == "any":
+            return value
+        if base == "record":
+            rid = RecordId.parse(value)
+            if self.table and rid.table != self.table:
+                raise ValueError(f"${name}: expected a {self.table} record, got {rid}")
+            return rid
+        if base == "string" and isinstance(value, str):
+            return value
+        if base == "bool" and isinstance(value, bool):
+            return value
+        if base == "int" and isinstance(value, int) and not isinstance(value, bool):
+            return value
+        if base in ("float", "number") and isinstance(value, (int, float)) and not isinstance(value, bool):
+            return float(value) if base == "float" else value
+        if base == "datetime":
+            if isinstance(value, datetime):
+                return value
+            if isinstance(value, str):
+                try:
+                    datetime.fromisoformat(value.replace("Z", "+00:00"))
+                    return value
+                except ValueError:
+                    pass
+        if base == "duration" and isinstance(value, str) and _DURATION_RE.match(value):
+            return value
+        if base == "object" and isinstance(value, dict):
+            return value
+        if base == "array" and isinstance(value, (list, tuple)):
+            return list(value)
+        raise ValueError(f"${name}: expected {self.base}, got {type(value).__name__}")
+
+    def coerce(self, name: str, value: Any) -> Any:
+        if value is None:
+            if self.optional:
+                return None
+            raise ValueError(f"${name} is required")
+        if self.array:
+            if not isinstance(value, (list, tuple)):
+                raise ValueError(f"${name}: expected an array, got {type(value).__name__}")
+            return [self._scalar(name, v) for v in value]
+        return self._scalar(name, value)
+
+
+def _strip_strings(sql: str) -> str:
+    return _STRING_RE.sub("''", sql)
+
+
+def check_balanced(sql: str) -> None:
+    stack: List[str] = []
+    for ch in _strip_strings(sql):
+        if ch in "([{":
+            stack.append(ch)
+        elif ch in _PAIRS:
+            if not stack or stack.pop() != _PAIRS[ch]:
+                raise ValueError(f"Unbalanced {ch!r}")
+    if stack:
+        raise ValueError(f"Unclosed {stack[-1]!r}")
+
+
+class QueryTemplate:
+    """
+    One SurrealQL query declared once, with typed parameters.
+
+    Declaring it checks that every `$var` the SQL reads is either declared,
+    defined by the SQL itself (LET/FOR) or a SurrealQL builtin, that every
+    declared parameter is used, and that brackets balance. What does not
+    depend on the values is computed here once: whether it writes, the tables
+    it touches, the cache-key prefix and the `LET $name = ` text of each
+    parameter. At call time `bind()` validates the values (record ids are
+    parsed, never interpolated) and the request only serializes them.
+    """
+
+    def __init__(self, name: str, sql: str, **params: str):
+        self.name = name
+        self.sql = sql.strip()
+        self.params: Dict[str, ParamType] = {}
+        for pname, spec in params.items():
+            try:
+                self.params[pname] = ParamType(spec)
+            except ValueError as e:
+                raise ValueError(f"Template {name}: {e}") from None
+        self.validate()
+
+        self.write = is_write(self.sql)
+        self.tables: Set[str] = tables_in(self.sql)
+        self.key_prefix = normalize_sql(self.sql) + "\x00"
+        self._lets = {p: f"LET ${p} = " for p in self.params}
+        self._id_params = [p for p, t in self.params.items() if t.base in ("record", "object", "array", "any")]
+
+    def validate(self):
+        if not self.sql.endswith(";"):
+            raise ValueError(f"Template {self.name}: SQL must end with ';'")
+        try:
+            check_balanced(self.sql)
+        except ValueError as e:
+            raise ValueError(f"Template {self.name}: {e}") from None
+        text = _strip_strings(self.sql)
+        used = set(_VAR_RE.findall(text))
+        local = set(_DECLARED_RE.findall(text))
+        undeclared = used - local - BUILTIN_VARS - set(self.params)
+        if undeclared:
+            raise ValueError(f"Template {self.name}: undeclared parameters {sorted(undeclared)}")
+        unused = set(self.params) - used
+        if unused:
+            raise ValueError(f"Template {self.name}: declared but unused parameters {sorted(unused)}")
+        shadowed = set(self.params) & local
+        if shadowed:
+            raise ValueError(f"Template {self.name}: parameters redefined by the SQL {sorted(shadowed)}")
+
+    def bind(self, values: Dict[str, Any]) -> Dict[str, Any]:
+        """Validated, typed parameter values (ValueError on anything unexpected)"""
+        unknown = set(values) - set(self.params)
+        if unknown:
+            raise ValueError(f"Template {self.name}: unknown parameters {sorted(unknown)}")
+        return {name: ptype.coerce(name, values.get(name)) for name, ptype in self.params.items()}
+
+    def http_body(self, bound: Dict[str, Any]) -> Tuple[str, int]:
+        """`LET` statements for the bound values followed by the SQL; returns (text, statements prepended)"""
+        lets = [self._lets[k] + to_surql(v) + ";" for k, v in bound.items()]
+        lets.append(self.sql)
+        return "\n".join(lets), len(bound)
+
+    def cache_key(self, bound: Dict[str, Any]) -> str:
+        # Same format as QueryCache.make_key, without re-normalizing the SQL
+        return self.key_prefix + json.dumps(bound, sort_keys=True, default=str)
+
+    def tables_for(self, bound: Dict[str, Any]) -> Set[str]:
+        if not self._id_params:
+            return self.tables
+        tables = set(self.tables)
+        for name in self._id_params:
+            tables.update(_param_tables(bound.get(name)))
+        return tables
+
+    def __repr__(self) -> str:
+        return f"QueryTemplate({self.name!r})"
+
+
+def register(name: str, sql: str, **params: str) -> QueryTemplate:
+    """Declare (and validate) a template; names are unique"""
+    if name in TEMPLATES and TEMPLATES[name].sql != sql.strip():
+        raise ValueError(f"Template {name!r} is already registered")
+    template = QueryTemplate(name, sql, **params)
+    TEMPLATES[name] = template
+    return template
+
+
+def get_template(template: Union[str, QueryTemplate]) -> QueryTemplate:
+    if isinstance(template, QueryTemplate):
+        return template
+    try:
+        return TEMPLATES[template]
+    except KeyError:
+        raise ValueError(f"Unknown query template {template!r}") from None
+
+
+def validate_all(modules: Optional[Tuple[str, ...]] = None) -> int:
+    """Import every declaring module and re-check all templates; returns how many there are"""
+    for module in modules or TEMPLATE_MODULES:
+        importlib.import_module(module)
+    for template in TEMPLATES.values():
+        template.validate()
+    return len(TEMPLATES)
@@ -0,0 +1,506 @@
+import os
+import sys
+import asyncio
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+import numpy as np
+
+from db_client import RecordId
+from templates import register
+
+# Flags raised on the latest point of a (concept, source) series
+FLAGS = ("spike", "drop", "shift_up", "shift_down", "reversal_up", "reversal_down")
+
+# `>=` plus the ids already read at $since: a sampling tick shares one timestamp,
+# and a page (or a poll) can end before the whole tick has been read
+LOAD_SQL = """
+SELECT id, concept, source, value, timestamp FROM trend_metric
+    WHERE timestamp >= <datetime>$since AND id NOTINSIDE $seen ORDER BY timestamp ASC LIMIT $limit;
+"""
+
+# velocity keeps its previous value when there is not enough history to compute one
+WRITE_SQL = """
+FOR $u IN $updates {
+    UPDATE $u.id SET velocity = $u.velocity ?? velocity, zscore = $u.zscore, flags = $u.flags RETURN NONE;
+};
+"""
+
+LOAD = register("trends.load", LOAD_SQL, since="datetime", seen="array<record>", limit="int")
+WRITE = register("trends.write", WRITE_SQL, updates="array<object>")
+
+_DAY = 86400.0
+
+
+def _epoch(values: List[Any]) -> np.ndarray:
+    """Seconds since the epoch for ISO strings / datetimes"""
+    # A batch shares few distinct timestamps (one per sampling tick): parse each once
+    parsed: Dict[Any, float] = dict.fromkeys(values)
+    for v in parsed:
+        t = datetime.fromisoformat(v.replace("Z", "+00:00")) if isinstance(v, str) else v
+        if t.tzinfo is None:
+            t = t.replace(tzinfo=timezone.utc)
+        parsed[v] = t.timestamp()
+    return np.fromiter((parsed[v] for v in values), dtype=np.float64, count=len(values))
+
+
+def _masked_mean_std(x: np.ndarray, mask: np.ndarray) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    n = mask.sum(axis=1)
+    safe = np.maximum(n, 1)
+    mean = np.where(mask, x, 0.0).sum(axis=1) / safe
+    dev = np.where(mask, x - mean[:, None], 0.0)
+    std = np.sqrt((dev * dev).sum(axis=1) / np.maximum(n - 1, 1))
+    return mean, std, n
+
+
+def _masked_slope(t: np.ndarray, y: np.ndarray, mask: np.ndarray) -> np.ndarray:
+    """Least-squares slope of y over t (per row, masked points only)"""
+    n = np.maximum(mask.sum(axis=1), 1)
+    mt = np.where(mask, t, 0.0).sum(axis=1) / n
+    my = np.where(mask, y, 0.0).sum(axis=1) / n
+    dt = np.where(mask, t - mt[:, None], 0.0)
+    dy = np.where(mask, y - my[:, None], 0.0)
+    den = (dt * dt).sum(axis=1)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return np.where(den > 0, (dt * dy).sum(axis=1) / den, 0.0)
+
+
+class TrendWindows:
+    """
+    Rolling windows of the last `capacity` points for every (concept, source)
+    series, held as ring buffers in two 2-D NumPy arrays (values, timestamps)
+    with one row per series. Appends and statistics work on whole batches of
+    rows at once; Python only loops over the distinct keys of a batch.
+
+    Points must arrive in time order per series; a point older than the
+    newest one already held for its series is counted in `late` and skipped.
+    """
+
+    def __init__(self, capacity: int = 64):
+        self.capacity = capacity
+        self._index: Dict[Tuple[str, str], int] = {}
+        self.keys: List[Tuple[str, str]] = []
+        self.values = np.zeros((0, capacity), dtype=np.float64)
+        self.times = np.zeros((0, capacity), dtype=np.float64)
+        self.head = np.zeros(0, dtype=np.int64)   # next slot to write
+        self.count = np.zeros(0, dtype=np.int64)
+        self.dirty = np.zeros(0, dtype=bool)
+        self.last_id = np.empty(0, dtype=object)  # record holding the newest point
+        self.late = 0
+
+    def __len__(self) -> int:
+        return len(self.keys)
+
+    @property
+    def nbytes(self) -> int:
+        return int(self.values.nbytes + self.times.nbytes + self.head.nbytes + self.count.nbytes)
+
+    def _grow(self, rows: int):
+        size = len(self.head)
+        if rows <= size:
+            return
+        new = max(rows, size * 2, 64)
+        pad = new - size
+        self.values = np.vstack([self.values, np.zeros((pad, self.capacity))])
+        self.times = np.vstack([self.times, np.zeros((pad, self.capacity))])
+        self.head = np.concatenate([self.head, np.zeros(pad, dtype=np.int64)])
+        self.count = np.concatenate([self.count, np.zeros(pad, dtype=np.int64)])
+        self.dirty = np.concatenate([self.dirty, np.zeros(pad, dtype=bool)])
+        self.last_id = np.concatenate([self.last_id, np.empty(pad, dtype=object)])
+
+    def _key_rows(self, keys: List[Tuple[str, str]]) -> np.ndarray:
+        index = self._index
+        for key in dict.fromkeys(keys):
+            if key not in index:
+                index[key] = len(self.keys)
+                self.keys.append(key)
+        self._grow(len(self.keys))
+        return np.fromiter((index[k] for k in keys), dtype=np.int64, count=len(keys))
+
+    def append(self, rows: List[Dict]) -> int:
+        """Add trend_metric rows (concept, source, value, timestamp[, id]); returns points kept"""
+        keys, values, stamps, ids = [], [], [], []
+        now = datetime.now(timezone.utc)
+        for r in rows:
+            concept, value = r.get("concept"), r.get("value")
+            if concept is None or value is None:
+                continue
+            keys.append((str(concept), str(r.get("source") or "")))
+            values.append(float(value))
+            stamps.append(r.get("timestamp") or now)
+            record = r.get("id")
+            ids.append(str(record) if record is not None else None)
+        if not keys:
+            return 0
+        key_rows = self._key_rows(keys)
+        values = np.array(values)
+        times = _epoch(stamps)
+        ids = np.array(ids, dtype=object)
+
+        # Sort by (series, time) so each series' points form a contiguous run
+        order = np.lexsort((times, key_rows))
+        key_rows, values, times, ids = key_rows[order], values[order], times[order], ids[order]
+
+        newest = np.where(self.count[key_rows] > 0,
+                          self.times[key_rows, (self.head[key_rows] - 1) % self.capacity], -np.inf)
+        fresh = times >= newest
+        self.late += int((~fresh).sum())
+        key_rows, values, times, ids = key_rows[fresh], values[fresh], times[fresh], ids[fresh]
+        if not len(key_rows):
+            return 0
+
+        # Position of each point within its series' run, then its ring slot
+        starts = np.r_[0, np.flatnonzero(np.diff(key_rows)) + 1]
+        lengths = np.diff(np.r_[starts, len(key_rows)])
+        rank = np.arange(len(key_rows)) - np.repeat(starts, lengths)
+        per_point = np.repeat(lengths, lengths)
+        # More points than the window holds: only the newest `capacity` are written
+        keep = rank >= per_point - self.capacity
+        slots = (self.head[key_rows] + rank) % self.capacity
+        self.values[key_rows[keep], slots[keep]] = values[keep]
+        self.times[key_rows[keep], slots[keep]] = times[keep]
+
+        series = key_rows[starts]
+        ends = starts + lengths - 1
+        self.head[series] = (self.head[series] + lengths) % self.capacity
+        self.count[series] = np.minimum(self.count[series] + lengths, self.capacity)
+        self.last_id[series] = ids[ends]
+        self.dirty[series] = True
+        return len(key_rows)
+
+    def ordered(self, rows: np.ndarray) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """Values, times and validity mask of `rows`, oldest to newest, right-aligned"""
+        cols = (self.head[rows, None] - self.capacity + np.arange(self.capacity)) % self.capacity
+        valid = np.arange(self.capacity) >= (self.capacity - self.count[rows])[:, None]
+        return self.values[rows[:, None], cols], self.times[rows[:, None], cols], valid
+
+
+class TrendEngine:
+    """
+    Velocity, z-scores and change-point flags for every trend_metric series,
+    maintained incrementally.
+
+    Rows arrive from a `LIVE SELECT` on trend_metric (after a warm-up load of
+    the last `history_days`) and go into `TrendWindows`. Every
+    `flush_interval` seconds the series that received points are recomputed
+    together with vectorized NumPy operations, and the results are written
+    back to the newest row of each series in batches of `write_batch`
+    updates per request:
+
+    - velocity: relative change of the latest value against the value
+      `velocity_days` earlier (WoW by default)
+    - zscore: latest value against the mean/std of the rest of the window
+    - flags: spike/drop (|z| >= z_threshold), shift_up/shift_down (mean of the
+      last `recent` points against the earlier ones, Welch-style t >=
+      shift_threshold) and reversal_up/reversal_down (the slope over the
+      recent points changes sign against the slope just before it, both
+      clearly above the noise of the series)
+    """
+
+    def __init__(self, db, capacity: Optional[int] = None, velocity_days: Optional[float] = None,
+                 z_threshold: Optional[float] = None, shift_threshold: Optional[float] = None,
+                 recent: Optional[int] = None, min_points: Optional[int] = None,
+                 history_days: Optional[float] = None, write_batch: Optional[int] = None,
+                 flush_interval: Optional[float] = None):
+        self.db = db
+        self.windows = TrendWindows(capacity or int(os.getenv("TREND_WINDOW", "64")))
+        self.velocity_days = velocity_days or float(os.getenv("TREND_VELOCITY_DAYS", "7"))
+        self.z_threshold = z_threshold or float(os.getenv("TREND_Z_THRESHOLD", "3"))
+        self.shift_threshold = shift_threshold or float(os.getenv("TREND_SHIFT_T", "4"))
+        self.recent = recent or int(os.getenv("TREND_RECENT", "3"))
+        self.min_points = min_points or int(os.getenv("TREND_MIN_POINTS", "8"))
+        self.history_days = history_days or float(os.getenv("TREND_HISTORY_DAYS", "90"))
+        self.write_batch = write_batch or int(os.getenv("TREND_WRITE_BATCH", "500"))
+        self.flush_interval = flush_interval or float(os.getenv("TREND_FLUSH_INTERVAL", "5"))
+
+        # Latest results, one slot per series (same rows as the windows)
+        self.velocity = np.zeros(0)
+        self.zscore = np.zeros(0)
+        self.shift = np.zeros(0)
+        self.flags = np.zeros((0, len(FLAGS)), dtype=bool)
+
+        self._since: Optional[str] = None
+        # Ids of the rows read so far whose timestamp is exactly `_since`
+        self._seen: Set[str] = set()
+        self._pending: List[Dict] = []
+        self._lock = asyncio.Lock()
+        self._task: Optional[asyncio.Task] = None
+        self._stopping = asyncio.Event()
+        self.stats: Dict[str, int] = {"points": 0, "computed": 0, "writes": 0, "requests": 0, "failures": 0,
+                                      "polls": 0, "reconnects": 0}
+        # True while the live subscription is delivering points
+        self.live = False
+
+    # --- Statistics ---
+
+    def compute(self, rows: np.ndarray) -> Dict[str, np.ndarray]:
+        """Velocity, z-score, shift t-statistic and flags for the series in `rows`"""
+        V, T, valid = self.windows.ordered(rows)
+        T = T / _DAY
+        count = valid.sum(axis=1)
+        latest, t_last = V[:, -1], T[:, -1]
+
+        # Velocity: against the newest point at least `velocity_days` old
+        ref_mask = valid & (T <= (t_last - self.velocity_days)[:, None])
+        has_ref = ref_mask.any(axis=1)
+        ref_col = self.windows.capacity - 1 - np.argmax(ref_mask[:, ::-1], axis=1)
+        ref = V[np.arange(len(rows)), ref_col]
+        with np.errstate(divide="ignore", invalid="ignore"):
+            velocity = np.where(has_ref & (np.abs(ref) > 1e-12), (latest - ref) / np.abs(ref), np.nan)
+
+        # z-score of the latest point against the rest of the window
+        base = valid.copy()
+        base[:, -1] = False
+        mean, std, n_base = _masked_mean_std(V, base)
+        floor = np.maximum(np.abs(mean) * 0.01, 1e-9)
+        enough = count >= self.min_points
+        zscore = np.where(enough, (latest - mean) / np.maximum(std, floor), np.nan)
+
+        # Mean shift: last `recent` points against everything before them
+        r = self.recent
+        recent_mask = valid & (np.arange(self.windows.capacity) >= self.windows.capacity - r)
+        prior_mask = valid & ~recent_mask
+        mean_r, _, n_r = _masked_mean_std(V, recent_mask)
+        mean_p, std_p, n_p = _masked_mean_std(V, prior_mask)
+        scale = np.maximum(std_p, np.maximum(np.abs(mean_p) * 0.01, 1e-9))
+        shift = np.where(enough & (n_r == r),
+                         (mean_r - mean_p) / (scale * np.sqrt(1.0 / np.maximum(n_r, 1) + 1.0 / np.maximum(n_p, 1))),
+                         np.nan)
+
+        # Reversal: slope over the last r+1 points against the r+1 points before them
+        cols = np.arange(self.windows.capacity)
+        last_mask = valid & (cols >= self.windows.capacity - r - 1)
+        before_mask = valid & (cols >= self.windows.capacity - 2 * r - 1) & (cols <= self.windows.capacity - r - 1)
+        slope_now = _masked_slope(T, V, last_mask)
+        slope_before = _masked_slope(T, V, before_mask)
+        diffs = np.diff(V, axis=1)
+        step = np.diff(T, axis=1)
+        diff_mask = valid[:, 1:] & valid[:, :-1] & (step > 0)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            rate = np.where(diff_mask, diffs / np.where(step > 0, step, 1.0), 0.0)
+        _, noise, _ = _masked_mean_std(rate, diff_mask)
+        noise = np.maximum(noise, 1e-9)
+        strong = (np.abs(slope_now) >= noise) & (np.abs(slope_before) >= noise) & enough
+
+        flags = np.zeros((len(rows), len(FLAGS)), dtype=bool)
+        with np.errstate(invalid="ignore"):
+            flags[:, 0] = zscore >= self.z_threshold
+            flags[:, 1] = zscore <= -self.z_threshold
+            flags[:, 2] = shift >= self.shift_threshold
+            flags[:, 3] = shift <= -self.shift_threshold
+        flags[:, 4] = strong & (slope_before < 0) & (slope_now > 0)
+        flags[:, 5] = strong & (slope_before > 0) & (slope_now < 0)
+        return {"velocity": velocity, "zscore": zscore, "shift": shift, "flags": flags,
+                "latest": latest, "points": count}
+
+    def _store(self, rows: np.ndarray, result: Dict[str, np.ndarray]):
+        size = len(self.windows.head)
+        if len(self.velocity) < size:
+            pad = size - len(self.velocity)
+            self.velocity = np.concatenate([self.velocity, np.full(pad, np.nan)])
+            self.zscore = np.concatenate([self.zscore, np.full(pad, np.nan)])
+            self.shift = np.concatenate([self.shift, np.full(pad, np.nan)])
+            self.flags = np.vstack([self.flags, np.zeros((pad, len(FLAGS)), dtype=bool)])
+        self.velocity[rows] = result["velocity"]
+        self.zscore[rows] = result["zscore"]
+        self.shift[rows] = result["shift"]
+        self.flags[rows] = result["flags"]
+
+    # --- Intake ---
+
+    def ingest(self, rows: List[Dict]) -> int:
+        kept = self.windows.append(rows)
+        self.stats["points"] += kept
+        return kept
+
+    async def load(self, page: int = 5000) -> int:
+        """Read rows newer than the last load (first call: the last `history_days`)"""
+        if self._since is None:
+            self._since = datetime.fromtimestamp(
+                datetime.now(timezone.utc).timestamp() - self.history_days * _DAY, timezone.utc).isoformat()
+        loaded = 0
+        while True:
+            res = await self.db.run(LOAD, since=self._since, seen=[RecordId.parse(i) for i in self._seen],
+                                    limit=page, use_cache=False)
+            rows = (res[-1].get("result") or []) if res else []
+            loaded += self.ingest(rows)
+            if rows:
+                last = str(rows[-1]["timestamp"])
+                if last != self._since:
+                    self._since, self._seen = last, set()
+                self._seen.update(str(r["id"]) for r in rows if str(r["timestamp"]) == last)
+            if len(rows) < page:
+                return loaded
+
+    # --- Compute + write back ---
+
+    def _updates(self, rows: np.ndarray) -> List[Dict]:
+        updates = []
+        names = np.array(FLAGS)
+        for row in rows:
+            record = self.windows.last_id[row]
+            if record is None:
+                continue
+            v, z = self.velocity[row], self.zscore[row]
+            updates.append({
+                "id": RecordId.parse(record),
+                "velocity": round(float(v), 6) if np.isfinite(v) else None,
+                "zscore": round(float(z), 4) if np.isfinite(z) else None,
+                "flags": names[self.flags[row]].tolist(),
+            })
+        return updates
+
+    async def flush(self, write: bool = True) -> int:
+        """Recompute every series that received points; returns series computed"""
+        async with self._lock:
+            if self._pending:
+                pending, self._pending = self._pending, []
+                self.ingest(pending)
+            rows = np.flatnonzero(self.windows.dirty)
+            if not len(rows):
+                return 0
+            self.windows.dirty[rows] = False
+            self._store(rows, self.compute(rows))
+            self.stats["computed"] += len(rows)
+            if not write:
+                return len(rows)
+            updates = self._updates(rows)
+            for start in range(0, len(updates), self.write_batch):
+                chunk = updates[start:start + self.write_batch]
+                try:
+                    await self.db.run(WRITE, updates=chunk, use_cache=False)
+                except Exception as e:
+                    # The in-memory results stand; the next point of each series rewrites them
+                    self.stats["failures"] += 1
+                    print(f"[Trends] Write-back of {len(chunk)} series failed: {e}", file=sys.stderr)
+                    continue
+                self.stats["requests"] += 1
+                self.stats["writes"] += len(chunk)
+            return len(rows)
+
+    # --- Queries ---
+
+    def anomalies(self, flags: Optional[List[str]] = None, source: Optional[str] = None,
+                  concept: Optional[str] = None, min_abs_z: Optional[float] = None,
+                  limit: int = 50) -> List[Dict]:
+        """Flagged series, strongest first (|z|, then |shift|)"""
+        size = len(self.windows)
+        if not size:
+            return []
+        wanted = np.ones(len(FLAGS), dtype=bool)
+        if flags:
+            unknown = set(flags) - set(FLAGS)
+            if unknown:
+                raise ValueError(f"Unknown flags {sorted(unknown)} (expected any of {', '.join(FLAGS)})")
+            wanted = np.isin(FLAGS, flags)
+        mask = (self.flags[:size] & wanted).any(axis=1)
+        z = np.nan_to_num(self.zscore[:size])
+        if min_abs_z is not None:
+            mask &= np.abs(z) >= min_abs_z
+        if source is not None or concept is not None:
+            keep = np.array([(source is None or s == source) and (concept is None or c == concept)
+                             for c, s in self.windows.keys])
+            mask &= keep
+        rows = np.flatnonzero(mask)
+        strength = np.abs(z[rows]) + np.abs(np.nan_to_num(self.shift[rows])) * 1e-3
+        rows = rows[np.argsort(-strength)][:max(1, int(limit))]
+
+        latest, times, _ = self.windows.ordered(rows) if len(rows) else (None, None, None)
+        out = []
+        names = np.array(FLAGS)
+        for i, row in enumerate(rows):
+            c, s = self.windows.keys[row]
+            v, z_row, sh = self.velocity[row], self.zscore[row], self.shift[row]
+            out.append({
+                "concept": c,
+                "source": s,
+                "record": self.windows.last_id[row],
+                "value": float(latest[i, -1]),
+                "timestamp": datetime.fromtimestamp(times[i, -1], timezone.utc).isoformat(),
+                "velocity": round(float(v), 4) if np.isfinite(v) else None,
+                "zscore": round(float(z_row), 2) if np.isfinite(z_row) else None,
+                "shift_t": round(float(sh), 2) if np.isfinite(sh) else None,
+                "flags": names[self.flags[row]].tolist(),
+                "points": int(self.windows.count[row]),
+            })
+        return out
+
+    async def detect(self, **filters) -> Dict:
+        """
+        Flagged series for the detect_trend_anomalies tool. When the engine is
+        not running in the background, new rows are pulled and computed first.
+        """
+        if self._task is None or self._task.done():
+            await self.load()
+            await self.flush()
+        anomalies = self.anomalies(**filters)
+        return {"series": len(self.windows), "flagged": len(anomalies), "anomalies": anomalies}
+
+    # --- Background loop ---
+
+    async def _watch(self, max_backoff: float = 30.0):
+        """Feed new points from a live subscription; reconnects with backoff"""
+        backoff = 1.0
+        while True:
+            since = datetime.fromisoformat(self._since.replace("Z", "+00:00")) if self._since else None
+            sub = self.db.subscribe("trend_metric", since=since)
+            try:
+                await sub.start()
+                self.live = True
+                backoff = 1.0
+                async for event in sub:
+                    # Our own write-back shows up as UPDATE; only new points matter
+                    if event["action"] == "CREATE":
+                        self._pending.append(event["record"])
+                        self._since, self._seen = sub.since.isoformat(), set()
+            except asyncio.CancelledError:
+                self.live = False
+                await sub.close()
+                raise
+            except Exception as e:
+                print(f"[Trends] Live subscription failed, polling until it is back: {e}", file=sys.stderr)
+            self.live = False
+            self.stats["reconnects"] += 1
+            await sub.close()
+            await asyncio.sleep(backoff)
+            backoff = min(backoff * 2, max_backoff)
+
+    async def run(self):
+        try:
+            await self.load()
+            await self.flush()
+            print(f"[Trends] Tracking {len(self.windows)} series", file=sys.stderr)
+        except Exception as e:
+            print(f"[Trends] Initial load failed, will retry: {e}", file=sys.stderr)
+        watcher = asyncio.create_task(self._watch())
+        try:
+            while not self._stopping.is_set():
+                try:
+                    await asyncio.wait_for(self._stopping.wait(), self.flush_interval)
+                except asyncio.TimeoutError:
+                    pass
+                try:
+                    if not self.live:
+                        # No live socket (HTTP-only server or reconnecting): poll instead
+                        await self.load()
+                        self.stats["polls"] += 1
+                    await self.flush()
+                except Exception as e:
+                    print(f"[Trends] Flush failed, will retry: {e}", file=sys.stderr)
+        finally:
+            watcher.cancel()
+            await asyncio.gather(watcher, return_exceptions=True)
+
+    def start(self):
+        if self._task is None:
+            self._stopping.clear()
+            self._task = asyncio.create_task(self.run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._stopping.set()
+            try:
+                await self._task
+            except Exception as e:
+                print(f"[Trends] Engine stopped with error: {e}", file=sys.stderr)
+            self._task = None
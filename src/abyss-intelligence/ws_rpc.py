@@ -0,0 +1,177 @@
+import sys
+import json
+import asyncio
+import itertools
+from typing import Any, Callable, Dict, List, Optional
+
+from websockets.asyncio.client import connect as ws_connect
+from websockets.exceptions import ConnectionClosed
+
+
+class SurrealRpcError(Exception):
+    pass
+
+
+class SurrealRpc:
+    """
+    SurrealDB WebSocket RPC transport.
+
+    Keeps a single authenticated socket (`signin` + `use` happen once per
+    connection) and multiplexes concurrent calls over it: every request gets an
+    id and a pending future, and a background reader resolves futures as
+    responses arrive, in whatever order the server sends them.
+
+    Live query notifications carry no request id; they are routed to the
+    listener registered for their live query id. Live queries die with the
+    socket, so listeners are dropped on disconnect and `on_disconnect`
+    callbacks are told to resubscribe.
+    """
+
+    def __init__(self, url: str, user: str, password: str, namespace: str, database: str,
+                 timeout: float = 30.0):
+        self.url = url
+        self.user = user
+        self.password = password
+        self.namespace = namespace
+        self.database = database
+        self.timeout = timeout
+
+        self._ws = None
+        # True once signin/use succeeded on the current socket
+        self._ready = False
+        self._reader: Optional[asyncio.Task] = None
+        self._pending: Dict[str, asyncio.Future] = {}
+        self._ids = itertools.count(1)
+        self._connect_lock = asyncio.Lock()
+        self._listeners: Dict[str, Callable[[Dict], None]] = {}
+        self._disconnect_handlers: List[Callable[[], None]] = []
+
+    @property
+    def connected(self) -> bool:
+        return self._ready
+
+    async def connect(self):
+        async with self._connect_lock:
+            if self._ready:
+                return
+            self._ws = await ws_connect(self.url, subprotocols=["json"], max_size=None,
+                                        open_timeout=self.timeout)
+            self._reader = asyncio.create_task(self._read_loop(self._ws))
+            try:
+                await self._call("signin", [{"user": self.user, "pass": self.password}])
+                await self._call("use", [self.namespace, self.database])
+                self._ready = True
+            except Exception:
+                await self.close()
+                raise
+
+    async def close(self):
+        self._ready = False
+        ws, self._ws = self._ws, None
+        if ws is not None:
+            await ws.close()
+        if self._reader is not None:
+            self._reader.cancel()
+            try:
+                await self._reader
+            except asyncio.CancelledError:
+                pass
+            self._reader = None
+        self._fail_pending(ConnectionError("SurrealDB RPC connection closed"))
+        self._drop_listeners()
+
+    def _drop_listeners(self):
+        had_listeners = bool(self._listeners)
+        self._listeners = {}
+        if had_listeners:
+            for handler in list(self._disconnect_handlers):
+                handler()
+
+    def _fail_pending(self, exc: Exception):
+        pending, self._pending = self._pending, {}
+        for fut in pending.values():
+            if not fut.done():
+                fut.set_exception(exc)
+
+    async def _read_loop(self, ws):
+        try:
+            async for raw in ws:
+                msg = json.loads(raw)
+                if msg.get("id") is None:
+                    self._notify(msg.get("result"))
+                    continue
+                fut = self._pending.pop(str(msg.get("id")), None)
+                if fut is None or fut.done():
+                    continue
+                if msg.get("error"):
+                    fut.set_exception(SurrealRpcError(json.dumps(msg["error"])))
+                else:
+                    fut.set_result(msg.get("result"))
+        except ConnectionClosed as e:
+            print(f"[SurrealDB] RPC connection lost: {e}", file=sys.stderr)
+        finally:
+            # Drop the socket so the next call reconnects
+            if self._ws is ws:
+                self._ws = None
+                self._ready = False
+            self._fail_pending(ConnectionError("SurrealDB RPC connection lost"))
+            if self._ws is None:
+                self._drop_listeners()
+
+    def _notify(self, notification: Any):
+        if not isinstance(notification, dict):
+            return
+        listener = self._listeners.get(str(notification.get("id")))
+        if listener is not None:
+            listener(notification)
+
+    async def _call(self, method: str, params: List[Any]) -> Any:
+        ws = self._ws
+        if ws is None:
+            raise ConnectionError("SurrealDB RPC connection is not open")
+        req_id = str(next(self._ids))
+        fut = asyncio.get_running_loop().create_future()
+        self._pending[req_id] = fut
+        try:
+            await ws.send(json.dumps({"id": req_id, "method": method, "params": params}, default=str))
+            return await asyncio.wait_for(fut, self.timeout)
+        finally:
+            self._pending.pop(req_id, None)
+
+    async def call(self, method: str, params: Optional[List[Any]] = None) -> Any:
+        if not self._ready:
+            await self.connect()
+        return await self._call(method, params or [])
+
+    async def query(self, sql: str, params: Optional[Dict] = None) -> List[Dict]:
+        """Run SurrealQL with `params` passed as native bound variables"""
+        return await self.call("query", [sql, params or {}])
+
+    async def live(self, sql: str, params: Optional[Dict], listener: Callable[[Dict], None]) -> str:
+        """Start a `LIVE SELECT` and route its notifications to `listener`; returns the live id"""
+        res = await self.query(sql, params)
+        stmt = res[-1]
+        if stmt.get("status") == "ERR":
+            raise SurrealRpcError(str(stmt.get("result")))
+        live_id = str(stmt["result"])
+        self._listeners[live_id] = listener
+        return live_id
+
+    async def kill(self, live_id: str):
+        self._listeners.pop(live_id, None)
+        if self._ready:
+            await self.call("kill", [live_id])
+
+    def on_disconnect(self, handler: Callable[[], None]):
+        self._disconnect_handlers.append(handler)
+
+    def remove_disconnect_handler(self, handler: Callable[[], None]):
+        if handler in self._disconnect_handlers:
+            self._disconnect_handlers.remove(handler)
+
+    async def ping(self) -> bool:
+        try:
+            await self.call("ping")
+            return True
+        except Exception:
+            return False